@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark fuzzy path matching on synthetic projects of 10k, 100k and 1M paths.
+
+Compares PathMatcher with scoring every path through fuzzywuzzy's
+process.extract (the previous implementation), which is skipped above
+--baseline-max paths because it takes over a minute at 1M.
+
+Usage:
+    python bench_fuzzy_find.py [--sizes 10000,100000,1000000] [--baseline-max 100000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fuzzywuzzy import process  # noqa: E402
+
+from sparc_cli.code.path_match import PathMatcher  # noqa: E402
+
+WORDS = [
+    'src', 'lib', 'core', 'utils', 'api', 'models', 'views', 'tests', 'components', 'services',
+    'handlers', 'common', 'config', 'data', 'io', 'net', 'http', 'auth', 'user', 'admin', 'cache',
+    'db', 'schema', 'parser', 'lexer', 'render', 'widget', 'layout', 'theme', 'store', 'session',
+    'router', 'client', 'server', 'queue', 'worker', 'index', 'search', 'metrics', 'logging'
+]
+EXTENSIONS = ['.py', '.js', '.ts', '.go', '.rs', '.md', '.json']
+QUERIES = ['parser', 'auth_session', 'widget layout', 'rndrthm', 'srvr queue', 'metrics.py']
+
+
+def generate_paths(count: int, seed: int = 0) -> list:
+    """Generate distinct, realistic-looking project paths."""
+    rng = random.Random(seed)
+    paths = set()
+    while len(paths) < count:
+        dirs = [rng.choice(WORDS) + (str(rng.randint(0, 99)) if rng.random() < 0.4 else '')
+                for _ in range(rng.randint(1, 6))]
+        name = '_'.join(rng.sample(WORDS, rng.randint(1, 3))) + rng.choice(EXTENSIONS)
+        paths.add('/'.join(dirs + [name]))
+    return sorted(paths)
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated path counts')
+    parser.add_argument('--baseline-max', type=int, default=100000,
+                        help='Largest size to time process.extract on')
+    parser.add_argument('--limit', type=int, default=10, help='Results per query')
+    args = parser.parse_args()
+
+    print(f"{'paths':>9} {'build':>8} {'query':>9} {'baseline':>9} {'best score':>12} {'top-N scores':>14}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        paths = generate_paths(size)
+
+        started = time.perf_counter()
+        matcher = PathMatcher(paths)
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = [matcher.match(query, limit=args.limit) for query in QUERIES]
+        query_time = (time.perf_counter() - started) / len(QUERIES)
+
+        baseline = agree = overlap = '-'
+        if size <= args.baseline_max:
+            started = time.perf_counter()
+            expected = [process.extract(query, paths, limit=args.limit) for query in QUERIES]
+            baseline = f"{(time.perf_counter() - started) / len(QUERIES):.3f}s"
+            # Compare scores rather than paths: many paths tie, and ties are
+            # deliberately ranked by basename, depth and recency
+            agree = sum(max(s for _, s in r) == e[0][1] for r, e in zip(results, expected) if r and e)
+            agree = f"{agree}/{len(QUERIES)}"
+            shared = sum(sum((Counter(s for _, s in r) & Counter(s for _, s in e)).values())
+                         for r, e in zip(results, expected))
+            overlap = f"{shared / (len(QUERIES) * args.limit):.0%}"
+
+        print(f"{size:>9} {build:>7.2f}s {query_time:>8.3f}s {baseline:>9} {agree:>12} {overlap:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import argparse
+import os
 import sys
 import uuid
 from rich.panel import Panel
@@ -7,7 +8,10 @@ from sparc_cli.console.formatting import print_interrupt
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import create_react_agent
 from sparc_cli.env import validate_environment
-from sparc_cli.tools.memory import _global_memory, get_related_files, get_memory_value
+from sparc_cli.tools.memory import (
+    _global_memory, get_related_files, get_memory_value, enable_knowledge_base, enable_memory_compaction,
+    enable_work_log_export
+)
 from sparc_cli.tools.human import ask_human
 from sparc_cli.console.formatting import print_stage_header, print_error
 from sparc_cli.agent_utils import (
@@ -36,6 +40,7 @@ def parse_arguments():
 Examples:
     sparc -m "Add error handling to the database module"
     sparc -m "Explain the authentication flow" --research-only
+    sparc index    # Build or update the project indexes in .sparc/index
         '''
     )
     parser.add_argument(
@@ -82,6 +87,16 @@ Examples:
         type=str,
         help='The model name to use for expert knowledge queries (required for non-OpenAI providers)'
     )
+    parser.add_argument(
+        '--expert-diff-context',
+        action='store_true',
+        help='Keep one conversation with the expert and send only files that changed since the previous question'
+    )
+    parser.add_argument(
+        '--expert-full-files',
+        action='store_true',
+        help='Send large related files to the expert in full instead of only the definitions the question refers to'
+    )
     parser.add_argument(
         '--hil', '-H',
         action='store_true',
@@ -92,9 +107,34 @@ Examples:
         action='store_true',
         help='Enable chat mode with direct human interaction (implies --hil)'
     )
+    parser.add_argument(
+        '--knowledge-base',
+        action='store_true',
+        help='Persist key facts and snippets across runs in .sparc/ and preload them at startup'
+    )
+    parser.add_argument(
+        '--compact-memory',
+        action='store_true',
+        help='Condense low-priority research notes and key facts into summaries instead of dropping them, archiving the originals in .sparc/'
+    )
+    parser.add_argument(
+        '--compaction-model',
+        type=str,
+        help='Model (from --provider) used to write memory summaries; summaries are extractive when omitted. Implies --compact-memory'
+    )
+    parser.add_argument(
+        '--work-log-jsonl',
+        type=str,
+        metavar='PATH',
+        help='Also append every work log event to PATH as JSON lines'
+    )
     
     args = parser.parse_args()
     
+    # A compaction model implies memory compaction
+    if args.compaction_model:
+        args.compact_memory = True
+
     # Set hil=True when chat mode is enabled
     if args.chat:
         args.hil = True
@@ -121,6 +161,82 @@ planning_memory = MemorySaver()
 implementation_memory = MemorySaver()
 
 
+def run_index_command(argv):
+    """Build or update the project indexes, for `sparc index`."""
+    parser = argparse.ArgumentParser(
+        prog='sparc index',
+        description='Build or update the symbol and code chunk indexes (and optionally the code search index) '
+                    'in .sparc/index so lookups are fast from the first query'
+    )
+    parser.add_argument(
+        'path',
+        nargs='?',
+        default='.',
+        help='Project root to index (default: current directory)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Worker processes to index with (default: one per CPU)'
+    )
+    parser.add_argument(
+        '--code-search',
+        action='store_true',
+        help='Also build the trigram code search index that narrows ripgrep_search in large repositories; '
+             'once built, it is updated by every `sparc index` run'
+    )
+    parser.add_argument(
+        '--rebuild',
+        action='store_true',
+        help='Rebuild the code search index from scratch instead of updating it'
+    )
+    args = parser.parse_args(argv)
+
+    from sparc_cli.code.index import SymbolIndex
+    index = SymbolIndex(args.path)
+    try:
+        stats = index.update(workers=args.workers)
+        console.print(Panel(
+            f"Indexed {stats.indexed} files, {stats.unchanged} unchanged, {stats.removed} removed, "
+            f"{stats.skipped} skipped in {stats.duration:.2f}s\n"
+            f"{index.file_count()} files in {index.db_path}",
+            title="🗂️ Symbol Index",
+            border_style="bright_blue"
+        ))
+    finally:
+        index.close()
+
+    from sparc_cli.code.search import CodeSearchIndex
+    search = CodeSearchIndex(args.path)
+    try:
+        stats = search.update(workers=args.workers)
+        console.print(Panel(
+            f"Indexed {stats.indexed} files, {stats.unchanged} unchanged, {stats.removed} removed, "
+            f"{stats.skipped} skipped in {stats.duration:.2f}s\n"
+            f"{search.chunk_count()} chunks in {search.db_path}",
+            title="🗂️ Code Chunk Index",
+            border_style="bright_blue"
+        ))
+    finally:
+        search.close()
+
+    from sparc_cli.code.trigrams import TrigramIndex
+    trigrams = TrigramIndex(args.path)
+    if args.code_search or args.rebuild or trigrams.exists():
+        try:
+            stats = trigrams.update(workers=args.workers, rebuild=args.rebuild)
+            action = "Built" if stats.rebuilt else "Updated"
+            console.print(Panel(
+                f"{action} in {stats.duration:.2f}s: {stats.indexed} files read, "
+                f"{stats.delta} in the delta segment\n"
+                f"{stats.files} files in {trigrams.directory}",
+                title="🗂️ Code Search Index",
+                border_style="bright_blue"
+            ))
+        finally:
+            trigrams.close()
+
+
 def is_informational_query() -> bool:
     """Determine if the current query is informational based on implementation_requested state."""
     return _global_memory.get('config', {}).get('research_only', False) or not is_stage_requested('implementation')
@@ -133,6 +249,10 @@ def is_stage_requested(stage: str) -> bool:
 
 def main():
     """Main entry point for the sparc command line tool."""
+    if sys.argv[1:2] == ['index']:
+        run_index_command(sys.argv[2:])
+        return
+
     try:
         args = parse_arguments()
 
@@ -155,6 +275,17 @@ def main():
         # Create the base model after validation
         model = initialize_llm(args.provider, args.model)
 
+        # Preload persisted project knowledge before any agent runs
+        if args.knowledge_base:
+            enable_knowledge_base(os.getcwd())
+
+        if args.compact_memory:
+            compaction_model = initialize_llm(args.provider, args.compaction_model) if args.compaction_model else None
+            enable_memory_compaction(os.getcwd(), compaction_model)
+
+        if args.work_log_jsonl:
+            enable_work_log_export(args.work_log_jsonl)
+
         # If no message is provided, default to chat mode
         if not args.message:
             args.chat = True
@@ -188,6 +319,8 @@ def main():
             _global_memory['config'] = config
             _global_memory['config']['expert_provider'] = args.expert_provider
             _global_memory['config']['expert_model'] = args.expert_model
+            _global_memory['config']['expert_diff_context'] = args.expert_diff_context
+            _global_memory['config']['expert_symbol_context'] = not args.expert_full_files
             
             # Run chat agent in a loop
             while True:
@@ -217,6 +350,8 @@ def main():
         # Store expert provider and model in config
         _global_memory['config']['expert_provider'] = args.expert_provider
         _global_memory['config']['expert_model'] = args.expert_model
+        _global_memory['config']['expert_diff_context'] = args.expert_diff_context
+        _global_memory['config']['expert_symbol_context'] = not args.expert_full_files
         
         # Run research stage
         print_stage_header("Research Stage")
@@ -41,6 +41,7 @@ from rich.panel import Panel
 from sparc_cli.tools.memory import (
     _global_memory,
     get_memory_value,
+    get_relevant_memory_value,
     get_related_files,
 )
 from sparc_cli.tool_configs import get_research_tools
@@ -112,9 +113,9 @@ def run_research_agent(
     human_section = HUMAN_PROMPT_SECTION_RESEARCH if hil else ""
     
     # Get research context from memory
-    key_facts = _global_memory.get("key_facts", "")
-    code_snippets = _global_memory.get("code_snippets", "")
-    related_files = _global_memory.get("related_files", "")
+    key_facts = get_memory_value('key_facts')
+    code_snippets = get_memory_value('key_snippets')
+    related_files = "\n".join(get_related_files())
     
     # Build prompt
     prompt = (RESEARCH_ONLY_PROMPT if research_only else RESEARCH_PROMPT).format(
@@ -140,6 +141,7 @@ def run_research_agent(
         console.print(Panel(Markdown(console_message), title="🔬 Looking into it..."))
 
     # Run agent with retry logic
+    _global_memory['stage'] = 'research'
     return run_agent_with_retry(agent, prompt, run_config)
 
 def run_planning_agent(
@@ -206,6 +208,7 @@ def run_planning_agent(
 
     # Run agent with retry logic
     print_stage_header("Planning Stage")
+    _global_memory['stage'] = 'planning'
     return run_agent_with_retry(agent, planning_prompt, run_config)
 
 def run_task_implementation_agent(
@@ -258,8 +261,8 @@ def run_task_implementation_agent(
         tasks=tasks,
         plan=plan,
         related_files=related_files,
-        key_facts=get_memory_value('key_facts'),
-        key_snippets=get_memory_value('key_snippets'),
+        key_facts=get_relevant_memory_value('key_facts', task),
+        key_snippets=get_relevant_memory_value('key_snippets', task),
         expert_section=EXPERT_PROMPT_SECTION_IMPLEMENTATION if expert_enabled else "",
         human_section=HUMAN_PROMPT_SECTION_IMPLEMENTATION if _global_memory.get('config', {}).get('hil', False) else ""
     )
@@ -273,6 +276,7 @@ def run_task_implementation_agent(
         run_config.update(config)
 
     # Run agent with retry logic
+    _global_memory['stage'] = 'implementation'
     return run_agent_with_retry(agent, prompt, run_config)
 
 _CONTEXT_STACK = []
@@ -0,0 +1,32 @@
+from .symbols import Symbol, extract_symbols, extract_references, cached_symbols
+from .context import build_code_context, referenced_names
+from .files import ProjectFileIndex, compile_patterns, get_project_files
+from .index import SymbolIndex, SymbolLocation, ReferenceLocation, IndexStats, INDEX_DIRNAME
+from .trigrams import TrigramIndex, TrigramStats, regex_query
+from .outline import FileOutline, outline_file, outline_files
+from .search import CodeSearchIndex, SearchHit
+
+__all__ = [
+    'Symbol',
+    'extract_symbols',
+    'extract_references',
+    'cached_symbols',
+    'build_code_context',
+    'referenced_names',
+    'ProjectFileIndex',
+    'compile_patterns',
+    'get_project_files',
+    'SymbolIndex',
+    'SymbolLocation',
+    'ReferenceLocation',
+    'IndexStats',
+    'INDEX_DIRNAME',
+    'TrigramIndex',
+    'TrigramStats',
+    'regex_query',
+    'FileOutline',
+    'outline_file',
+    'outline_files',
+    'CodeSearchIndex',
+    'SearchHit'
+]
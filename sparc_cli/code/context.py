@@ -0,0 +1,180 @@
+"""Selecting the parts of source files that matter to a question, under a token budget."""
+
+import os
+import re
+from typing import Dict, Iterable, List, Mapping, Sequence, Set, Tuple
+
+from sparc_cli.text.processing import estimate_tokens
+
+from .symbols import Symbol, cached_symbols
+
+# Files up to this many lines are sent whole
+DEFAULT_FULL_FILE_LINES = 200
+
+DEFAULT_MAX_TOKENS = 24000
+
+_IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*')
+
+
+def referenced_names(text: str) -> Set[str]:
+    """Return identifiers mentioned in text, including each part of dotted names."""
+    names = set()
+    for match in _IDENTIFIER_RE.findall(text):
+        if len(match) < 3:
+            continue
+        names.add(match)
+        parts = match.split('.')
+        names.update(part for part in parts if len(part) >= 3)
+        names.update('.'.join(parts[i:i + 2]) for i in range(len(parts) - 1))
+    return names
+
+
+def _excerpt(lines: List[str], blocks: Iterable[Tuple[int, int, bool]]) -> str:
+    """Render (first, last, signature_only) line blocks of a file in line order."""
+    parts = []
+    for first, last, signature_only in sorted(blocks):
+        label = f"line {first}, signature" if signature_only else f"lines {first}-{last}"
+        parts.append(f"[{label}]\n" + ''.join(lines[first - 1:last]).rstrip('\n') + '\n')
+    return '\n'.join(parts)
+
+
+def _signature_lines(symbol: Symbol) -> int:
+    return symbol.line + symbol.signature.count('\n')
+
+
+def build_code_context(
+    files: Mapping[str, str],
+    question: str,
+    *,
+    extra_text: str = '',
+    snippet_ranges: Sequence[Tuple[str, int, int]] = (),
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    full_file_lines: int = DEFAULT_FULL_FILE_LINES
+) -> Dict[str, str]:
+    """Reduce files to the code relevant to a question.
+
+    Small files are kept whole. In larger files only the classes and
+    functions the question (or ``extra_text``, e.g. key snippets) names,
+    and those containing a snippet range, are kept, along with the
+    signatures of functions they call directly. Bodies are added best
+    match first with the budget left after whole files; ones that don't
+    fit are cut to their signature.
+
+    If nothing in the larger files is referenced, they are kept whole, so
+    a vague question never gets less context than before.
+
+    Args:
+        files: Contents of each file, by path, in order of importance
+        question: The question being asked
+        extra_text: Other text whose identifiers count as references, at lower weight
+        snippet_ranges: (path, first line, last line) ranges known to matter
+        max_tokens: Estimated token budget for all files together
+        full_file_lines: Files with at most this many lines are kept whole
+
+    Returns:
+        Text to send for each file, by path; excerpts start with a note
+        saying how much of the file they cover
+    """
+    weights: Dict[str, int] = {}
+    for name in referenced_names(extra_text):
+        weights[name] = 1
+    for name in referenced_names(question):
+        weights[name] = 3
+
+    ranges_by_path: Dict[str, List[Tuple[int, int]]] = {}
+    for path, first, last in snippet_ranges:
+        ranges_by_path.setdefault(os.path.realpath(path), []).append((first, last))
+
+    lines_by_path = {path: text.splitlines(keepends=True) for path, text in files.items()}
+    symbols_by_path: Dict[str, Tuple[Symbol, ...]] = {}
+    for path, text in files.items():
+        if len(lines_by_path[path]) > full_file_lines:
+            symbols_by_path[path] = tuple(s for s in cached_symbols(path, text) if s.kind != 'import')
+
+    # Score definitions in large files by how they are referenced
+    candidates: List[Tuple[int, str, Symbol]] = []
+    for path, symbols in symbols_by_path.items():
+        snippet_spans = ranges_by_path.get(os.path.realpath(path), [])
+        for symbol in symbols:
+            score = max(weights.get(symbol.name, 0), weights.get(symbol.qualname, 0))
+            if any(first <= symbol.end_line and symbol.line <= last for first, last in snippet_spans):
+                # Innermost definitions around a snippet are what it refers to
+                if not any(other is not symbol and symbol.line <= other.line and other.end_line <= symbol.end_line
+                           and any(f <= other.end_line and other.line <= l for f, l in snippet_spans)
+                           for other in symbols):
+                    score += 2
+            if score:
+                candidates.append((score, path, symbol))
+
+    if symbols_by_path and not candidates:
+        symbols_by_path = {}
+
+    budget = max_tokens
+    result: Dict[str, str] = {}
+    blocks: Dict[str, List[Tuple[int, int, bool]]] = {path: [] for path in symbols_by_path}
+
+    for path, text in files.items():
+        if path not in symbols_by_path:
+            result[path] = text
+            budget -= estimate_tokens(text)
+
+    def covered(path: str, first: int, last: int) -> bool:
+        return any(f <= first and last <= l and not signature_only for f, l, signature_only in blocks[path])
+
+    selected: List[Symbol] = []
+    callees: Set[str] = set()
+    for score, path, symbol in sorted(candidates, key=lambda c: (-c[0], c[2].line)):
+        if covered(path, symbol.line, symbol.end_line):
+            continue
+        body = ''.join(lines_by_path[path][symbol.line - 1:symbol.end_line])
+        tokens = estimate_tokens(body)
+        if tokens <= budget:
+            # Drop anything the body contains, e.g. a method kept before its class
+            blocks[path] = [b for b in blocks[path] if not (symbol.line <= b[0] and b[1] <= symbol.end_line)]
+            blocks[path].append((symbol.line, symbol.end_line, False))
+            budget -= tokens
+        else:
+            blocks[path].append((symbol.line, _signature_lines(symbol), True))
+            budget -= estimate_tokens(symbol.signature)
+            if symbol.kind == 'class':
+                # Outline a class too big to include through its method signatures
+                callees.update(s.name for s in symbols_by_path[path] if s.parent == symbol.qualname)
+        selected.append(symbol)
+
+    # Signatures of direct callees, wherever they are defined among the large files
+    for symbol in selected:
+        callees.update(symbol.calls)
+    for path, symbols in symbols_by_path.items():
+        for symbol in symbols:
+            if symbol.name not in callees or symbol in selected or covered(path, symbol.line, symbol.end_line):
+                continue
+            tokens = estimate_tokens(symbol.signature)
+            if tokens > budget:
+                break
+            blocks[path].append((symbol.line, _signature_lines(symbol), True))
+            budget -= tokens
+
+    # Files nothing was taken from are outlined by their top-level definitions
+    for path, symbols in symbols_by_path.items():
+        if blocks[path]:
+            continue
+        for symbol in symbols:
+            tokens = estimate_tokens(symbol.signature)
+            if symbol.parent is not None or tokens > budget:
+                continue
+            blocks[path].append((symbol.line, _signature_lines(symbol), True))
+            budget -= tokens
+
+    for path in symbols_by_path:
+        if not blocks[path]:
+            result[path] = f"[{len(lines_by_path[path])} lines; nothing referenced by the question]\n"
+            continue
+        # A signature inside a kept body is already there
+        kept = [b for b in blocks[path] if not (b[2] and covered(path, b[0], b[1]))]
+        lines = lines_by_path[path]
+        shown = sum(last - first + 1 for first, last, _ in kept)
+        note = f"[Excerpts: {shown} of {len(lines)} lines; referenced definitions and signatures of what they call]\n\n"
+        result[path] = note + _excerpt(lines, kept)
+
+    # Preserve the caller's file order
+    return {path: result[path] for path in files if path in result}
@@ -0,0 +1,204 @@
+"""Long-lived, cheaply refreshed listing of a project's files."""
+
+import fnmatch
+import os
+import re
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Skipped when walking a directory that isn't a git repository
+EXCLUDED_DIRS = frozenset({
+    '.git', '.sparc', 'node_modules', 'vendor', '.venv', 'venv', 'env', '__pycache__', '.cache',
+    'dist', 'build', '.idea', '.vscode', '.tox', '.mypy_cache', '.pytest_cache'
+})
+
+# Seconds after which untracked (or, outside git, all) files are listed again
+DEFAULT_MAX_AGE = 30.0
+
+# Commits whose changed files count as recently changed
+RECENT_COMMITS = 50
+
+
+def compile_patterns(patterns: Iterable[str]) -> Callable[[str], bool]:
+    """Compile fnmatch-style patterns into one matcher.
+
+    Returns:
+        Function returning whether a path matches any of the patterns
+    """
+    patterns = list(patterns)
+    if not patterns:
+        return lambda path: False
+    regex = re.compile('|'.join(f'(?:{fnmatch.translate(p)})' for p in patterns))
+    return lambda path: regex.match(path) is not None
+
+
+def compile_filter(include: Iterable[str] = (), exclude: Iterable[str] = ()) -> Callable[[str], bool]:
+    """Compile include and exclude patterns into a predicate.
+
+    Returns:
+        Function returning whether a path matches any include pattern (or
+        there are none) and no exclude pattern
+    """
+    include = list(include)
+    if not include:
+        excluded = compile_patterns(exclude)
+        return lambda path: not excluded(path)
+    included = compile_patterns(include)
+    excluded = compile_patterns(exclude)
+    return lambda path: included(path) and not excluded(path)
+
+
+def _git(root: str, *args: str) -> Optional[str]:
+    try:
+        result = subprocess.run(['git', *args], cwd=root, capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.decode('utf-8', errors='replace')
+
+
+def walk_files(root: str, excluded_dirs: Iterable[str] = EXCLUDED_DIRS) -> List[str]:
+    """List files under root, relative to it, skipping excluded directory names."""
+    excluded = frozenset(excluded_dirs)
+    files = []
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(root, rel_dir) if rel_dir else root)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in excluded:
+                            stack.append(rel)
+                    elif entry.is_file():
+                        files.append(rel)
+                except OSError:
+                    continue
+    files.sort()
+    return files
+
+
+class ProjectFileIndex:
+    """Cached list of the files in a project.
+
+    In a git repository, tracked files come from ``git ls-files`` and are
+    listed again only when git's index file changes; untracked, unignored
+    files are re-listed when the index changes or after ``max_age``
+    seconds. Other directories are walked with ``os.scandir``, again at
+    most every ``max_age`` seconds. ``invalidate`` forces a refresh, e.g.
+    after creating files.
+
+    Args:
+        root: Project root directory
+        max_age: Seconds before listings git can't track changes of are refreshed
+    """
+
+    def __init__(self, root: str = '.', max_age: float = DEFAULT_MAX_AGE):
+        self.root = os.path.realpath(root)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._git_index: Optional[str] = None
+        git_dir = _git(self.root, 'rev-parse', '--git-dir')
+        self.is_git = git_dir is not None
+        if self.is_git:
+            self._git_index = os.path.join(self.root, git_dir.strip(), 'index')
+        self._index_version: Optional[Tuple[int, int]] = None
+        self._tracked: List[str] = []
+        self._untracked: List[str] = []
+        self._listed_at = 0.0
+        self._files: Optional[Tuple[str, ...]] = None
+        self._recent: Optional[Tuple[str, ...]] = None
+        self.refreshes = 0
+
+    def _index_stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._git_index)
+        except (OSError, TypeError):
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._files = None
+            self._recent = None
+            self._index_version = None
+
+    def files(self) -> Tuple[str, ...]:
+        """Return the project's files relative to the root, refreshing stale listings first."""
+        with self._lock:
+            expired = time.monotonic() - self._listed_at > self.max_age
+            if not self.is_git:
+                if self._files is None or expired:
+                    self._files = tuple(walk_files(self.root))
+                    self._listed_at = time.monotonic()
+                    self.refreshes += 1
+                return self._files
+
+            version = self._index_stat()
+            index_changed = self._files is None or version != self._index_version
+            if index_changed:
+                self._tracked = _split(_git(self.root, 'ls-files', '-z', '--cached'))
+                self._recent = None
+                self._index_version = version
+            if index_changed or expired:
+                self._untracked = _split(_git(self.root, 'ls-files', '-z', '--others', '--exclude-standard'))
+                self._listed_at = time.monotonic()
+                self._files = tuple(dict.fromkeys(self._tracked + self._untracked))
+                self.refreshes += 1
+            return self._files
+
+    def recent_files(self) -> Tuple[str, ...]:
+        """Return files changed in the last RECENT_COMMITS commits, most recent first (empty outside git)."""
+        if not self.is_git:
+            return ()
+        self.files()
+        with self._lock:
+            if self._recent is None:
+                output = _git(self.root, 'log', f'-n{RECENT_COMMITS}', '--name-only', '--format=', '-z')
+                self._recent = tuple(dict.fromkeys(p.strip('\n') for p in _split(output) if p.strip('\n')))
+            return self._recent
+
+    def filter(self, include: Iterable[str] = (), exclude: Iterable[str] = ()) -> List[str]:
+        """Return the project's files matching any include pattern (if given) and no exclude pattern."""
+        accept = compile_filter(include, exclude)
+        return [f for f in self.files() if accept(f)]
+
+
+def changed_files(root: str, ref: str) -> List[str]:
+    """List files changed since a git ref, committed or not, plus untracked files.
+
+    Paths are relative to root, limited to files under it that still exist.
+
+    Raises:
+        ValueError: If root is not in a git repository or ref is unknown
+    """
+    diff = _git(root, 'diff', '--name-only', '--relative', '-z', ref, '--')
+    if diff is None:
+        raise ValueError(f"Cannot list files changed since '{ref}': not a git repository or unknown ref")
+    untracked = _git(root, 'ls-files', '-z', '--others', '--exclude-standard')
+    paths = dict.fromkeys(_split(diff) + _split(untracked))
+    return [p for p in paths if os.path.isfile(os.path.join(root, p))]
+
+
+def _split(output: Optional[str]) -> List[str]:
+    return [p for p in (output or '').split('\0') if p]
+
+
+_indexes: Dict[str, ProjectFileIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_project_files(root: str = '.') -> ProjectFileIndex:
+    """Return the shared file index for a project root."""
+    key = os.path.realpath(root)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = ProjectFileIndex(key)
+        return index
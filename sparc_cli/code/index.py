@@ -0,0 +1,450 @@
+"""Persistent, incrementally updated index of the symbols defined and referenced in a project."""
+
+import hashlib
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from sparc_cli.memory.knowledge_base import ensure_sparc_dir
+from sparc_cli.text import file_cache
+
+from .files import get_project_files
+from .symbols import extract_references, extract_symbols
+
+# Directory under .sparc/ holding the project's indexes
+INDEX_DIRNAME = 'index'
+SYMBOL_INDEX_FILENAME = 'symbols.db'
+
+SOURCE_EXTENSIONS = frozenset({
+    '.py', '.pyi', '.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx', '.go', '.rs', '.rb', '.java',
+    '.kt', '.kts', '.scala', '.c', '.h', '.cc', '.cpp', '.cxx', '.hpp', '.hh', '.cs', '.swift',
+    '.php', '.m', '.mm', '.lua', '.dart', '.ex', '.exs', '.sh'
+})
+
+# Larger files are usually generated or minified and aren't indexed
+MAX_FILE_BYTES = 2 * 1024 * 1024
+
+# Below this many files to (re)index, worker processes cost more than they save
+PARALLEL_MIN_FILES = 200
+
+_FILES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS symbols (
+    file_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    qualname TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    signature TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS symbols_name_nocase ON symbols (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS symbols_file ON symbols (file_id);
+CREATE TABLE IF NOT EXISTS refs (
+    file_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS refs_name ON refs (name);
+CREATE INDEX IF NOT EXISTS refs_file ON refs (file_id);
+"""
+
+
+@dataclass
+class SymbolLocation:
+    """Where a symbol is defined (or, for imports, bound)."""
+    path: str
+    name: str
+    qualname: str
+    kind: str
+    line: int
+    end_line: int
+    signature: str
+
+
+@dataclass
+class ReferenceLocation:
+    """A line where a name is used."""
+    path: str
+    line: int
+    text: str
+
+
+@dataclass
+class IndexStats:
+    """Outcome of an index update."""
+    indexed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    skipped: int = 0
+    duration: float = 0.0
+
+
+def index_dir(root: str) -> str:
+    """Return the project's .sparc/index directory, creating it if needed."""
+    path = os.path.join(ensure_sparc_dir(root), INDEX_DIRNAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def list_source_files(root: str) -> List[str]:
+    """List source files under root, relative to it.
+
+    Uses the project's shared ``ProjectFileIndex``: tracked and unignored
+    untracked files in git repositories, otherwise a directory walk that
+    skips EXCLUDED_DIRS.
+    """
+    return [p for p in get_project_files(root).files() if os.path.splitext(p)[1].lower() in SOURCE_EXTENSIONS]
+
+
+def read_changed(job: Tuple[str, str, Optional[str]]) -> Optional[Tuple[str, int, int, str, Optional[str]]]:
+    """Read a file for indexing unless its content hash is still ``known_hash``.
+
+    Returns:
+        (path, mtime_ns, size, hash, text), with text None if the content
+        is unchanged; None if the file is unreadable
+    """
+    root, path, known_hash = job
+    try:
+        full_path = os.path.join(root, path)
+        stat = os.stat(full_path)
+        with open(full_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    if digest == known_hash:
+        return (path, stat.st_mtime_ns, stat.st_size, digest, None)
+    return (path, stat.st_mtime_ns, stat.st_size, digest, data.decode('utf-8', errors='replace'))
+
+
+def _index_file(job: Tuple[str, str, Optional[str]]) -> Optional[tuple]:
+    """Extract one file's symbols and references; runs in worker processes.
+
+    Returns:
+        (path, mtime_ns, size, hash, (symbols, refs)), with the contents
+        None if the content hash matches ``known_hash``; None if unreadable
+    """
+    result = read_changed(job)
+    if result is None or result[4] is None:
+        return result
+    path, mtime_ns, size, digest, text = result
+    symbols = [(s.name, s.qualname, s.kind, s.line, s.end_line, s.signature) for s in extract_symbols(path, text)]
+    return (path, mtime_ns, size, digest, (symbols, extract_references(path, text)))
+
+
+class FileIndex(ABC):
+    """Base for SQLite indexes of a project's source files, kept up to date per file.
+
+    Files are re-indexed only when their mtime or size changed and then
+    only if their content hash did too. Large updates are spread over
+    worker processes. Subclasses provide the schema, a module-level
+    ``_worker`` returning ``read_changed``'s tuple with the text replaced
+    by what ``_store_contents`` stores, and the tables holding it.
+
+    Args:
+        root: Project root directory (default: current directory)
+        db_path: Optional explicit database path (default: <root>/.sparc/index/<FILENAME>)
+    """
+
+    FILENAME = ''
+    SCHEMA = ''
+    # Tables with a file_id column, cleared when a file is re-indexed or removed
+    FILE_TABLES: Tuple[str, ...] = ()
+
+    def __init__(self, root: str = '.', db_path: Optional[str] = None):
+        self.root = os.path.realpath(root)
+        if db_path is None:
+            db_path = os.path.join(index_dir(self.root), self.FILENAME)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Tools may run on worker threads, so share one connection behind a lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(_FILES_SCHEMA + self.SCHEMA)
+
+    @staticmethod
+    @abstractmethod
+    def _worker(job: Tuple[str, str, Optional[str]]) -> Optional[tuple]:
+        """Read a file if changed and extract what the index stores; runs in worker processes."""
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _relpath(self, path: str) -> str:
+        if os.path.isabs(path):
+            path = os.path.relpath(os.path.realpath(path), self.root)
+        return os.path.normpath(path)
+
+    def update(self, paths: Optional[Iterable[str]] = None, workers: Optional[int] = None) -> IndexStats:
+        """Bring the index up to date with the files on disk.
+
+        Args:
+            paths: Only check these files (default: all source files in the project)
+            workers: Worker processes for extraction (default: one per CPU)
+
+        Returns:
+            Counts of indexed, unchanged, removed and skipped files
+        """
+        started = time.monotonic()
+        stats = IndexStats()
+        with self._lock:
+            known = {row[0]: row[1:] for row in self._conn.execute("SELECT path, mtime_ns, size, hash FROM files")}
+
+        if paths is None:
+            # A full update should see files created since the listing was cached
+            get_project_files(self.root).invalidate()
+            current = list_source_files(self.root)
+            missing = set(known) - set(current)
+        else:
+            current = [self._relpath(p) for p in paths]
+            missing = {p for p in current if p in known and not os.path.exists(os.path.join(self.root, p))}
+
+        jobs = []
+        for path in current:
+            if path in missing:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.root, path))
+            except OSError:
+                # Deleted, e.g. tracked by git but removed from the working tree
+                if path in known:
+                    missing.add(path)
+                else:
+                    stats.skipped += 1
+                continue
+            entry = known.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                stats.unchanged += 1
+            elif stat.st_size > MAX_FILE_BYTES:
+                stats.skipped += 1
+            else:
+                jobs.append((self.root, path, entry[2] if entry else None))
+
+        processed = 0
+        for batch in self._extract(jobs, workers):
+            self._store(batch)
+            processed += len(batch)
+            # Touched files whose content hash didn't change come back without contents
+            stats.indexed += sum(1 for result in batch if result[4] is not None)
+        stats.unchanged += processed - stats.indexed
+        stats.skipped += len(jobs) - processed
+        stats.removed = self._remove(missing)
+        stats.duration = time.monotonic() - started
+        return stats
+
+    def refresh(self, workers: Optional[int] = None) -> IndexStats:
+        """Re-index the source files whose mtime or size changed since they were indexed.
+
+        A cheaper ``update`` for use before every lookup: it stats the files
+        in the project's cached file list instead of listing the project
+        again, so new untracked files are picked up once that list is.
+
+        Returns:
+            Counts of indexed, unchanged, removed and skipped files among those re-checked
+        """
+        started = time.monotonic()
+        current = list_source_files(self.root)
+        with self._lock:
+            known = {row[0]: row[1:] for row in self._conn.execute("SELECT path, mtime_ns, size FROM files")}
+
+        current_set = set(current)
+        gone = [path for path in known if path not in current_set]
+        stale = []
+        for path in current:
+            try:
+                stat = os.stat(os.path.join(self.root, path))
+            except OSError:
+                if path in known:
+                    gone.append(path)
+                continue
+            if known.get(path) != (stat.st_mtime_ns, stat.st_size) and stat.st_size <= MAX_FILE_BYTES:
+                stale.append(path)
+
+        stats = self.update(stale, workers) if stale else IndexStats()
+        stats.unchanged += len(known) - len(gone) - sum(1 for path in stale if path in known)
+        stats.removed = self._remove(gone)
+        stats.duration = time.monotonic() - started
+        return stats
+
+    def _extract(self, jobs: List[tuple], workers: Optional[int]) -> Iterable[List[tuple]]:
+        """Run extraction jobs, yielding results in batches for storage."""
+        batch_size = 500
+        worker = type(self)._worker
+        if len(jobs) < PARALLEL_MIN_FILES or workers == 1:
+            for start in range(0, len(jobs), batch_size):
+                yield [r for r in map(worker, jobs[start:start + batch_size]) if r is not None]
+            return
+
+        try:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError):
+            # No multiprocessing support here, e.g. missing semaphores
+            yield from self._extract(jobs, workers=1)
+            return
+        with executor:
+            batch = []
+            for result in executor.map(worker, jobs, chunksize=32):
+                if result is not None:
+                    batch.append(result)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    def _store(self, results: List[tuple]) -> None:
+        with self._lock, self._conn:
+            for path, mtime_ns, size, digest, contents in results:
+                row = self._conn.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+                if contents is None and row is not None:
+                    # Touched but unchanged content
+                    self._conn.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?", (mtime_ns, size, row[0]))
+                    continue
+                if row is None:
+                    file_id = self._conn.execute(
+                        "INSERT INTO files (path, mtime_ns, size, hash) VALUES (?, ?, ?, ?)",
+                        (path, mtime_ns, size, digest)
+                    ).lastrowid
+                else:
+                    file_id = row[0]
+                    self._conn.execute(
+                        "UPDATE files SET mtime_ns = ?, size = ?, hash = ? WHERE id = ?",
+                        (mtime_ns, size, digest, file_id)
+                    )
+                    self._clear(file_id)
+                if contents is not None:
+                    self._store_contents(file_id, contents)
+
+    def _clear(self, file_id: int) -> None:
+        for table in self.FILE_TABLES:
+            self._conn.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+
+    @abstractmethod
+    def _store_contents(self, file_id: int, contents) -> None:
+        """Insert a file's extracted contents into the subclass's tables."""
+
+    def _remove(self, paths: Iterable[str]) -> int:
+        removed = 0
+        with self._lock, self._conn:
+            for path in paths:
+                row = self._conn.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+                if row is None:
+                    continue
+                self._clear(row[0])
+                self._conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+                removed += 1
+        return removed
+
+    def file_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def _line_text(self, path: str, line: int) -> str:
+        try:
+            lines = file_cache.get(os.path.join(self.root, path)).lines
+        except (OSError, UnicodeDecodeError):
+            return ''
+        return lines[line - 1].strip() if 0 < line <= len(lines) else ''
+
+
+class SymbolIndex(FileIndex):
+    """SQLite index of the definitions, imports and name references in a project.
+
+    Files are re-indexed only when their mtime or size changed and then
+    only if their content hash did too. Large updates are spread over
+    worker processes.
+
+    Args:
+        root: Project root directory (default: current directory)
+        db_path: Optional explicit database path (default: <root>/.sparc/index/symbols.db)
+    """
+
+    FILENAME = SYMBOL_INDEX_FILENAME
+    SCHEMA = _SCHEMA
+    FILE_TABLES = ('symbols', 'refs')
+    _worker = staticmethod(_index_file)
+
+    def _store_contents(self, file_id: int, contents) -> None:
+        symbols, refs = contents
+        self._conn.executemany(
+            "INSERT INTO symbols (file_id, name, qualname, kind, line, end_line, signature) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(file_id,) + symbol for symbol in symbols]
+        )
+        self._conn.executemany(
+            "INSERT INTO refs (file_id, name, line) VALUES (?, ?, ?)",
+            [(file_id, name, line) for name, line in refs]
+        )
+
+    def find_symbol(self, name: str, kind: Optional[str] = None, limit: int = 20) -> List[SymbolLocation]:
+        """Find where a symbol is defined.
+
+        Args:
+            name: Symbol name, or a dotted qualified name such as 'Class.method'
+            kind: Only return this kind: 'class', 'function', 'method' or 'import'
+                (default: any kind except imports)
+            limit: Maximum number of results (default: 20)
+
+        Returns:
+            Matching definitions; exact-case matches, or case-insensitive ones if there are none
+        """
+        short_name = name.rsplit('.', 1)[-1]
+        conditions = []
+        params: List = []
+        if '.' in name:
+            conditions.append("(s.qualname = ? OR s.qualname LIKE ? ESCAPE '\\')")
+            params.extend([name, '%.' + name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')])
+        if kind:
+            conditions.append("s.kind = ?")
+            params.append(kind)
+        else:
+            conditions.append("s.kind != 'import'")
+        where = ''.join(f" AND {c}" for c in conditions)
+
+        for comparison in ("s.name = ?", "s.name = ? COLLATE NOCASE"):
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT f.path, s.name, s.qualname, s.kind, s.line, s.end_line, s.signature "
+                    f"FROM symbols s JOIN files f ON f.id = s.file_id WHERE {comparison}{where} "
+                    "ORDER BY f.path, s.line LIMIT ?",
+                    [short_name] + params + [limit]
+                ).fetchall()
+            if rows:
+                return [SymbolLocation(*row) for row in rows]
+        return []
+
+    def find_references(self, name: str, limit: int = 50) -> Tuple[List[ReferenceLocation], int]:
+        """Find lines that use a name.
+
+        Args:
+            name: Name to look up; for dotted names, the last part is used
+            limit: Maximum number of locations to return (default: 50)
+
+        Returns:
+            Tuple of (locations with their source line, total number of references)
+        """
+        short_name = name.rsplit('.', 1)[-1]
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM refs WHERE name = ?", (short_name,)).fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT f.path, r.line FROM refs r JOIN files f ON f.id = r.file_id WHERE r.name = ? "
+                "ORDER BY f.path, r.line LIMIT ?",
+                (short_name, limit)
+            ).fetchall()
+        return [ReferenceLocation(path, line, self._line_text(path, line)) for path, line in rows], total
@@ -0,0 +1,150 @@
+"""Compact outlines of source files: their classes, functions and methods with signatures."""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Sequence, Tuple
+
+from .index import MAX_FILE_BYTES
+from .symbols import PYTHON_EXTENSIONS, Symbol, extract_symbols
+
+# Below this many files to parse, worker processes cost more than they save
+PARALLEL_MIN_FILES = 32
+
+# Outlines kept in memory, keyed by path and (mtime, size)
+MAX_CACHED_OUTLINES = 4096
+
+# Longer signatures are cut
+MAX_SIGNATURE_CHARS = 160
+
+# Spaces left inside brackets by joining a multi-line signature
+_BRACKET_SPACE = re.compile(r'(?<=[(\[])\s+|,?\s+(?=[)\]])')
+
+# Opening quote of a module docstring, after any comments
+_MODULE_DOC_RE = re.compile(r'(?:[ \t]*(?:#[^\n]*)?\n)*[ \t]*[rRuU]?("""|\'\'\'|"|\')')
+
+
+@dataclass(frozen=True)
+class FileOutline:
+    """Definitions in a file as of one (mtime, size) version.
+
+    Attributes:
+        path: File path as given
+        lines: Number of lines in the file
+        doc: First line of the module docstring (Python only)
+        symbols: Definitions and imports, in line order
+    """
+    path: str
+    lines: int
+    doc: str
+    symbols: Tuple[Symbol, ...]
+
+    def format(self, include_imports: bool = False) -> str:
+        """Render one line per definition, indented by nesting, with line ranges and docstring first lines."""
+        out = [f"{self.path} ({self.lines} lines)" + (f" — {self.doc}" if self.doc else '')]
+        imports = [s.name for s in self.symbols if s.kind == 'import']
+        if include_imports and imports:
+            out.append(f"  imports: {', '.join(dict.fromkeys(imports))}")
+        for symbol in self.symbols:
+            if symbol.kind == 'import':
+                continue
+            depth = symbol.parent.count('.') + 2 if symbol.parent else 1
+            signature = _BRACKET_SPACE.sub('', ' '.join(symbol.signature.split()))
+            if len(signature) > MAX_SIGNATURE_CHARS:
+                signature = signature[:MAX_SIGNATURE_CHARS] + ' ...'
+            line = f"{'  ' * depth}{symbol.line}-{symbol.end_line}: {signature}"
+            if symbol.doc:
+                line += f"  # {symbol.doc}"
+            out.append(line)
+        return '\n'.join(out)
+
+
+def _module_doc(path: str, text: str) -> str:
+    if os.path.splitext(path)[1].lower() not in PYTHON_EXTENSIONS:
+        return ''
+    match = _MODULE_DOC_RE.match(text)
+    if not match:
+        return ''
+    end = text.find(match.group(1), match.end())
+    body = text[match.end():end if end >= 0 else match.end()]
+    return next((line.strip() for line in body.splitlines() if line.strip()), '')
+
+
+def _parse(path: str) -> Tuple[int, str, Tuple[Symbol, ...]]:
+    """Read and outline one file (run in worker processes for large batches)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    lines = text.count('\n') + (1 if text and not text.endswith('\n') else 0)
+    return lines, _module_doc(path, text), tuple(extract_symbols(path, text))
+
+
+_cache: 'OrderedDict[str, Tuple[Tuple[int, int], FileOutline]]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def outline_files(paths: Sequence[str], workers: Optional[int] = None) -> Dict[str, Optional[FileOutline]]:
+    """Outline files, reusing cached outlines of files whose mtime and size are unchanged.
+
+    Files not cached are parsed in worker processes once there are
+    PARALLEL_MIN_FILES of them.
+
+    Args:
+        paths: Files to outline
+        workers: Worker processes (default: one per CPU)
+
+    Returns:
+        Outline of each path, or None for files that can't be read as
+        UTF-8 text or are larger than MAX_FILE_BYTES
+    """
+    outlines: Dict[str, Optional[FileOutline]] = {}
+    versions: Dict[str, Tuple[int, int]] = {}
+    for path in dict.fromkeys(paths):
+        outlines[path] = None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if stat.st_size > MAX_FILE_BYTES:
+            continue
+        version = (stat.st_mtime_ns, stat.st_size)
+        key = os.path.realpath(path)
+        with _cache_lock:
+            cached = _cache.get(key)
+            if cached is not None and cached[0] == version:
+                _cache.move_to_end(key)
+                outlines[path] = replace(cached[1], path=path)
+                continue
+        versions[path] = version
+
+    missing = list(versions)
+    if len(missing) >= PARALLEL_MIN_FILES:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_try_parse, missing, chunksize=8))
+    else:
+        results = [_try_parse(path) for path in missing]
+
+    with _cache_lock:
+        for path, result in zip(missing, results):
+            if result is None:
+                continue
+            outline = outlines[path] = FileOutline(path, *result)
+            _cache[os.path.realpath(path)] = (versions[path], outline)
+            _cache.move_to_end(os.path.realpath(path))
+        while len(_cache) > MAX_CACHED_OUTLINES:
+            _cache.popitem(last=False)
+    return outlines
+
+
+def _try_parse(path: str) -> Optional[Tuple[int, str, Tuple[Symbol, ...]]]:
+    try:
+        return _parse(path)
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def outline_file(path: str) -> Optional[FileOutline]:
+    """Outline one file (see ``outline_files``)."""
+    return outline_files([path])[path]
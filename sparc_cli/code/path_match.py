@@ -0,0 +1,196 @@
+"""Fuzzy matching of file paths that scales to very large projects.
+
+Scoring every path with ``fuzzywuzzy`` costs tens of microseconds per
+path, so past a few thousand files candidates are first narrowed in C:
+all paths are kept as one newline-separated, lowercased string, which
+regular expressions scan for lines containing the query's rarest
+trigrams, or its characters in order. Only the best few hundred
+candidates are scored with ``fuzz.WRatio``, the scorer
+``process.extract`` uses, so scores stay comparable.
+"""
+
+import bisect
+import heapq
+import itertools
+import os
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from fuzzywuzzy import fuzz, utils
+
+from .files import get_project_files
+
+# Lists up to this size are scored in full, exactly like process.extract
+PREFILTER_MIN_PATHS = 5000
+
+# Paths scored per query after prefiltering (at least; more for large limits)
+MAX_CANDIDATES = 300
+
+# Rarest query trigrams (that occur) whose lines become candidates
+SEED_TRIGRAMS = 3
+
+# Ranking adjustments, in score points; the reported score is not adjusted
+BASENAME_BONUS = 5
+RECENT_BONUS = 3
+DEPTH_PENALTY = 0.5
+MAX_DEPTH_PENALTY = 3
+
+# Characters of the path list sampled to estimate how common a trigram is
+_SAMPLE_CHARS = 1 << 20
+
+
+def _trigrams(tokens: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(t[i:i + 3] for t in tokens for i in range(len(t) - 2)))
+
+
+class PathMatcher:
+    """Fuzzy matcher over a fixed list of paths.
+
+    Args:
+        paths: Paths to match against
+        recent: Recently changed paths, ranked slightly higher
+    """
+
+    def __init__(self, paths: Sequence[str], recent: Iterable[str] = ()):
+        self.paths = list(paths)
+        self.recent: Set[str] = set(recent)
+        self._blob = '\n'.join(self.paths).lower()
+        self._starts = [0]
+        self._starts.extend(itertools.accumulate(len(p) + 1 for p in self.paths))
+        self._sample = self._blob[:_SAMPLE_CHARS]
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def _line(self, i: int) -> str:
+        return self._blob[self._starts[i]:self._starts[i + 1] - 1]
+
+    def _containing(self, text: str) -> List[int]:
+        """Ids of the paths containing a literal substring, found with str.find."""
+        blob, starts = self._blob, self._starts
+        ids = []
+        pos = blob.find(text)
+        while pos >= 0:
+            i = bisect.bisect_right(starts, pos) - 1
+            ids.append(i)
+            pos = blob.find(text, starts[i + 1])
+        return ids
+
+    def _matching(self, pattern: 're.Pattern') -> List[int]:
+        """Ids of the paths a regular expression (that doesn't span lines) matches."""
+        starts = self._starts
+        ids = []
+        pos = 0
+        while True:
+            match = pattern.search(self._blob, pos)
+            if match is None:
+                return ids
+            i = bisect.bisect_right(starts, match.start()) - 1
+            ids.append(i)
+            pos = starts[i + 1]
+
+    def candidates(self, query: str, count: int, accept: Optional[Callable[[str], bool]] = None) -> List[int]:
+        """Ids of the paths most likely to match a processed query, best first.
+
+        Paths ``accept`` rejects are dropped before the cut to ``count``.
+        """
+        tokens = query.split()
+        trigrams = _trigrams(tokens)
+        scored: Dict[int, int] = {}
+        if trigrams:
+            # Seed with the rarest trigrams that occur at all; a typo's don't
+            seeds = 0
+            for trigram in sorted(trigrams, key=self._sample.count):
+                ids = self._containing(trigram)
+                for i in ids:
+                    scored[i] = scored.get(i, 0) + 1
+                seeds += bool(ids)
+                if seeds == SEED_TRIGRAMS:
+                    break
+            if accept is not None:
+                scored = {i: n for i, n in scored.items() if accept(self.paths[i])}
+            # Paths containing the most seeds, shortest first, ranked by all trigrams they share with the query
+            starts = self._starts
+            shortlist = heapq.nlargest(count * 10, scored, key=lambda i: (scored[i], starts[i] - starts[i + 1]))
+            scored = {i: sum(t in self._line(i) for t in trigrams) for i in shortlist}
+
+        if len(scored) < count:
+            # Abbreviations and short queries: the query's characters in order,
+            # each gap excluding the next character so matching never backtracks
+            chars = ''.join(tokens)
+            if chars:
+                pattern = re.compile(re.escape(chars[0]) + ''.join(
+                    f'[^\n{re.escape(c)}]*{re.escape(c)}' for c in chars[1:]
+                ))
+                for i in self._matching(pattern):
+                    if i not in scored and (accept is None or accept(self.paths[i])):
+                        scored[i] = 0
+
+        return heapq.nlargest(count, scored, key=lambda i: (scored[i], -len(self.paths[i])))
+
+    def match(
+        self,
+        query: str,
+        limit: int = 10,
+        threshold: int = 0,
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> List[Tuple[str, int]]:
+        """Find the paths best matching a query.
+
+        Args:
+            query: Search term
+            limit: Maximum number of results
+            threshold: Minimum ``fuzz.WRatio`` score (0-100)
+            accept: Optional filter paths must pass, e.g. include/exclude patterns
+
+        Returns:
+            (path, score) tuples, best first; ties and near-ties favor
+            basename matches, shallow paths and recently changed files
+        """
+        processed = utils.full_process(query)
+        if not processed or limit <= 0:
+            return []
+
+        if len(self.paths) <= PREFILTER_MIN_PATHS:
+            ids: Iterable[int] = range(len(self.paths))
+            if accept is not None:
+                ids = [i for i in ids if accept(self.paths[i])]
+        else:
+            ids = self.candidates(processed, max(MAX_CANDIDATES, limit * 20), accept)
+
+        tokens = processed.split()
+        results = []
+        for i in ids:
+            path = self.paths[i]
+            score = fuzz.WRatio(processed, path)
+            if score < threshold:
+                continue
+            results.append((score + self._bonus(path, tokens), path, score))
+
+        best = heapq.nlargest(limit, results, key=lambda r: (r[0], r[2], -len(r[1])))
+        return [(path, score) for _, path, score in best]
+
+    def _bonus(self, path: str, tokens: List[str]) -> float:
+        basename = os.path.basename(path).lower()
+        bonus = -min(path.count('/') * DEPTH_PENALTY, MAX_DEPTH_PENALTY)
+        if all(token in basename for token in tokens):
+            bonus += BASENAME_BONUS
+        if path in self.recent:
+            bonus += RECENT_BONUS
+        return bonus
+
+
+_matchers: Dict[str, Tuple[tuple, PathMatcher]] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_path_matcher(root: str = '.') -> PathMatcher:
+    """Return a matcher over a project's files, rebuilt when its file list changes."""
+    project = get_project_files(root)
+    files = project.files()
+    with _matchers_lock:
+        cached = _matchers.get(project.root)
+        if cached is None or cached[0] is not files:
+            cached = _matchers[project.root] = (files, PathMatcher(files, project.recent_files()))
+        return cached[1]
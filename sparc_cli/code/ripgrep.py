@@ -0,0 +1,366 @@
+"""Streaming ripgrep backend: runs ``rg --json`` and collects capped, grouped results."""
+
+import base64
+import json
+import re
+import subprocess
+import tempfile
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_MAX_RESULTS = 200
+DEFAULT_MAX_PER_FILE = 20
+
+# Matches past the caps are still counted, up to this many in total
+MAX_COUNTED_MATCHES = 10000
+
+# Explicit paths passed to one ripgrep process, to stay under command line limits
+PATHS_PER_PROCESS = 1000
+
+# Longer lines, usually minified or generated code, are cut
+MAX_LINE_CHARS = 300
+
+_MATCH_PREFIX = b'{"type":"match"'
+_BEGIN_PREFIX = b'{"type":"begin"'
+_CONTEXT_PREFIX = b'{"type":"context"'
+
+
+@dataclass
+class FileMatches:
+    """Matches kept for one file.
+
+    Attributes:
+        path: File path as reported by ripgrep
+        lines: (line number, text, is_match) in line order, including context lines
+        match_count: Matching lines in the file, including ones past the per-file cap
+    """
+    path: str
+    lines: List[Tuple[int, str, bool]] = field(default_factory=list)
+    match_count: int = 0
+
+    @property
+    def shown(self) -> int:
+        return sum(1 for _, _, is_match in self.lines if is_match)
+
+
+@dataclass
+class SearchResult:
+    """Outcome of a ripgrep search.
+
+    Attributes:
+        files: Files with kept matches, in the order ripgrep found them
+        match_count: Matching lines found, including ones past the caps
+        file_count: Files with matches, including ones past the caps
+        truncated: Whether matches were left out because of the caps
+        complete: False if counting stopped at MAX_COUNTED_MATCHES
+        return_code: ripgrep's exit status (1 means no matches)
+        error: ripgrep's error output, if any
+    """
+    files: List[FileMatches] = field(default_factory=list)
+    match_count: int = 0
+    file_count: int = 0
+    truncated: bool = False
+    complete: bool = True
+    return_code: int = 0
+    error: str = ''
+
+    @property
+    def shown(self) -> int:
+        return sum(f.shown for f in self.files)
+
+    def format(self) -> str:
+        """Render matches grouped by file, ripgrep-style: 'N:' for matches, 'N-' for context."""
+        parts = []
+        for file in self.files:
+            out = [file.path]
+            previous = None
+            for number, text, is_match in file.lines:
+                if previous is not None and number > previous + 1:
+                    out.append('--')
+                out.append(f"{number}{':' if is_match else '-'}{text}")
+                previous = number
+            if file.match_count > file.shown:
+                out.append(f"[... {file.match_count - file.shown} more matches in this file]")
+            parts.append('\n'.join(out))
+
+        output = '\n\n'.join(parts)
+        if self.truncated:
+            total = f"{self.match_count}{'' if self.complete else '+'}"
+            files = f"{self.file_count}{'' if self.complete else '+'}"
+            output += (f"\n\n[Showing {self.shown} of {total} matches in {files} files; "
+                       "narrow the pattern or paths to see the rest]")
+        return output
+
+
+def _text(value: Dict) -> str:
+    """Decode a ripgrep JSON text or base64 'bytes' value."""
+    if 'text' in value:
+        return value['text']
+    return base64.b64decode(value.get('bytes', '')).decode('utf-8', errors='replace')
+
+
+def _clip(line: str) -> str:
+    line = line.rstrip('\r\n')
+    if len(line) > MAX_LINE_CHARS:
+        return line[:MAX_LINE_CHARS] + ' [...]'
+    return line
+
+
+class _Collector:
+    """Builds a SearchResult from streamed ripgrep messages, applying the caps."""
+
+    def __init__(self, context: int, max_results: int, max_per_file: int):
+        self.result = SearchResult()
+        self.context = context
+        self.max_results = max_results
+        self.max_per_file = max_per_file
+        self.kept = 0
+        self.file: Optional[FileMatches] = None
+        self.file_kept = 0
+        # Context lines that may precede a match not yet seen
+        self.pending: Deque[Tuple[int, str, bool]] = deque(maxlen=max(context, 1))
+        self.last_kept: Optional[int] = None
+
+    @property
+    def full(self) -> bool:
+        return self.kept >= self.max_results
+
+    def begin(self, path: Optional[str]) -> None:
+        self.file = FileMatches(path or '')
+        self.file_kept = 0
+        self.pending.clear()
+        self.last_kept = None
+
+    def match(self, number: Optional[int] = None, text: Optional[str] = None) -> None:
+        """Count a matching line, keeping it if within the caps (it must then be decoded)."""
+        file = self.file
+        if not file.match_count:
+            self.result.file_count += 1
+        file.match_count += 1
+        self.result.match_count += 1
+        if self.full or self.file_kept >= self.max_per_file:
+            self.result.truncated = True
+            self.last_kept = None
+            return
+        if not file.lines:
+            self.result.files.append(file)
+        file.lines.extend(line for line in self.pending if line[0] < number)
+        self.pending.clear()
+        file.lines.append((number, text, True))
+        self.last_kept = number
+        self.file_kept += 1
+        self.kept += 1
+
+    def context_line(self, number: int, text: str) -> None:
+        if self.last_kept is not None and number - self.last_kept <= self.context:
+            # After-context of a kept match
+            self.file.lines.append((number, text, False))
+        elif not self.full:
+            self.pending.append((number, text, False))
+
+
+def _stream(cmd: List[str], cwd: Optional[str], handle: Callable[[bytes], bool]) -> Tuple[int, str]:
+    """Run ripgrep, passing each output line to ``handle`` until it returns False.
+
+    Returns:
+        ripgrep's exit status (None if it was stopped) and error output
+    """
+    # A file rather than a pipe for errors, so a flood of them can't block ripgrep
+    errors = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=errors, cwd=cwd)
+    stopped = False
+    try:
+        for raw in process.stdout:
+            if not handle(raw):
+                stopped = True
+                break
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+        errors.seek(0)
+        error = errors.read().decode('utf-8', errors='replace').strip()
+        errors.close()
+    return (None if stopped else process.returncode), error
+
+
+def _json_command(command: Sequence[str], context: int) -> List[str]:
+    cmd = [command[0], '--json']
+    if context:
+        cmd.append(f'--context={context}')
+    cmd.extend(command[1:])
+    return cmd
+
+
+def run_ripgrep(
+    command: Sequence[str],
+    paths: Sequence[str] = (),
+    *,
+    context: int = 0,
+    max_results: int = DEFAULT_MAX_RESULTS,
+    max_per_file: int = DEFAULT_MAX_PER_FILE,
+    cwd: Optional[str] = None
+) -> SearchResult:
+    """Run ripgrep with ``--json`` and parse its output as it streams.
+
+    Only the first ``max_results`` matching lines, at most ``max_per_file``
+    per file, are decoded and kept along with their context lines. Past
+    that, matches are counted from the raw stream without decoding, and
+    ripgrep is stopped once MAX_COUNTED_MATCHES have been seen.
+
+    Args:
+        command: ripgrep executable and its options and pattern
+        paths: Files or directories to search, in chunks of PATHS_PER_PROCESS
+            (default: the working directory)
+        context: Context lines requested from ripgrep (-C), kept around kept matches only
+        max_results: Maximum matching lines to keep in total
+        max_per_file: Maximum matching lines to keep per file
+        cwd: Directory to run in
+
+    Returns:
+        Kept matches grouped by file, with overall counts
+    """
+    collector = _Collector(context, max_results, max_per_file)
+    result = collector.result
+
+    def handle(raw: bytes) -> bool:
+        if collector.full and not (collector.last_kept is not None and raw.startswith(_CONTEXT_PREFIX)):
+            # Past the overall cap: count without decoding
+            if raw.startswith(_MATCH_PREFIX):
+                collector.match()
+                if result.match_count >= MAX_COUNTED_MATCHES:
+                    result.complete = False
+                    return False
+            elif raw.startswith(_BEGIN_PREFIX):
+                collector.begin(None)
+            return True
+
+        message = json.loads(raw)
+        kind = message['type']
+        data = message['data']
+        if kind == 'begin':
+            collector.begin(_text(data['path']))
+        elif kind == 'match':
+            collector.match(data['line_number'], _clip(_text(data['lines'])))
+        elif kind == 'context' and context:
+            collector.context_line(data['line_number'], _clip(_text(data['lines'])))
+        return True
+
+    cmd = _json_command(command, context)
+    return_code, errors = _run_chunks(cmd, paths, cwd, handle)
+    result.error = '\n'.join(errors)
+    result.return_code = 0 if result.match_count else return_code
+    return result
+
+
+def _run_chunks(cmd: List[str], paths: Sequence[str], cwd: Optional[str], handle) -> Tuple[int, List[str]]:
+    """Run ripgrep over paths in chunks, stopping early if ``handle`` asks to.
+
+    Returns:
+        Combined exit status (0 if stopped early or anything matched, 1 if
+        nothing did, 2 on errors) and the error output of each run
+    """
+    chunks = [list(paths[i:i + PATHS_PER_PROCESS]) for i in range(0, len(paths), PATHS_PER_PROCESS)] or [[]]
+    codes, errors = set(), []
+    for chunk in chunks:
+        code, error = _stream(cmd + ['--'] + chunk if chunk else cmd, cwd, handle)
+        if error:
+            errors.append(error)
+        if code is None:
+            return 0, errors
+        codes.add(code)
+    # ripgrep exits with 1 when nothing matched and 2 on errors
+    if codes - {0, 1}:
+        return max(codes), errors
+    return (0 if 0 in codes else 1), errors
+
+
+def _python_pattern(pattern: str, ignore_case: bool) -> Optional['re.Pattern']:
+    try:
+        return re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    except re.error:
+        return None
+
+
+def run_ripgrep_many(
+    command: Sequence[str],
+    patterns: Sequence[str],
+    paths: Sequence[str] = (),
+    *,
+    ignore_case: bool = False,
+    context: int = 0,
+    max_results: int = DEFAULT_MAX_RESULTS,
+    max_per_file: int = DEFAULT_MAX_PER_FILE,
+    cwd: Optional[str] = None
+) -> Dict[str, SearchResult]:
+    """Search for several patterns in one ripgrep pass over the files.
+
+    ripgrep reports matching lines but not which pattern matched, so each
+    line is attributed by testing the patterns with Python's ``re``. Lines
+    no pattern explains (ripgrep's regex syntax differs in places) go to
+    the patterns ``re`` can't compile, or to every pattern if it compiles
+    them all. The caps apply to each pattern separately. Long path lists
+    are searched in chunks, with one ripgrep process per chunk.
+
+    Args:
+        command: ripgrep executable and its options, without patterns or paths
+        patterns: Regular expressions to search for
+        paths: Files or directories to search (default: the whole working directory)
+        ignore_case: Match case-insensitively
+        context: Context lines to keep around kept matches
+        max_results: Maximum matching lines to keep per pattern
+        max_per_file: Maximum matching lines to keep per file and pattern
+        cwd: Directory to run in
+
+    Returns:
+        Results for each pattern, in the order given; errors and the exit
+        status are reported on every result
+    """
+    patterns = list(dict.fromkeys(patterns))
+    collectors = {pattern: _Collector(context, max_results, max_per_file) for pattern in patterns}
+    compiled = [(collectors[p], _python_pattern(p, ignore_case)) for p in patterns]
+    fallback = [collector for collector, regex in compiled if regex is None] or list(collectors.values())
+    total = 0
+
+    def handle(raw: bytes) -> bool:
+        nonlocal total
+        message = json.loads(raw)
+        kind = message['type']
+        data = message['data']
+        if kind == 'begin':
+            path = _text(data['path'])
+            for collector in collectors.values():
+                collector.begin(path)
+        elif kind == 'match':
+            total += 1
+            text = _text(data['lines'])
+            matched = [collector for collector, regex in compiled if regex is not None and regex.search(text)]
+            line = _clip(text)
+            for collector in matched or fallback:
+                collector.match(data['line_number'], line)
+            if total >= MAX_COUNTED_MATCHES:
+                return False
+        elif kind == 'context' and context:
+            line = _clip(_text(data['lines']))
+            for collector in collectors.values():
+                collector.context_line(data['line_number'], line)
+        return True
+
+    base = _json_command(command, context)
+    if ignore_case:
+        base.append('-i')
+    for pattern in patterns:
+        base.extend(['-e', pattern])
+
+    return_code, errors = _run_chunks(base, paths, cwd, handle)
+
+    results = {}
+    for pattern, collector in collectors.items():
+        result = collector.result
+        result.complete = total < MAX_COUNTED_MATCHES
+        result.error = '\n'.join(errors)
+        result.return_code = 0 if result.match_count else (return_code or 1)
+        results[pattern] = result
+    return results
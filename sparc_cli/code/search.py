@@ -0,0 +1,244 @@
+"""Persistent BM25 index of a project's code chunks for offline, ranked code search."""
+
+import math
+import os
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sparc_cli.memory.retrieval import tokenize
+from sparc_cli.text import file_cache
+
+from .index import FileIndex, read_changed
+from .symbols import extract_symbols
+
+SEARCH_INDEX_FILENAME = 'search.db'
+
+# Module-level code between definitions is indexed in windows of this many lines
+WINDOW_LINES = 50
+
+# Longer definitions are split into pieces of this many lines, each titled with the definition's name
+MAX_CHUNK_LINES = 200
+
+# Preview lines are cut to this many characters
+MAX_PREVIEW_CHARS = 160
+
+# BM25 parameters, as for memory retrieval
+K1 = 1.5
+B = 0.75
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_id INTEGER NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_file ON chunks (file_id);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    chunk_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, chunk_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_chunk ON postings (chunk_id);
+"""
+
+
+@dataclass
+class SearchHit:
+    """A ranked code chunk.
+
+    Attributes:
+        path: File path relative to the project root
+        start_line: First line of the chunk (1-based)
+        end_line: Last line of the chunk (inclusive)
+        title: Qualified name of the definition, or '' for module-level code
+        score: BM25 score against the query
+        preview: The chunk's line matching most query terms, stripped
+    """
+    path: str
+    start_line: int
+    end_line: int
+    title: str
+    score: float
+    preview: str = ''
+
+
+def split_chunks(path: str, text: str) -> List[Tuple[int, int, str, str]]:
+    """Split a source file into searchable chunks.
+
+    Functions and methods are one chunk each (nested functions stay in
+    theirs), classes contribute their header up to the first member, and
+    the code left between definitions is cut into WINDOW_LINES windows.
+
+    Returns:
+        (start_line, end_line, title, doc) per chunk, in line order
+    """
+    lines = text.splitlines()
+    definitions = sorted((s for s in extract_symbols(path, text) if s.kind != 'import'), key=lambda s: s.line)
+    functions = {s.qualname for s in definitions if s.kind != 'class'}
+
+    chunks = []
+    covered = [False] * (len(lines) + 2)
+    for symbol in definitions:
+        if symbol.parent in functions:
+            continue
+        end = min(symbol.end_line, len(lines))
+        if symbol.kind == 'class':
+            members = [s.line for s in definitions if s.parent == symbol.qualname and s.line > symbol.line]
+            if members:
+                end = min(members) - 1
+                while end > symbol.line and not lines[end - 1].strip():
+                    end -= 1
+        for start in range(symbol.line, end + 1, MAX_CHUNK_LINES):
+            stop = min(start + MAX_CHUNK_LINES - 1, end)
+            chunks.append((start, stop, symbol.qualname, symbol.doc))
+            for line in range(start, stop + 1):
+                covered[line] = True
+
+    line = 1
+    while line <= len(lines):
+        if covered[line] or not lines[line - 1].strip():
+            line += 1
+            continue
+        start = line
+        while line <= len(lines) and not covered[line] and line - start < WINDOW_LINES:
+            line += 1
+        end = line - 1
+        while not lines[end - 1].strip():
+            end -= 1
+        chunks.append((start, end, '', ''))
+
+    chunks.sort()
+    return chunks
+
+
+def _chunk_terms(path: str, lines: List[str], chunk: Tuple[int, int, str, str]) -> Counter:
+    start, end, title, doc = chunk
+    terms = Counter(tokenize('\n'.join(lines[start - 1:end])))
+    # Names and docstrings say what the code is for, so they count extra
+    title_terms = tokenize(title.replace('.', ' '))
+    terms.update(title_terms + title_terms)
+    terms.update(tokenize(doc))
+    terms.update(tokenize(path))
+    return terms
+
+
+def _index_chunks(job: Tuple[str, str, Optional[str]]) -> Optional[tuple]:
+    """Split one file into chunks and count their terms; runs in worker processes.
+
+    Returns:
+        (path, mtime_ns, size, hash, chunks), with chunks None if the content
+        hash matches ``known_hash``; None if unreadable
+    """
+    result = read_changed(job)
+    if result is None or result[4] is None:
+        return result
+    path, mtime_ns, size, digest, text = result
+    lines = text.splitlines()
+    chunks = []
+    for chunk in split_chunks(path, text):
+        terms = _chunk_terms(path, lines, chunk)
+        chunks.append((chunk[0], chunk[1], chunk[2], sum(terms.values()), dict(terms)))
+    return (path, mtime_ns, size, digest, chunks)
+
+
+class CodeSearchIndex(FileIndex):
+    """SQLite BM25 index of the functions, classes and module-level code in a project.
+
+    Chunks are indexed by their identifier-split terms, with definition
+    names and docstrings weighted up, so a query such as 'parse config
+    file' finds ``parseConfigFile`` and code described that way.
+    Updates are incremental per file, like the symbol index.
+
+    Args:
+        root: Project root directory (default: current directory)
+        db_path: Optional explicit database path (default: <root>/.sparc/index/search.db)
+    """
+
+    FILENAME = SEARCH_INDEX_FILENAME
+    SCHEMA = _SCHEMA
+    _worker = staticmethod(_index_chunks)
+
+    def _clear(self, file_id: int) -> None:
+        self._conn.execute(
+            "DELETE FROM postings WHERE chunk_id IN (SELECT id FROM chunks WHERE file_id = ?)", (file_id,)
+        )
+        self._conn.execute("DELETE FROM chunks WHERE file_id = ?", (file_id,))
+
+    def _store_contents(self, file_id: int, contents) -> None:
+        for start, end, title, length, terms in contents:
+            chunk_id = self._conn.execute(
+                "INSERT INTO chunks (file_id, start_line, end_line, title, length) VALUES (?, ?, ?, ?, ?)",
+                (file_id, start, end, title, length)
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)",
+                [(term, chunk_id, tf) for term, tf in terms.items()]
+            )
+
+    def chunk_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def search(self, query: str, limit: int = 10) -> List[SearchHit]:
+        """Rank code chunks against a free-text query with BM25.
+
+        Args:
+            query: Words, identifiers or a description of the code wanted
+            limit: Maximum number of results (default: 10)
+
+        Returns:
+            Best-scoring chunks first, each with a preview line
+        """
+        query_terms = set(tokenize(query))
+        scores: Dict[int, float] = {}
+        with self._lock:
+            n_chunks, avg_len = self._conn.execute("SELECT COUNT(*), AVG(length) FROM chunks").fetchone()
+            if not n_chunks or not query_terms:
+                return []
+            avg_len = avg_len or 1.0
+            for term in query_terms:
+                postings = self._conn.execute(
+                    "SELECT p.chunk_id, p.tf, c.length FROM postings p JOIN chunks c ON c.id = p.chunk_id "
+                    "WHERE p.term = ?",
+                    (term,)
+                ).fetchall()
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n_chunks - df + 0.5) / (df + 0.5))
+                for chunk_id, tf, length in postings:
+                    norm = K1 * (1 - B + B * length / avg_len)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            hits = []
+            for chunk_id, score in ranked:
+                path, start, end, title = self._conn.execute(
+                    "SELECT f.path, c.start_line, c.end_line, c.title FROM chunks c JOIN files f ON f.id = c.file_id "
+                    "WHERE c.id = ?",
+                    (chunk_id,)
+                ).fetchone()
+                hits.append(SearchHit(path, start, end, title, score))
+
+        for hit in hits:
+            hit.preview = self._preview(hit, query_terms)
+        return hits
+
+    def _preview(self, hit: SearchHit, query_terms: set) -> str:
+        try:
+            lines = file_cache.get(os.path.join(self.root, hit.path)).lines
+        except (OSError, UnicodeDecodeError):
+            return ''
+        best, best_matches = '', -1
+        for line in lines[hit.start_line - 1:hit.end_line]:
+            matches = len(query_terms.intersection(tokenize(line)))
+            if matches > best_matches and line.strip():
+                best, best_matches = line.strip(), matches
+        if len(best) > MAX_PREVIEW_CHARS:
+            best = best[:MAX_PREVIEW_CHARS] + ' ...'
+        return best
@@ -0,0 +1,348 @@
+"""Symbol extraction from source files: AST-based for Python, regex-based for other languages."""
+
+import ast
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Tuple
+
+PYTHON_EXTENSIONS = frozenset({'.py', '.pyi'})
+
+# Files whose symbols cached_symbols keeps, one version each
+MAX_CACHED_SYMBOL_FILES = 1024
+
+# Identifier followed by an opening parenthesis, for call detection without a parser
+_CALL_RE = re.compile(r'\b([A-Za-z_$][\w$]*)\s*\(')
+
+_KEYWORDS = frozenset({
+    'if', 'for', 'while', 'switch', 'catch', 'return', 'sizeof', 'elif', 'else', 'with',
+    'function', 'new', 'typeof', 'await', 'match', 'case', 'print', 'super', 'not', 'and', 'or',
+    'func', 'fn', 'def'
+})
+
+# Definition patterns for languages without a parser here; group 1 is the name
+_REGEX_DEFINITIONS: List[Tuple[str, 're.Pattern']] = [
+    ('class', re.compile(
+        r'^\s*(?:export\s+)?(?:default\s+)?(?:pub(?:\([^)]*\))?\s+)?'
+        r'(?:(?:public|private|protected|internal|abstract|final|static|sealed|data|open)\s+)*'
+        r'(?:class|interface|struct|enum|trait|protocol|module|impl)\s+([A-Za-z_$][\w$]*)'
+    )),
+    ('class', re.compile(r'^\s*type\s+([A-Za-z_]\w*)\s+(?:struct|interface)\b')),
+    ('function', re.compile(
+        r'^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)\s*\('
+    )),
+    ('function', re.compile(
+        r'^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?'
+        r'(?:function\b|\([^)]*\)\s*(?::[^=]+)?=>|[A-Za-z_$][\w$]*\s*=>)'
+    )),
+    ('function', re.compile(r'^\s*func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)\s*[\[(]')),
+    ('function', re.compile(
+        r'^\s*(?:pub(?:\([^)]*\))?\s+)?(?:const\s+)?(?:async\s+)?(?:unsafe\s+)?(?:extern\s+"[^"]*"\s+)?'
+        r'fn\s+([A-Za-z_]\w*)'
+    )),
+    ('function', re.compile(r'^\s*def\s+(?:self\.)?([A-Za-z_]\w*[?!]?)')),
+    ('function', re.compile(
+        r'^\s*(?:(?:public|private|protected|internal|static|final|abstract|virtual|override|'
+        r'async|inline|synchronized|extern|const|unsigned|signed)\s+)*'
+        r'[A-Za-z_][\w:<>,\[\]*&\s]*?[\s*&]([A-Za-z_]\w*)\s*\([^;]*$'
+    )),
+]
+
+# Methods declared without a keyword, only recognized inside a class body
+_METHOD_RE = re.compile(
+    r'^\s*(?:(?:static|async|get|set|public|private|protected|override|readonly)\s+)*'
+    r'\*?([A-Za-z_$][\w$]*)\s*\([^)]*\)\s*(?::[^{]+)?\{'
+)
+
+_IMPORT_WORDS = frozenset({'import', 'from', 'as', 'use', 'using', 'require', 'include', 'const', 'let', 'var', 'type'})
+
+_NEW_RE = re.compile(r'\bnew\s+([A-Za-z_$][\w$]*)')
+
+_IMPORT_RE = re.compile(
+    r'^\s*(?:import\s|from\s+\S+\s+import\s|#include\s|use\s+[\w:]+|using\s+[\w.]+\s*;|require\s*\(|'
+    r'(?:const|let|var)\s+.*=\s*require\s*\()'
+)
+
+
+@dataclass(frozen=True)
+class Symbol:
+    """A definition or import in a source file.
+
+    Attributes:
+        name: Symbol name; for imports, the name bound in the file
+        kind: 'class', 'function', 'method' or 'import'
+        line: First line, including decorators (1-based)
+        end_line: Last line (inclusive)
+        signature: Definition header, e.g. 'def read(path: str) -> str:'
+        parent: Qualified name of the enclosing class or function, if any
+        calls: Names of functions called in the body
+        doc: First line of the docstring, or of the comment just above the definition
+    """
+    name: str
+    kind: str
+    line: int
+    end_line: int
+    signature: str
+    parent: Optional[str] = None
+    calls: FrozenSet[str] = frozenset()
+    doc: str = ''
+
+    @property
+    def qualname(self) -> str:
+        return f"{self.parent}.{self.name}" if self.parent else self.name
+
+
+def extract_symbols(path: str, text: str) -> List[Symbol]:
+    """Extract definitions and imports from a source file.
+
+    Python files are parsed with ``ast``; other files, and Python files
+    that don't parse, use line-based patterns for common languages.
+
+    Args:
+        path: File path, used to pick the language by extension
+        text: File contents
+
+    Returns:
+        Symbols in order of their first line
+    """
+    if os.path.splitext(path)[1].lower() in PYTHON_EXTENSIONS:
+        try:
+            return _python_symbols(text)
+        except (SyntaxError, ValueError):
+            pass
+    return _regex_symbols(text)
+
+
+_cache: 'OrderedDict[str, Tuple[int, Tuple[Symbol, ...]]]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def cached_symbols(path: str, text: str) -> Tuple[Symbol, ...]:
+    """Memoized ``extract_symbols``; unchanged file contents are parsed once.
+
+    Only the latest version of each file is kept, identified by a hash of
+    its contents rather than the contents themselves.
+    """
+    key = os.path.realpath(path)
+    version = hash(text)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == version:
+            _cache.move_to_end(key)
+            return cached[1]
+
+    symbols = tuple(extract_symbols(path, text))
+    with _cache_lock:
+        _cache[key] = (version, symbols)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_SYMBOL_FILES:
+            _cache.popitem(last=False)
+    return symbols
+
+
+def extract_references(path: str, text: str) -> List[Tuple[str, int]]:
+    """Find where names are used in a source file.
+
+    In Python every read of a name or attribute counts; in other languages
+    calls, ``new`` expressions and imports do.
+
+    Args:
+        path: File path, used to pick the language by extension
+        text: File contents
+
+    Returns:
+        Distinct (name, line) pairs in line order
+    """
+    refs = set()
+    if os.path.splitext(path)[1].lower() in PYTHON_EXTENSIONS:
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError):
+            tree = None
+        if tree is not None:
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+                    refs.add((node.id, node.lineno))
+                elif isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Load):
+                    refs.add((node.attr, node.end_lineno or node.lineno))
+                elif isinstance(node, ast.ImportFrom):
+                    refs.update((alias.name, getattr(alias, 'lineno', node.lineno)) for alias in node.names)
+                elif isinstance(node, ast.Import):
+                    refs.update((alias.name.split('.')[-1], getattr(alias, 'lineno', node.lineno)) for alias in node.names)
+            return sorted(refs, key=lambda ref: (ref[1], ref[0]))
+
+    for number, line in enumerate(text.splitlines(), 1):
+        if _IMPORT_RE.match(line):
+            refs.update((name, number) for name in re.findall(r'[A-Za-z_$][\w$]*', line)
+                        if name not in _IMPORT_WORDS)
+            continue
+        refs.update((name, number) for name in _CALL_RE.findall(line) if name not in _KEYWORDS)
+        refs.update((name, number) for name in _NEW_RE.findall(line))
+    return sorted(refs, key=lambda ref: (ref[1], ref[0]))
+
+
+def _python_symbols(text: str) -> List[Symbol]:
+    tree = ast.parse(text)
+    lines = text.splitlines()
+    symbols: List[Symbol] = []
+
+    def header(node: ast.AST) -> str:
+        body_start = node.body[0].lineno if node.body else node.lineno
+        end = max(body_start - 1, node.lineno)
+        header_lines = lines[node.lineno - 1:end]
+        if node.body:
+            # Body on the header's last line: keep everything up to it (offsets are in bytes)
+            before = lines[body_start - 1].encode()[:node.body[0].col_offset].decode(errors='ignore')
+            if before.strip():
+                header_lines = lines[node.lineno - 1:body_start - 1] + [before.rstrip()]
+        return '\n'.join(header_lines).strip()
+
+    def calls(node: ast.AST) -> FrozenSet[str]:
+        names = set()
+        for child in ast.walk(node):
+            if isinstance(child, ast.Call):
+                func = child.func
+                if isinstance(func, ast.Name):
+                    names.add(func.id)
+                elif isinstance(func, ast.Attribute):
+                    names.add(func.attr)
+        return frozenset(names)
+
+    def visit(body: List[ast.stmt], parent: Optional[str], parent_kind: Optional[str]) -> None:
+        for node in body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                if parent is None:
+                    signature = lines[node.lineno - 1].strip()
+                    for alias in node.names:
+                        name = alias.asname or alias.name.split('.')[0]
+                        symbols.append(Symbol(name, 'import', node.lineno, node.end_lineno, signature))
+            elif isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+                if isinstance(node, ast.ClassDef):
+                    kind = 'class'
+                else:
+                    kind = 'method' if parent_kind == 'class' else 'function'
+                symbol = Symbol(
+                    node.name, kind, start, node.end_lineno, header(node), parent,
+                    frozenset() if kind == 'class' else calls(node), _first_line(ast.get_docstring(node))
+                )
+                symbols.append(symbol)
+                visit(node.body, symbol.qualname, kind)
+            elif parent is None and isinstance(node, (ast.If, ast.Try)):
+                # Conditional imports and definitions at module level
+                visit(node.body, parent, parent_kind)
+                visit(node.orelse, parent, parent_kind)
+
+    visit(tree.body, None, None)
+    symbols.sort(key=lambda s: s.line)
+    return symbols
+
+
+def _block_end(lines: List[str], start: int) -> int:
+    """Find the last line (0-based) of a block starting at ``start``.
+
+    Blocks that open a brace within their first few lines end where the
+    braces balance; others end before the next line indented no deeper
+    than the first.
+    """
+    depth = 0
+    opened = False
+    for i in range(start, len(lines)):
+        code = re.sub(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|//.*$', '', lines[i])
+        depth += code.count('{') - code.count('}')
+        opened = opened or '{' in code
+        if opened and depth <= 0:
+            return i
+        if not opened and (i - start >= 2 or code.rstrip().endswith(';')):
+            break
+
+    indent = len(lines[start]) - len(lines[start].lstrip())
+    end = start
+    for i in range(start + 1, len(lines)):
+        stripped = lines[i].strip()
+        if not stripped:
+            continue
+        if len(lines[i]) - len(lines[i].lstrip()) <= indent:
+            # Keep a closing 'end' or bracket line with the block
+            if re.match(r'^(end\b|[)\]}])', stripped):
+                end = i
+            break
+        end = i
+    return end
+
+
+def _regex_symbols(text: str) -> List[Symbol]:
+    lines = text.splitlines()
+    symbols: List[Symbol] = []
+    # Enclosing class blocks as (qualified name, last line)
+    scopes: List[Tuple[str, int]] = []
+
+    for i, line in enumerate(lines):
+        while scopes and scopes[-1][1] < i:
+            scopes.pop()
+        if _IMPORT_RE.match(line):
+            symbols.append(Symbol(_import_name(line), 'import', i + 1, i + 1, line.strip()))
+            continue
+
+        definitions = _REGEX_DEFINITIONS + [('function', _METHOD_RE)] if scopes else _REGEX_DEFINITIONS
+        for kind, pattern in definitions:
+            match = pattern.match(line)
+            if not match or match.group(1) in _KEYWORDS:
+                continue
+            end = _block_end(lines, i)
+            parent = scopes[-1][0] if scopes else None
+            if kind == 'function' and parent is not None:
+                kind = 'method'
+            body = '\n'.join(lines[i + 1:end + 1]) if end > i else line[match.end():]
+            calls = frozenset(
+                name for name in _CALL_RE.findall(body)
+                if name != match.group(1) and name not in _KEYWORDS
+            )
+            symbol = Symbol(
+                match.group(1), kind, i + 1, end + 1, line.strip(), parent,
+                frozenset() if kind == 'class' else calls, _comment_above(lines, i)
+            )
+            symbols.append(symbol)
+            if kind == 'class' and end > i:
+                scopes.append((symbol.qualname, end))
+            break
+
+    return symbols
+
+
+def _first_line(text: Optional[str]) -> str:
+    for line in (text or '').splitlines():
+        if line.strip():
+            return line.strip()
+    return ''
+
+
+# Comment lines in common languages; '#' only when not a preprocessor directive or attribute
+_COMMENT_RE = re.compile(r'^\s*(?://+!?|/\*+|\*+/?|#(?![\[!]|include\b|define\b|if|endif\b|else\b|pragma\b)|--)')
+
+
+def _comment_above(lines: List[str], index: int) -> str:
+    """First line of text in the comment block directly above a definition."""
+    start = index
+    while start > 0 and _COMMENT_RE.match(lines[start - 1]) and lines[start - 1].strip():
+        start -= 1
+    for line in lines[start:index]:
+        text = _COMMENT_RE.sub('', line, count=1).strip().rstrip('*/').strip()
+        if text and not text.startswith('@'):
+            return text
+    return ''
+
+
+def _import_name(line: str) -> str:
+    """Best-effort name bound by an import line."""
+    line = line.strip().rstrip(';')
+    match = re.search(r'\bas\s+([A-Za-z_$][\w$]*)\s*$', line)
+    if match:
+        return match.group(1)
+    match = re.match(r'(?:const|let|var)\s+([A-Za-z_$][\w$]*)', line)
+    if match:
+        return match.group(1)
+    words = re.findall(r'[A-Za-z_$][\w$]*', line.split(' from ')[0])
+    return words[-1] if words else line
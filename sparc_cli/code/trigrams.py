@@ -0,0 +1,488 @@
+"""Trigram index that narrows regex searches to candidate files, in the style of codesearch.
+
+Every file's distinct byte trigrams (ASCII-lowercased) are recorded in
+segment files: a base segment for the whole project and a delta segment
+for files changed since it was built. A segment holds a sorted table of
+trigrams and, for each, a sorted array of file ids; both are read
+through ``mmap``, so a query only touches the postings it needs. A
+regular expression is reduced to the literal strings any match must
+contain, and files lacking their trigrams are ruled out. Candidates are
+then verified by running ripgrep on them only.
+
+The index is kept current incrementally: files changed since the last
+update (per ``git diff`` when available, confirmed by size and mtime)
+are re-read into the delta segment, and the base is rebuilt once the
+delta grows large. Files changed since the last update are always
+candidates, so results are never stale.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import subprocess
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+
+from sparc_cli.memory.knowledge_base import SPARC_DIR
+
+from .files import changed_files, get_project_files
+from .index import INDEX_DIRNAME, MAX_FILE_BYTES, PARALLEL_MIN_FILES, index_dir
+
+TRIGRAM_META_FILENAME = 'trigrams.json'
+_SEGMENT_FILENAME = 'trigrams-{}.bin'
+_META_VERSION = 1
+
+# The base is rebuilt once this many files, or this share of all files, are in the delta
+MAX_DELTA_FILES = 2000
+MAX_DELTA_FRACTION = 0.1
+
+# Files per job sent to a worker process
+_CHUNK_FILES = 200
+
+_MAGIC = b'SPTRI\x01\x00\x00'
+_HEADER = struct.Struct('=8sII')
+_ENTRY = struct.Struct('=III')
+
+# A query is None (matches any file), literal bytes every match contains,
+# or ('and' | 'or', [queries])
+Query = Union[None, bytes, Tuple[str, list]]
+
+
+@dataclass
+class TrigramStats:
+    """Outcome of a trigram index update.
+
+    Attributes:
+        files: Files covered by the index
+        indexed: Files read during this update
+        delta: Files in the delta segment
+        rebuilt: Whether the base segment was rebuilt
+        duration: Seconds taken
+    """
+    files: int = 0
+    indexed: int = 0
+    delta: int = 0
+    rebuilt: bool = False
+    duration: float = 0.0
+
+
+def _file_trigrams(root: str, path: str) -> Tuple[Optional[List[int]], Optional[Set[bytes]]]:
+    """Return a file's [mtime_ns, size] and trigrams (None if too large to index, or unreadable)."""
+    try:
+        full_path = os.path.join(root, path)
+        stat = os.stat(full_path)
+        if stat.st_size > MAX_FILE_BYTES:
+            return [stat.st_mtime_ns, stat.st_size], None
+        with open(full_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None, None
+    if b'\0' in data[:8192]:
+        # Binary, which ripgrep skips too
+        return [stat.st_mtime_ns, stat.st_size], set()
+    data = data.lower()
+    return [stat.st_mtime_ns, stat.st_size], {data[i:i + 3] for i in range(len(data) - 2)}
+
+
+def _index_chunk(job: Tuple[str, int, List[str]]) -> Tuple[List[tuple], Dict[bytes, bytes]]:
+    """Read a chunk of files and invert their trigrams; runs in worker processes.
+
+    Returns:
+        (path, stat, indexed) for each readable file, and the chunk's
+        postings as raw uint32 file id arrays by trigram
+    """
+    root, first_id, paths = job
+    files = []
+    postings: Dict[bytes, array] = {}
+    for path in paths:
+        stat, trigrams = _file_trigrams(root, path)
+        if stat is None:
+            continue
+        files.append((path, stat, trigrams is not None))
+        if trigrams:
+            file_id = first_id + len(files) - 1
+            for trigram in trigrams:
+                ids = postings.get(trigram)
+                if ids is None:
+                    ids = postings[trigram] = array('I')
+                ids.append(file_id)
+    return files, {trigram: ids.tobytes() for trigram, ids in postings.items()}
+
+
+def _run_jobs(jobs: List[tuple], workers: Optional[int]) -> Iterable[tuple]:
+    if sum(len(job[2]) for job in jobs) < PARALLEL_MIN_FILES or workers == 1:
+        yield from map(_index_chunk, jobs)
+        return
+    try:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError):
+        yield from map(_index_chunk, jobs)
+        return
+    with executor:
+        yield from executor.map(_index_chunk, jobs)
+
+
+def _write_segment(path: str, root: str, paths: List[str], workers: Optional[int]) -> List[tuple]:
+    """Index files into a segment file.
+
+    Chunks are merged in order, so file ids stay sorted in every posting
+    list. Unreadable files are left out and later ids shifted down.
+
+    Returns:
+        (path, stat, indexed) for each file, in file id order
+    """
+    files: List[tuple] = []
+    postings: Dict[bytes, array] = {}
+    jobs = [(root, start, paths[start:start + _CHUNK_FILES]) for start in range(0, len(paths), _CHUNK_FILES)]
+    for (_, start, _), (chunk_files, chunk_postings) in zip(jobs, _run_jobs(jobs, workers)):
+        shift = start - len(files)
+        files.extend(chunk_files)
+        for trigram, raw in chunk_postings.items():
+            ids = array('I')
+            ids.frombytes(raw)
+            if shift:
+                ids = array('I', (i - shift for i in ids))
+            existing = postings.get(trigram)
+            if existing is None:
+                postings[trigram] = ids
+            else:
+                existing.extend(ids)
+
+    keys = sorted(postings)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, len(keys), sum(len(ids) for ids in postings.values())))
+        offset = 0
+        for trigram in keys:
+            count = len(postings[trigram])
+            f.write(_ENTRY.pack(int.from_bytes(trigram, 'big'), offset, count))
+            offset += count
+        for trigram in keys:
+            postings[trigram].tofile(f)
+    os.replace(tmp_path, path)
+    return files
+
+
+class _Segment:
+    """Read-only view of a segment file."""
+
+    def __init__(self, path: str, paths: List[str]):
+        self.paths = paths
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._keys, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a trigram index segment")
+        self._postings_start = _HEADER.size + self._keys * _ENTRY.size
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def postings(self, trigram: bytes) -> Set[int]:
+        key = int.from_bytes(trigram, 'big')
+        lo, hi = 0, self._keys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _ENTRY.unpack_from(self._mm, _HEADER.size + mid * _ENTRY.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self._keys:
+            return set()
+        found, offset, count = _ENTRY.unpack_from(self._mm, _HEADER.size + lo * _ENTRY.size)
+        if found != key:
+            return set()
+        ids = array('I')
+        start = self._postings_start + offset * ids.itemsize
+        ids.frombytes(self._mm[start:start + count * ids.itemsize])
+        return set(ids)
+
+    def evaluate(self, query: Query) -> Optional[Set[int]]:
+        """Ids of files that may match a query; None means all of them."""
+        if query is None:
+            return None
+        if isinstance(query, bytes):
+            trigrams = sorted({query[i:i + 3] for i in range(len(query) - 2)})
+            result: Optional[Set[int]] = None
+            for trigram in trigrams:
+                ids = self.postings(trigram)
+                result = ids if result is None else result & ids
+                if not result:
+                    return set()
+            return result
+        op, parts = query
+        results = [self.evaluate(part) for part in parts]
+        if op == 'or':
+            if any(r is None for r in results):
+                return None
+            return set().union(*results)
+        known = [r for r in results if r is not None]
+        if not known:
+            return None
+        return set.intersection(*known)
+
+
+def _simplify(op: str, parts: List[Query]) -> Query:
+    if op == 'and':
+        parts = [p for p in parts if p is not None]
+        if not parts:
+            return None
+    elif any(p is None for p in parts):
+        return None
+    return parts[0] if len(parts) == 1 else (op, parts)
+
+
+def _plan(items, ignore_case: bool) -> Query:
+    parts: List[Query] = []
+    run = bytearray()
+
+    def flush():
+        if len(run) >= 3:
+            parts.append(bytes(run).lower())
+        run.clear()
+
+    for op, av in items:
+        name = str(op)
+        if name == 'LITERAL':
+            char = chr(av)
+            if ignore_case and ord(char) > 127:
+                # Case variants of non-ASCII letters differ in more than ASCII lowercasing
+                flush()
+            else:
+                run.extend(char.encode('utf-8'))
+            continue
+        flush()
+        if name == 'SUBPATTERN':
+            _, add_flags, _, sub = av
+            parts.append(_plan(sub, ignore_case or bool(add_flags & re.IGNORECASE)))
+        elif name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT'):
+            low, _, sub = av
+            if low >= 1:
+                parts.append(_plan(sub, ignore_case))
+        elif name == 'BRANCH':
+            parts.append(_simplify('or', [_plan(branch, ignore_case) for branch in av[1]]))
+        elif name == 'ATOMIC_GROUP':
+            parts.append(_plan(av, ignore_case))
+        # Anything else (classes, anchors, lookarounds, backreferences) requires no literal
+    flush()
+    return _simplify('and', parts)
+
+
+def regex_query(pattern: str, ignore_case: bool = False) -> Query:
+    """Reduce a regular expression to literal strings every match must contain.
+
+    Returns:
+        Query over literals of at least 3 bytes, or None if no literal is
+        required or the pattern can't be parsed (ripgrep's syntax differs
+        from Python's in places)
+    """
+    try:
+        parsed = _sre_parse.parse(pattern, re.IGNORECASE if ignore_case else 0)
+    except (re.error, OverflowError, RecursionError, ValueError):
+        return None
+    return _plan(parsed, ignore_case or bool(parsed.state.flags & re.IGNORECASE))
+
+
+def _head(root: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True, check=True
+        ).stdout.decode().strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class TrigramIndex:
+    """Persistent trigram index of a project's files, stored in .sparc/index.
+
+    Args:
+        root: Project root directory
+    """
+
+    def __init__(self, root: str = '.'):
+        self.root = os.path.realpath(root)
+        self.directory = os.path.join(self.root, SPARC_DIR, INDEX_DIRNAME)
+        self._meta: Optional[Dict] = None
+        self._meta_version: Optional[Tuple[int, int]] = None
+        self._segments: Dict[str, _Segment] = {}
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.directory, TRIGRAM_META_FILENAME)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.meta_path)
+
+    def close(self) -> None:
+        for segment in self._segments.values():
+            segment.close()
+        self._segments = {}
+        self._meta = None
+        self._meta_version = None
+
+    def _load(self) -> Optional[Dict]:
+        """Load metadata and segments, again whenever another process updated them."""
+        try:
+            stat = os.stat(self.meta_path)
+        except OSError:
+            self.close()
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        if self._meta is not None and version == self._meta_version:
+            return self._meta
+        self.close()
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            if meta.get('version') != _META_VERSION:
+                return None
+            for name in ('base', 'delta'):
+                self._segments[name] = _Segment(
+                    os.path.join(self.directory, _SEGMENT_FILENAME.format(name)), meta[name]
+                )
+        except (OSError, ValueError, KeyError):
+            self.close()
+            return None
+        self._meta, self._meta_version = meta, version
+        return meta
+
+    def _changed(self, meta: Dict, paths: Iterable[str]) -> List[str]:
+        """Files among paths whose size or mtime differ from when they were indexed."""
+        stats = meta['stats']
+        changed = []
+        for path in paths:
+            try:
+                stat = os.stat(os.path.join(self.root, path))
+            except OSError:
+                continue
+            if stats.get(path) != [stat.st_mtime_ns, stat.st_size]:
+                changed.append(path)
+        return changed
+
+    def dirty_files(self) -> List[str]:
+        """Files added or changed since the index was last updated.
+
+        In git repositories only files git reports as changed since the
+        indexed commit are checked; elsewhere every file is.
+        """
+        meta = self._load()
+        if meta is None:
+            return []
+        if meta.get('commit'):
+            try:
+                return self._changed(meta, changed_files(self.root, meta['commit']))
+            except ValueError:
+                pass
+        return self._changed(meta, get_project_files(self.root).files())
+
+    def update(self, workers: Optional[int] = None, rebuild: bool = False) -> TrigramStats:
+        """Bring the index up to date, building it if needed.
+
+        Changed files go into the delta segment; the base is rebuilt when
+        ``rebuild`` is set, there is no index yet, or the delta is too large.
+
+        Args:
+            workers: Worker processes for reading files (default: one per CPU)
+            rebuild: Rebuild everything from scratch
+        """
+        started = time.monotonic()
+        index_dir(self.root)
+        project = get_project_files(self.root)
+        project.invalidate()
+        current = list(project.files())
+        current_set = set(current)
+        commit = _head(self.root)
+
+        meta = None if rebuild else self._load()
+        stats = TrigramStats()
+        if meta is not None:
+            dirty = set(self.dirty_files())
+            delta = [p for p in dict.fromkeys(meta['delta'] + sorted(dirty)) if p in current_set]
+            if len(delta) > max(MAX_DELTA_FILES, MAX_DELTA_FRACTION * len(current)):
+                meta = None
+
+        if meta is None:
+            self.close()
+            files = _write_segment(os.path.join(self.directory, _SEGMENT_FILENAME.format('base')),
+                                   self.root, current, workers)
+            _write_segment(os.path.join(self.directory, _SEGMENT_FILENAME.format('delta')), self.root, [], workers)
+            meta = {
+                'version': _META_VERSION,
+                'base': [path for path, _, _ in files],
+                'delta': [],
+                'masked': [],
+                'unindexed': [path for path, _, indexed in files if not indexed],
+                'stats': {path: stat for path, stat, _ in files}
+            }
+            stats.indexed, stats.rebuilt = len(files), True
+        else:
+            self.close()
+            files = _write_segment(os.path.join(self.directory, _SEGMENT_FILENAME.format('delta')),
+                                   self.root, delta, workers)
+            base = set(meta['base'])
+            delta_paths = [path for path, _, _ in files]
+            removed = set(meta['stats']) - current_set
+            # Base entries superseded by the delta or deleted since
+            masked = (set(meta['masked']) | set(delta_paths) | set(meta['delta']) | removed) & base
+            unindexed = (set(meta['unindexed']) - set(delta_paths) - removed) | {
+                path for path, _, indexed in files if not indexed
+            }
+            meta_stats = {path: stat for path, stat in meta['stats'].items() if path not in removed}
+            meta_stats.update((path, stat) for path, stat, _ in files)
+            meta.update(delta=delta_paths, masked=sorted(masked), unindexed=sorted(unindexed), stats=meta_stats)
+            stats.indexed = len(files)
+
+        meta['commit'] = commit
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+        stats.files = len(meta['stats'])
+        stats.delta = len(meta['delta'])
+        stats.duration = time.monotonic() - started
+        return stats
+
+    def candidates(self, pattern: str, ignore_case: bool = False) -> Optional[List[str]]:
+        """Files that may contain a match for a regular expression.
+
+        Returns:
+            Candidate paths relative to the root, including every file
+            changed since the last update and every file too large to
+            index; None if there's no index or the pattern requires no
+            literal text, in which case every file must be searched
+        """
+        meta = self._load()
+        if meta is None:
+            return None
+        query = regex_query(pattern, ignore_case)
+        if query is None:
+            return None
+
+        masked = set(meta['masked'])
+        result: Dict[str, None] = {}
+        for name in ('base', 'delta'):
+            segment = self._segments[name]
+            ids = segment.evaluate(query)
+            if ids is None:
+                return None
+            paths = (segment.paths[i] for i in sorted(ids))
+            result.update((path, None) for path in paths if name == 'delta' or path not in masked)
+        result.update((path, None) for path in meta['unindexed'])
+        result.update((path, None) for path in self.dirty_files())
+        return [path for path in result if os.path.isfile(os.path.join(self.root, path))]
+
+    def file_count(self) -> int:
+        meta = self._load()
+        return len(meta['stats']) if meta else 0
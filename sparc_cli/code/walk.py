@@ -0,0 +1,306 @@
+"""Parallel, gitignore-aware directory walker for tree listings."""
+
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pathspec
+
+# Entries listed at most by one walk, unless the caller asks otherwise
+DEFAULT_MAX_ENTRIES = 2000
+
+# Threads scanning the directories of one level of the tree
+DEFAULT_WORKERS = 8
+
+_GROUP_NAME = re.compile(r'\(\?P<\w+>')
+
+
+class IgnoreMatcher:
+    """Gitignore-style patterns compiled into one matcher.
+
+    Patterns from nested ``.gitignore`` files are rewritten relative to the
+    walk's root, so each directory needs a single matcher however many
+    ignore files apply to it. Without negated patterns, all of them are
+    joined into one regular expression.
+
+    Args:
+        patterns: Gitignore-syntax lines, later lines taking precedence
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.patterns = [p for p in patterns if p.strip() and not p.startswith('#')]
+        compiled = [pathspec.patterns.GitWildMatchPattern(p) for p in self.patterns]
+        self._rules = [(p.regex, p.include) for p in compiled if p.include is not None]
+        self._regex = None
+        if all(include for _, include in self._rules):
+            # Named groups would clash once joined
+            self._regex = re.compile('|'.join(
+                f'(?:{_GROUP_NAME.sub("(?:", regex.pattern)})' for regex, _ in self._rules
+            ) or '(?!)')
+
+    def extend(self, lines: Iterable[str], base: str) -> 'IgnoreMatcher':
+        """Return a matcher that also applies a ``.gitignore`` found in directory ``base``."""
+        return IgnoreMatcher(self.patterns + [_rebase(line, base) for line in lines])
+
+    def __call__(self, path: str, is_dir: bool = False) -> bool:
+        """Whether a path relative to the root is ignored."""
+        if is_dir:
+            path += '/'
+        if self._regex is not None:
+            return self._regex.match(path) is not None
+        for regex, include in reversed(self._rules):
+            if regex.match(path):
+                return include
+        return False
+
+
+def _rebase(line: str, base: str) -> str:
+    """Rewrite a line of ``base/.gitignore`` as a pattern relative to the walk's root."""
+    line = line.rstrip('\n').strip()
+    if not base or not line or line.startswith('#'):
+        return line
+    negate = line.startswith('!')
+    body = line[1:] if negate else line
+    if body.startswith('/'):
+        body = f'/{base}{body}'
+    elif '/' in body.rstrip('/'):
+        # Patterns with an inner slash are relative to the ignore file's directory
+        body = f'/{base}/{body}'
+    else:
+        body = f'/{base}/**/{body}'
+    return f"!{body}" if negate else body
+
+
+@dataclass
+class FileEntry:
+    """A listed file; size and mtime are only read when asked for."""
+    name: str
+    size: Optional[int] = None
+    mtime: Optional[float] = None
+
+
+@dataclass
+class DirEntry:
+    """A listed directory.
+
+    Attributes:
+        name: Directory name
+        path: Path relative to the walk's root ('' for the root)
+        dirs: Subdirectories, sorted case-insensitively
+        files: Files, sorted case-insensitively
+        scanned: Whether the directory's contents were listed (False past max_depth or the entry cap)
+        error: Why the directory couldn't be read, if it couldn't
+    """
+    name: str
+    path: str
+    dirs: List['DirEntry'] = field(default_factory=list)
+    files: List[FileEntry] = field(default_factory=list)
+    scanned: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class WalkResult:
+    """Outcome of a walk.
+
+    Attributes:
+        root: The walked directory
+        entries: Files and directories listed
+        truncated: Whether the entry cap left entries out
+    """
+    root: DirEntry
+    entries: int = 0
+    truncated: bool = False
+
+
+def _scan(
+    root: str,
+    directory: DirEntry,
+    ignore: IgnoreMatcher,
+    follow_links: bool,
+    want_stat: bool,
+    visited: Set[Tuple[int, int]]
+) -> Tuple[IgnoreMatcher, List[DirEntry], List[FileEntry]]:
+    """List one directory, applying its own ``.gitignore`` on top of the inherited rules."""
+    try:
+        with os.scandir(os.path.join(root, directory.path)) as it:
+            entries = list(it)
+    except PermissionError:
+        directory.error = 'Permission denied'
+        return ignore, [], []
+    except OSError as e:
+        directory.error = e.strerror or str(e)
+        return ignore, [], []
+
+    for entry in entries:
+        if entry.name == '.gitignore':
+            try:
+                with open(entry.path, encoding='utf-8', errors='replace') as f:
+                    ignore = ignore.extend(f, directory.path)
+            except OSError:
+                pass
+            break
+
+    dirs, files = [], []
+    prefix = f"{directory.path}/" if directory.path else ''
+    for entry in entries:
+        rel = prefix + entry.name
+        try:
+            if entry.is_symlink() and not follow_links:
+                continue
+            is_dir = entry.is_dir()
+            if ignore(rel, is_dir):
+                continue
+            if is_dir:
+                if follow_links and entry.is_symlink():
+                    # Don't loop through links back up the tree
+                    stat = entry.stat()
+                    if (stat.st_dev, stat.st_ino) in visited:
+                        continue
+                    visited.add((stat.st_dev, stat.st_ino))
+                dirs.append(DirEntry(entry.name, rel))
+            else:
+                file = FileEntry(entry.name)
+                if want_stat:
+                    # DirEntry caches the stat, so size and mtime cost one call
+                    stat = entry.stat()
+                    file.size, file.mtime = stat.st_size, stat.st_mtime
+                files.append(file)
+        except OSError:
+            continue
+
+    dirs.sort(key=lambda d: d.name.lower())
+    files.sort(key=lambda f: f.name.lower())
+    return ignore, dirs, files
+
+
+def walk_tree(
+    path: str,
+    *,
+    max_depth: Optional[int] = 1,
+    ignore: Optional[IgnoreMatcher] = None,
+    follow_links: bool = False,
+    want_stat: bool = False,
+    max_entries: int = DEFAULT_MAX_ENTRIES,
+    workers: int = DEFAULT_WORKERS
+) -> WalkResult:
+    """Walk a directory tree breadth-first, listing each level's directories in parallel.
+
+    ``.gitignore`` files found along the way apply to their directory and
+    everything below it. Levels are scanned in parallel but taken in
+    order, so the entries kept under ``max_entries`` are always the
+    shallowest ones, in sorted order.
+
+    Args:
+        path: Directory to walk
+        max_depth: Levels to list below it (1 lists its direct contents; None for all)
+        ignore: Patterns to skip, on top of any ``.gitignore`` files
+        follow_links: Whether to list symlinked files and descend into symlinked directories
+        want_stat: Whether to read file sizes and modification times
+        max_entries: Maximum files and directories to list in total
+        workers: Threads scanning directories
+
+    Returns:
+        The root directory with its listed contents, and whether the cap was hit
+    """
+    root = os.path.realpath(path)
+    result = WalkResult(DirEntry(os.path.basename(root) or root, ''))
+    visited: Set[Tuple[int, int]] = set()
+    try:
+        stat = os.stat(root)
+        visited.add((stat.st_dev, stat.st_ino))
+    except OSError:
+        pass
+
+    level = [(result.root, ignore or IgnoreMatcher())]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        depth = 0
+        while level and (max_depth is None or depth < max_depth):
+            depth += 1
+            scans = executor.map(
+                lambda item: _scan(root, item[0], item[1], follow_links, want_stat, visited), level
+            )
+
+            next_level = []
+            for (directory, _), (matcher, dirs, files) in zip(level, scans):
+                if result.truncated:
+                    continue
+                directory.scanned = True
+                room = max_entries - result.entries
+                if len(dirs) + len(files) > room:
+                    # Keep directories first: they lead to the rest of the tree
+                    result.truncated = True
+                    dirs, files = dirs[:room], files[:max(0, room - len(dirs))]
+                directory.dirs, directory.files = dirs, files
+                result.entries += len(dirs) + len(files)
+                next_level.extend((d, matcher) for d in dirs)
+            level = next_level
+    return result
+
+
+@dataclass
+class DirSummary:
+    """Aggregate of the files below a directory.
+
+    Attributes:
+        files: Files, in the directory and all its subdirectories
+        dirs: Subdirectories, at any depth
+        size: Total size of the files in bytes
+        newest: Latest file modification time
+        extensions: File counts by lowercased extension ('' for none)
+        complete: False if part of the subtree wasn't walked
+    """
+    files: int = 0
+    dirs: int = 0
+    size: int = 0
+    newest: Optional[float] = None
+    extensions: Counter = field(default_factory=Counter)
+    complete: bool = True
+
+    def add(self, other: 'DirSummary') -> None:
+        self.files += other.files
+        self.dirs += other.dirs
+        self.size += other.size
+        if other.newest is not None and (self.newest is None or other.newest > self.newest):
+            self.newest = other.newest
+        self.extensions.update(other.extensions)
+        self.complete = self.complete and other.complete
+
+
+def summarize_files(files: Iterable[FileEntry]) -> DirSummary:
+    """Aggregate a list of files (walked with ``want_stat`` for sizes and times)."""
+    summary = DirSummary()
+    for file in files:
+        summary.files += 1
+        summary.size += file.size or 0
+        if file.mtime is not None and (summary.newest is None or file.mtime > summary.newest):
+            summary.newest = file.mtime
+        summary.extensions[os.path.splitext(file.name)[1].lower()] += 1
+    return summary
+
+
+def summarize_tree(root: DirEntry) -> Dict[str, DirSummary]:
+    """Aggregate every walked directory's subtree, bottom-up in one pass.
+
+    Returns:
+        Summaries keyed by directory path relative to the walk's root
+    """
+    order = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        order.append(directory)
+        stack.extend(directory.dirs)
+
+    summaries: Dict[str, DirSummary] = {}
+    for directory in reversed(order):
+        summary = summarize_files(directory.files)
+        summary.dirs = len(directory.dirs)
+        summary.complete = directory.scanned and not directory.error
+        for subdir in directory.dirs:
+            summary.add(summaries[subdir.path])
+        summaries[directory.path] = summary
+    return summaries
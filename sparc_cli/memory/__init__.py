@@ -0,0 +1,47 @@
+from .compaction import MemoryArchive, ArchivedItem, extractive_summary
+from .dedup import (
+    NearDuplicateIndex, RecordDedupIndex, shingles, merge_snippets, snippet_line_range
+)
+from .knowledge_base import ProjectKnowledgeBase, KnowledgeEntry, ensure_sparc_dir, SPARC_DIR
+from .related_files import RelatedFilesRegistry, normalize_path
+from .retrieval import BM25Index, RecordIndex, tokenize
+from .snippet_refs import SnippetRefRecord, SnippetResolver
+from .snapshot import ContextMemory, MemorySnapshot, MemoryChange
+from .work_log import WorkLog, WorkLogEvent, JsonlWorkLogSink
+from .store import (
+    BoundedPriorityStore, BoundedPriorityList, MemoryRecord, NoteRecord, FactRecord, SnippetRecord
+)
+
+__all__ = [
+    'BoundedPriorityStore',
+    'BoundedPriorityList',
+    'MemoryRecord',
+    'NoteRecord',
+    'FactRecord',
+    'SnippetRecord',
+    'RelatedFilesRegistry',
+    'normalize_path',
+    'ProjectKnowledgeBase',
+    'KnowledgeEntry',
+    'ensure_sparc_dir',
+    'SPARC_DIR',
+    'BM25Index',
+    'RecordIndex',
+    'tokenize',
+    'SnippetRefRecord',
+    'SnippetResolver',
+    'NearDuplicateIndex',
+    'RecordDedupIndex',
+    'shingles',
+    'merge_snippets',
+    'snippet_line_range',
+    'MemoryArchive',
+    'ArchivedItem',
+    'extractive_summary',
+    'ContextMemory',
+    'MemorySnapshot',
+    'MemoryChange',
+    'WorkLog',
+    'WorkLogEvent',
+    'JsonlWorkLogSink'
+]
@@ -0,0 +1,201 @@
+"""Condensing evicted memory into summaries, with an on-disk archive of the originals."""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from sparc_cli.text.processing import estimate_tokens
+
+from .knowledge_base import ensure_sparc_dir
+from .retrieval import BM25Index, tokenize
+from .store import MemoryRecord
+
+ARCHIVE_FILENAME = 'memory_archive.db'
+
+# Sentence boundaries: end punctuation followed by whitespace, or line breaks
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    content TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    run_id TEXT,
+    archived_at REAL NOT NULL
+);
+"""
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences and list items, dropping list markers and blanks."""
+    sentences = []
+    for part in _SENTENCE_RE.split(text):
+        part = part.strip().lstrip('-*• ').strip()
+        if part:
+            sentences.append(part)
+    return sentences
+
+
+def extractive_summary(texts: Iterable[str], max_tokens: int) -> str:
+    """Condense texts offline by keeping their most central sentences.
+
+    Sentences are scored by how frequent their terms are across all of the
+    texts, normalized for length, so statements that several items repeat
+    or build on win over one-off detail. The best sentences that fit the
+    token budget are returned in their original order, one per line.
+
+    Args:
+        texts: Texts to condense, in order
+        max_tokens: Estimated token budget for the summary
+
+    Returns:
+        Summary text, or empty string if there's nothing to summarize
+    """
+    sentences: List[str] = []
+    seen = set()
+    for text in texts:
+        for sentence in split_sentences(text):
+            key = sentence.lower()
+            if key not in seen:
+                seen.add(key)
+                sentences.append(sentence)
+    if not sentences:
+        return ""
+
+    terms = [tokenize(sentence) for sentence in sentences]
+    frequency: Dict[str, int] = {}
+    for sentence_terms in terms:
+        for term in set(sentence_terms):
+            frequency[term] = frequency.get(term, 0) + 1
+
+    def score(i: int) -> float:
+        unique = set(terms[i])
+        if not unique:
+            return 0.0
+        return sum(frequency[t] for t in unique) / len(unique) ** 0.5
+
+    selected = []
+    used = 0
+    for i in sorted(range(len(sentences)), key=lambda i: (-score(i), i)):
+        tokens = estimate_tokens(sentences[i]) + 1
+        if used + tokens > max_tokens:
+            continue
+        selected.append(i)
+        used += tokens
+
+    return "\n".join(f"- {sentences[i]}" for i in sorted(selected))
+
+
+@dataclass
+class ArchivedItem:
+    """A memory item moved to the archive by compaction."""
+    id: int
+    kind: str
+    content: str
+    priority: int
+    run_id: Optional[str]
+    archived_at: float
+
+
+class MemoryArchive:
+    """SQLite archive of memory items that were condensed out of memory.
+
+    Archived items stay searchable with BM25; the search index is built on
+    first use and kept up to date as items are added.
+
+    Args:
+        root: Project root directory (default: current directory)
+        db_path: Optional explicit database path (default: <root>/.sparc/memory_archive.db)
+    """
+
+    def __init__(self, root: str = '.', db_path: Optional[str] = None):
+        if db_path is None:
+            db_path = os.path.join(ensure_sparc_dir(os.path.realpath(root)), ARCHIVE_FILENAME)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._index: Optional[BM25Index] = None
+        # Tools may run on worker threads, so share one connection behind a lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add(self, kind: str, records: Iterable[MemoryRecord], run_id: Optional[str] = None) -> List[int]:
+        """Archive memory records of one category.
+
+        Returns:
+            Archive IDs of the stored records
+        """
+        ids = []
+        with self._lock, self._conn:
+            for record in records:
+                content = record['content']
+                cursor = self._conn.execute(
+                    "INSERT INTO archive (kind, content, priority, run_id, archived_at) VALUES (?, ?, ?, ?, ?)",
+                    (kind, content, record.priority, run_id, time.time())
+                )
+                ids.append(cursor.lastrowid)
+                if self._index is not None:
+                    self._index.add(cursor.lastrowid, content)
+        return ids
+
+    def count(self, kind: Optional[str] = None) -> int:
+        """Return the number of archived items, optionally of one category."""
+        with self._lock:
+            if kind is None:
+                return self._conn.execute("SELECT COUNT(*) FROM archive").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM archive WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def _fetch(self, ids: List[int]) -> Dict[int, ArchivedItem]:
+        placeholders = ', '.join('?' * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, kind, content, priority, run_id, archived_at FROM archive WHERE id IN ({placeholders})",
+                ids
+            ).fetchall()
+        return {row[0]: ArchivedItem(*row) for row in rows}
+
+    def search(
+        self, query: str, limit: int = 10, kind: Optional[str] = None, run_id: Optional[str] = None
+    ) -> List[ArchivedItem]:
+        """Return archived items ranked by relevance to a query, best first.
+
+        Args:
+            query: Free text query
+            limit: Maximum number of items (default: 10)
+            kind: Only return items of this category
+            run_id: Only return items archived by this run (default: any run)
+        """
+        if limit <= 0:
+            return []
+        if self._index is None:
+            index = BM25Index()
+            with self._lock:
+                for row_id, content in self._conn.execute("SELECT id, content FROM archive"):
+                    index.add(row_id, content)
+            self._index = index
+
+        ranked = [key for key, _ in self._index.search(query)]
+        results = []
+        # Fetch in pages so filters don't load the whole archive
+        page_size = limit * 4
+        for start in range(0, len(ranked), page_size):
+            page = ranked[start:start + page_size]
+            items = self._fetch(page)
+            for key in page:
+                item = items.get(key)
+                if item is None or (kind is not None and item.kind != kind):
+                    continue
+                if run_id is None or item.run_id == run_id:
+                    results.append(item)
+                    if len(results) >= limit:
+                        return results
+        return results
@@ -0,0 +1,226 @@
+"""Near-duplicate detection for memory text and overlapping snippets."""
+
+import random
+import re
+import zlib
+from typing import Dict, FrozenSet, Hashable, List, Mapping, Optional, Set, Tuple
+
+from .related_files import normalize_path
+from .retrieval import STOPWORDS
+from .snippet_refs import SnippetRefRecord
+from .store import MemoryRecord, SnippetRecord
+
+_WORD_RE = re.compile(r'[a-z0-9_]+')
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def shingles(text: str, size: int = 2) -> FrozenSet[str]:
+    """Return the set of word n-grams in a text, ignoring case and stopwords.
+
+    Texts shorter than ``size`` words use their single words as shingles.
+    """
+    words = [w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+    if len(words) < size:
+        return frozenset(words)
+    return frozenset(' '.join(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index for finding texts similar to ones already stored.
+
+    Signatures are split into bands; texts sharing any band are candidates,
+    which are then verified with the exact Jaccard similarity of their
+    shingle sets.
+
+    Args:
+        threshold: Minimum Jaccard similarity to count as a duplicate (default: 0.7)
+        num_perm: Number of MinHash permutations (default: 64)
+        bands: Number of LSH bands; must divide num_perm (default: 16)
+        shingle_size: Words per shingle (default: 2)
+    """
+
+    def __init__(self, threshold: float = 0.7, num_perm: int = 64, bands: int = 16, shingle_size: int = 2):
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self._rows = num_perm // bands
+        rng = random.Random(1)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+        self._buckets: List[Dict[Tuple[int, ...], Set[Hashable]]] = [{} for _ in range(bands)]
+        self._entries: Dict[Hashable, Tuple[FrozenSet[str], Tuple[int, ...]]] = {}
+
+    def _signature(self, shingle_set: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = [zlib.crc32(s.encode('utf-8')) for s in shingle_set] or [0]
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms)
+
+    def _bands(self, signature: Tuple[int, ...]):
+        for i, bucket in enumerate(self._buckets):
+            yield bucket, signature[i * self._rows:(i + 1) * self._rows]
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Index a text, replacing any text with the same key."""
+        self.remove(key)
+        shingle_set = shingles(text, self.shingle_size)
+        signature = self._signature(shingle_set)
+        self._entries[key] = (shingle_set, signature)
+        for bucket, band in self._bands(signature):
+            bucket.setdefault(band, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for bucket, band in self._bands(entry[1]):
+            keys = bucket[band]
+            keys.discard(key)
+            if not keys:
+                del bucket[band]
+
+    def find(self, text: str) -> Optional[Tuple[Hashable, float]]:
+        """Return the most similar indexed text at or above the threshold.
+
+        Returns:
+            Tuple of (key, Jaccard similarity), or None if there's no near-duplicate
+        """
+        shingle_set = shingles(text, self.shingle_size)
+        if not shingle_set:
+            return None
+        candidates: Set[Hashable] = set()
+        for bucket, band in self._bands(self._signature(shingle_set)):
+            candidates.update(bucket.get(band, ()))
+
+        best = None
+        for key in candidates:
+            similarity = jaccard(shingle_set, self._entries[key][0])
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RecordDedupIndex(NearDuplicateIndex):
+    """Near-duplicate index kept in step with a memory store."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._indexed: Dict[int, MemoryRecord] = {}
+
+    def sync(self, records: Mapping[int, MemoryRecord]) -> None:
+        """Bring the index up to date with an ID to record mapping."""
+        for record_id in [i for i in self._indexed if i not in records]:
+            self.remove(record_id)
+            del self._indexed[record_id]
+        for record_id, record in records.items():
+            if self._indexed.get(record_id) is not record:
+                self.add(record_id, record.text())
+                self._indexed[record_id] = record
+
+
+def snippet_line_range(record: MemoryRecord) -> Tuple[int, int]:
+    """Return the inclusive (first, last) line range a snippet covers."""
+    end_line = record.get('end_line')
+    if end_line is None:
+        end_line = record['line_number'] + max(len(record['snippet'].splitlines()), 1) - 1
+    return record['line_number'], end_line
+
+
+def ranges_overlap(a: Tuple[int, int], b: Tuple[int, int], gap: int = 1) -> bool:
+    """Whether two inclusive line ranges overlap or are within ``gap`` lines of touching."""
+    return a[0] <= b[1] + gap and b[0] <= a[1] + gap
+
+
+def merge_snippet_text(first: MemoryRecord, second: MemoryRecord) -> Tuple[int, str]:
+    """Merge the text of two overlapping copied snippets from the same file.
+
+    Where the snippets cover the same line, the text from ``second`` wins.
+
+    Returns:
+        Tuple of (first line number, merged snippet text)
+    """
+    lines: Dict[int, str] = {}
+    for record in (first, second):
+        for offset, line in enumerate(record['snippet'].splitlines()):
+            lines[record['line_number'] + offset] = line
+    start = min(lines)
+    # Only overlapping or adjacent snippets are merged, so gaps are left blank rather than guessed
+    text = '\n'.join(lines.get(n, '') for n in range(start, max(lines) + 1))
+    return start, text
+
+
+def _merge_descriptions(*records: MemoryRecord) -> Optional[str]:
+    descriptions = []
+    for record in records:
+        description = record.get('description')
+        if description and description not in descriptions:
+            descriptions.append(description)
+    return "\n".join(descriptions) or None
+
+
+def _rebuild_snippet(record: MemoryRecord, description: Optional[str], priority: int) -> MemoryRecord:
+    if isinstance(record, SnippetRefRecord):
+        return SnippetRefRecord(
+            record.filepath,
+            start_line=record.line_number,
+            end_line=record.end_line,
+            symbol=record.symbol,
+            description=description,
+            priority=priority
+        )
+    return SnippetRecord(record.filepath, record.line_number, record.snippet, description, priority=priority)
+
+
+def merge_snippets(existing: MemoryRecord, new: MemoryRecord) -> Optional[MemoryRecord]:
+    """Merge two snippets of the same file whose line ranges overlap or touch.
+
+    Copied snippets are merged line by line, with ``new`` winning where they
+    overlap. A snippet contained in the other's range is absorbed by it, and
+    two line range references are widened into one. Other combinations (such
+    as a copied snippet partially overlapping a reference) are left alone.
+
+    Returns:
+        The merged record with the higher of the two priorities, or None if the snippets shouldn't be merged
+    """
+    if normalize_path(existing['filepath']) != normalize_path(new['filepath']):
+        return None
+    existing_range, new_range = snippet_line_range(existing), snippet_line_range(new)
+    if not ranges_overlap(existing_range, new_range):
+        return None
+
+    description = _merge_descriptions(existing, new)
+    priority = max(existing.priority, new.priority)
+    existing_is_ref = isinstance(existing, SnippetRefRecord)
+    new_is_ref = isinstance(new, SnippetRefRecord)
+
+    try:
+        if not existing_is_ref and not new_is_ref:
+            line_number, text = merge_snippet_text(existing, new)
+            return SnippetRecord(existing['filepath'], line_number, text, description, priority=priority)
+        if existing_range[0] <= new_range[0] and new_range[1] <= existing_range[1]:
+            return _rebuild_snippet(existing, description, priority)
+        if new_range[0] <= existing_range[0] and existing_range[1] <= new_range[1]:
+            return _rebuild_snippet(new, description, priority)
+        if existing_is_ref and new_is_ref and not existing.symbol and not new.symbol:
+            return SnippetRefRecord(
+                existing.filepath,
+                start_line=min(existing_range[0], new_range[0]),
+                end_line=max(existing_range[1], new_range[1]),
+                description=description,
+                priority=priority
+            )
+    except ValueError:
+        # The file changed or vanished since the reference was captured
+        return None
+    return None
@@ -0,0 +1,247 @@
+"""Opt-in per-repository store that persists key facts and snippets across runs."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Directory, relative to the project root, holding SPARC's on-disk state
+SPARC_DIR = '.sparc'
+KNOWLEDGE_BASE_FILENAME = 'knowledge.db'
+
+# Facts that name no source file are kept this long, since no file change tells when they go stale
+SOURCELESS_FACT_MAX_AGE = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    content_key TEXT NOT NULL,
+    content TEXT NOT NULL,
+    filepath TEXT,
+    line_number INTEGER,
+    description TEXT,
+    priority INTEGER NOT NULL,
+    sources TEXT NOT NULL,
+    provenance TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (kind, content_key)
+);
+"""
+
+
+@dataclass
+class KnowledgeEntry:
+    """A persisted fact or snippet together with where it came from."""
+    kind: str
+    content: str
+    priority: int
+    sources: Dict[str, str] = field(default_factory=dict)
+    provenance: Dict[str, object] = field(default_factory=dict)
+    filepath: Optional[str] = None
+    line_number: Optional[int] = None
+    description: Optional[str] = None
+    id: Optional[int] = None
+    created_at: Optional[float] = None
+
+
+def ensure_sparc_dir(root: str) -> str:
+    """Create the project's .sparc directory if needed and return its path.
+
+    A .gitignore is written on creation so the directory stays out of commits.
+    """
+    path = os.path.join(root, SPARC_DIR)
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, '.gitignore'), 'w') as f:
+            f.write('*\n')
+    return path
+
+
+class ProjectKnowledgeBase:
+    """SQLite-backed store of key facts and snippets for one repository.
+
+    Every entry records the content hash of the source files it was derived
+    from. Entries whose sources have changed or disappeared are treated as
+    stale and dropped when the knowledge base is loaded, as are facts without
+    sources once they are older than SOURCELESS_FACT_MAX_AGE.
+
+    Args:
+        root: Project root directory (default: current directory)
+        db_path: Optional explicit database path (default: <root>/.sparc/knowledge.db)
+    """
+
+    FACT = 'fact'
+    SNIPPET = 'snippet'
+
+    def __init__(self, root: str = '.', db_path: Optional[str] = None):
+        self.root = os.path.realpath(root)
+        if db_path is None:
+            db_path = os.path.join(ensure_sparc_dir(self.root), KNOWLEDGE_BASE_FILENAME)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._hash_cache: Dict[str, Tuple[int, float, str]] = {}
+        # Tools may run on worker threads, so share one connection behind a lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _relpath(self, path: str) -> str:
+        return os.path.relpath(os.path.realpath(os.path.join(self.root, path)), self.root)
+
+    def file_hash(self, path: str) -> Optional[str]:
+        """Return the SHA-256 of a project file, or None if it can't be read.
+
+        Hashes are cached by size and mtime so unchanged files are read once.
+        """
+        full_path = os.path.join(self.root, path)
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return None
+
+        cached = self._hash_cache.get(full_path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        try:
+            with open(full_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        self._hash_cache[full_path] = (stat.st_size, stat.st_mtime, digest.hexdigest())
+        return digest.hexdigest()
+
+    def _hash_sources(self, source_files: Iterable[str]) -> Dict[str, str]:
+        sources = {}
+        for path in source_files:
+            relpath = self._relpath(path)
+            file_hash = self.file_hash(relpath)
+            if file_hash is not None:
+                sources[relpath] = file_hash
+        return sources
+
+    @staticmethod
+    def _content_key(*parts: object) -> str:
+        return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+    def _upsert(self, entry: KnowledgeEntry, content_key: str) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """INSERT INTO entries (kind, content_key, content, filepath, line_number, description,
+                                        priority, sources, provenance, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (kind, content_key) DO UPDATE SET
+                       priority = MAX(priority, excluded.priority),
+                       sources = excluded.sources,
+                       provenance = excluded.provenance,
+                       created_at = excluded.created_at""",
+                (entry.kind, content_key, entry.content, entry.filepath, entry.line_number,
+                 entry.description, entry.priority, json.dumps(entry.sources),
+                 json.dumps(entry.provenance), time.time())
+            )
+            return cursor.lastrowid
+
+    def save_fact(
+        self,
+        content: str,
+        priority: int,
+        source_files: Iterable[str] = (),
+        provenance: Optional[Dict[str, object]] = None
+    ) -> int:
+        """Persist a key fact derived from the given source files.
+
+        Saving a fact again renews it, with the sources given this time.
+        """
+        entry = KnowledgeEntry(
+            kind=self.FACT,
+            content=content,
+            priority=priority,
+            sources=self._hash_sources(source_files),
+            provenance=provenance or {}
+        )
+        return self._upsert(entry, self._content_key(content))
+
+    def save_snippet(
+        self,
+        filepath: str,
+        line_number: int,
+        snippet: str,
+        description: Optional[str],
+        priority: int,
+        provenance: Optional[Dict[str, object]] = None
+    ) -> Optional[int]:
+        """Persist a key snippet; its own file is the source it is validated against.
+
+        Returns None without saving if the file can't be read, as the
+        snippet could never be checked for staleness.
+        """
+        relpath = self._relpath(filepath)
+        sources = self._hash_sources([relpath])
+        if not sources:
+            return None
+        entry = KnowledgeEntry(
+            kind=self.SNIPPET,
+            content=snippet,
+            priority=priority,
+            sources=sources,
+            provenance=provenance or {},
+            filepath=relpath,
+            line_number=line_number,
+            description=description
+        )
+        return self._upsert(entry, self._content_key(relpath, line_number, snippet))
+
+    def forget_fact(self, content: str) -> None:
+        """Remove a persisted fact."""
+        self._delete(self.FACT, self._content_key(content))
+
+    def forget_snippet(self, filepath: str, line_number: int, snippet: str) -> None:
+        """Remove a persisted snippet."""
+        self._delete(self.SNIPPET, self._content_key(self._relpath(filepath), line_number, snippet))
+
+    def _delete(self, kind: str, content_key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries WHERE kind = ? AND content_key = ?", (kind, content_key))
+
+    def _is_valid(self, entry: KnowledgeEntry) -> bool:
+        if not entry.sources:
+            # Snippets are only valid against their file; facts naming none expire by age
+            return entry.kind == self.FACT and time.time() - (entry.created_at or 0) <= SOURCELESS_FACT_MAX_AGE
+        return all(self.file_hash(path) == file_hash for path, file_hash in entry.sources.items())
+
+    def load(self) -> List[KnowledgeEntry]:
+        """Return all entries whose source files are unchanged, oldest first.
+
+        Stale entries are deleted from the database.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT id, kind, content, filepath, line_number, description, priority, sources, provenance,
+                          created_at
+                   FROM entries ORDER BY id"""
+            ).fetchall()
+
+        valid, stale = [], []
+        for row in rows:
+            entry = KnowledgeEntry(
+                id=row[0], kind=row[1], content=row[2], filepath=row[3], line_number=row[4],
+                description=row[5], priority=row[6], sources=json.loads(row[7]),
+                provenance=json.loads(row[8]), created_at=row[9]
+            )
+            (valid if self._is_valid(entry) else stale).append(entry)
+
+        if stale:
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM entries WHERE id = ?", [(e.id,) for e in stale])
+        return valid
@@ -0,0 +1,122 @@
+"""Indexed registry of files related to the current task."""
+
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def normalize_path(path: str) -> str:
+    """Normalize a file path so different spellings of one file compare equal.
+
+    ``./a.py``, ``a.py`` and the absolute path all normalize to the same
+    real path, with symlinks resolved.
+    """
+    return os.path.realpath(os.path.expanduser(path))
+
+
+class RelatedFilesRegistry:
+    """Bidirectional ID <-> path registry for related files.
+
+    Behaves as a mapping of file ID to the path as first given, while a
+    second index keyed on the normalized path makes duplicate detection O(1).
+
+    Args:
+        next_id: First ID to hand out (default: 1)
+    """
+
+    def __init__(self, next_id: int = 1):
+        self.next_id = next_id
+        self._paths: Dict[int, str] = {}
+        self._ids: Dict[str, int] = {}
+
+    def add(self, path: str) -> Tuple[int, bool]:
+        """Register a file path.
+
+        Returns:
+            Tuple of (file ID, whether the file was newly added)
+        """
+        key = normalize_path(path)
+        existing_id = self._ids.get(key)
+        if existing_id is not None:
+            return existing_id, False
+
+        file_id = self.next_id
+        self.put(file_id, path)
+        return file_id, True
+
+    def add_many(self, paths: Iterable[str]) -> List[Tuple[int, str, bool]]:
+        """Register several file paths in one pass.
+
+        Returns:
+            List of (file ID, path, whether newly added) in input order
+        """
+        results = []
+        for path in paths:
+            file_id, added = self.add(path)
+            results.append((file_id, path, added))
+        return results
+
+    def put(self, file_id: int, path: str) -> None:
+        """Register a path under an explicit ID, replacing any existing entry for the ID or the path."""
+        key = normalize_path(path)
+        owner = self._ids.get(key)
+        if owner is not None:
+            self.pop(owner)
+        if file_id in self._paths:
+            self.pop(file_id)
+        self._paths[file_id] = path
+        self._ids[key] = file_id
+        self.next_id = max(self.next_id, file_id + 1)
+
+    def id_for(self, path: str) -> Optional[int]:
+        """Return the ID of a registered path in any spelling, or None."""
+        return self._ids.get(normalize_path(path))
+
+    def pop(self, file_id: int, *default):
+        if file_id not in self._paths:
+            if default:
+                return default[0]
+            raise KeyError(file_id)
+        path = self._paths.pop(file_id)
+        self._ids.pop(normalize_path(path), None)
+        return path
+
+    def __delitem__(self, file_id: int) -> None:
+        self.pop(file_id)
+
+    def clear(self) -> None:
+        self._paths.clear()
+        self._ids.clear()
+
+    def copy(self) -> 'RelatedFilesRegistry':
+        """Return an independent registry with the same files."""
+        clone = RelatedFilesRegistry(self.next_id)
+        clone._paths = dict(self._paths)
+        clone._ids = dict(self._ids)
+        return clone
+
+    def get(self, file_id: int, default: Optional[str] = None) -> Optional[str]:
+        return self._paths.get(file_id, default)
+
+    def keys(self):
+        return self._paths.keys()
+
+    def values(self):
+        return self._paths.values()
+
+    def items(self):
+        return self._paths.items()
+
+    def __getitem__(self, file_id: int) -> str:
+        return self._paths[file_id]
+
+    def __contains__(self, file_id: object) -> bool:
+        return file_id in self._paths
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._paths!r})"
@@ -0,0 +1,138 @@
+"""Offline BM25 relevance ranking for memory items and other text chunks."""
+
+import math
+import re
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+from .store import MemoryRecord
+
+_WORD_RE = re.compile(r'[A-Za-z0-9_]+')
+# Splits identifiers into parts: snake_case, camelCase, HTTPServer, v2
+_IDENTIFIER_PART_RE = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+')
+
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in', 'is',
+    'it', 'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'with'
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search terms.
+
+    Identifiers are split into their parts (``parseHTTPResponse`` ->
+    ``parse``, ``http``, ``response``) and the full identifier is kept as
+    well, so both exact and partial mentions match.
+    """
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        parts = [p.lower() for p in _IDENTIFIER_PART_RE.findall(word)]
+        tokens.extend(p for p in parts if p not in STOPWORDS)
+        lower = word.lower()
+        if len(parts) != 1 and lower not in STOPWORDS:
+            tokens.append(lower)
+    return tokens
+
+
+class BM25Index:
+    """Incrementally updatable in-memory BM25 index.
+
+    Args:
+        k1: Term frequency saturation parameter (default: 1.5)
+        b: Document length normalization parameter (default: 0.75)
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._doc_terms: Dict[Hashable, Dict[str, int]] = {}
+        self._doc_len: Dict[Hashable, int] = {}
+        self._total_len = 0
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Index a document, replacing any document with the same key."""
+        self.add_terms(key, tokenize(text))
+
+    def add_terms(self, key: Hashable, terms: Iterable[str]) -> None:
+        """Index an already tokenized document."""
+        if key in self._doc_len:
+            self.remove(key)
+        counts: Dict[str, int] = {}
+        length = 0
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+            length += 1
+        for term, count in counts.items():
+            self._postings.setdefault(term, {})[key] = count
+        self._doc_terms[key] = counts
+        self._doc_len[key] = length
+        self._total_len += length
+
+    def remove(self, key: Hashable) -> None:
+        """Remove a document from the index if present."""
+        counts = self._doc_terms.pop(key, None)
+        if counts is None:
+            return
+        for term in counts:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(key)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """Rank documents against a query.
+
+        Args:
+            query: Free text query
+            limit: Optional maximum number of results
+
+        Returns:
+            List of (key, score) with positive scores, best first
+        """
+        n_docs = len(self._doc_len)
+        if not n_docs:
+            return []
+        avg_len = self._total_len / n_docs or 1.0
+
+        scores: Dict[Hashable, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for key, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[key] / avg_len)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit is not None else ranked
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._doc_len
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+
+class RecordIndex(BM25Index):
+    """BM25 index kept in step with a memory store.
+
+    ``sync`` only tokenizes records that are new or replaced since the last
+    call and drops records that have been deleted or evicted.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        super().__init__(k1, b)
+        self._indexed: Dict[int, MemoryRecord] = {}
+
+    def sync(self, records: Mapping[int, MemoryRecord]) -> None:
+        """Bring the index up to date with an ID to record mapping."""
+        for record_id in [i for i in self._indexed if i not in records]:
+            self.remove(record_id)
+            del self._indexed[record_id]
+        for record_id, record in records.items():
+            if self._indexed.get(record_id) is not record:
+                self.add(record_id, record.text())
+                self._indexed[record_id] = record
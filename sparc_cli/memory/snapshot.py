@@ -0,0 +1,161 @@
+"""Per-agent memory snapshots, so sub-agents can run without touching their parent's memory."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, MutableMapping, Optional
+
+
+@dataclass
+class MemoryChange:
+    """One change a sub-agent made to its memory snapshot.
+
+    Attributes:
+        category: Memory key the change applies to, e.g. 'key_facts'
+        op: 'add', 'update', 'delete' or 'set'
+        key: ID of the item in the snapshot, if the category is keyed
+        value: New item or value; None for deletions
+    """
+    category: str
+    op: str
+    key: Optional[Hashable] = None
+    value: Any = None
+
+
+def _copy_value(value: Any) -> Any:
+    # Containers and stores provide copy(); everything else is treated as immutable
+    copy = getattr(value, 'copy', None)
+    return copy() if callable(copy) else value
+
+
+class MemorySnapshot(MutableMapping):
+    """Copy-on-access view of a parent memory mapping.
+
+    Each value is copied from the parent the first time it is read, so the
+    snapshot can be changed freely while the parent stays untouched. Keys in
+    ``shared`` (configuration, open databases) are passed through to the
+    parent's object instead of being copied.
+
+    Changes made through the memory tools are recorded in ``changes`` so they
+    can be replayed onto the parent afterwards.
+
+    Args:
+        parent: Memory mapping to snapshot
+        shared: Keys whose values are shared with the parent rather than copied
+    """
+
+    def __init__(self, parent: MutableMapping, shared: Iterable[str] = ()):
+        self.parent = parent
+        self.shared = frozenset(shared)
+        self.changes: List[MemoryChange] = []
+        self._local: Dict[str, Any] = {}
+        self._deleted: set = set()
+        self._bases: Dict[str, Dict[Hashable, Any]] = {}
+
+    def record(self, category: str, op: str, key: Optional[Hashable] = None, value: Any = None) -> None:
+        """Append a change to the change log."""
+        self.changes.append(MemoryChange(category, op, key, value))
+
+    def base(self, category: str) -> Dict[Hashable, Any]:
+        """Return the parent's ID to item mapping for a category as it was when first copied."""
+        return self._bases.get(category, {})
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._local:
+            return self._local[key]
+        if key in self._deleted:
+            raise KeyError(key)
+        value = self.parent[key]
+        if key in self.shared:
+            return value
+        if hasattr(value, 'items'):
+            self._bases[key] = dict(value.items())
+        value = self._local[key] = _copy_value(value)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self.shared:
+            self.parent[key] = value
+            return
+        self._deleted.discard(key)
+        self._local[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._local.pop(key, None)
+        self._deleted.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._local or (key not in self._deleted and key in self.parent)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._local
+        for key in self.parent:
+            if key not in self._local and key not in self._deleted:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def clear(self) -> None:
+        self._deleted.update(k for k in self.parent if k not in self.shared)
+        self._local.clear()
+
+
+class ContextMemory(MutableMapping):
+    """Memory mapping that resolves to the memory of the current agent context.
+
+    Outside any snapshot this is the root memory. ``fork`` makes a snapshot
+    current for the enclosed block; because the current memory is held in a
+    context variable, threads and tasks started with a copied context see
+    their own agent's memory.
+
+    Args:
+        root: The root memory mapping
+    """
+
+    def __init__(self, root: MutableMapping):
+        self.root = root
+        self._current: ContextVar[Optional[MutableMapping]] = ContextVar(f'sparc_memory_{id(self)}', default=None)
+
+    def current(self) -> MutableMapping:
+        memory = self._current.get()
+        return self.root if memory is None else memory
+
+    @contextmanager
+    def fork(self, shared: Iterable[str] = ()) -> Iterator[MemorySnapshot]:
+        """Make a snapshot of the current memory current for the enclosed block."""
+        snapshot = MemorySnapshot(self.current(), shared)
+        token = self._current.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            self._current.reset(token)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.current()[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.current()[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self.current()[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.current()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.current())
+
+    def __len__(self) -> int:
+        return len(self.current())
+
+    def clear(self) -> None:
+        self.current().clear()
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.current())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.current())!r})"
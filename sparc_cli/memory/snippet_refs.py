@@ -0,0 +1,227 @@
+"""Key snippets stored as file references and resolved from disk on demand."""
+
+import ast
+import os
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from .store import MemoryRecord
+
+# Upper bound on lines taken for a symbol found by the regex fallback
+MAX_SYMBOL_LINES = 200
+
+# Definition keywords recognised by the non-Python symbol fallback
+_DEFINITION_RE = r'^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:pub(?:\(\w+\))?\s+)?(?:static\s+)?' \
+                 r'(?:def|class|function|func|fn|interface|struct|enum|trait|type|impl|module|const|let|var)\s+' \
+                 r'(?:\([^)]*\)\s*)?{name}\b'
+
+
+def _line_hashes(lines: List[str]) -> Tuple[int, ...]:
+    # Trailing whitespace is ignored so reformatting line endings doesn't break anchors
+    return tuple(zlib.crc32(line.rstrip().encode('utf-8')) for line in lines)
+
+
+def _find_python_symbol(source: str, symbol: str) -> Optional[Tuple[int, int]]:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    nodes = tree.body
+    found = None
+    for part in symbol.split('.'):
+        found = next(
+            (n for n in nodes
+             if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and n.name == part),
+            None
+        )
+        if found is None:
+            return None
+        nodes = getattr(found, 'body', [])
+
+    start = min([found.lineno] + [d.lineno for d in found.decorator_list])
+    return start, found.end_lineno
+
+
+def _find_symbol_by_regex(lines: List[str], symbol: str) -> Optional[Tuple[int, int]]:
+    name = re.escape(symbol.split('.')[-1])
+    pattern = re.compile(_DEFINITION_RE.format(name=name))
+    for i, line in enumerate(lines):
+        if not pattern.match(line):
+            continue
+        indent = len(line) - len(line.lstrip())
+        end = i
+        # Block ends at the next non-empty line indented no deeper than the definition,
+        # keeping a closing brace/keyword line that sits at the same indent
+        for j in range(i + 1, min(len(lines), i + MAX_SYMBOL_LINES)):
+            stripped = lines[j].strip()
+            if not stripped:
+                continue
+            if len(lines[j]) - len(lines[j].lstrip()) <= indent:
+                if stripped[0] in '}])' or stripped in ('end', 'fi', 'done'):
+                    end = j
+                break
+            end = j
+        return i + 1, end + 1
+    return None
+
+
+class SnippetResolver:
+    """Reads and caches file lines for resolving snippet references.
+
+    File contents are cached per path and re-read only when the file's
+    mtime or size changes.
+    """
+
+    def __init__(self):
+        self._files: Dict[str, Tuple[Tuple[int, int], List[str]]] = {}
+
+    def read_lines(self, filepath: str) -> Optional[Tuple[Tuple[int, int], List[str]]]:
+        """Return (file version, lines) for a file, or None if it can't be read."""
+        path = os.path.realpath(filepath)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._files.pop(path, None)
+            return None
+
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._files.get(path)
+        if cached and cached[0] == version:
+            return cached
+
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                lines = f.read().splitlines(keepends=True)
+        except OSError:
+            return None
+        self._files[path] = (version, lines)
+        return self._files[path]
+
+    def locate(
+        self,
+        filepath: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        symbol: Optional[str] = None
+    ) -> Tuple[int, int]:
+        """Find the 1-based inclusive line range a reference points at.
+
+        Raises:
+            ValueError: If the file can't be read, the range is invalid or the symbol isn't found
+        """
+        read = self.read_lines(filepath)
+        if read is None:
+            raise ValueError(f"File not found or unreadable: {filepath}")
+        lines = read[1]
+
+        if symbol:
+            found = None
+            if filepath.endswith('.py'):
+                found = _find_python_symbol(''.join(lines), symbol)
+            if found is None:
+                found = _find_symbol_by_regex(lines, symbol)
+            if found is None:
+                raise ValueError(f"Symbol '{symbol}' not found in {filepath}")
+            return found
+
+        if not start_line:
+            raise ValueError("Either a line range or a symbol is required")
+        end_line = end_line or start_line
+        if start_line < 1 or end_line < start_line or start_line > len(lines):
+            raise ValueError(f"Invalid line range {start_line}-{end_line} for {filepath} ({len(lines)} lines)")
+        return start_line, min(end_line, len(lines))
+
+    def resolve(self, ref: 'SnippetRefRecord') -> str:
+        """Return the current text of a reference, re-anchoring moved line ranges.
+
+        Symbol references are looked up again whenever the file changes. Line
+        range references whose content moved are relocated by matching the
+        per-line hashes captured when the reference was stored.
+        """
+        read = self.read_lines(ref.filepath)
+        if read is None:
+            return f"[{ref.filepath} no longer exists]"
+        version, lines = read
+
+        if ref._resolved is not None and ref._resolved[0] == version:
+            return ref._resolved[1]
+
+        note = ""
+        if ref.symbol:
+            try:
+                ref.line_number, ref.end_line = self.locate(ref.filepath, symbol=ref.symbol)
+            except ValueError:
+                note = f"[symbol '{ref.symbol}' no longer found; showing last known location]\n"
+        else:
+            start = self._reanchor(lines, ref)
+            if start is None:
+                note = "[content changed since this snippet was captured]\n"
+            else:
+                ref.end_line = start + ref.end_line - ref.line_number
+                ref.line_number = start
+
+        text = note + ''.join(lines[ref.line_number - 1:ref.end_line])
+        ref._resolved = (version, text)
+        return text
+
+    @staticmethod
+    def _reanchor(lines: List[str], ref: 'SnippetRefRecord') -> Optional[int]:
+        anchor = ref.anchor
+        length = len(anchor)
+        if _line_hashes(lines[ref.line_number - 1:ref.line_number - 1 + length]) == anchor:
+            return ref.line_number
+        if not anchor:
+            return None
+
+        # Try candidate start lines closest to the original position first
+        hashes = _line_hashes(lines)
+        candidates = [i for i, h in enumerate(hashes) if h == anchor[0]]
+        candidates.sort(key=lambda i: abs(i + 1 - ref.line_number))
+        for i in candidates:
+            if hashes[i:i + length] == anchor:
+                return i + 1
+        return None
+
+
+default_resolver = SnippetResolver()
+
+
+class SnippetRefRecord(MemoryRecord):
+    """Key snippet stored as a file reference; its text is read from disk when used.
+
+    Exposes the same ``filepath``/``line_number``/``snippet``/``description``
+    keys as a copied snippet, so it renders the same way.
+    """
+    __slots__ = ('filepath', 'line_number', 'end_line', 'symbol', 'description', 'anchor', '_resolved')
+    _fields = ('filepath', 'line_number', 'end_line', 'symbol', 'snippet', 'description')
+
+    def __init__(
+        self,
+        filepath: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        symbol: Optional[str] = None,
+        description: Optional[str] = None,
+        *,
+        priority: int,
+        timestamp: Optional[float] = None
+    ):
+        """Capture a reference, anchoring it to the current file content.
+
+        Raises:
+            ValueError: If the reference can't be resolved
+        """
+        super().__init__(priority, timestamp)
+        self.filepath = filepath
+        self.symbol = symbol
+        self.description = description
+        self.line_number, self.end_line = default_resolver.locate(filepath, start_line, end_line, symbol)
+        lines = default_resolver.read_lines(filepath)[1]
+        self.anchor = _line_hashes(lines[self.line_number - 1:self.end_line])
+        self._resolved = None
+
+    @property
+    def snippet(self) -> str:
+        return default_resolver.resolve(self)
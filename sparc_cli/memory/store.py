@@ -0,0 +1,298 @@
+"""Bounded, priority-ordered storage for agent memory categories."""
+
+import copy
+import heapq
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sparc_cli.text.processing import estimate_tokens
+
+
+class MemoryRecord:
+    """Compact memory record with priority, monotonic timestamp and stable ID.
+
+    Records support read-only mapping-style access (``record['content']``) so
+    code written against the previous TypedDict entries keeps working.
+    """
+    __slots__ = ('id', 'priority', 'timestamp')
+    _fields: Tuple[str, ...] = ()
+
+    def __init__(self, priority: int, timestamp: Optional[float] = None):
+        self.id: Optional[int] = None
+        self.priority = priority
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+
+    def keys(self) -> Tuple[str, ...]:
+        return ('priority', 'timestamp') + self._fields
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.keys()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def text(self) -> str:
+        """Return the record's payload as text, used for sizing against budgets."""
+        return "\n".join(str(getattr(self, f)) for f in self._fields if getattr(self, f) is not None)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the record as a plain dict."""
+        return {key: getattr(self, key) for key in self.keys()}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, MemoryRecord):
+            return type(self) is type(other) and self.as_dict() == other.as_dict()
+        if isinstance(other, dict):
+            return self.as_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self.as_dict())
+
+
+class NoteRecord(MemoryRecord):
+    """Research note."""
+    __slots__ = ('content',)
+    _fields = ('content',)
+
+    def __init__(self, content: str, priority: int, timestamp: Optional[float] = None):
+        super().__init__(priority, timestamp)
+        self.content = content
+
+
+class FactRecord(MemoryRecord):
+    """Key fact about the project or task."""
+    __slots__ = ('content',)
+    _fields = ('content',)
+
+    def __init__(self, content: str, priority: int, timestamp: Optional[float] = None):
+        super().__init__(priority, timestamp)
+        self.content = content
+
+
+class SnippetRecord(MemoryRecord):
+    """Key source code snippet."""
+    __slots__ = ('filepath', 'line_number', 'snippet', 'description')
+    _fields = ('filepath', 'line_number', 'snippet', 'description')
+
+    def __init__(
+        self,
+        filepath: str,
+        line_number: int,
+        snippet: str,
+        description: Optional[str] = None,
+        *,
+        priority: int,
+        timestamp: Optional[float] = None
+    ):
+        super().__init__(priority, timestamp)
+        self.filepath = filepath
+        self.line_number = line_number
+        self.snippet = snippet
+        self.description = description
+
+
+class BoundedPriorityStore:
+    """ID-keyed record store that evicts the lowest priority, oldest records first.
+
+    Insertion and eviction are O(log n): records are kept in an insertion
+    ordered dict for lookup and iteration, and a min-heap keyed on
+    ``(priority, timestamp, id)`` tracks the next eviction candidate.
+    Deleted records are dropped from the heap lazily.
+
+    Besides the item count, the store can be bounded by an estimated token
+    budget and a byte budget over the records' text. Records are evicted
+    until every configured bound is satisfied.
+
+    Args:
+        limit: Maximum number of records to keep
+        next_id: First ID to hand out (default: 1)
+        max_tokens: Optional maximum estimated tokens across all records
+        max_bytes: Optional maximum UTF-8 bytes across all records
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        next_id: int = 1,
+        *,
+        max_tokens: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.limit = limit
+        self.next_id = next_id
+        self.max_tokens = max_tokens
+        self.max_bytes = max_bytes
+        self.total_tokens = 0
+        self.total_bytes = 0
+        self._items: Dict[int, MemoryRecord] = {}
+        self._sizes: Dict[int, Tuple[int, int]] = {}
+        self._heap: List[Tuple[int, float, int]] = []
+
+    def add(self, record: MemoryRecord) -> Tuple[int, List[MemoryRecord]]:
+        """Insert a record, assigning it the next ID.
+
+        Args:
+            record: The record to store
+
+        Returns:
+            Tuple of (assigned ID, records evicted to stay within the limit)
+        """
+        record_id = self.next_id
+        return record_id, self.put(record_id, record)
+
+    def put(self, record_id: int, record: MemoryRecord) -> List[MemoryRecord]:
+        """Store a record under an explicit ID, replacing any existing record.
+
+        Args:
+            record_id: ID to store the record under
+            record: The record to store
+
+        Returns:
+            Records evicted to stay within the limits. A record that exceeds
+            a budget on its own is not stored and is returned here as well;
+            any record already under the ID is then kept.
+        """
+        record.id = record_id
+        self.next_id = max(self.next_id, record_id + 1)
+
+        text = record.text()
+        size = (estimate_tokens(text), len(text.encode('utf-8')))
+        if not self._fits(*size):
+            return [record]
+        if record_id in self._items:
+            self.pop(record_id)
+
+        self._items[record_id] = record
+        self._sizes[record_id] = size
+        self.total_tokens += size[0]
+        self.total_bytes += size[1]
+        heapq.heappush(self._heap, (record.priority, record.timestamp, record_id))
+        return self.enforce_limit()
+
+    def _fits(self, tokens: int, nbytes: int) -> bool:
+        return ((self.max_tokens is None or tokens <= self.max_tokens) and
+                (self.max_bytes is None or nbytes <= self.max_bytes))
+
+    def over_budget(self) -> bool:
+        """Whether the store currently exceeds its count, token or byte bounds."""
+        return len(self._items) > self.limit or not self._fits(self.total_tokens, self.total_bytes)
+
+    def size_of(self, record_id: int) -> Tuple[int, int]:
+        """Return the (estimated tokens, bytes) accounted for a stored record."""
+        return self._sizes[record_id]
+
+    def enforce_limit(self) -> List[MemoryRecord]:
+        """Evict records until the store is within its limit and budgets.
+
+        Returns:
+            The evicted records, lowest priority and oldest first
+        """
+        evicted = []
+        while self.over_budget() and self._heap:
+            priority, timestamp, record_id = heapq.heappop(self._heap)
+            record = self._items.get(record_id)
+            # Skip stale heap entries left behind by deletes and replacements
+            if record is None or (record.priority, record.timestamp) != (priority, timestamp):
+                continue
+            self._discard(record_id)
+            evicted.append(record)
+        return evicted
+
+    def _compact_heap(self) -> None:
+        # Rebuild once stale entries dominate so deletes don't leak heap space
+        if len(self._heap) > 2 * len(self._items) + 32:
+            self._heap = [(r.priority, r.timestamp, i) for i, r in self._items.items()]
+            heapq.heapify(self._heap)
+
+    def _discard(self, record_id: int) -> MemoryRecord:
+        tokens, nbytes = self._sizes.pop(record_id)
+        self.total_tokens -= tokens
+        self.total_bytes -= nbytes
+        return self._items.pop(record_id)
+
+    def pop(self, record_id: int, *default: Any) -> Any:
+        if record_id in self._items:
+            record = self._discard(record_id)
+            self._compact_heap()
+            return record
+        if default:
+            return default[0]
+        raise KeyError(record_id)
+
+    def __delitem__(self, record_id: int) -> None:
+        self.pop(record_id)
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._sizes.clear()
+        self._heap.clear()
+        self.total_tokens = 0
+        self.total_bytes = 0
+
+    def copy(self) -> 'BoundedPriorityStore':
+        """Return an independent store holding the same records and bounds.
+
+        Records themselves are shared, as stores only ever replace them.
+        """
+        clone = copy.copy(self)
+        clone._items = dict(self._items)
+        clone._sizes = dict(self._sizes)
+        clone._heap = list(self._heap)
+        return clone
+
+    def get(self, record_id: int, default: Any = None) -> Any:
+        return self._items.get(record_id, default)
+
+    def keys(self):
+        return self._items.keys()
+
+    def values(self):
+        return self._items.values()
+
+    def items(self):
+        return self._items.items()
+
+    def __getitem__(self, record_id: int) -> MemoryRecord:
+        return self._items[record_id]
+
+    def __contains__(self, record_id: object) -> bool:
+        return record_id in self._items
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(limit={self.limit}, items={self._items!r})"
+
+
+class BoundedPriorityList(BoundedPriorityStore):
+    """Sequence view over a BoundedPriorityStore for list-shaped categories.
+
+    Iteration and integer indexing are over records in insertion order
+    rather than over IDs.
+    """
+
+    def append(self, record: MemoryRecord) -> List[MemoryRecord]:
+        """Insert a record and return any records evicted to make room."""
+        return self.add(record)[1]
+
+    def __iter__(self) -> Iterator[MemoryRecord]:
+        return iter(self._items.values())
+
+    def __getitem__(self, index):
+        return list(self._items.values())[index]
+
+    def __contains__(self, record: object) -> bool:
+        return any(record == r for r in self._items.values())
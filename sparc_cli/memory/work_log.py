@@ -0,0 +1,178 @@
+"""Bounded, structured work log with incremental rendering and an optional JSONL sink."""
+
+import atexit
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class WorkLogEvent:
+    """A typed work log entry.
+
+    Supports ``event['timestamp']``/``event['event']`` access like the plain
+    dict entries it replaces.
+    """
+    event: str
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    stage: Optional[str] = None
+    agent_depth: int = 0
+    tool: Optional[str] = None
+    duration: Optional[float] = None
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def markdown(self) -> str:
+        return f"## {self.timestamp}\n\n{self.event}"
+
+
+class JsonlWorkLogSink:
+    """Append-only JSONL file that work log events are exported to.
+
+    Lines are buffered and written in batches: once ``batch_size`` lines are
+    pending, or on the first write after ``flush_interval`` seconds. Pending
+    lines are flushed on close and at interpreter exit.
+
+    Args:
+        path: File to append to
+        batch_size: Pending lines that trigger a flush (default: 50)
+        flush_interval: Seconds after which pending lines are flushed on the next write (default: 2.0)
+        extra: Fields added to every line, such as a run ID
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 50,
+        flush_interval: float = 2.0,
+        extra: Optional[Dict[str, Any]] = None
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.extra = dict(extra or {})
+        self._pending: List[str] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def write(self, event: WorkLogEvent) -> None:
+        line = json.dumps({**self.extra, **event.as_dict()}, default=str)
+        with self._lock:
+            self._pending.append(line)
+            due = (len(self._pending) >= self.batch_size or
+                   time.monotonic() - self._last_flush >= self.flush_interval)
+            if due:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(self._pending) + '\n')
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        atexit.unregister(self.flush)
+
+
+class WorkLog:
+    """Ring buffer of work log events.
+
+    Appends are O(1) and the oldest events drop off once ``maxlen`` is
+    reached. Each event's markdown is rendered once, when it is appended,
+    and the full rendering is cached until the log changes.
+
+    Args:
+        maxlen: Maximum number of events kept
+        sink: Optional sink every appended event is also written to
+    """
+
+    def __init__(self, maxlen: int, sink: Optional[JsonlWorkLogSink] = None):
+        self.sink = sink
+        self.total = 0
+        self._events: deque = deque(maxlen=maxlen)
+        self._rendered: deque = deque(maxlen=maxlen)
+        self._cache: Optional[str] = None
+
+    @property
+    def maxlen(self) -> int:
+        return self._events.maxlen
+
+    @maxlen.setter
+    def maxlen(self, maxlen: int) -> None:
+        if maxlen != self._events.maxlen:
+            self._events = deque(self._events, maxlen=maxlen)
+            self._rendered = deque(self._rendered, maxlen=maxlen)
+            self._cache = None
+
+    def append(self, event: WorkLogEvent) -> None:
+        self._events.append(event)
+        self._rendered.append(event.markdown())
+        self.total += 1
+        self._cache = None
+        if self.sink is not None:
+            self.sink.write(event)
+
+    def render(self, since: Optional[int] = None) -> str:
+        """Render events as markdown, one section per event.
+
+        Args:
+            since: Only render events appended after ``total`` had this value,
+                e.g. to show what happened since a previous render
+
+        Returns:
+            Markdown with timestamps as headings and events as content
+        """
+        if since is not None:
+            skip = max(since - (self.total - len(self._rendered)), 0)
+            return "\n\n".join(list(self._rendered)[skip:])
+        if self._cache is None:
+            self._cache = "\n\n".join(self._rendered)
+        return self._cache
+
+    def clear(self) -> None:
+        self._events.clear()
+        self._rendered.clear()
+        self._cache = None
+
+    def copy(self) -> 'WorkLog':
+        """Return an independent log with the same events and no sink."""
+        clone = WorkLog(self.maxlen)
+        clone.total = self.total
+        clone._events.extend(self._events)
+        clone._rendered.extend(self._rendered)
+        return clone
+
+    def __getitem__(self, index: int) -> WorkLogEvent:
+        return self._events[index]
+
+    def __iter__(self) -> Iterator[WorkLogEvent]:
+        return iter(self._events)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __bool__(self) -> bool:
+        return bool(self._events)
@@ -17,6 +17,7 @@ Expert Consultation (if expert is available):
     - Use emit_expert_context to provide all relevant context about what you've found
     - Wait for the expert response before proceeding with research
     - The expert can help analyze complex codebases, unclear patterns, or subtle edge cases
+    - For long questions, ask_expert_async lets you keep exploring while the expert thinks; collect the answer with await_expert
 """
 
 EXPERT_PROMPT_SECTION_PLANNING = """
@@ -32,6 +33,7 @@ Expert Consultation (if expert is available):
     If you have any doubts about logic, debugging, or best approaches (or how to test something thoroughly):
     - Use emit_expert_context to provide context about your specific concern
     - Ask the expert to perform deep analysis or correctness checks
+    - Deep analysis can take minutes: ask with ask_expert_async, keep reading the code, and collect the answer with await_expert before acting on it
     - Wait for expert guidance before proceeding with implementation
 """
 
@@ -253,9 +255,14 @@ By following this SPARC-based prompt, you will produce a rigorously tested, clea
 
 
     Use only non-recursive, targeted fuzzy find, ripgrep_search tool (which provides context), list_directory_tree tool, shell commands, etc. (use your imagination) to efficiently explore the project structure.
+    To locate where a class, function or method is defined, or everything that uses it, prefer find_symbol and find_references over repeated ripgrep_search calls.
+    To search for several related identifiers, use one ripgrep_search_many call (optionally scoped to related files or files changed since a git ref) rather than a series of ripgrep_search calls.
+    To read several files, or parts of them, use one read_files call rather than a series of read_file_tool calls.
+    To see what a file or directory defines before reading it, use file_outline; then read only the line ranges you need.
+    To find code by what it does when you don't know its names, describe it to search_code rather than guessing ripgrep_search patterns.
     After identifying files, you may read them to confirm their contents only if needed to understand what currently exists.
     Be meticulous: If you find a directory, explore it thoroughly. If you find files of potential relevance, record them. Make sure you do not skip any directories you discover.
-    Prefer to use list_directory_tree and other tools over shell commands.
+    Prefer to use list_directory_tree and other tools over shell commands. For large or deep directories, call list_directory_tree with summary=True and expand the subdirectories you need.
     Do not produce huge outputs from your commands. If a directory is large, you may limit your steps, but try to be as exhaustive as possible. Incrementally gather details as needed.
     Request subtasks for topics that require deeper investigation.
     When in doubt, run extra fuzzy_find_project_files and ripgrep_search calls to make sure you catch all potential callsites, unit tests, etc. that could be relevant to the base task. You don't want to miss anything.
@@ -436,9 +443,14 @@ You must not:
 Tools and Methodology
 
     Use only non-recursive, targeted fuzzy find, ripgrep_search tool (which provides context), list_directory_tree tool, shell commands, etc. (use your imagination) to efficiently explore the project structure.
+    To locate where a class, function or method is defined, or everything that uses it, prefer find_symbol and find_references over repeated ripgrep_search calls.
+    To search for several related identifiers, use one ripgrep_search_many call (optionally scoped to related files or files changed since a git ref) rather than a series of ripgrep_search calls.
+    To read several files, or parts of them, use one read_files call rather than a series of read_file_tool calls.
+    To see what a file or directory defines before reading it, use file_outline; then read only the line ranges you need.
+    To find code by what it does when you don't know its names, describe it to search_code rather than guessing ripgrep_search patterns.
     After identifying files, you may read them to confirm their contents only if needed to understand what currently exists.
     Be meticulous: If you find a directory, explore it thoroughly. If you find files of potential relevance, record them. Make sure you do not skip any directories you discover.
-    Prefer to use list_directory_tree and other tools over shell commands.
+    Prefer to use list_directory_tree and other tools over shell commands. For large or deep directories, call list_directory_tree with summary=True and expand the subdirectories you need.
     Do not produce huge outputs from your commands. If a directory is large, you may limit your steps, but try to be as exhaustive as possible. Incrementally gather details as needed.
     Request subtasks for topics that require deeper investigation.
     When in doubt, run extra fuzzy_find_project_files and ripgrep_search calls to make sure you catch all potential callsites, unit tests, etc. that could be relevant to the base task. You don't want to miss anything.
@@ -523,7 +535,7 @@ Snippet Management:
     Snippets include file path, line number, and source code.
     Snippets may have optional descriptions explaining their significance.
     Delete snippets with delete_key_snippets([id1, id2, ...]) to remove outdated or irrelevant ones.
-    Use emit_key_snippets to store important code sections needed for reference in batches.
+    Use emit_key_snippets to store important code sections needed for reference in batches, or emit_key_snippet_refs to reference existing code by line range or symbol without copying it.
 
 Guidelines:
 
@@ -1,3 +1,5 @@
-from .processing import truncate_output
+from .processing import truncate_output, estimate_tokens
+from .file_cache import FileContentCache, CachedFile, file_cache
+from .line_index import LineRange, read_lines
 
-__all__ = ['truncate_output']
+__all__ = ['truncate_output', 'estimate_tokens', 'FileContentCache', 'CachedFile', 'file_cache', 'LineRange', 'read_lines']
@@ -0,0 +1,107 @@
+"""Cache of text file contents, revalidated by modification time and size."""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Tuple
+
+# Default total size of cached file contents, in characters
+DEFAULT_MAX_CHARS = 32 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CachedFile:
+    """Contents of a file as of one (mtime, size) version."""
+    path: str
+    mtime_ns: int
+    size: int
+    text: str
+
+    @property
+    def version(self) -> Tuple[int, int]:
+        return (self.mtime_ns, self.size)
+
+    @property
+    def lines(self) -> List[str]:
+        """Lines of the file, with line endings kept."""
+        return self.text.splitlines(keepends=True)
+
+
+class FileContentCache:
+    """LRU cache of decoded file contents keyed by real path.
+
+    Every lookup stats the file; the cached text is reused while the
+    file's mtime and size are unchanged and re-read otherwise. Least
+    recently used files are dropped once the cached text exceeds
+    ``max_chars``.
+
+    Args:
+        max_chars: Total characters of file text to keep (default: 32M)
+        encoding: Encoding files are decoded with (default: utf-8)
+    """
+
+    def __init__(self, max_chars: int = DEFAULT_MAX_CHARS, encoding: str = 'utf-8'):
+        self.max_chars = max_chars
+        self.encoding = encoding
+        self.hits = 0
+        self.misses = 0
+        self._files: 'OrderedDict[str, CachedFile]' = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> CachedFile:
+        """Return the current contents of a file.
+
+        Raises:
+            OSError: If the file can't be read
+            UnicodeDecodeError: If the file isn't valid text in the cache's encoding
+        """
+        key = os.path.realpath(path)
+        stat = os.stat(key)
+        with self._lock:
+            cached = self._files.get(key)
+            if cached is not None and cached.version == (stat.st_mtime_ns, stat.st_size):
+                self._files.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        with open(key, 'r', encoding=self.encoding) as f:
+            text = f.read()
+        cached = CachedFile(key, stat.st_mtime_ns, stat.st_size, text)
+
+        with self._lock:
+            self.misses += 1
+            self._discard(key)
+            if len(text) <= self.max_chars:
+                self._files[key] = cached
+                self._chars += len(text)
+                while self._chars > self.max_chars:
+                    _, oldest = self._files.popitem(last=False)
+                    self._chars -= len(oldest.text)
+        return cached
+
+    def invalidate(self, path: str) -> None:
+        """Drop a file from the cache, e.g. after writing it."""
+        with self._lock:
+            self._discard(os.path.realpath(path))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._chars = 0
+
+    def _discard(self, key: str) -> None:
+        old = self._files.pop(key, None)
+        if old is not None:
+            self._chars -= len(old.text)
+
+    def __contains__(self, path: object) -> bool:
+        return isinstance(path, str) and os.path.realpath(path) in self._files
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+
+# Shared by tools that read project files
+file_cache = FileContentCache()
@@ -0,0 +1,189 @@
+"""Line-addressed reads of large text files through mmap and a cached newline index."""
+
+import bisect
+import codecs
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+# Bytes per block whose newlines are counted; a line is located by scanning at most one block
+BLOCK_BYTES = 1 << 20
+
+# Default cap on the bytes returned by one read
+DEFAULT_MAX_BYTES = 200 * 1024
+
+# Files whose newline index is kept
+MAX_CACHED_INDEXES = 256
+
+# Encodings in which b'\n' always encodes a newline and never occurs inside another character
+_ASCII_COMPATIBLE = frozenset({
+    'utf-8', 'ascii', 'latin-1', 'iso8859-1', 'iso8859-15', 'cp1252', 'cp1251', 'cp1250', 'cp437',
+    'gbk', 'gb18030', 'big5', 'shift_jis', 'euc_jp', 'euc_kr'
+})
+
+
+@dataclass
+class LineRange:
+    """Lines read from a file.
+
+    Attributes:
+        text: The lines' text, line endings included
+        start_line: First line returned (1-based)
+        end_line: Last line returned, or start_line - 1 if none were
+        total_lines: Lines in the whole file
+        truncated: Whether max_bytes cut the range short
+    """
+    text: str
+    start_line: int
+    end_line: int
+    total_lines: int
+    truncated: bool = False
+
+
+class LineIndex:
+    """Newline counts of a file, per BLOCK_BYTES block, as of one (mtime, size) version.
+
+    Building it counts newlines block by block in C; finding where a line
+    starts then takes a bisect over the blocks and a scan within one.
+    """
+
+    def __init__(self, path: str, mtime_ns: int, size: int, counts: array, ends_with_newline: bool):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        # counts[b]: newlines before block b; counts[-1]: newlines in the file
+        self._counts = counts
+        self.total_lines = counts[-1] + (0 if size == 0 or ends_with_newline else 1)
+
+    @classmethod
+    def build(cls, path: str, data, mtime_ns: int) -> 'LineIndex':
+        size = len(data)
+        counts = array('Q', [0])
+        for pos in range(0, size, BLOCK_BYTES):
+            counts.append(counts[-1] + data[pos:pos + BLOCK_BYTES].count(b'\n'))
+        return cls(path, mtime_ns, size, counts, size > 0 and data[size - 1:size] == b'\n')
+
+    def offset(self, data, line: int) -> int:
+        """Byte offset where a 1-based line starts (the file's size past the last line)."""
+        newlines = line - 1
+        if newlines <= 0:
+            return 0
+        if newlines > self._counts[-1]:
+            return self.size
+        block = bisect.bisect_left(self._counts, newlines) - 1
+        pos = block * BLOCK_BYTES
+        for _ in range(newlines - self._counts[block]):
+            pos = data.find(b'\n', pos) + 1
+        return pos
+
+
+_indexes: 'OrderedDict[str, LineIndex]' = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _get_index(path: str, stat: os.stat_result, data) -> LineIndex:
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is not None and (index.mtime_ns, index.size) == (stat.st_mtime_ns, stat.st_size):
+            _indexes.move_to_end(path)
+            return index
+    index = LineIndex.build(path, data, stat.st_mtime_ns)
+    with _indexes_lock:
+        _indexes[path] = index
+        _indexes.move_to_end(path)
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def _read_text_lines(
+    path: str, start_line: int, end_line: Optional[int], max_bytes: int, encoding: str
+) -> LineRange:
+    """Fallback for encodings whose bytes can't be split at b'\\n' (e.g. UTF-16)."""
+    with open(path, 'r', encoding=encoding) as f:
+        lines = f.read().splitlines(keepends=True)
+    stop = len(lines) if end_line is None else min(end_line, len(lines))
+    kept, size = [], 0
+    for line in lines[start_line - 1:stop]:
+        if kept and size + len(line) > max_bytes:
+            break
+        kept.append(line[:max_bytes])
+        size += len(line)
+    end = start_line - 1 + len(kept)
+    truncated = end < stop or (bool(kept) and len(kept[-1]) < len(lines[end - 1]))
+    return LineRange(''.join(kept), start_line, end, len(lines), truncated)
+
+
+def read_lines(
+    path: str,
+    start_line: int = 1,
+    end_line: Optional[int] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    encoding: str = 'utf-8'
+) -> LineRange:
+    """Read a range of lines from a file without reading the rest of it.
+
+    The file is mapped into memory and the range located through a cached
+    newline index, so paging through a large file costs about the size of
+    each page. Ranges longer than ``max_bytes`` end at the last whole line
+    that fits; a single line longer than that is cut.
+
+    Args:
+        path: File to read
+        start_line: First line to return (1-based)
+        end_line: Last line to return, inclusive (default: through the end)
+        max_bytes: Maximum bytes of text to return
+        encoding: Encoding the file is decoded with
+
+    Returns:
+        The lines read, with their range and the file's total line count
+
+    Raises:
+        OSError: If the file can't be read
+        UnicodeDecodeError: If the range isn't valid text in the encoding
+    """
+    start_line = max(1, start_line)
+    max_bytes = max(1, max_bytes)
+    key = os.path.realpath(path)
+    try:
+        ascii_compatible = codecs.lookup(encoding).name in _ASCII_COMPATIBLE
+    except LookupError:
+        ascii_compatible = False
+    if not ascii_compatible:
+        return _read_text_lines(key, start_line, end_line, max_bytes, encoding)
+
+    with open(key, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size == 0:
+            return LineRange('', start_line, start_line - 1, 0)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            index = _get_index(key, stat, data)
+            begin = index.offset(data, start_line)
+            if end_line is None or end_line >= index.total_lines:
+                stop = index.size
+            else:
+                stop = index.offset(data, max(end_line, start_line - 1) + 1)
+
+            truncated = False
+            clipped = False
+            if stop - begin > max_bytes:
+                truncated = True
+                cut = data.rfind(b'\n', begin, begin + max_bytes)
+                if cut >= 0:
+                    stop = cut + 1
+                else:
+                    stop = begin + max_bytes
+                    clipped = True
+            raw = data[begin:stop]
+
+    if clipped:
+        # The cut may fall inside a multibyte character, which is left out
+        text = codecs.getincrementaldecoder(encoding)().decode(raw, final=False)
+    else:
+        text = raw.decode(encoding)
+    shown = text.count('\n') + (1 if text and not text.endswith('\n') else 0)
+    return LineRange(text, start_line, start_line + shown - 1, index.total_lines, truncated)
@@ -40,3 +40,22 @@ def truncate_output(output: str, max_lines: Optional[int] = 5000) -> str:
     
     # Combine message with remaining lines
     return truncation_msg + "".join(truncated_lines)
+
+# Average characters per token for English text and source code
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in a string without a tokenizer.
+    
+    Uses a characters-per-token heuristic, which is close enough for budgeting
+    prompt context and avoids depending on a provider specific tokenizer.
+    
+    Args:
+        text: The text to estimate
+        
+    Returns:
+        Estimated token count (0 for empty text)
+    """
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
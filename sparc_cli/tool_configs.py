@@ -1,12 +1,12 @@
 from typing import List
 from sparc_cli.tools import (
-    ask_expert, ask_human, run_shell_command, run_programming_task,
+    ask_expert, ask_expert_async, await_expert, ask_human, run_shell_command, run_programming_task,
     emit_research_notes, emit_plan, emit_related_files, emit_task,
     emit_expert_context, emit_key_facts, delete_key_facts,
-    emit_key_snippets, delete_key_snippets, deregister_related_files, delete_tasks, read_file_tool,
-    fuzzy_find_project_files, ripgrep_search, list_directory_tree,
+    emit_key_snippets, emit_key_snippet_refs, delete_key_snippets, deregister_related_files, delete_tasks, read_file_tool, read_files,
+    fuzzy_find_project_files, ripgrep_search, ripgrep_search_many, find_symbol, find_references, file_outline, search_code, list_directory_tree,
     swap_task_order, monorepo_detected, existing_project_detected, ui_detected,
-    task_completed, plan_implementation_completed
+    task_completed, plan_implementation_completed, search_memory_archive
 )
 from sparc_cli.tools.math.evaluator import CalculatorTool, SymbolicSolverTool
 from sparc_cli.tools.scrape import scrape_url_tool
@@ -21,12 +21,20 @@ def get_read_only_tools(human_interaction: bool = False) -> list:
         emit_key_facts,
         delete_key_facts,
         emit_key_snippets,
+        emit_key_snippet_refs,
         delete_key_snippets,
         deregister_related_files,
+        search_memory_archive,
         list_directory_tree,
         read_file_tool,
+        read_files,
         fuzzy_find_project_files,
         ripgrep_search,
+        ripgrep_search_many,
+        find_symbol,
+        find_references,
+        file_outline,
+        search_code,
         run_shell_command, # can modify files, but we still need it for read-only tasks.
         scrape_url_tool
     ]
@@ -40,7 +48,7 @@ def get_read_only_tools(human_interaction: bool = False) -> list:
 READ_ONLY_TOOLS = get_read_only_tools()
 MODIFICATION_TOOLS = [run_programming_task]
 COMMON_TOOLS = READ_ONLY_TOOLS.copy()
-EXPERT_TOOLS = [emit_expert_context, ask_expert]
+EXPERT_TOOLS = [emit_expert_context, ask_expert, ask_expert_async, await_expert]
 RESEARCH_TOOLS = [
     emit_research_notes,
     one_shot_completed,
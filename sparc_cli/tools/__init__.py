@@ -7,22 +7,27 @@ from .math.evaluator import MathBenchmarkEvaluator
 from .math.agent import MathAgent
 from .human import ask_human
 from .programmer import run_programming_task
-from .expert import ask_expert, emit_expert_context
-from .read_file import read_file_tool
+from .expert import ask_expert, ask_expert_async, await_expert, emit_expert_context
+from .read_file import read_file_tool, read_files
 from .file_str_replace import file_str_replace
 from .write_file import write_file_tool
 from .fuzzy_find import fuzzy_find_project_files
 from .list_directory import list_directory_tree
-from .ripgrep import ripgrep_search
+from .ripgrep import ripgrep_search, ripgrep_search_many
+from .symbol_index import find_symbol, find_references
+from .file_outline import file_outline
+from .search_code import search_code
 from .memory import (
     delete_tasks, emit_research_notes, emit_plan, emit_task, get_memory_value, emit_key_facts,
     request_implementation, delete_key_facts,
-    emit_key_snippets, delete_key_snippets, emit_related_files, swap_task_order, task_completed,
-    plan_implementation_completed, deregister_related_files
+    emit_key_snippets, emit_key_snippet_refs, delete_key_snippets, emit_related_files, swap_task_order, task_completed,
+    plan_implementation_completed, deregister_related_files, search_memory_archive
 )
 
 __all__ = [
     'ask_expert',
+    'ask_expert_async',
+    'await_expert',
     'BenchmarkRequest',
     'BenchmarkResponse',
     'delete_key_facts',
@@ -31,19 +36,26 @@ __all__ = [
     'emit_expert_context', 
     'emit_key_facts',
     'emit_key_snippets',
+    'emit_key_snippet_refs',
     'emit_plan',
     'emit_related_files', 
     'emit_research_notes',
     'emit_task',
+    'file_outline',
+    'find_references',
+    'find_symbol',
     'fuzzy_find_project_files',
     'get_memory_value',
     'list_directory_tree',
     'read_file_tool',
+    'read_files',
     'request_implementation',
     'run_programming_task',
     'run_shell_command',
+    'search_code',
     'write_file_tool',
     'ripgrep_search',
+    'ripgrep_search_many',
     'file_str_replace',
     'delete_tasks',
     'swap_task_order',
@@ -54,6 +66,7 @@ __all__ = [
     'task_completed',
     'plan_implementation_completed',
     'scrape_url_tool',
+    'search_memory_archive',
     'MathAgent',
     'MathBenchmarkEvaluator',
     'MathValidator'
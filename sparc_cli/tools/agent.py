@@ -1,5 +1,6 @@
 """Tools for spawning and managing sub-agents."""
 
+import time
 from langchain_core.tools import tool
 from typing import Dict, Any, Union, List
 from typing_extensions import TypeAlias
@@ -8,7 +9,10 @@ ResearchResult = Dict[str, Union[str, bool, Dict[int, Any], List[Any], None]]
 from rich.console import Console
 from sparc_cli.tools.memory import _global_memory
 from sparc_cli.console.formatting import print_error, print_interrupt
-from .memory import get_memory_value, get_related_files, get_work_log, reset_work_log
+from .memory import (
+    get_memory_value, get_related_files, get_work_log, reset_work_log, log_work_event,
+    fork_memory, merge_memory_snapshot
+)
 from ..llm import initialize_llm
 from ..console import print_task_header
 
@@ -49,37 +53,39 @@ def request_research(query: str) -> ResearchResult:
     success = True
     reason = None
     
-    try:
-        # Run research agent
-        from ..agent_utils import run_research_agent
-        result = run_research_agent(
-            query,
-            model,
-            expert_enabled=True,
-            research_only=True,
-            hil=config.get('hil', False),
-            console_message=query
-        )
-    except KeyboardInterrupt:
-        print_interrupt("Research interrupted by user")
-        success = False
-        reason = CANCELLED_BY_USER_REASON
-    except Exception as e:
-        print_error(f"Error during research: {str(e)}")
-        success = False
-        reason = f"error: {str(e)}"
-    finally:
-        # Get completion message if available
-        completion_message = _global_memory.get('completion_message', 'Task was completed successfully.' if success else None)
+    # The sub-agent works on a snapshot of memory, so its completion state never leaks into ours
+    started = time.monotonic()
+    with fork_memory() as snapshot:
+        try:
+            # Run research agent
+            from ..agent_utils import run_research_agent
+            result = run_research_agent(
+                query,
+                model,
+                expert_enabled=True,
+                research_only=True,
+                hil=config.get('hil', False),
+                console_message=query
+            )
+        except KeyboardInterrupt:
+            print_interrupt("Research interrupted by user")
+            success = False
+            reason = CANCELLED_BY_USER_REASON
+        except Exception as e:
+            print_error(f"Error during research: {str(e)}")
+            success = False
+            reason = f"error: {str(e)}"
+        finally:
+            # Get completion message if available
+            completion_message = _global_memory.get('completion_message', 'Task was completed successfully.' if success else None)
+    merge_memory_snapshot(snapshot)
+    duration = time.monotonic() - started
+    log_work_event(f"Research sub-agent finished in {duration:.1f}s.", tool="request_research", duration=duration)
         
-        # Get and reset work log if at root depth
-        work_log = get_work_log() if current_depth == 1 else None
-        if current_depth == 1:
-            reset_work_log()
-            
-        # Clear completion state from global memory
-        _global_memory['completion_message'] = ''
-        _global_memory['task_completed'] = False
+    # Get and reset work log if at root depth
+    work_log = get_work_log() if current_depth == 1 else None
+    if current_depth == 1:
+        reset_work_log()
         
     return {
         "work_log": work_log,
@@ -103,42 +109,43 @@ def request_research_and_implementation(query: str) -> Dict[str, Any]:
     config = _global_memory.get('config', {})
     model = initialize_llm(config.get('provider', 'anthropic'), config.get('model', 'claude-3-5-sonnet-20241022'))
     
-    try:
-        # Run research agent
-        from ..agent_utils import run_research_agent
-        result = run_research_agent(
-            query,
-            model,
-            expert_enabled=True,
-            research_only=False,
-            hil=config.get('hil', False),
-            console_message=query
-        )
+    # The sub-agent works on a snapshot of memory, so its completion state never leaks into ours
+    started = time.monotonic()
+    with fork_memory() as snapshot:
+        try:
+            # Run research agent
+            from ..agent_utils import run_research_agent
+            result = run_research_agent(
+                query,
+                model,
+                expert_enabled=True,
+                research_only=False,
+                hil=config.get('hil', False),
+                console_message=query
+            )
         
-        success = True
-        reason = None
-    except KeyboardInterrupt:
-        print_interrupt("Task interrupted by user")
-        success = False
-        reason = CANCELLED_BY_USER_REASON
-    except Exception as e:
-        console.print(f"\n[red]Error during research: {str(e)}[/red]")
-        success = False
-        reason = f"error: {str(e)}"
+            success = True
+            reason = None
+        except KeyboardInterrupt:
+            print_interrupt("Task interrupted by user")
+            success = False
+            reason = CANCELLED_BY_USER_REASON
+        except Exception as e:
+            console.print(f"\n[red]Error during research: {str(e)}[/red]")
+            success = False
+            reason = f"error: {str(e)}"
         
-    # Get completion message if available
-    completion_message = _global_memory.get('completion_message', 'Task was completed successfully.' if success else None)
+        # Get completion message if available
+        completion_message = _global_memory.get('completion_message', 'Task was completed successfully.' if success else None)
+    merge_memory_snapshot(snapshot)
+    duration = time.monotonic() - started
+    log_work_event(f"Research and implementation sub-agent finished in {duration:.1f}s.", tool="request_research_and_implementation", duration=duration)
     
     # Get and reset work log if at root depth
     current_depth = _global_memory.get('agent_depth', 0)
     work_log = get_work_log() if current_depth == 1 else None
     if current_depth == 1:
         reset_work_log()
-    
-    # Clear completion state from global memory
-    _global_memory['completion_message'] = ''
-    _global_memory['task_completed'] = False
-    _global_memory['plan_completed'] = False
 
     return {
         "work_log": work_log,
@@ -167,43 +174,45 @@ def request_task_implementation(task_spec: str) -> Dict[str, Any]:
     plan = _global_memory.get('plan', '')
     related_files = list(_global_memory['related_files'].values())
     
-    try:
-        print_task_header(task_spec)
-        # Run implementation agent
-        from ..agent_utils import run_task_implementation_agent
-        result = run_task_implementation_agent(
-            base_task=_global_memory.get('base_task', ''),
-            tasks=tasks,
-            task=task_spec,
-            plan=plan, 
-            related_files=related_files,
-            model=model,
-            expert_enabled=True
-        )
+    # The sub-agent works on a snapshot of memory, so its completion state never leaks into ours
+    started = time.monotonic()
+    with fork_memory() as snapshot:
+        try:
+            print_task_header(task_spec)
+            # Run implementation agent
+            from ..agent_utils import run_task_implementation_agent
+            result = run_task_implementation_agent(
+                base_task=_global_memory.get('base_task', ''),
+                tasks=tasks,
+                task=task_spec,
+                plan=plan, 
+                related_files=related_files,
+                model=model,
+                expert_enabled=True
+            )
         
-        success = True
-        reason = None
-    except KeyboardInterrupt:
-        print_interrupt("Task implementation interrupted by user")
-        success = False
-        reason = CANCELLED_BY_USER_REASON
-    except Exception as e:
-        print_error(f"Error during task implementation: {str(e)}")
-        success = False
-        reason = f"error: {str(e)}"
+            success = True
+            reason = None
+        except KeyboardInterrupt:
+            print_interrupt("Task implementation interrupted by user")
+            success = False
+            reason = CANCELLED_BY_USER_REASON
+        except Exception as e:
+            print_error(f"Error during task implementation: {str(e)}")
+            success = False
+            reason = f"error: {str(e)}"
         
-    # Get completion message if available
-    completion_message = _global_memory.get('completion_message', 'Task was completed successfully.' if success else None)
+        # Get completion message if available
+        completion_message = _global_memory.get('completion_message', 'Task was completed successfully.' if success else None)
+    merge_memory_snapshot(snapshot)
+    duration = time.monotonic() - started
+    log_work_event(f"Task implementation sub-agent finished in {duration:.1f}s.", tool="request_task_implementation", duration=duration)
     
     # Get and reset work log if at root depth
     current_depth = _global_memory.get('agent_depth', 0)
     work_log = get_work_log() if current_depth == 1 else None
     if current_depth == 1:
         reset_work_log()
-    
-    # Clear completion state from global memory
-    _global_memory['completion_message'] = ''
-    _global_memory['task_completed'] = False
         
     return {
         "work_log": work_log,
@@ -226,41 +235,42 @@ def request_implementation(task_spec: str) -> Dict[str, Any]:
     config = _global_memory.get('config', {})
     model = initialize_llm(config.get('provider', 'anthropic'), config.get('model', 'claude-3-5-sonnet-20241022'))
     
-    try:
-        # Run planning agent
-        from ..agent_utils import run_planning_agent
-        result = run_planning_agent(
-            task_spec,
-            model,
-            config=config,
-            expert_enabled=True,
-            hil=config.get('hil', False)
-        )
+    # The sub-agent works on a snapshot of memory, so its completion state never leaks into ours
+    started = time.monotonic()
+    with fork_memory() as snapshot:
+        try:
+            # Run planning agent
+            from ..agent_utils import run_planning_agent
+            result = run_planning_agent(
+                task_spec,
+                model,
+                config=config,
+                expert_enabled=True,
+                hil=config.get('hil', False)
+            )
         
-        success = True
-        reason = None
-    except KeyboardInterrupt:
-        print_interrupt("Planning interrupted by user")
-        success = False
-        reason = CANCELLED_BY_USER_REASON
-    except Exception as e:
-        print_error(f"Error during planning: {str(e)}")
-        success = False
-        reason = f"error: {str(e)}"
+            success = True
+            reason = None
+        except KeyboardInterrupt:
+            print_interrupt("Planning interrupted by user")
+            success = False
+            reason = CANCELLED_BY_USER_REASON
+        except Exception as e:
+            print_error(f"Error during planning: {str(e)}")
+            success = False
+            reason = f"error: {str(e)}"
         
-    # Get completion message if available
-    completion_message = _global_memory.get('completion_message', 'Task was completed successfully.' if success else None)
+        # Get completion message if available
+        completion_message = _global_memory.get('completion_message', 'Task was completed successfully.' if success else None)
+    merge_memory_snapshot(snapshot)
+    duration = time.monotonic() - started
+    log_work_event(f"Implementation sub-agent finished in {duration:.1f}s.", tool="request_implementation", duration=duration)
     
     # Get and reset work log if at root depth
     current_depth = _global_memory.get('agent_depth', 0)
     work_log = get_work_log() if current_depth == 1 else None
     if current_depth == 1:
         reset_work_log()
-    
-    # Clear completion state from global memory
-    _global_memory['completion_message'] = ''
-    _global_memory['task_completed'] = False
-    _global_memory['plan_completed'] = False
         
     return {
         "work_log": work_log,
@@ -1,11 +1,21 @@
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+import contextvars
+import difflib
+import itertools
 import os
+import threading
+import weakref
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.tools import tool
 from rich.console import Console
 from rich.panel import Panel
 from rich.markdown import Markdown
 from ..llm import initialize_expert_llm
-from .memory import get_memory_value, get_related_files, _global_memory
+from ..code import build_code_context
+from ..memory import MemorySnapshot, snippet_line_range
+from ..text import estimate_tokens, file_cache
+from .memory import get_relevant_memory_value, get_related_file_paths, _global_memory
 
 console = Console()
 _model = None
@@ -29,6 +39,34 @@ expert_context = {
     'files': []    # File paths to include
 }
 
+# Expert conversation for diff-aware context (config 'expert_diff_context')
+expert_session = {
+    'messages': [],   # List[BaseMessage] - Previous questions and answers
+    'files': {},      # Dict[str, Tuple[str, str]] - (file contents, text sent) as last sent, by path
+    'sections': {}    # Dict[str, str] - Key snippets/facts as last sent, by heading
+}
+
+# Token budget for excerpts of large related files (config 'expert_symbol_context')
+EXPERT_CODE_CONTEXT_TOKENS = 24000
+
+# Once the conversation is estimated to exceed this, it restarts with full context
+EXPERT_SESSION_MAX_TOKENS = 100000
+_session_lock = threading.RLock()
+
+# Questions asked with ask_expert_async, per agent (keyed on the id of its memory),
+# by ticket: (question, future answer). Sub-agents run on their own memory snapshot.
+expert_tickets: Dict[int, Dict[str, Tuple[str, Future]]] = {}
+_ticket_ids = itertools.count(1)
+_tickets_lock = threading.Lock()
+
+# Expert calls running at once across all agents; questions each agent may have
+# waiting for an answer, and answered ones it may leave uncollected
+EXPERT_MAX_CONCURRENT = 2
+EXPERT_MAX_PENDING = 4
+EXPERT_MAX_UNCLAIMED = 4
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
 @tool("emit_expert_context")
 def emit_expert_context(context: str) -> str:
     """Add context for the next expert question.
@@ -54,46 +92,124 @@ def emit_expert_context(context: str) -> str:
     
     return f"Context added."
 
-def read_files_with_limit(file_paths: List[str], max_lines: int = 10000) -> str:
+def read_files_with_limit(file_paths: List[str], max_lines: int = 10000, texts: Optional[Dict[str, str]] = None) -> str:
     """Read multiple files and concatenate contents, stopping at line limit.
     
     Args:
         file_paths: List of file paths to read
         max_lines: Maximum total lines to read (default: 10000)
+        texts: Contents to use instead of reading the files, by path; paths missing from it are skipped
         
     Note:
         - Each file's contents will be prefaced with its path as a header
         - Stops reading files when max_lines limit is reached
         - Files that would exceed the line limit are truncated
+        - Contents come from the shared file cache, so unchanged files aren't re-read
     """
     total_lines = 0
     contents = []
     
     for path in file_paths:
-        try:
-            if not os.path.exists(path):
-                console.print(f"Warning: File not found: {path}", style="yellow")
-                continue
-                
-            with open(path, 'r', encoding='utf-8') as f:
-                file_content = []
-                for i, line in enumerate(f):
-                    if total_lines + i >= max_lines:
-                        file_content.append(f"\n... truncated after {max_lines} lines ...")
-                        break
-                    file_content.append(line)
-                
-                if file_content:
-                    contents.append(f'\n## File: {path}\n')
-                    contents.append(''.join(file_content))
-                    total_lines += len(file_content)
-            
-        except Exception as e:
-            console.print(f"Error reading file {path}: {str(e)}", style="red")
+        if total_lines >= max_lines:
+            break
+        lines = _lines_for(path, texts)
+        if not lines:
             continue
+        file_content = lines[:max_lines - total_lines]
+        if len(file_content) < len(lines):
+            file_content.append(f"\n... truncated after {max_lines} lines ...")
+        contents.append(f'\n## File: {path}\n')
+        contents.append(''.join(file_content))
+        total_lines += len(file_content)
             
     return ''.join(contents)
 
+def _read_lines(path: str) -> Optional[List[str]]:
+    """Read a file's lines through the file cache, warning instead of raising."""
+    if not os.path.exists(path):
+        console.print(f"Warning: File not found: {path}", style="yellow")
+        return None
+    try:
+        return file_cache.get(path).lines
+    except Exception as e:
+        console.print(f"Error reading file {path}: {str(e)}", style="red")
+        return None
+
+def _lines_for(path: str, texts: Optional[Dict[str, str]]) -> Optional[List[str]]:
+    if texts is None:
+        return _read_lines(path)
+    return texts[path].splitlines(keepends=True) if path in texts else None
+
+def read_changed_files(
+    file_paths: List[str],
+    sent: Dict[str, Tuple[str, str]],
+    max_lines: int = 10000,
+    texts: Optional[Dict[str, str]] = None
+) -> str:
+    """Render only what changed in files since their contents were last sent.
+    
+    Files not sent before are included in full, changed files as unified diff
+    hunks against the sent version, and unchanged files are just listed.
+    Whether a file changed is decided on its contents on disk, so a file sent
+    as an excerpt that now shows other definitions is sent again in full
+    rather than diffed. ``sent`` is updated for every file rendered.
+    
+    Args:
+        file_paths: List of file paths to include
+        sent: (file contents, text sent) of each file as last sent, by path
+        max_lines: Maximum total lines to render (default: 10000)
+        texts: Text to send instead of the whole file, by path; paths missing from it are skipped
+        
+    Returns:
+        Markdown with the new files, changes and unchanged file list
+    """
+    total_lines = 0
+    contents = []
+    unchanged = []
+    
+    for path in dict.fromkeys(file_paths):
+        if total_lines >= max_lines:
+            break
+        if texts is not None and path not in texts:
+            continue
+        lines = _read_lines(path)
+        if lines is None:
+            continue
+        text = ''.join(lines)
+        shown = texts[path] if texts is not None else text
+        previous = sent.get(path)
+        if previous is not None and previous[1] == shown:
+            unchanged.append(path)
+            sent[path] = (text, shown)
+            continue
+        
+        if previous is None or previous[0] == text:
+            # New to the expert, or the same file cut down to other definitions
+            header = f'\n## File: {path}\n'
+            body = shown.splitlines(keepends=True)
+        else:
+            header = f'\n## Changes to: {path}\n'
+            body = [line if line.endswith('\n') else line + '\n' for line in difflib.unified_diff(
+                previous[1].splitlines(keepends=True), shown.splitlines(keepends=True),
+                fromfile=f'{path} (previous)', tofile=path
+            )]
+        
+        rendered = body[:max_lines - total_lines]
+        if len(rendered) < len(body):
+            rendered.append(f"\n... truncated after {max_lines} lines ...")
+        else:
+            # Only a file sent in full counts as seen by the expert
+            sent[path] = (text, shown)
+        contents.append(header)
+        contents.append(''.join(rendered))
+        total_lines += len(rendered)
+    
+    if unchanged:
+        contents.append('\n## Unchanged since the previous question\n')
+        contents.append(''.join(f'- {path}\n' for path in unchanged))
+    
+    return ''.join(contents)
+
 def read_related_files(file_paths: List[str]) -> str:
     """Read the provided files and return their contents.
     
@@ -125,13 +241,106 @@ def ask_expert(question: str) -> str:
 
     The expert can be prone to overthinking depending on what and how you ask it.
     """
-    global expert_context
-    
-    # Get all content first
-    file_paths = expert_context['files'] + list(get_related_files())
-    related_contents = read_related_files(file_paths)
-    key_snippets = get_memory_value('key_snippets')
-    key_facts = get_memory_value('key_facts')
+    context = _collect_context(question)
+    content = _consult_expert(question, context)
+    _print_response(content)
+    return content
+
+@tool("ask_expert_async")
+def ask_expert_async(question: str) -> str:
+    """Ask the expert a question without waiting for the answer.
+
+    Works like ask_expert, including the context that is sent, but returns a ticket immediately.
+    Keep working while the expert thinks, then call await_expert with the ticket to collect the answer.
+
+    Use this for long or open-ended questions when there is other useful work to do meanwhile.
+    """
+    tickets = _agent_tickets()
+    pending = sum(1 for _, future in list(tickets.values()) if not future.done())
+    if pending >= EXPERT_MAX_PENDING:
+        return f"{pending} expert questions are already pending. Collect an answer with await_expert before asking another."
+
+    context = _collect_context(question)
+    ticket = f"expert-{next(_ticket_ids)}"
+    # Run in a copy of this context so the call sees the calling agent's memory
+    future = _get_executor().submit(contextvars.copy_context().run, _consult_expert, question, context)
+    with _tickets_lock:
+        tickets[ticket] = (question, future)
+        _evict_unclaimed(tickets)
+
+    console.print(Panel(f"Submitted as ticket {ticket}", title="⏳ Expert Query Pending", border_style="yellow"))
+    return f"Question submitted as ticket {ticket}. Continue working and call await_expert with this ticket to collect the answer."
+
+@tool("await_expert")
+def await_expert(ticket: str, timeout: Optional[float] = None) -> str:
+    """Collect the answer to a question asked with ask_expert_async.
+
+    Args:
+        ticket: Ticket returned by ask_expert_async
+        timeout: Seconds to wait for the answer; waits until it arrives if omitted
+    """
+    tickets = _agent_tickets()
+    entry = tickets.get(ticket)
+    if entry is None:
+        return f"Unknown expert ticket: {ticket}"
+
+    _, future = entry
+    try:
+        content = future.result(timeout=timeout)
+    except FutureTimeoutError:
+        return f"The expert is still working on {ticket}. Call await_expert again later."
+    except Exception as e:
+        tickets.pop(ticket, None)
+        console.print(Panel(f"Expert query {ticket} failed: {e}", title="Error", border_style="red"))
+        return f"Expert query {ticket} failed: {e}"
+
+    tickets.pop(ticket, None)
+    _print_response(content)
+    return content
+
+def _agent_tickets() -> Dict[str, Tuple[str, Future]]:
+    """Return the expert tickets of the calling agent.
+
+    Tickets are kept per agent memory, so a sub-agent's questions don't count
+    against its parent's limits. They are dropped once the sub-agent's
+    snapshot is gone, i.e. after it and its expert calls have finished.
+    """
+    memory = _global_memory.current()
+    key = id(memory)
+    with _tickets_lock:
+        tickets = expert_tickets.get(key)
+        if tickets is None:
+            tickets = expert_tickets[key] = {}
+            if isinstance(memory, MemorySnapshot):
+                weakref.finalize(memory, _drop_tickets, key)
+        return tickets
+
+def _drop_tickets(key: int) -> None:
+    with _tickets_lock:
+        expert_tickets.pop(key, None)
+
+def _evict_unclaimed(tickets: Dict[str, Tuple[str, Future]]) -> None:
+    """Forget the oldest answered tickets beyond EXPERT_MAX_UNCLAIMED."""
+    answered = [ticket for ticket, (_, future) in tickets.items() if future.done()]
+    for ticket in answered[:max(len(answered) - EXPERT_MAX_UNCLAIMED, 0)]:
+        del tickets[ticket]
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=EXPERT_MAX_CONCURRENT, thread_name_prefix='sparc-expert')
+    return _executor
+
+def _collect_context(question: str) -> Dict[str, Any]:
+    """Show the question and take the context to send with it, clearing emitted context."""
+    context = {
+        'file_paths': expert_context['files'] + get_related_file_paths(),
+        'key_snippets': get_relevant_memory_value('key_snippets', question),
+        'key_facts': get_relevant_memory_value('key_facts', question),
+        'text': list(expert_context['text']),
+        'snippet_ranges': _snippet_ranges()
+    }
     
     # Build display query (just question)
     display_query = "# Question\n" + question
@@ -146,36 +355,109 @@ def ask_expert(question: str) -> str:
     # Clear context after panel display
     expert_context['text'].clear()
     expert_context['files'].clear()
+    return context
+
+def _consult_expert(question: str, context: Dict[str, Any]) -> str:
+    """Send a question with its context to the expert model and return the answer."""
+    texts = _file_texts(question, context)
+    if not _global_memory.get('config', {}).get('expert_diff_context', False):
+        related_contents = read_files_with_limit(list(texts), texts=texts) if texts else ''
+        full_query = _build_query(question, context, related_contents)
+        return get_model().invoke(full_query).content
     
-    # Build full query in specified order
+    # One conversation per session, so diff-aware questions are answered in turn
+    with _session_lock:
+        if _session_tokens() > EXPERT_SESSION_MAX_TOKENS:
+            reset_expert_session()
+        related_contents = read_changed_files(list(texts), expert_session['files'], texts=texts) if texts else ''
+        full_query = _build_query(question, context, related_contents, expert_session['sections'])
+        
+        message = HumanMessage(content=full_query)
+        try:
+            response = get_model().invoke(expert_session['messages'] + [message])
+        except Exception:
+            # The expert never saw this context, so start over next time
+            reset_expert_session()
+            raise
+        expert_session['messages'].extend([message, AIMessage(content=response.content)])
+        return response.content
+
+def _file_texts(question: str, context: Dict[str, Any]) -> Dict[str, str]:
+    """Read the related files, cut down to the code relevant to the question unless disabled."""
+    texts = {}
+    for path in dict.fromkeys(context['file_paths']):
+        lines = _read_lines(path)
+        if lines:
+            texts[path] = ''.join(lines)
+    if texts and _global_memory.get('config', {}).get('expert_symbol_context', True):
+        texts = build_code_context(
+            texts,
+            question,
+            extra_text='\n'.join([context['key_snippets'] or ''] + context['text']),
+            snippet_ranges=context['snippet_ranges'],
+            max_tokens=EXPERT_CODE_CONTEXT_TOKENS
+        )
+    return texts
+
+def _snippet_ranges() -> List[Tuple[str, int, int]]:
+    """Return the (path, first line, last line) ranges of the key snippets."""
+    ranges = []
+    for record in list(_global_memory.get('key_snippets', {}).values()):
+        try:
+            first, last = snippet_line_range(record)
+        except (KeyError, TypeError, OSError):
+            continue
+        ranges.append((record['filepath'], first, last))
+    return ranges
+
+def _build_query(
+    question: str,
+    context: Dict[str, Any],
+    related_contents: str,
+    sent_sections: Optional[Dict[str, str]] = None
+) -> str:
+    """Build the full expert query.
+    
+    If ``sent_sections`` is given, snippet and fact sections identical to the
+    ones last sent are replaced by a note, and it's updated with the rest.
+    """
     query_parts = []
     
     if related_contents:
         query_parts.extend(['# Related Files', related_contents])
         
-    if key_snippets and len(key_snippets) > 0:
-        query_parts.extend(['# Key Snippets', key_snippets])
-        
-    if key_facts and len(key_facts) > 0:
-        query_parts.extend(['# Key Facts About This Project', key_facts])
+    for heading, section in (('# Key Snippets', context['key_snippets']), ('# Key Facts About This Project', context['key_facts'])):
+        if not section:
+            continue
+        if sent_sections is not None:
+            if sent_sections.get(heading) == section:
+                query_parts.extend([heading, 'Unchanged since the previous question.'])
+                continue
+            sent_sections[heading] = section
+        query_parts.extend([heading, section])
         
-    if expert_context['text']:
-        query_parts.extend(['\n# Additional Context', '\n'.join(expert_context['text'])])
+    if context['text']:
+        query_parts.extend(['\n# Additional Context', '\n'.join(context['text'])])
         
     query_parts.extend(['# Question', question])
     query_parts.extend(['\n # Addidional Requirements', "Do not expand the scope unnecessarily."])
     
     # Join all parts
-    full_query = '\n'.join(query_parts)
-    
-    # Get response using full query
-    response = get_model().invoke(full_query)
-    
-    # Format and display response
+    return '\n'.join(query_parts)
+
+def _print_response(content: str) -> None:
     console.print(Panel(
-        Markdown(response.content),
+        Markdown(content),
         title="Expert Response",
         border_style="blue"
     ))
-    
-    return response.content
+
+def _session_tokens() -> int:
+    return sum(estimate_tokens(str(m.content)) for m in expert_session['messages'])
+
+def reset_expert_session() -> None:
+    """Forget what was sent to the expert, so the next question carries full context."""
+    with _session_lock:
+        expert_session['messages'].clear()
+        expert_session['files'].clear()
+        expert_session['sections'].clear()
@@ -0,0 +1,72 @@
+import os
+
+from langchain_core.tools import tool
+from rich.console import Console
+from rich.markdown import Markdown
+from rich.panel import Panel
+
+from sparc_cli.code.files import get_project_files, walk_files
+from sparc_cli.code.index import SOURCE_EXTENSIONS
+from sparc_cli.code.outline import outline_files
+
+console = Console()
+
+
+def _source_files(directory: str) -> list:
+    """Source files under a directory, from the project's file list when it's inside the working directory."""
+    root = os.path.realpath(os.getcwd())
+    target = os.path.realpath(directory)
+    if target == root or target.startswith(root + os.sep):
+        prefix = os.path.relpath(target, root)
+        prefix = '' if prefix == '.' else prefix.replace(os.sep, '/') + '/'
+        files = [os.path.join(directory, f[len(prefix):]) for f in get_project_files(root).files()
+                 if f.startswith(prefix)]
+    else:
+        files = [os.path.join(directory, f) for f in walk_files(target)]
+    return sorted(f for f in files if os.path.splitext(f)[1].lower() in SOURCE_EXTENSIONS)
+
+
+@tool
+def file_outline(path: str, include_imports: bool = False, max_files: int = 50) -> str:
+    """Outline a source file: its classes, functions and methods with signatures, line ranges and docstring first lines.
+
+    Usually 10-50x smaller than the file, so prefer it over reading a whole
+    file to find what to read next. Given a directory, outlines the source
+    files under it.
+
+    Args:
+        path: Source file or directory to outline
+        include_imports: Also list the names each file imports (default: False)
+        max_files: Maximum files to outline for a directory (default: 50)
+
+    Returns:
+        Per file, a header with its line count and module docstring, then one
+        line per definition: 'start-end: signature  # docstring first line'
+    """
+    if os.path.isdir(path):
+        files = _source_files(path)
+        skipped = max(0, len(files) - max_files)
+        files = files[:max_files]
+    elif os.path.exists(path):
+        files, skipped = [path], 0
+    else:
+        return f"Path not found: {path}"
+
+    outlines = outline_files(files)
+    parts = []
+    for file in files:
+        outline = outlines[file]
+        parts.append(outline.format(include_imports) if outline else f"{file}: not a readable text file")
+    if not parts:
+        parts.append(f"No source files found in {path}")
+    if skipped:
+        parts.append(f"[{skipped} more files not outlined; outline a subdirectory to see them]")
+    output = '\n\n'.join(parts)
+
+    definitions = sum(1 for o in outlines.values() if o for s in o.symbols if s.kind != 'import')
+    console.print(Panel(
+        Markdown(f"**{path}**: {definitions} definition(s) in {len(files)} file(s)"),
+        title="🧭 File Outline",
+        border_style="bright_blue"
+    ))
+    return output
@@ -1,12 +1,12 @@
 from typing import List, Tuple
-import fnmatch
-from git import Repo
-from fuzzywuzzy import process
 from langchain_core.tools import tool
 from rich.console import Console
 from rich.panel import Panel
 from rich.markdown import Markdown
 
+from sparc_cli.code.files import compile_filter
+from sparc_cli.code.path_match import get_path_matcher
+
 console = Console()
 
 DEFAULT_EXCLUDE_PATTERNS = [
@@ -28,15 +28,18 @@ def fuzzy_find_project_files(
     include_paths: List[str] = None,
     exclude_patterns: List[str] = None
 ) -> List[Tuple[str, int]]:
-    """Fuzzy find files in a git repository matching the search term.
+    """Fuzzy find files in a project matching the search term.
     
-    This tool searches for files within a git repository using fuzzy string matching,
-    allowing for approximate matches to the search term. It returns a list of matched
-    files along with their match scores.
+    This tool searches for files within a git repository (or any directory) using fuzzy
+    string matching, allowing for approximate matches to the search term. It returns a
+    list of matched files along with their match scores. The file list is cached per
+    project and refreshed when git's index changes; in large projects candidates are
+    prefiltered by trigrams before scoring. Near-equal matches are ranked by basename
+    match, path depth and recent git changes.
     
     Args:
         search_term: String to match against file paths
-        repo_path: Path to git repository (defaults to current directory)
+        repo_path: Path to the project, usually a git repository (defaults to current directory)
         threshold: Minimum similarity score (0-100) for matches (default: 60)
         max_results: Maximum number of results to return (default: 10)
         include_paths: Optional list of path patterns to include in search
@@ -46,7 +49,6 @@ def fuzzy_find_project_files(
         List of tuples containing (file_path, match_score)
         
     Raises:
-        InvalidGitRepositoryError: If repo_path is not a git repository
         ValueError: If threshold is not between 0 and 100
     """
     # Validate threshold
@@ -57,49 +59,20 @@ def fuzzy_find_project_files(
     if not search_term:
         return []
 
-    # Initialize repo for normal search
-    repo = Repo(repo_path)
-    
-    # Get all tracked files
-    tracked_files = repo.git.ls_files().splitlines()
-    
-    # Get all untracked files
-    untracked_files = repo.untracked_files
-    
-    # Combine file lists
-    all_files = tracked_files + untracked_files
-    
-    # Apply include patterns if specified
-    if include_paths:
-        filtered_files = []
-        for pattern in include_paths:
-            filtered_files.extend(
-                f for f in all_files 
-                if fnmatch.fnmatch(f, pattern)
-            )
-        all_files = filtered_files
-    
-    # Apply exclude patterns
-    patterns = DEFAULT_EXCLUDE_PATTERNS + (exclude_patterns or [])
-    for pattern in patterns:
-        all_files = [
-            f for f in all_files 
-            if not fnmatch.fnmatch(f, pattern)
-        ]
-    
-    # Perform fuzzy matching
-    matches = process.extract(
+    # Tracked and untracked files, from the project's cached listing
+    matcher = get_path_matcher(repo_path)
+    accept = compile_filter(
+        include_paths or [],
+        DEFAULT_EXCLUDE_PATTERNS + (exclude_patterns or [])
+    )
+
+    # Perform fuzzy matching and filter by threshold
+    filtered_matches = matcher.match(
         search_term,
-        all_files,
-        limit=max_results
+        limit=max_results,
+        threshold=threshold,
+        accept=accept
     )
-    
-    # Filter by threshold
-    filtered_matches = [
-        (path, score) 
-        for path, score in matches 
-        if score >= threshold
-    ]
 
     # Build info panel content
     info_sections = []
@@ -125,7 +98,7 @@ def fuzzy_find_project_files(
     # Results statistics section
     stats_section = [
         "## Results Statistics",
-        f"**Total Files Scanned**: {len(all_files)}",
+        f"**Files in Project**: {len(matcher)}",
         f"**Matches Found**: {len(filtered_matches)}"
     ]
     info_sections.append("\n".join(stats_section))
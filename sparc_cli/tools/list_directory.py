@@ -1,14 +1,16 @@
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Set
 import datetime
 from dataclasses import dataclass
-import pathspec
 from rich.tree import Tree
 from rich.console import Console
 from rich.panel import Panel
-from rich.markdown import Markdown
+from rich.text import Text
 from langchain_core.tools import tool
-import fnmatch
+
+from sparc_cli.code.walk import (
+    DEFAULT_MAX_ENTRIES, DirEntry, DirSummary, FileEntry, IgnoreMatcher, summarize_files, summarize_tree, walk_tree
+)
 
 console = Console()
 
@@ -34,6 +36,15 @@ def format_time(timestamp: float) -> str:
     dt = datetime.datetime.fromtimestamp(timestamp)
     return dt.strftime("%Y-%m-%d %H:%M")
 
+# Summary mode: directories with more entries than this are collapsed into aggregates
+SUMMARY_FANOUT = 20
+
+# Summary mode walks the whole tree for its aggregates, up to this many entries
+SUMMARY_MAX_ENTRIES = 200000
+
+# Extensions named in an aggregate; the rest are counted together
+SUMMARY_EXTENSIONS = 4
+
 # Default patterns to exclude
 DEFAULT_EXCLUDE_PATTERNS = [
     ".*",  # Hidden files
@@ -54,94 +65,101 @@ DEFAULT_EXCLUDE_PATTERNS = [
     "*.cache",  # Cache files
 ]
 
-def load_gitignore_patterns(path: Path) -> pathspec.PathSpec:
-    """Load gitignore patterns from .gitignore file or use defaults.
-    
-    Args:
-        path: Directory path to search for .gitignore
-        
-    Returns:
-        PathSpec object configured with the loaded patterns
-    """
-    gitignore_path = path / '.gitignore'
-    patterns = []
-    
-    # Load patterns from .gitignore if it exists
-    if gitignore_path.exists():
-        with open(gitignore_path) as f:
-            patterns.extend(line.strip() for line in f 
-                          if line.strip() and not line.startswith('#'))
-            
-    # Add default patterns
-    patterns.extend(DEFAULT_EXCLUDE_PATTERNS)
-    
-    return pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, patterns)
+def build_tree(directory: DirEntry, tree: Tree, config: DirScanConfig) -> None:
+    """Add a walked directory's contents to a Rich tree, directories first"""
+    if directory.error:
+        tree.add(f"🔒 ({directory.error})")
+        return
+
+    for subdir in directory.dirs:
+        branch = tree.add(f"📁 {subdir.name}/")
+        build_tree(subdir, branch, config)
 
-def should_ignore(path: str, spec: pathspec.PathSpec) -> bool:
-    """Check if a path should be ignored based on gitignore patterns"""
-    return spec.match_file(path)
+    for file in directory.files:
+        tree.add(file_label(file, config))
 
-def should_exclude(name: str, patterns: List[str]) -> bool:
-    """Check if a file/directory name matches any exclude patterns"""
-    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+def file_label(file: FileEntry, config: DirScanConfig) -> str:
+    """Label a file node with optional metadata"""
+    meta = []
+    if config.show_size:
+        meta.append(format_size(file.size))
+    if config.show_modified:
+        meta.append(format_time(file.mtime))
 
-def build_tree(
-    path: Path,
+    label = file.name
+    if meta:
+        label = f"{label} ({', '.join(meta)})"
+    return label
+
+def format_summary(summary: DirSummary) -> str:
+    """Format an aggregate as e.g. '120 files, 4 dirs: 80 .py, 40 .md; 1.2MB; newest 2024-05-01 10:00'"""
+    more = '' if summary.complete else '+'
+    counts = [f"{summary.files:,}{more} file{'' if summary.files == 1 else 's'}"]
+    if summary.dirs:
+        counts.append(f"{summary.dirs:,}{more} dir{'' if summary.dirs == 1 else 's'}")
+    text = ', '.join(counts)
+
+    if summary.files:
+        common = summary.extensions.most_common(SUMMARY_EXTENSIONS)
+        kinds = [f"{count:,} {ext or '(no ext)'}" for ext, count in common]
+        rest = summary.files - sum(count for _, count in common)
+        if rest:
+            kinds.append(f"{rest:,} other")
+        text += f": {', '.join(kinds)}; {format_size(summary.size)}"
+        if summary.newest is not None:
+            text += f"; newest {format_time(summary.newest)}"
+    return text
+
+def build_summary_tree(
+    directory: DirEntry,
     tree: Tree,
+    summaries: Dict[str, DirSummary],
     config: DirScanConfig,
-    current_depth: int = 0,
-    spec: Optional[pathspec.PathSpec] = None
+    fanout: int,
+    expand: Set[str],
+    depth: int = 0
 ) -> None:
-    """Recursively build a Rich tree representation of the directory"""
-    if current_depth >= config.max_depth:
+    """Add a directory to a Rich tree, collapsing large and deep subtrees into one aggregate line each.
+
+    Directories in ``expand`` are listed like the root, and their parents
+    only as far as needed to reach them.
+    """
+    if directory.error:
+        tree.add(f"🔒 ({directory.error})")
         return
 
-    try:
-        # Get sorted list of directory contents
-        entries = sorted(path.iterdir(), key=lambda p: (not p.is_dir(), p.name.lower()))
-        
-        for entry in entries:
-            # Get relative path from root for pattern matching
-            rel_path = entry.relative_to(path)
-            
-            # Skip if path matches exclude patterns
-            if spec and should_ignore(str(rel_path), spec):
-                continue
-            if should_exclude(entry.name, config.exclude_patterns):
-                continue
-                
-            # Skip if symlink and not following links
-            if entry.is_symlink() and not config.follow_links:
-                continue
-
-            try:
-                if entry.is_dir():
-                    # Add directory node
-                    branch = tree.add(
-                        f"📁 {entry.name}/"
-                    )
-                    
-                    # Recursively process subdirectory
-                    build_tree(entry, branch, config, current_depth + 1, spec)
-                else:
-                    # Add file node with optional metadata
-                    meta = []
-                    if config.show_size:
-                        meta.append(format_size(entry.stat().st_size))
-                    if config.show_modified:
-                        meta.append(format_time(entry.stat().st_mtime))
-                        
-                    label = entry.name
-                    if meta:
-                        label = f"{label} ({', '.join(meta)})"
-                    
-                    tree.add(label)
-                    
-            except PermissionError:
-                tree.add(f"🔒 {entry.name} (Permission denied)")
-                
-    except PermissionError:
-        tree.add("🔒 (Permission denied)")
+    # A parent of an expanded directory that would otherwise be collapsed
+    on_path_only = (
+        directory.path and directory.path not in expand
+        and len(directory.dirs) + len(directory.files) > fanout
+    )
+    rest = DirSummary()
+
+    for subdir in directory.dirs:
+        on_path = any(p == subdir.path or p.startswith(subdir.path + '/') for p in expand)
+        if on_path_only and not on_path:
+            rest.add(summaries[subdir.path])
+            rest.dirs += 1
+            continue
+        collapse = not on_path and (
+            depth + 1 >= config.max_depth or len(subdir.dirs) + len(subdir.files) > fanout
+        )
+        if collapse:
+            tree.add(f"📁 {subdir.name}/ ({format_summary(summaries[subdir.path])})")
+        else:
+            branch = tree.add(f"📁 {subdir.name}/")
+            build_summary_tree(
+                subdir, branch, summaries, config, fanout, expand,
+                0 if subdir.path in expand else depth + 1
+            )
+
+    if on_path_only or (len(directory.files) > fanout and directory.path not in expand):
+        rest.add(summarize_files(directory.files))
+    else:
+        for file in directory.files:
+            tree.add(file_label(file, config))
+    if rest.files or rest.dirs:
+        tree.add(f"📄 {'other entries: ' if on_path_only else ''}{format_summary(rest)}")
 
 @tool
 def list_directory_tree(
@@ -151,9 +169,19 @@ def list_directory_tree(
     follow_links: bool = False,
     show_size: bool = False,  # Default to not showing size
     show_modified: bool = False,  # Default to not showing modified time
-    exclude_patterns: List[str] = None
+    exclude_patterns: List[str] = None,
+    max_entries: Optional[int] = None,
+    summary: bool = False,
+    fanout: int = SUMMARY_FANOUT,
+    expand: List[str] = None
 ) -> str:
     """List directory contents in a tree format with optional metadata.
+
+    For large or deep trees, use summary mode: directories past max_depth or
+    with more than ``fanout`` entries are shown as one line of aggregates
+    (file counts by extension, total size, newest change), so the output
+    grows with the number of directories rather than files. Pass
+    directories to ``expand`` to list them in full.
     
     Args:
         path: Directory path to list
@@ -162,6 +190,11 @@ def list_directory_tree(
         show_size: Show file sizes (default: False)
         show_modified: Show last modified times (default: False)
         exclude_patterns: List of patterns to exclude (uses gitignore syntax)
+        max_entries: Maximum files and directories to list; shallower entries are kept first
+            (default: 2000, or 200000 scanned for the aggregates in summary mode)
+        summary: Collapse large and deep directories into aggregates (default: False)
+        fanout: In summary mode, directories with more entries than this are collapsed (default: 20)
+        expand: In summary mode, directories (relative to path) to list in full anyway
         
     Returns:
         Rendered tree string
@@ -172,11 +205,6 @@ def list_directory_tree(
     if not root_path.is_dir():
         raise ValueError(f"Path is not a directory: {path}")
 
-    # Load .gitignore patterns if present
-    spec = load_gitignore_patterns(root_path)
-    
-    # Create tree
-    tree = Tree(f"📁 {root_path}/")
     config = DirScanConfig(
         max_depth=max_depth,
         follow_links=follow_links,
@@ -184,18 +212,43 @@ def list_directory_tree(
         show_modified=show_modified,
         exclude_patterns=DEFAULT_EXCLUDE_PATTERNS + (exclude_patterns or [])
     )
-    
-    # Build tree
-    build_tree(root_path, tree, config, 0, spec)
-    
+
+    # Walk with os.scandir, scanning subdirectories in parallel; .gitignore
+    # files, the root's and any nested ones, are applied along the way.
+    # Summary mode walks the whole tree for its aggregates.
+    if max_entries is None:
+        max_entries = SUMMARY_MAX_ENTRIES if summary else DEFAULT_MAX_ENTRIES
+    result = walk_tree(
+        str(root_path),
+        max_depth=None if summary else config.max_depth,
+        ignore=IgnoreMatcher(config.exclude_patterns),
+        follow_links=config.follow_links,
+        want_stat=summary or config.show_size or config.show_modified,
+        max_entries=max_entries
+    )
+
+    # Create tree
+    tree = Tree(f"📁 {root_path}/")
+    if summary:
+        expanded = {p.strip('/') for p in (expand or [])}
+        expanded = {p[2:] if p.startswith('./') else p for p in expanded} - {'', '.'}
+        build_summary_tree(result.root, tree, summarize_tree(result.root), config, fanout, expanded)
+        if result.truncated:
+            tree.add(f"[... stopped scanning at {result.entries} entries; counts marked + are partial]")
+    else:
+        build_tree(result.root, tree, config)
+        if result.truncated:
+            tree.add(f"[... stopped at {result.entries} entries; "
+                     "list a subdirectory, lower max_depth or use summary mode]")
+
     # Capture tree output
     with console.capture() as capture:
         console.print(tree)
     tree_str = capture.get()
     
-    # Display panel
+    # Display panel, reusing the rendered text
     console.print(Panel(
-        Markdown(f"```\n{tree_str}\n```"),
+        Text(tree_str),
         title="📂 Directory Tree",
         border_style="bright_blue"
     ))
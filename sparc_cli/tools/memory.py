@@ -1,13 +1,20 @@
-from typing import Dict, List, Any, Union, Optional, Set
-from typing_extensions import TypedDict
-
-class WorkLogEntry(TypedDict):
-    timestamp: str
-    event: str
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterator, List, Any, Union, Optional, Tuple
+from typing_extensions import NotRequired, TypedDict
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
 from langchain_core.tools import tool
+from sparc_cli.memory import (
+    BoundedPriorityStore, BoundedPriorityList, MemoryRecord, NoteRecord, FactRecord, SnippetRecord,
+    RelatedFilesRegistry, ProjectKnowledgeBase, RecordIndex, SnippetRefRecord,
+    RecordDedupIndex, merge_snippets, snippet_line_range, MemoryArchive, extractive_summary,
+    ContextMemory, MemorySnapshot, MemoryChange, WorkLog, WorkLogEvent, JsonlWorkLogSink
+)
 
 class SnippetInfo(TypedDict):
     """Type definition for source code snippet information"""
@@ -16,6 +23,14 @@ class SnippetInfo(TypedDict):
     snippet: str
     description: Optional[str]
 
+class SnippetRefInfo(TypedDict):
+    """Type definition for a source code snippet stored by reference"""
+    filepath: str
+    start_line: NotRequired[Optional[int]]
+    end_line: NotRequired[Optional[int]]
+    symbol: NotRequired[Optional[str]]
+    description: NotRequired[Optional[str]]
+
 console = Console()
 
 # Memory configuration
@@ -28,83 +43,515 @@ MEMORY_LIMITS = {
     'work_log': 100  # Max number of work log entries
 }
 
+# Size budgets per category, enforced alongside MEMORY_LIMITS at insert time.
+# 'tokens' is an estimate of model tokens, 'bytes' is the UTF-8 size; None disables a bound.
+MEMORY_BUDGETS = {
+    'research_notes': {'tokens': 16000, 'bytes': None},
+    'key_facts': {'tokens': 6000, 'bytes': None},
+    'key_snippets': {'tokens': 24000, 'bytes': None}
+}
+
 class MemoryPriority:
     LOW = 0
     MEDIUM = 1
     HIGH = 2
     CRITICAL = 3
 
-class MemoryItem(TypedDict):
-    """Base type for memory items with priority"""
-    priority: int
-    timestamp: str
+# Record type used for each prioritized memory category
+_RECORD_TYPES = {
+    'research_notes': NoteRecord,
+    'key_facts': FactRecord,
+    'key_snippets': SnippetRecord
+}
+
+# Token budget and item cap for memory injected into narrowly scoped prompts,
+# such as a single implementation task or an expert question
+RELEVANT_MEMORY_BUDGETS = {
+    'research_notes': 6000,
+    'key_facts': 3000,
+    'key_snippets': 12000
+}
+RELEVANT_MEMORY_TOP_K = 25
+
+# Relevance indexes over each prioritized category, updated lazily on query
+_memory_indexes: Dict[str, RecordIndex] = {}
+
+# Minimum shingle (Jaccard) similarity at which a new note or fact is merged into
+# an existing one instead of being stored separately; None disables merging.
+# Key snippets are merged when they overlap a snippet of the same file instead.
+DEDUP_THRESHOLDS = {
+    'research_notes': 0.7,
+    'key_facts': 0.7
+}
+
+# Near-duplicate indexes over the text categories, updated lazily on insert
+_dedup_indexes: Dict[str, RecordDedupIndex] = {}
+
+# Categories whose evicted items are condensed into a summary item when
+# compaction is enabled, the summary's token budget, and how many times a
+# summary may displace further items before those are simply archived
+COMPACTED_CATEGORIES = ('research_notes', 'key_facts')
+COMPACTION_SUMMARY_TOKENS = 600
+COMPACTION_PASSES = 3
+
+# Singular labels used when reporting evicted records
+_EVICTION_LABELS = {
+    'research_notes': 'Note',
+    'key_facts': 'Fact',
+    'key_snippets': 'Snippet'
+}
+
+_PRIORITY_LABELS = {
+    MemoryPriority.LOW: "Low Priority",
+    MemoryPriority.MEDIUM: "Medium Priority",
+    MemoryPriority.HIGH: "High Priority",
+    MemoryPriority.CRITICAL: "Critical"
+}
 
-class PrioritizedNote(MemoryItem):
-    """Research note with priority"""
-    content: str
+# Counter keys mirrored from each store's next ID
+_ID_COUNTERS = {
+    'key_facts': 'key_fact_id_counter',
+    'key_snippets': 'key_snippet_id_counter'
+}
 
-class PrioritizedFact(MemoryItem):
-    """Key fact with priority"""
-    content: str
+# Memory keys whose values sub-agents share with their parent rather than copy:
+# configuration and handles to on-disk stores
+SHARED_MEMORY_KEYS = ('config', 'knowledge_base', 'memory_archive', 'compaction_model', 'run_id')
 
-class PrioritizedSnippet(MemoryItem, SnippetInfo):
-    """Code snippet with priority"""
-    pass
+# Words in a key fact that may name a file: a path with a separator, or a name with an extension
+_PATH_RE = re.compile(r'[\w.-]*/[\w./-]+|[\w-][\w.-]*\.[A-Za-z]\w*')
 
-# Global memory store
-_global_memory: Dict[str, Union[List[Any], Dict[int, Union[str, PrioritizedFact, PrioritizedSnippet]], int, Set[str], bool, str, int, List[WorkLogEntry]]] = {
-    'research_notes': [],  # List[PrioritizedNote]
+# Global memory store. Sub-agents run against a snapshot of it (see fork_memory),
+# so this resolves to the memory of whichever agent is currently running.
+_global_memory: ContextMemory = ContextMemory({
+    'research_notes': BoundedPriorityList(MEMORY_LIMITS['research_notes']),  # NoteRecord entries
     'plans': [],
     'tasks': {},  # Dict[int, str] - ID to task mapping
     'task_completed': False,  # Flag indicating if task is complete
     'completion_message': '',  # Message explaining completion
     'task_id_counter': 1,  # Counter for generating unique task IDs
-    'key_facts': {},  # Dict[int, PrioritizedFact] - ID to fact mapping
+    'key_facts': BoundedPriorityStore(MEMORY_LIMITS['key_facts']),  # ID to FactRecord mapping
     'key_fact_id_counter': 1,  # Counter for generating unique fact IDs
-    'key_snippets': {},  # Dict[int, PrioritizedSnippet] - ID to snippet mapping
+    'key_snippets': BoundedPriorityStore(MEMORY_LIMITS['key_snippets']),  # ID to SnippetRecord mapping
     'key_snippet_id_counter': 1,  # Counter for generating unique snippet IDs
     'implementation_requested': False,
-    'related_files': {},  # Dict[int, str] - ID to filepath mapping
+    'related_files': RelatedFilesRegistry(),  # ID to filepath mapping, indexed by normalized path
     'related_file_id_counter': 1,  # Counter for generating unique file IDs
     'plan_completed': False,
     'agent_depth': 0,
-    'work_log': []  # List[WorkLogEntry] - Timestamped work events
-}
+    'work_log': WorkLog(MEMORY_LIMITS['work_log'])  # Ring buffer of WorkLogEvent entries
+})
+
+def _get_store(memory_type: str) -> BoundedPriorityStore:
+    """Get the bounded store backing a prioritized memory category.
+
+    Plain lists or dicts found in global memory (e.g. after the memory has been
+    reset by assigning fresh containers) are migrated into a store first.
+    """
+    store_cls = BoundedPriorityList if memory_type == 'research_notes' else BoundedPriorityStore
+    current = _global_memory.get(memory_type)
+    counter_key = _ID_COUNTERS.get(memory_type)
+
+    if not isinstance(current, store_cls):
+        store = store_cls(MEMORY_LIMITS[memory_type], next_id=_global_memory.get(counter_key, 1) if counter_key else 1)
+        items = current.items() if isinstance(current, dict) else enumerate(current or [], start=1)
+        record_cls = _RECORD_TYPES[memory_type]
+        for item_id, item in items:
+            if not isinstance(item, MemoryRecord):
+                fields = item if isinstance(item, dict) else {'content': item}
+                item = record_cls(
+                    **{k: fields.get(k) for k in record_cls._fields},
+                    priority=fields.get('priority', MemoryPriority.MEDIUM)
+                )
+            store.put(item_id, item)
+        _global_memory[memory_type] = store
+        current = store
+
+    budget = MEMORY_BUDGETS.get(memory_type, {})
+    current.limit = MEMORY_LIMITS[memory_type]
+    current.max_tokens = budget.get('tokens')
+    current.max_bytes = budget.get('bytes')
+    return current
+
+def _record_change(category: str, op: str, key: Optional[Hashable] = None, value: Any = None) -> None:
+    """Log a memory change if running in a sub-agent's snapshot, for merging back later."""
+    memory = _global_memory.current()
+    if isinstance(memory, MemorySnapshot):
+        memory.record(category, op, key, value)
+
+def _add_record(memory_type: str, record: MemoryRecord) -> Tuple[int, List[MemoryRecord]]:
+    """Add a record to a prioritized memory category, enforcing its limit and budget.
+
+    Returns:
+        Tuple of (assigned ID, records evicted or rejected to stay within budget)
+    """
+    store = _get_store(memory_type)
+    record_id, evicted = store.add(record)
+    counter_key = _ID_COUNTERS.get(memory_type)
+    if counter_key:
+        _global_memory[counter_key] = store.next_id
+    _record_change(memory_type, 'add', record_id, record)
+    return record_id, evicted
+
+def _put_record(memory_type: str, record_id: int, record: MemoryRecord) -> List[MemoryRecord]:
+    """Replace the record stored under an ID, enforcing the category's limit and budget."""
+    store = _get_store(memory_type)
+    evicted = store.put(record_id, record)
+    # A rejected replacement leaves the existing record in place
+    if store.get(record_id) is record:
+        _record_change(memory_type, 'update', record_id, record)
+    return evicted
+
+def _pop_record(memory_type: str, record_id: int) -> MemoryRecord:
+    """Remove and return a record from a prioritized memory category."""
+    record = _get_store(memory_type).pop(record_id)
+    _record_change(memory_type, 'delete', record_id)
+    return record
+
+def _find_text_duplicate(memory_type: str, record: MemoryRecord) -> Optional[int]:
+    """Return the ID of a stored note or fact that is a near-duplicate of a record."""
+    threshold = DEDUP_THRESHOLDS.get(memory_type)
+    if threshold is None:
+        return None
+    index = _dedup_indexes.get(memory_type)
+    if index is None or index.threshold != threshold:
+        index = _dedup_indexes[memory_type] = RecordDedupIndex(threshold=threshold)
+    index.sync(_get_store(memory_type))
+    match = index.find(record.text())
+    # Compaction summaries are rewritten wholesale, so nothing is merged into them
+    summary_id = _global_memory.get('memory_summaries', {}).get(memory_type, {}).get('id')
+    return match[0] if match and match[0] != summary_id else None
+
+def _store_record(memory_type: str, record: MemoryRecord) -> Tuple[int, MemoryRecord, List[MemoryRecord], List[MemoryRecord]]:
+    """Add a record, merging it into near-duplicates already in memory.
+
+    A note or fact similar to a stored one replaces it under the same ID,
+    keeping the newer wording and the higher priority. A snippet overlapping
+    snippets of the same file is merged with them into the lowest of their IDs.
+
+    Returns:
+        Tuple of (ID, record as stored, records evicted or rejected to stay within
+        budget, existing records the new one was merged with)
+    """
+    store = _get_store(memory_type)
+
+    if memory_type == 'key_snippets':
+        target_id = None
+        merged_with = []
+        for record_id, existing in sorted(store.items()):
+            merged = merge_snippets(existing, record)
+            if merged is not None:
+                record = merged
+                merged_with.append(existing)
+                target_id = target_id or record_id
+        for existing in merged_with[1:]:
+            _pop_record(memory_type, existing.id)
+    else:
+        target_id = _find_text_duplicate(memory_type, record)
+        merged_with = [store[target_id]] if target_id is not None else []
+        if merged_with:
+            existing = merged_with[0]
+            record = type(record)(
+                content=record['content'],
+                priority=max(existing.priority, record.priority)
+            )
+
+    if target_id is None:
+        record_id, evicted = _add_record(memory_type, record)
+        return record_id, record, evicted, []
+    return target_id, record, _put_record(memory_type, target_id, record), merged_with
+
+def _wording_key(text: str) -> str:
+    """Reduce text to its words, so wordings differing only in spacing or punctuation compare equal."""
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+def _report_merges(memory_type: str, merges: List[Tuple[int, List[MemoryRecord]]]) -> str:
+    """Display and describe new records that were merged into existing ones.
+
+    Returns:
+        Message for the agent listing the merges, or empty string if none
+    """
+    if not merges:
+        return ""
+
+    label = _EVICTION_LABELS[memory_type]
+    store = _get_store(memory_type)
+    lines = []
+    for record_id, merged_with in merges:
+        line = f"- Merged into {label} #{record_id}"
+        absorbed = [f"#{record.id}" for record in merged_with if record.id != record_id]
+        if absorbed:
+            line += f" (also absorbed {', '.join(absorbed)})"
+        stored = store.get(record_id)
+        if memory_type != 'key_snippets' and stored is not None:
+            previous = merged_with[0]['content']
+            if _wording_key(previous) != _wording_key(stored['content']):
+                if len(previous) > 80:
+                    previous = previous[:77] + "..."
+                line += f"; kept the new wording, replacing: {previous}"
+        lines.append(line)
+    message = f"Merged overlapping or near-duplicate {memory_type.replace('_', ' ')} into existing entries:\n" + "\n".join(lines)
+
+    console.print(Panel(Markdown(message), title="🔗 Memory Merged", border_style="cyan"))
+    return message
+
+def _with_reports(result: str, *reports: str) -> str:
+    return "\n\n".join([result] + [report for report in reports if report])
+
+def _report_evictions(memory_type: str, evicted: List[MemoryRecord]) -> str:
+    """Display and describe records dropped to keep a category within its budget.
+
+    Returns:
+        Message for the agent listing the dropped records, or empty string if none
+    """
+    if not evicted:
+        return ""
+
+    label = _EVICTION_LABELS[memory_type]
+    store = _get_store(memory_type)
+    lines = []
+    for record in evicted:
+        summary = record['filepath'] if memory_type == 'key_snippets' else record['content']
+        if len(summary) > 80:
+            summary = summary[:77] + "..."
+        lines.append(f"- {label} #{record.id} ({_PRIORITY_LABELS[record.priority]}): {summary}")
+
+    usage = f"{len(store)}/{store.limit} items, ~{store.total_tokens} tokens"
+    if store.max_tokens is not None:
+        usage += f" of {store.max_tokens}"
+    message = f"Memory budget reached for {memory_type} ({usage}). Dropped:\n" + "\n".join(lines)
+
+    console.print(Panel(Markdown(message), title="🗑️ Memory Evicted", border_style="yellow"))
+    return message
+
+def _memory_archive() -> Optional[MemoryArchive]:
+    return _global_memory.get('memory_archive')
+
+def _summarize(memory_type: str, texts: List[str]) -> str:
+    """Condense texts with the configured compaction model, or offline if there is none.
+
+    Falls back to the extractive summarizer if the model call fails.
+    """
+    model = _global_memory.get('compaction_model')
+    if model is not None:
+        prompt = (
+            f"Condense these {memory_type.replace('_', ' ')} into a bullet list of at most "
+            f"{COMPACTION_SUMMARY_TOKENS} tokens. Keep file paths, identifiers and concrete findings; "
+            "drop repetition. Reply with the list only.\n\n" + "\n\n".join(texts)
+        )
+        try:
+            summary = model.invoke(prompt).content
+            if isinstance(summary, str) and summary.strip():
+                return summary.strip()
+        except Exception as e:
+            console.print(Panel(f"Compaction model failed, summarizing offline: {e}", title="Error", border_style="red"))
+    return extractive_summary(texts, COMPACTION_SUMMARY_TOKENS)
+
+def _summary_record(memory_type: str, body: str, count: int, priority: MemoryPriority) -> MemoryRecord:
+    """Build the memory item holding a category's compaction summary."""
+    label = _EVICTION_LABELS[memory_type].lower()
+    return _RECORD_TYPES[memory_type](
+        content=f"[Summary of {count} archived {label}s; search_memory_archive has the full text]\n{body}",
+        priority=priority
+    )
+
+def _compact_evictions(memory_type: str, evicted: List[MemoryRecord]) -> Tuple[List[MemoryRecord], str]:
+    """Condense evicted records into the category's summary item and archive the originals.
+
+    The summary item takes the highest priority of what it condenses. If
+    storing it displaces further records, those are folded in as well, up to
+    COMPACTION_PASSES times.
+
+    Returns:
+        Tuple of (records still dropped from memory, though archived; message for the agent)
+    """
+    archive = _memory_archive()
+    if archive is None or memory_type not in COMPACTED_CATEGORIES or not evicted:
+        return evicted, ""
+
+    summaries = _global_memory.setdefault('memory_summaries', {})
+    label = _EVICTION_LABELS[memory_type].lower()
+    run_id = _global_memory.get('run_id')
+    folded_count = 0
+
+    pending = evicted
+    for _ in range(COMPACTION_PASSES):
+        if not pending:
+            break
+        summary = summaries.get(memory_type, {'id': None, 'body': '', 'count': 0, 'priority': MemoryPriority.LOW})
+        folded = [record for record in pending if record.id != summary['id']]
+        archive.add(memory_type, folded, run_id=run_id)
+        # Evictions aren't logged, but a merge must not summarize these a second time
+        for record in folded:
+            _record_change(memory_type, 'delete', record.id)
+        folded_count += len(folded)
+
+        texts = ([summary['body']] if summary['body'] else []) + [record['content'] for record in folded]
+        body = _summarize(memory_type, texts)
+        count = summary['count'] + len(folded)
+        priority = max([summary['priority']] + [record.priority for record in folded])
+        record = _summary_record(memory_type, body, count, priority)
+        if summary['id'] is not None:
+            summary_id = summary['id']
+            pending = _put_record(memory_type, summary_id, record)
+        else:
+            summary_id, pending = _add_record(memory_type, record)
+        summaries[memory_type] = {'id': summary_id, 'body': body, 'count': count, 'priority': priority}
+
+    # Anything still displaced is kept in the archive but not summarized
+    summary_id = summaries[memory_type]['id']
+    dropped = [record for record in pending if record.id != summary_id]
+    archive.add(memory_type, dropped, run_id=run_id)
+
+    message = (
+        f"Memory budget reached for {memory_type}: condensed {folded_count} {label}s into {_EVICTION_LABELS[memory_type]} "
+        f"#{summary_id}. The originals are archived; use search_memory_archive to look them up."
+    )
+    console.print(Panel(Markdown(message), title="🗜️ Memory Compacted", border_style="yellow"))
+    return dropped, message
+
+def _handle_evictions(memory_type: str, evicted: List[MemoryRecord]) -> str:
+    """Compact evicted records if enabled, then report whatever was still dropped."""
+    remaining, compaction_report = _compact_evictions(memory_type, evicted)
+    reports = [compaction_report, _report_evictions(memory_type, remaining)]
+    return "\n\n".join(report for report in reports if report)
+
+def enable_memory_compaction(root: str = '.', model: Optional[Any] = None) -> MemoryArchive:
+    """Condense items evicted from research notes and key facts instead of dropping them.
+
+    The evicted items are folded into one summary item per category and the
+    originals are archived under <root>/.sparc/, where search_memory_archive
+    can still find them.
+
+    Args:
+        root: Project root directory (default: current directory)
+        model: Optional chat model used to write summaries; summaries are
+            extractive and computed offline when omitted
+
+    Returns:
+        The memory archive
+    """
+    archive = MemoryArchive(root)
+    _global_memory['memory_archive'] = archive
+    _global_memory['compaction_model'] = model
+    _global_memory.setdefault('run_id', str(uuid.uuid4()))
+    return archive
 
 def _enforce_memory_limit(memory_type: str) -> None:
     """Enforce memory limits by removing lowest priority, oldest items first."""
-    from datetime import datetime
-    
     if memory_type not in MEMORY_LIMITS:
         return
-        
-    limit = MEMORY_LIMITS[memory_type]
-    
-    if memory_type == 'research_notes':
-        notes = _global_memory['research_notes']
-        if len(notes) > limit:
-            # Sort by priority (ascending) then timestamp (ascending)
-            notes.sort(key=lambda x: (x['priority'], x['timestamp']))
-            # Remove oldest, lowest priority items
-            _global_memory['research_notes'] = notes[-limit:]
-            
-    elif memory_type in ['key_facts', 'key_snippets']:
-        items = _global_memory[memory_type]
-        if len(items) > limit:
-            # Sort items by priority and timestamp
-            sorted_items = sorted(
-                items.items(),
-                key=lambda x: (x[1]['priority'], x[1]['timestamp'])
-            )
-            # Keep only the highest priority, newest items
-            items_to_keep = dict(sorted_items[-limit:])
-            _global_memory[memory_type] = items_to_keep
-            
+
+    if memory_type in _RECORD_TYPES:
+        _get_store(memory_type).enforce_limit()
+
     elif memory_type == 'work_log':
-        log = _global_memory['work_log']
-        if len(log) > limit:
-            # Keep newest entries
-            _global_memory['work_log'] = log[-limit:]
+        # The ring buffer keeps the newest entries; this just applies limit changes
+        _get_work_log()
+
+def _knowledge_base() -> Optional[ProjectKnowledgeBase]:
+    return _global_memory.get('knowledge_base')
+
+def _provenance() -> Dict[str, Any]:
+    config = _global_memory.get('config', {})
+    return {
+        'run_id': _global_memory.get('run_id'),
+        'agent_depth': _global_memory.get('agent_depth', 0),
+        'model': config.get('model'),
+        'created_at': time.time()
+    }
+
+def _fact_sources(fact: str, root: str) -> List[str]:
+    """Files a fact names: paths relative to the project root, or the names of related files."""
+    related: Dict[str, List[str]] = {}
+    for path in get_related_file_paths():
+        related.setdefault(os.path.basename(path), []).append(path)
+    sources = []
+    for word in _PATH_RE.findall(fact):
+        word = word.rstrip('.')
+        if word.startswith('./'):
+            word = word[2:]
+        if os.path.isfile(os.path.join(root, word)):
+            sources.append(word)
+        else:
+            sources.extend(related.get(os.path.basename(word), []))
+    return list(dict.fromkeys(sources))
+
+def _persist_fact(fact: str, priority: int) -> None:
+    """Save a fact to the project knowledge base, if enabled.
+
+    A fact is tied to the files it names and becomes stale once one of them
+    changes. Facts that name no file expire by age instead (see
+    SOURCELESS_FACT_MAX_AGE).
+    """
+    kb = _knowledge_base()
+    if kb is not None:
+        kb.save_fact(fact, priority, source_files=_fact_sources(fact, kb.root), provenance=_provenance())
+
+def _persist_snippet(snippet_info: Union[SnippetInfo, MemoryRecord], priority: int) -> None:
+    """Save a snippet to the project knowledge base, if enabled."""
+    kb = _knowledge_base()
+    if kb is not None:
+        kb.save_snippet(
+            snippet_info['filepath'],
+            snippet_info['line_number'],
+            snippet_info['snippet'],
+            snippet_info.get('description'),
+            priority,
+            provenance=_provenance()
+        )
+
+def _forget_fact(fact: MemoryRecord) -> None:
+    kb = _knowledge_base()
+    if kb is not None:
+        kb.forget_fact(fact['content'])
+
+def _forget_snippet(snippet: MemoryRecord) -> None:
+    kb = _knowledge_base()
+    if kb is not None:
+        kb.forget_snippet(snippet['filepath'], snippet['line_number'], snippet['snippet'])
+
+def enable_knowledge_base(root: str = '.') -> int:
+    """Open the project knowledge base and preload its valid entries into memory.
+
+    Once enabled, key facts and snippets emitted during the run are persisted
+    under <root>/.sparc/ and deleting them also removes them from disk.
+
+    Args:
+        root: Project root directory (default: current directory)
+
+    Returns:
+        Number of entries loaded into memory
+    """
+    kb = ProjectKnowledgeBase(root)
+    _global_memory['knowledge_base'] = kb
+    _global_memory['run_id'] = str(uuid.uuid4())
+
+    facts = snippets = 0
+    for entry in kb.load():
+        if entry.kind == ProjectKnowledgeBase.FACT:
+            _add_record('key_facts', FactRecord(content=entry.content, priority=entry.priority))
+            facts += 1
+        else:
+            filepath = os.path.relpath(os.path.join(kb.root, entry.filepath))
+            _get_related_files_registry().add(filepath)
+            _add_record('key_snippets', SnippetRecord(
+                filepath=filepath,
+                line_number=entry.line_number,
+                snippet=entry.content,
+                description=entry.description,
+                priority=entry.priority
+            ))
+            snippets += 1
+    _global_memory['related_file_id_counter'] = _get_related_files_registry().next_id
+
+    if facts or snippets:
+        console.print(Panel(
+            f"Loaded {facts} key facts and {snippets} key snippets from {kb.db_path}",
+            title="📚 Knowledge Base",
+            border_style="bright_blue"
+        ))
+    return facts + snippets
 
 @tool("emit_research_notes")
 def emit_research_notes(notes: str, priority: int = MemoryPriority.MEDIUM) -> str:
@@ -115,18 +562,10 @@ def emit_research_notes(notes: str, priority: int = MemoryPriority.MEDIUM) -> st
         priority: Priority level (0-3, default: MEDIUM)
         
     Returns:
-        The stored notes
+        The stored notes, followed by a list of any notes dropped to stay within the memory budget
     """
-    from datetime import datetime
-    
-    note = PrioritizedNote(
-        content=notes,
-        priority=min(max(priority, MemoryPriority.LOW), MemoryPriority.CRITICAL),
-        timestamp=datetime.now().isoformat()
-    )
-    
-    _global_memory['research_notes'].append(note)
-    _enforce_memory_limit('research_notes')
+    priority = min(max(priority, MemoryPriority.LOW), MemoryPriority.CRITICAL)
+    note_id, _, evicted, merged_with = _store_record('research_notes', NoteRecord(content=notes, priority=priority))
     
     priority_labels = {
         MemoryPriority.LOW: "Low Priority",
@@ -139,7 +578,13 @@ def emit_research_notes(notes: str, priority: int = MemoryPriority.MEDIUM) -> st
         Markdown(notes),
         title=f"🔍 Research Notes ({priority_labels[priority]})"
     ))
-    return notes
+
+    merges = [(note_id, merged_with)] if merged_with else []
+    return _with_reports(
+        notes,
+        _report_merges('research_notes', merges),
+        _handle_evictions('research_notes', evicted)
+    )
 
 @tool("emit_plan")
 def emit_plan(plan: str) -> str:
@@ -153,7 +598,7 @@ def emit_plan(plan: str) -> str:
     """
     _global_memory['plans'].append(plan)
     console.print(Panel(Markdown(plan), title="📋 Plan"))
-    log_work_event(f"Added plan step:\n\n{plan}")
+    log_work_event(f"Added plan step:\n\n{plan}", tool="emit_plan")
     return plan
 
 @tool("emit_task")
@@ -174,7 +619,7 @@ def emit_task(task: str) -> str:
     _global_memory['tasks'][task_id] = task
     
     console.print(Panel(Markdown(task), title=f"✅ Task #{task_id}"))
-    log_work_event(f"Task #{task_id} added:\n\n{task}")
+    log_work_event(f"Task #{task_id} added:\n\n{task}", tool="emit_task")
     return f"Task #{task_id} stored."
 
 
@@ -190,22 +635,20 @@ def emit_key_facts(facts: List[str], priority: int = MemoryPriority.MEDIUM) -> s
     Returns:
         List of stored fact confirmation messages
     """
-    from datetime import datetime
-    
     results = []
+    evicted = []
+    merges = []
     priority = min(max(priority, MemoryPriority.LOW), MemoryPriority.CRITICAL)
     
     for fact in facts:
-        # Get and increment fact ID
-        fact_id = _global_memory['key_fact_id_counter']
-        _global_memory['key_fact_id_counter'] += 1
-        
-        # Store fact with ID and priority
-        _global_memory['key_facts'][fact_id] = PrioritizedFact(
-            content=fact,
-            priority=priority,
-            timestamp=datetime.now().isoformat()
-        )
+        # Store fact with priority; the store assigns the ID, merges near-duplicates and enforces the limit
+        fact_id, stored, dropped, merged_with = _store_record('key_facts', FactRecord(content=fact, priority=priority))
+        evicted.extend(dropped)
+        if merged_with:
+            merges.append((fact_id, merged_with))
+            if merged_with[0]['content'] != stored['content']:
+                _forget_fact(merged_with[0])
+        _persist_fact(stored['content'], stored.priority)
         
         # Display panel with ID and priority
         priority_labels = {
@@ -216,17 +659,20 @@ def emit_key_facts(facts: List[str], priority: int = MemoryPriority.MEDIUM) -> s
         }
         
         console.print(Panel(
-            Markdown(fact),
-            title=f"💡 Key Fact #{fact_id} ({priority_labels[priority]})",
+            Markdown(stored['content']),
+            title=f"💡 Key Fact #{fact_id} ({priority_labels[stored.priority]})",
             border_style="bright_cyan"
         ))
         
         # Add result message
         results.append(f"Stored fact #{fact_id}: {fact}")
     
-    _enforce_memory_limit('key_facts')
-    log_work_event(f"Stored {len(facts)} key facts.")    
-    return "Facts stored."
+    log_work_event(f"Stored {len(facts)} key facts.", tool="emit_key_facts", counts={'facts': len(facts)})    
+    return _with_reports(
+        "Facts stored.",
+        _report_merges('key_facts', merges),
+        _handle_evictions('key_facts', evicted)
+    )
 
 
 @tool("delete_key_facts")
@@ -244,12 +690,13 @@ def delete_key_facts(fact_ids: List[int]) -> str:
     for fact_id in fact_ids:
         if fact_id in _global_memory['key_facts']:
             # Delete the fact
-            deleted_fact = _global_memory['key_facts'].pop(fact_id)
+            deleted_fact = _pop_record('key_facts', fact_id)
+            _forget_fact(deleted_fact)
             success_msg = f"Successfully deleted fact #{fact_id}: {deleted_fact}"
             console.print(Panel(Markdown(success_msg), title="Fact Deleted", border_style="green"))
             results.append(success_msg)
     
-    log_work_event(f"Deleted facts {fact_ids}.")        
+    log_work_event(f"Deleted facts {fact_ids}.", tool="delete_key_facts", counts={'facts': len(fact_ids)})        
     return "Facts deleted."
 
 @tool("delete_tasks")
@@ -274,7 +721,7 @@ def delete_tasks(task_ids: List[int]) -> str:
                               border_style="green"))
             results.append(success_msg)
     
-    log_work_event(f"Deleted tasks {task_ids}.")        
+    log_work_event(f"Deleted tasks {task_ids}.", tool="delete_tasks", counts={'tasks': len(task_ids)})        
     return "Tasks deleted."
 
 @tool("request_implementation")
@@ -291,8 +738,9 @@ def request_implementation() -> str:
         Empty string
     """
     _global_memory['implementation_requested'] = True
+    _record_change('implementation_requested', 'set', value=True)
     console.print(Panel("🚀 Implementation Requested", style="yellow", padding=0))
-    log_work_event("Implementation requested.")
+    log_work_event("Implementation requested.", tool="request_implementation")
     return ""
 
 
@@ -313,25 +761,25 @@ def emit_key_snippets(snippets: List[SnippetInfo], priority: int = MemoryPriorit
     Returns:
         List of stored snippet confirmation messages
     """
-    from datetime import datetime
-    
     priority = min(max(priority, MemoryPriority.LOW), MemoryPriority.CRITICAL)
     # First collect unique filepaths to add as related files
-    emit_related_files.invoke({"files": [snippet_info['filepath'] for snippet_info in snippets]})
+    register_related_files([snippet_info['filepath'] for snippet_info in snippets])
 
     results = []
+    evicted = []
+    merges = []
     for snippet_info in snippets:
-        # Get and increment snippet ID 
-        snippet_id = _global_memory['key_snippet_id_counter']
-        _global_memory['key_snippet_id_counter'] += 1
-        
-        # Store snippet info with priority
-        prioritized_snippet = PrioritizedSnippet(
-            **snippet_info,
-            priority=priority,
-            timestamp=datetime.now().isoformat()
+        # Store snippet info with priority; the store assigns the ID, merges overlapping
+        # snippets of the same file and enforces the limit
+        snippet_id, stored, dropped, merged_with = _store_record(
+            'key_snippets', SnippetRecord(**snippet_info, priority=priority)
         )
-        _global_memory['key_snippets'][snippet_id] = prioritized_snippet
+        evicted.extend(dropped)
+        if merged_with:
+            merges.append((snippet_id, merged_with))
+            for existing in merged_with:
+                _forget_snippet(existing)
+        _persist_snippet(stored, stored.priority)
         
         # Format display text as markdown
         priority_labels = {
@@ -342,19 +790,19 @@ def emit_key_snippets(snippets: List[SnippetInfo], priority: int = MemoryPriorit
         }
         
         display_text = [
-            f"**Priority**: {priority_labels[priority]}",
+            f"**Priority**: {priority_labels[stored.priority]}",
             "",
             f"**Source Location**:",
-            f"- File: `{snippet_info['filepath']}`",
-            f"- Line: `{snippet_info['line_number']}`",
+            f"- File: `{stored['filepath']}`",
+            f"- Line: `{stored['line_number']}`",
             "",  # Empty line before code block
             "**Code**:",
             "```python",
-            snippet_info['snippet'].rstrip(),  # Remove trailing whitespace 
+            stored['snippet'].rstrip(),  # Remove trailing whitespace 
             "```"
         ]
-        if snippet_info['description']:
-            display_text.extend(["", "**Description**:", snippet_info['description']])
+        if stored['description']:
+            display_text.extend(["", "**Description**:", stored['description']])
             
         # Display panel
         console.print(Panel(
@@ -365,9 +813,82 @@ def emit_key_snippets(snippets: List[SnippetInfo], priority: int = MemoryPriorit
         
         results.append(f"Stored snippet #{snippet_id}")
     
-    _enforce_memory_limit('key_snippets')
-    log_work_event(f"Stored {len(snippets)} code snippets.")    
-    return "Snippets stored."
+    log_work_event(f"Stored {len(snippets)} code snippets.", tool="emit_key_snippets", counts={'snippets': len(snippets)})    
+    return _with_reports(
+        "Snippets stored.",
+        _report_merges('key_snippets', merges),
+        _handle_evictions('key_snippets', evicted)
+    )
+
+@tool("emit_key_snippet_refs")
+def emit_key_snippet_refs(refs: List[SnippetRefInfo], priority: int = MemoryPriority.MEDIUM) -> str:
+    """Store key source code snippets by reference instead of copying their text.
+    Prefer this over emit_key_snippets for code that already exists on disk: only the location is
+    stored, and the current code is read from the file whenever snippets are shown, so they stay
+    up to date after edits.
+    Automatically adds the filepaths of the snippets to related files.
+    
+    Args:
+        refs: List of snippet reference dictionaries containing:
+              - filepath: Path to the source file
+              - start_line: First line of the snippet (1-based), if referencing a line range
+              - end_line: Last line of the snippet (inclusive, defaults to start_line)
+              - symbol: Function/class name to reference instead of a line range (e.g. 'MyClass.method')
+              - description: Optional description of the significance
+        priority: Priority level (0-3, default: MEDIUM)
+                 
+    Returns:
+        Confirmation message, including any references that could not be resolved
+    """
+    priority = min(max(priority, MemoryPriority.LOW), MemoryPriority.CRITICAL)
+
+    stored = []
+    errors = []
+    evicted = []
+    merges = []
+    for ref_info in refs:
+        try:
+            record = SnippetRefRecord(
+                ref_info['filepath'],
+                start_line=ref_info.get('start_line'),
+                end_line=ref_info.get('end_line'),
+                symbol=ref_info.get('symbol'),
+                description=ref_info.get('description'),
+                priority=priority
+            )
+        except ValueError as e:
+            errors.append(f"- `{ref_info['filepath']}`: {e}")
+            continue
+
+        snippet_id, record, dropped, merged_with = _store_record('key_snippets', record)
+        evicted.extend(dropped)
+        stored.append(ref_info['filepath'])
+        if merged_with:
+            merges.append((snippet_id, merged_with))
+            for existing in merged_with:
+                _forget_snippet(existing)
+        _persist_snippet(record, record.priority)
+
+        location = f"`{record['symbol']}` " if record.get('symbol') else ""
+        console.print(Panel(
+            Markdown(f"**Reference**: {location}`{record['filepath']}` lines {record['line_number']}-{snippet_line_range(record)[1]}"),
+            title=f"📝 Key Snippet #{snippet_id}",
+            border_style="bright_cyan"
+        ))
+
+    if stored:
+        register_related_files(stored)
+    log_work_event(f"Stored {len(stored)} code snippet references.", tool="emit_key_snippet_refs", counts={'snippets': len(stored)})
+
+    result = "Snippets stored."
+    if errors:
+        console.print(Panel(Markdown("\n".join(errors)), title="Snippet References Not Stored", border_style="yellow"))
+        result += "\n\nCould not resolve:\n" + "\n".join(errors)
+    return _with_reports(
+        result,
+        _report_merges('key_snippets', merges),
+        _handle_evictions('key_snippets', evicted)
+    )
 
 @tool("delete_key_snippets") 
 def delete_key_snippets(snippet_ids: List[int]) -> str:
@@ -384,16 +905,48 @@ def delete_key_snippets(snippet_ids: List[int]) -> str:
     for snippet_id in snippet_ids:
         if snippet_id in _global_memory['key_snippets']:
             # Delete the snippet
-            deleted_snippet = _global_memory['key_snippets'].pop(snippet_id)
+            deleted_snippet = _pop_record('key_snippets', snippet_id)
+            _forget_snippet(deleted_snippet)
             success_msg = f"Successfully deleted snippet #{snippet_id} from {deleted_snippet['filepath']}"
             console.print(Panel(Markdown(success_msg), 
                               title="Snippet Deleted", 
                               border_style="green"))
             results.append(success_msg)
     
-    log_work_event(f"Deleted snippets {snippet_ids}.")        
+    log_work_event(f"Deleted snippets {snippet_ids}.", tool="delete_key_snippets", counts={'snippets': len(snippet_ids)})        
     return "Snippets deleted."
 
+@tool("search_memory_archive")
+def search_memory_archive(query: str, limit: int = 5, all_runs: bool = False) -> str:
+    """Search research notes and key facts that were condensed out of memory to save space.
+    Use this when a memory summary mentions something you need the full details of.
+    
+    Args:
+        query: What to look for
+        limit: Maximum number of archived items to return (default: 5)
+        all_runs: Also search items archived by earlier sparc runs in this project (default: False)
+        
+    Returns:
+        Matching archived items, best match first
+    """
+    archive = _memory_archive()
+    if archive is None:
+        return "Memory compaction is not enabled, so nothing has been archived."
+
+    run_id = _global_memory.get('run_id')
+    items = archive.search(query, limit=limit, run_id=None if all_runs else run_id)
+    if not items:
+        return "No archived memory matches the query."
+
+    sections = []
+    for item in items:
+        label = _EVICTION_LABELS.get(item.kind, item.kind)
+        earlier = ", earlier run" if item.run_id != run_id else ""
+        sections.append(
+            f"## Archived {label} #{item.id} ({_PRIORITY_LABELS.get(item.priority, item.priority)}{earlier})\n\n{item.content}"
+        )
+    return "\n\n".join(sections)
+
 @tool("swap_task_order")
 def swap_task_order(id1: int, id2: int) -> str:
     """Swap the order of two tasks in global memory by their IDs.
@@ -441,7 +994,7 @@ def one_shot_completed(message: str) -> str:
     _global_memory['task_completed'] = True
     _global_memory['completion_message'] = message
     console.print(Panel(Markdown(message), title="✅ Task Completed"))
-    log_work_event(f"Task completed\n\n{message}")
+    log_work_event(f"Task completed\n\n{message}", tool="task_completed")
     return "Completion noted."
 
 @tool("task_completed")
@@ -474,9 +1027,20 @@ def plan_implementation_completed(message: str) -> str:
     _global_memory['tasks'].clear()  # Clear task list when plan is completed
     _global_memory['task_id_counter'] = 1
     console.print(Panel(Markdown(message), title="✅ Plan Executed"))
-    log_work_event(f"Plan execution completed:\n\n{message}")
+    log_work_event(f"Plan execution completed:\n\n{message}", tool="plan_implementation_completed")
     return "Plan completion noted and task list cleared."
 
+def _get_related_files_registry() -> RelatedFilesRegistry:
+    """Get the related files registry, migrating a plain ID to path dict if needed."""
+    current = _global_memory.get('related_files')
+    if not isinstance(current, RelatedFilesRegistry):
+        registry = RelatedFilesRegistry(next_id=_global_memory.get('related_file_id_counter', 1))
+        for file_id, filepath in (current or {}).items():
+            registry.put(file_id, filepath)
+        _global_memory['related_files'] = registry
+        current = registry
+    return current
+
 def get_related_files() -> List[str]:
     """Get the current list of related files.
     
@@ -486,60 +1050,83 @@ def get_related_files() -> List[str]:
     files = _global_memory['related_files']
     return [f"ID#{file_id} {filepath}" for file_id, filepath in sorted(files.items())]
 
-@tool("emit_related_files")
-def emit_related_files(files: List[str]) -> str:
-    """Store multiple related files that tools should work with.
+def get_related_file_paths() -> List[str]:
+    """Get the paths of all related files, ordered by file ID."""
+    files = _global_memory['related_files']
+    return [filepath for _, filepath in sorted(files.items())]
+
+def register_related_files(files: List[str]) -> List[str]:
+    """Register related files in one batch, deduplicating by normalized path.
     
     Args:
         files: List of file paths to add
         
     Returns:
-        Formatted string containing file IDs and paths for all processed files
+        List of 'File ID #X: path' strings, one per input path
     """
-    results = []
-    added_files = []
-    
-    # Process files
-    for file in files:
-        # Check if file path already exists in values
-        existing_id = None
-        for fid, fpath in _global_memory['related_files'].items():
-            if fpath == file:
-                existing_id = fid
-                break
-                
-        if existing_id is not None:
-            # File exists, use existing ID
-            results.append(f"File ID #{existing_id}: {file}")
-        else:
-            # New file, assign new ID
-            file_id = _global_memory['related_file_id_counter']
-            _global_memory['related_file_id_counter'] += 1
-            
-            # Store file with ID
-            _global_memory['related_files'][file_id] = file
-            added_files.append((file_id, file))
-            results.append(f"File ID #{file_id}: {file}")
-    
+    registry = _get_related_files_registry()
+    registered = registry.add_many(files)
+    _global_memory['related_file_id_counter'] = registry.next_id
+    for file_id, file, added in registered:
+        if added:
+            _record_change('related_files', 'add', file_id, file)
+
     # Rich output - single consolidated panel
+    added_files = [file for _, file, added in registered if added]
     if added_files:
-        files_added_md = '\n'.join(f"- `{file}`" for id, file in added_files)
+        files_added_md = '\n'.join(f"- `{file}`" for file in added_files)
         md_content = f"**Files Noted:**\n{files_added_md}"
         console.print(Panel(Markdown(md_content), 
                           title="📁 Related Files Noted", 
                           border_style="green"))
+
+    return [f"File ID #{file_id}: {file}" for file_id, file, _ in registered]
+
+@tool("emit_related_files")
+def emit_related_files(files: List[str]) -> str:
+    """Store multiple related files that tools should work with.
     
-    return '\n'.join(results)
+    Args:
+        files: List of file paths to add
+        
+    Returns:
+        Formatted string containing file IDs and paths for all processed files
+    """
+    return '\n'.join(register_related_files(files))
 
 
-def log_work_event(event: str) -> str:
+def _get_work_log() -> WorkLog:
+    """Get the work log ring buffer, migrating a plain list of entries if needed."""
+    current = _global_memory.get('work_log')
+    if not isinstance(current, WorkLog):
+        log = WorkLog(MEMORY_LIMITS['work_log'])
+        for entry in current or []:
+            log.append(entry if isinstance(entry, WorkLogEvent) else WorkLogEvent(
+                event=entry['event'], timestamp=entry['timestamp']
+            ))
+        _global_memory['work_log'] = log
+        current = log
+    current.maxlen = MEMORY_LIMITS['work_log']
+    return current
+
+def log_work_event(
+    event: str,
+    *,
+    tool: Optional[str] = None,
+    duration: Optional[float] = None,
+    counts: Optional[Dict[str, int]] = None
+) -> str:
     """Add timestamped entry to work log.
     
     Internal function used to track major events during agent execution.
-    Each entry is stored with an ISO format timestamp.
+    Each entry is stored with an ISO format timestamp, the current stage and
+    agent depth, and any tool, duration and counts given.
     
     Args:
         event: Description of the event to log
+        tool: Name of the tool the event comes from
+        duration: How long the logged operation took, in seconds
+        counts: Item counts for the event, e.g. {'facts': 3}
         
     Returns:
         Confirmation message
@@ -548,19 +1135,25 @@ def log_work_event(event: str) -> str:
         Entries can be retrieved with get_work_log() as markdown formatted text.
         Older entries are automatically removed when limit is reached.
     """
-    from datetime import datetime
-    entry = WorkLogEntry(
-        timestamp=datetime.now().isoformat(),
-        event=event
+    entry = WorkLogEvent(
+        event=event,
+        stage=_global_memory.get('stage'),
+        agent_depth=_global_memory.get('agent_depth', 0),
+        tool=tool,
+        duration=duration,
+        counts=counts or {}
     )
-    _global_memory['work_log'].append(entry)
-    _enforce_memory_limit('work_log')
+    _get_work_log().append(entry)
+    _record_change('work_log', 'add', value=entry)
     return f"Event logged: {event}"
 
 
-def get_work_log() -> str:
+def get_work_log(since: Optional[int] = None) -> str:
     """Return formatted markdown of work log entries.
     
+    Args:
+        since: Only include entries logged after get_work_log_position() returned this value
+    
     Returns:
         Markdown formatted text with timestamps as headings and events as content,
         or 'No work log entries' if the log is empty.
@@ -570,19 +1163,14 @@ def get_work_log() -> str:
 
         Task #1 added: Create login form
     """
-    if not _global_memory['work_log']:
-        return "No work log entries"
-    
-    entries = []
-    for entry in _global_memory['work_log']:
-        entries.extend([
-            f"## {entry['timestamp']}",
-            "",
-            entry['event'],
-            ""  # Blank line between entries
-        ])
-    
-    return "\n".join(entries).rstrip()  # Remove trailing newline
+    log = _get_work_log()
+    text = log.render(since)
+    return text or "No work log entries"
+
+
+def get_work_log_position() -> int:
+    """Return the number of entries logged so far, for use with get_work_log(since=...)."""
+    return _get_work_log().total
 
 
 def reset_work_log() -> str:
@@ -594,10 +1182,29 @@ def reset_work_log() -> str:
     Note:
         This permanently removes all work log entries. The operation cannot be undone.
     """
-    _global_memory['work_log'].clear()
+    _get_work_log().clear()
     return "Work log cleared"
 
 
+def enable_work_log_export(path: str, batch_size: int = 50) -> JsonlWorkLogSink:
+    """Also append every work log entry to a JSONL file, one JSON object per line.
+    
+    Lines carry the run ID along with the entry's fields and are written in
+    batches; pending lines are flushed at exit.
+    
+    Args:
+        path: File to append to
+        batch_size: Entries buffered before a write (default: 50)
+        
+    Returns:
+        The sink, which can be flushed or closed explicitly
+    """
+    run_id = _global_memory.setdefault('run_id', str(uuid.uuid4()))
+    sink = JsonlWorkLogSink(path, batch_size=batch_size, extra={'run_id': run_id})
+    _get_work_log().sink = sink
+    return sink
+
+
 @tool("deregister_related_files")
 def deregister_related_files(file_ids: List[int]) -> str:
     """Delete multiple related files from global memory by their IDs.
@@ -611,9 +1218,10 @@ def deregister_related_files(file_ids: List[int]) -> str:
     """
     results = []
     for file_id in file_ids:
-        if file_id in _global_memory['related_files']:
+        if file_id in _get_related_files_registry():
             # Delete the file reference
-            deleted_file = _global_memory['related_files'].pop(file_id)
+            deleted_file = _get_related_files_registry().pop(file_id)
+            _record_change('related_files', 'delete', file_id)
             success_msg = f"Successfully removed related file #{file_id}: {deleted_file}"
             console.print(Panel(Markdown(success_msg), 
                               title="File Reference Removed", 
@@ -622,6 +1230,183 @@ def deregister_related_files(file_ids: List[int]) -> str:
             
     return "File references removed."
 
+@contextmanager
+def fork_memory() -> Iterator[MemorySnapshot]:
+    """Run the enclosed block, typically a sub-agent, against a snapshot of the current memory.
+    
+    The snapshot starts out identical to the current memory and records the
+    changes the sub-agent makes through the memory tools. Completion state,
+    tasks, plans and agent depth stay local to the snapshot; pass it to
+    merge_memory_snapshot afterwards to bring the sub-agent's findings back.
+    
+    Yields:
+        The snapshot, which is the current memory inside the block
+    """
+    with _global_memory.fork(shared=SHARED_MEMORY_KEYS) as snapshot:
+        yield snapshot
+
+def _merge_target(
+    snapshot: MemorySnapshot,
+    change: MemoryChange,
+    id_map: Dict[Hashable, Hashable],
+    current: Any
+) -> Optional[Hashable]:
+    """Find the item in the current memory that a snapshot update or delete refers to.
+    
+    Returns:
+        The current ID, or None if the item was added by the snapshot and has
+        since gone, or was changed or removed in the current memory meanwhile
+    """
+    if change.key in id_map:
+        target = id_map[change.key]
+        return target if target in current else None
+    base = snapshot.base(change.category).get(change.key)
+    if base is not None and current.get(change.key) is base:
+        return change.key
+    return None
+
+def _merge_summaries(
+    snapshot: MemorySnapshot,
+    summary_ids: Dict[str, Hashable],
+    id_maps: Dict[str, Dict[Hashable, Hashable]],
+    removed_both: Dict[str, int]
+) -> Dict[str, List[MemoryRecord]]:
+    """Bring over the compaction summaries a sub-agent started or extended.
+    
+    The sub-agent's summary becomes the summary here if there is none, or
+    replaces it if it was extended from an unchanged one. Otherwise the two
+    summaries are condensed into the current one.
+    
+    Args:
+        snapshot: The sub-agent's snapshot
+        summary_ids: Per category, the ID of the sub-agent's changed summary item
+        id_maps: Per category ID maps from the replay, updated with the summaries' IDs
+        removed_both: Per category, snapshot items removed both here and by the sub-agent
+    
+    Returns:
+        Per category, records evicted to make room for the summaries
+    """
+    summaries = _global_memory.setdefault('memory_summaries', {})
+    base = snapshot.base('memory_summaries')
+    evicted: Dict[str, List[MemoryRecord]] = {}
+    for category, child_id in summary_ids.items():
+        child = snapshot['memory_summaries'][category]
+        record = snapshot[category].get(child_id)
+        if record is None:
+            continue
+        current = summaries.get(category)
+        if current is None:
+            target, dropped = _add_record(category, record)
+            summaries[category] = dict(child, id=target)
+        elif current is base.get(category) and current['id'] == child_id:
+            target = child_id
+            dropped = _put_record(category, target, record)
+            summaries[category] = child
+        else:
+            # Items both summaries took from the snapshot are counted once
+            inherited = base[category]['count'] if category in base and base[category]['id'] == child_id else 0
+            target = current['id']
+            body = _summarize(category, [current['body'], child['body']])
+            count = current['count'] + child['count'] - inherited - removed_both.get(category, 0)
+            priority = max(current['priority'], child['priority'])
+            dropped = _put_record(category, target, _summary_record(category, body, count, priority))
+            summaries[category] = {'id': target, 'body': body, 'count': count, 'priority': priority}
+        id_maps.setdefault(category, {})[child_id] = target
+        evicted.setdefault(category, []).extend(dropped)
+    return evicted
+
+def merge_memory_snapshot(snapshot: MemorySnapshot) -> Dict[str, Dict[Hashable, Hashable]]:
+    """Apply a sub-agent's memory changes to the current memory.
+    
+    Changes are replayed in the order they were made, so merging the same
+    snapshots in the same order always gives the same result. Items the
+    sub-agent added get new IDs here, and go through the usual near-duplicate
+    merging and budgets. Updates and deletions only apply to items that are
+    unchanged here since the snapshot was taken. If such an item was changed
+    or removed meanwhile, an update is kept alongside it as a new item and a
+    deletion is skipped.
+    
+    Covers research notes, key facts, key snippets, related files, the work
+    log and the implementation requested flag. Compaction summaries the
+    sub-agent wrote stay summaries here, folded into any summary of our own.
+    
+    Args:
+        snapshot: Snapshot returned by fork_memory, after its block has exited
+        
+    Returns:
+        Per category, mapping of the sub-agent's item IDs to IDs in the current memory
+    """
+    id_maps: Dict[str, Dict[Hashable, Hashable]] = {}
+    evicted: Dict[str, List[MemoryRecord]] = {}
+    conflicts = []
+    # The sub-agent's compaction summaries are reconciled after the replay rather than copied as items
+    base_summaries = snapshot.base('memory_summaries')
+    summary_ids = {
+        category: summary['id'] for category, summary in snapshot.get('memory_summaries', {}).items()
+        if summary is not base_summaries.get(category)
+    }
+    # Items the sub-agent deleted or condensed that budgets here evicted first
+    gone: Dict[str, set] = {}
+    # Snapshot items that both sides removed, e.g. by condensing them into their summaries
+    removed_both: Dict[str, int] = {}
+
+    for change in snapshot.changes:
+        category = change.category
+        id_map = id_maps.setdefault(category, {})
+
+        if category in _RECORD_TYPES:
+            if change.key is not None and change.key == summary_ids.get(category):
+                continue
+            store = _get_store(category)
+            target = _merge_target(snapshot, change, id_map, store)
+            if change.op == 'delete':
+                if target is not None:
+                    _pop_record(category, target)
+                elif change.key in id_map:
+                    gone.setdefault(category, set()).add(id_map[change.key])
+                elif change.key not in store:
+                    removed_both[category] = removed_both.get(category, 0) + 1
+                else:
+                    conflicts.append(f"- {_EVICTION_LABELS[category]} #{change.key} changed here; not deleted")
+                continue
+            if change.op == 'update' and target is not None:
+                dropped = _put_record(category, target, change.value)
+                id_map[change.key] = target
+            else:
+                if change.op == 'update' and change.key not in id_map:
+                    conflicts.append(f"- {_EVICTION_LABELS[category]} #{change.key} changed here; kept both versions")
+                id_map[change.key], _, dropped, _ = _store_record(category, change.value)
+            evicted.setdefault(category, []).extend(dropped)
+
+        elif category == 'related_files':
+            registry = _get_related_files_registry()
+            if change.op == 'add':
+                register_related_files([change.value])
+                id_map[change.key] = registry.id_for(change.value)
+            else:
+                target = _merge_target(snapshot, change, id_map, registry)
+                if target is not None:
+                    registry.pop(target)
+                    _record_change(category, 'delete', target)
+
+        elif category == 'work_log':
+            _get_work_log().append(change.value)
+            _record_change(category, 'add', value=change.value)
+
+        elif change.op == 'set':
+            _global_memory[category] = change.value
+            _record_change(category, 'set', value=change.value)
+
+    for category, dropped in _merge_summaries(snapshot, summary_ids, id_maps, removed_both).items():
+        evicted.setdefault(category, []).extend(dropped)
+    for category, dropped in evicted.items():
+        dropped = [record for record in dropped if record.id not in gone.get(category, ())]
+        if dropped:
+            _handle_evictions(category, dropped)
+    if conflicts:
+        console.print(Panel(Markdown("\n".join(conflicts)), title="Sub-agent Memory Conflicts", border_style="yellow"))
+    return id_maps
+
 def get_memory_value(key: str) -> str:
     """Get a value from global memory.
     
@@ -641,13 +1426,26 @@ def get_memory_value(key: str) -> str:
     """
     values = _global_memory.get(key, [])
     
+    if key in ('key_facts', 'key_snippets'):
+        # Sort by ID for consistent output
+        return _format_memory_items(key, sorted(values.items()))
+    
+    if key == 'work_log':
+        return _get_work_log().render()
+
+    # For other types (lists), join with newlines
+    return "\n".join(str(v) for v in values)
+
+
+def _format_memory_items(key: str, items: List[Tuple[int, Any]]) -> str:
+    """Format (ID, item) pairs from a memory category as prompt text."""
+    if not items:
+        return ""
+
     if key == 'key_facts':
-        # For empty dict, return empty string
-        if not values:
-            return ""
-        # Sort by ID for consistent output and format as markdown sections
+        # Format as markdown sections
         facts = []
-        for k, v in sorted(values.items()):
+        for k, v in items:
             facts.extend([
                 f"## 🔑 Key Fact #{k}",
                 "",  # Empty line for better markdown spacing
@@ -657,35 +1455,91 @@ def get_memory_value(key: str) -> str:
         return "\n".join(facts).rstrip()  # Remove trailing newline
     
     if key == 'key_snippets':
-        if not values:
-            return ""
         # Format each snippet with file info and content using markdown
         snippets = []
-        for k, v in sorted(values.items()):
+        for k, v in items:
             snippet_text = [
                 f"## 📝 Code Snippet #{k}",
                 "",  # Empty line for better markdown spacing
                 f"**Source Location**:",
                 f"- File: `{v['filepath']}`",
                 f"- Line: `{v['line_number']}`",
+            ]
+            if v.get('symbol'):
+                snippet_text.append(f"- Symbol: `{v['symbol']}`")
+            snippet_text.extend([
                 "",  # Empty line before code block
                 "**Code**:",
                 "```python",
                 v['snippet'].rstrip(),  # Remove trailing whitespace
                 "```"
-            ]
+            ])
             if v['description']:
                 # Add empty line and description
                 snippet_text.extend(["", "**Description**:", v['description']])
             snippets.append("\n".join(snippet_text))
         return "\n\n".join(snippets)
+
+    return "\n".join(str(v) for _, v in items)
+
+
+def get_relevant_memory_value(
+    key: str,
+    query: str,
+    *,
+    max_tokens: Optional[int] = None,
+    top_k: Optional[int] = None
+) -> str:
+    """Get the memory items most relevant to a query, formatted like get_memory_value.
     
-    if key == 'work_log':
-        if not values:
-            return ""
-        entries = [f"## {entry['timestamp']}\n{entry['event']}"
-                  for entry in values]
-        return "\n\n".join(entries)
+    Critical items are always kept, whatever top_k and the token budget.
+    The rest are ranked offline with BM25 against the query, then by
+    priority and recency, and the best are kept while top_k items and the
+    token budget, counting the critical items, allow. When everything fits,
+    this is identical to get_memory_value.
+    
+    Args:
+        key: One of research_notes, key_facts or key_snippets
+        query: The task or question the memory is being selected for
+        max_tokens: Token budget (default: RELEVANT_MEMORY_BUDGETS[key])
+        top_k: Maximum number of items besides critical ones (default: RELEVANT_MEMORY_TOP_K)
+        
+    Returns:
+        Formatted memory items, in ID order, with a note on how many were omitted
+    """
+    store = _get_store(key)
+    if max_tokens is None:
+        max_tokens = RELEVANT_MEMORY_BUDGETS.get(key)
+    if top_k is None:
+        top_k = RELEVANT_MEMORY_TOP_K
 
-    # For other types (lists), join with newlines
-    return "\n".join(str(v) for v in values)
+    if len(store) <= top_k and (max_tokens is None or store.total_tokens <= max_tokens):
+        return get_memory_value(key)
+
+    index = _memory_indexes.setdefault(key, RecordIndex())
+    index.sync(store)
+    scores = dict(index.search(query))
+
+    selected = [(i, r) for i, r in store.items() if r.priority == MemoryPriority.CRITICAL]
+    used_tokens = sum(store.size_of(record_id)[0] for record_id, _ in selected)
+    ranked = sorted(
+        ((i, r) for i, r in store.items() if r.priority != MemoryPriority.CRITICAL),
+        key=lambda item: (scores.get(item[0], 0.0), item[1].priority, item[1].timestamp),
+        reverse=True
+    )
+
+    limit = len(selected) + top_k
+    for record_id, record in ranked:
+        if len(selected) >= limit:
+            break
+        tokens = store.size_of(record_id)[0]
+        if max_tokens is not None and used_tokens + tokens > max_tokens:
+            continue
+        selected.append((record_id, record))
+        used_tokens += tokens
+
+    text = _format_memory_items(key, sorted(selected, key=lambda item: item[0]))
+    omitted = len(store) - len(selected)
+    if omitted:
+        text += f"\n\n({omitted} less relevant {key.replace('_', ' ')} omitted)"
+    return text
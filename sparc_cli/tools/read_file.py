@@ -1,77 +1,214 @@
 import os.path
 import logging
 import time
-from typing import Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+from typing_extensions import NotRequired, TypedDict
 from langchain_core.tools import tool
 from rich.console import Console
 from rich.panel import Panel
-from sparc_cli.text.processing import truncate_output
+from sparc_cli.text.line_index import DEFAULT_MAX_BYTES, LineRange, read_lines
+from sparc_cli.text.processing import CHARS_PER_TOKEN, estimate_tokens
 
 console = Console()
 
-# Standard buffer size for file reading
-CHUNK_SIZE = 8192
+# Tokens of file content read_files returns across the whole batch, by default
+DEFAULT_BATCH_TOKEN_BUDGET = 50000
+
+# Files read at once by read_files
+READ_WORKERS = 8
+
+class FileRangeInfo(TypedDict):
+    """Type definition for a file, or a range of its lines, to read"""
+    filepath: str
+    start_line: NotRequired[Optional[int]]
+    end_line: NotRequired[Optional[int]]
 
 @tool
 def read_file_tool(
     filepath: str,
     verbose: bool = True,
-    encoding: str = 'utf-8'
-) -> Dict[str, str]:
-    """Read and return the contents of a text file.
+    encoding: str = 'utf-8',
+    start_line: int = 1,
+    end_line: Optional[int] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES
+) -> Dict[str, Union[str, int, bool]]:
+    """Read and return the contents of a text file, or a range of its lines.
+
+    Large files are returned from the top, up to max_bytes; page through
+    the rest with start_line/end_line. Only the requested lines are read.
 
     Args:
         filepath: Path to the file to read
         verbose: Whether to display a Rich panel with read statistics (default: True)
         encoding: File encoding to use (default: utf-8)
+        start_line: First line to return, 1-based (default: 1)
+        end_line: Last line to return, inclusive (default: end of file)
+        max_bytes: Maximum bytes of content to return (default: 200KB)
 
     Returns:
         Dict containing:
-            - content: The file contents as a string (truncated if needed)
+            - content: The requested lines, followed by a note on how to read on if cut short
+            - start_line: First line returned
+            - end_line: Last line returned
+            - total_lines: Number of lines in the file
+            - truncated: Whether max_bytes cut the requested range short
 
     Raises:
-        RuntimeError: If file cannot be read or does not exist
+        FileNotFoundError: If the file does not exist
+        OSError, UnicodeDecodeError: If the file cannot be read as text
     """
     start_time = time.time()
-    try:
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"File not found: {filepath}")
-
-        logging.debug(f"Starting to read file: {filepath}")
-        content = []
-        line_count = 0
-        total_bytes = 0
-
-        with open(filepath, 'r', encoding=encoding) as f:
-            while True:
-                chunk = f.read(CHUNK_SIZE)
-                if not chunk:
-                    break
-                
-                content.append(chunk)
-                total_bytes += len(chunk)
-                line_count += chunk.count('\n')
-                
-                logging.debug(f"Read chunk: {len(chunk)} bytes, running total: {total_bytes} bytes")
-
-        full_content = ''.join(content)
-        elapsed = time.time() - start_time
-        
-        logging.debug(f"File read complete: {total_bytes} bytes in {elapsed:.2f}s")
-        logging.debug(f"Pre-truncation stats: {total_bytes} bytes, {line_count} lines")
-
-        if verbose:
-            console.print(Panel(
-                f"Read {line_count} lines ({total_bytes} bytes) from {filepath} in {elapsed:.2f}s",
-                title="📄 File Read",
-                border_style="bright_blue"
-            ))
-        
-        # Truncate if needed
-        truncated = truncate_output(full_content) if full_content else ""
-
-        return {"content": truncated}
-
-    except Exception as e:
-        elapsed = time.time() - start_time
-        raise
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"File not found: {filepath}")
+
+    logging.debug(f"Starting to read file: {filepath} (lines {start_line}-{end_line or 'end'})")
+    lines = read_lines(filepath, start_line, end_line, max_bytes, encoding)
+    elapsed = time.time() - start_time
+
+    content = lines.text
+    if lines.truncated:
+        content += (f"\n[Showing lines {lines.start_line}-{lines.end_line} of {lines.total_lines}; "
+                    f"call again with start_line={lines.end_line + 1} to read more]")
+    elif lines.start_line > lines.total_lines and lines.total_lines:
+        content = f"[start_line {lines.start_line} is past the end of the file ({lines.total_lines} lines)]"
+
+    logging.debug(f"File read complete: lines {lines.start_line}-{lines.end_line} of "
+                  f"{lines.total_lines} in {elapsed:.2f}s")
+
+    if verbose:
+        if lines.start_line == 1 and lines.end_line == lines.total_lines:
+            shown = f"{lines.total_lines} lines"
+        elif lines.end_line < lines.start_line:
+            shown = f"no lines (file has {lines.total_lines})"
+        else:
+            shown = f"lines {lines.start_line}-{lines.end_line} of {lines.total_lines}"
+        console.print(Panel(
+            f"Read {shown} ({len(lines.text)} chars) from {filepath} in {elapsed:.2f}s",
+            title="📄 File Read",
+            border_style="bright_blue"
+        ))
+
+    return {
+        "content": content,
+        "start_line": lines.start_line,
+        "end_line": lines.end_line,
+        "total_lines": lines.total_lines,
+        "truncated": lines.truncated
+    }
+
+def _trim(lines: LineRange, max_chars: int) -> LineRange:
+    """Cut a range down to its whole lines within max_chars (or part of the first line)."""
+    if len(lines.text) <= max_chars:
+        return lines
+    cut = lines.text.rfind('\n', 0, max_chars)
+    text = lines.text[:cut + 1] if cut >= 0 else lines.text[:max_chars]
+    shown = text.count('\n') + (1 if text and not text.endswith('\n') else 0)
+    return LineRange(text, lines.start_line, lines.start_line + shown - 1, lines.total_lines, True)
+
+def _share_budget(sizes: List[int], budget: int) -> List[int]:
+    """Split a budget so files under an equal share keep all of theirs and the rest split what's left."""
+    shares = [0] * len(sizes)
+    remaining = budget
+    order = sorted(range(len(sizes)), key=sizes.__getitem__)
+    for done, i in enumerate(order):
+        shares[i] = min(sizes[i], remaining // (len(sizes) - done))
+        remaining -= shares[i]
+    return shares
+
+@tool
+def read_files(
+    files: List[Union[str, FileRangeInfo]],
+    token_budget: int = DEFAULT_BATCH_TOKEN_BUDGET,
+    encoding: str = 'utf-8',
+    verbose: bool = True
+) -> Dict[str, Any]:
+    """Read several files, or line ranges of them, in one call.
+
+    Prefer this over calling read_file_tool once per file. Files are read
+    concurrently and share one token budget: files that fit within an
+    equal share are returned whole, and larger ones split what is left,
+    each cut at a line boundary with a note on where to continue.
+
+    Args:
+        files: Paths, or dicts with filepath and optional start_line/end_line (1-based, inclusive)
+        token_budget: Approximate tokens of content to return across all files (default: 50000)
+        encoding: File encoding to use (default: utf-8)
+        verbose: Whether to display a Rich panel with read statistics (default: True)
+
+    Returns:
+        Dict containing:
+            - files: Per file, in the order given: filepath, content, start_line,
+              end_line, total_lines, chars and truncated, or filepath and error.
+              A file the budget left no room for has end_line None and a note as content
+            - tokens: Estimated tokens of content returned
+            - truncated: Whether any file was cut short
+    """
+    start_time = time.time()
+    requests = [{'filepath': f} if isinstance(f, str) else f for f in files]
+    budget = max(1, token_budget) * CHARS_PER_TOKEN
+
+    def read(request: FileRangeInfo) -> Union[LineRange, Exception]:
+        try:
+            if not os.path.isfile(request['filepath']):
+                raise FileNotFoundError(f"File not found: {request['filepath']}")
+            return read_lines(
+                request['filepath'], request.get('start_line') or 1, request.get('end_line'),
+                budget, encoding
+            )
+        except (OSError, UnicodeDecodeError) as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(READ_WORKERS, len(requests)))) as executor:
+        results = list(executor.map(read, requests))
+
+    sizes = [len(r.text) if isinstance(r, LineRange) else 0 for r in results]
+    shares = _share_budget(sizes, budget)
+
+    entries = []
+    for request, result, share in zip(requests, results, shares):
+        path = request['filepath']
+        if isinstance(result, Exception):
+            entries.append({'filepath': path, 'error': str(result)})
+            continue
+        lines = _trim(result, share)
+        content = lines.text
+        omitted = lines.truncated and not lines.text
+        if omitted:
+            # Other files used up the budget before this one got any of it
+            content = (f"[Omitted to stay within the token budget ({lines.total_lines} lines); "
+                       f"read it from start_line={lines.start_line} separately]")
+        elif lines.truncated:
+            content += (f"\n[Showing lines {lines.start_line}-{lines.end_line} of {lines.total_lines}; "
+                        f"read from start_line={lines.end_line + 1} for more]")
+        entries.append({
+            'filepath': path,
+            'content': content,
+            'start_line': lines.start_line,
+            'end_line': None if omitted else lines.end_line,
+            'total_lines': lines.total_lines,
+            'chars': len(lines.text),
+            'truncated': lines.truncated
+        })
+
+    tokens = sum(estimate_tokens(e.get('content', '')) for e in entries)
+    truncated = any(e.get('truncated') for e in entries)
+    elapsed = time.time() - start_time
+
+    if verbose:
+        rows = []
+        for e in entries:
+            if 'error' in e:
+                rows.append(f"❌ {e['filepath']}: {e['error']}")
+            elif e['end_line'] is None:
+                rows.append(f"{e['filepath']}: omitted for budget ({e['total_lines']} lines)")
+            else:
+                cut = ' (truncated)' if e['truncated'] else ''
+                rows.append(f"{e['filepath']}: lines {e['start_line']}-{e['end_line']} of {e['total_lines']}{cut}")
+        console.print(Panel(
+            '\n'.join(rows + [f"~{tokens} of {token_budget} tokens in {elapsed:.2f}s"]),
+            title=f"📄 Read {len(entries)} Files",
+            border_style="bright_blue"
+        ))
+
+    return {'files': entries, 'tokens': tokens, 'truncated': truncated}
@@ -1,13 +1,19 @@
+import fnmatch
+import functools
 import os
 import shutil
 import subprocess
+import pathspec
 from typing import Dict, Union, Optional, List
 from langchain_core.tools import tool
 from rich.console import Console
 from rich.panel import Panel
 from rich.markdown import Markdown
-from sparc_cli.proc.interactive import run_interactive_command
-from sparc_cli.text.processing import truncate_output
+from rich.text import Text
+from sparc_cli.code.files import changed_files
+from sparc_cli.tools.memory import get_related_file_paths
+from sparc_cli.code.ripgrep import DEFAULT_MAX_PER_FILE, DEFAULT_MAX_RESULTS, SearchResult, run_ripgrep, run_ripgrep_many
+from sparc_cli.code.trigrams import TrigramIndex
 
 console = Console()
 
@@ -79,6 +85,97 @@ DEFAULT_EXCLUDE_DIRS = [
     '.vscode'
 ]
 
+# With more candidates than this share of the project's files, walking the tree is as cheap
+INDEX_MAX_CANDIDATE_FRACTION = 0.5
+
+_code_search_index: Optional[TrigramIndex] = None
+
+def _get_code_search_index() -> Optional[TrigramIndex]:
+    """Return the code search index of the current directory, if `sparc index --code-search` built one."""
+    global _code_search_index
+    root = os.path.realpath(os.getcwd())
+    if _code_search_index is None or _code_search_index.root != root:
+        _code_search_index = TrigramIndex(root)
+    return _code_search_index if _code_search_index.exists() else None
+
+@functools.lru_cache(maxsize=4)
+def _type_globs(rg_path: str) -> Dict[str, List[str]]:
+    """File globs of each of ripgrep's file types, from `rg --type-list`."""
+    output = subprocess.run([rg_path, '--type-list'], capture_output=True, text=True).stdout
+    types = {}
+    for line in output.splitlines():
+        name, _, globs = line.partition(':')
+        types[name.strip()] = [g.strip() for g in globs.split(',') if g.strip()]
+    return types
+
+def _index_candidates(
+    rg_path: str,
+    pattern: str,
+    case_sensitive: bool,
+    file_type: Optional[str],
+    include_hidden: bool,
+    exclusions: List[str]
+) -> Optional[List[str]]:
+    """Narrow a search to the files the code search index says may match.
+
+    rg searches explicitly listed files regardless of its hidden-file, type
+    and glob filters, so candidates are filtered here the way rg would.
+
+    Returns:
+        Candidate paths, or None to search the whole tree
+    """
+    index = _get_code_search_index()
+    if index is None:
+        return None
+    candidates = index.candidates(pattern, ignore_case=not case_sensitive)
+    if candidates is None or len(candidates) > INDEX_MAX_CANDIDATE_FRACTION * index.file_count():
+        return None
+    type_globs = None
+    if file_type:
+        type_globs = _type_globs(rg_path).get(file_type)
+        if type_globs is None:
+            # Let rg report the unknown type
+            return None
+
+    def keep(path: str) -> bool:
+        parts = path.split('/')
+        if not include_hidden and any(part.startswith('.') for part in parts):
+            return False
+        if any(fnmatch.fnmatch(part, excluded) for part in parts for excluded in exclusions):
+            return False
+        return type_globs is None or any(fnmatch.fnmatch(parts[-1], glob) for glob in type_globs)
+
+    return [path for path in candidates if keep(path)]
+
+def _build_command(
+    file_type: Optional[str],
+    include_hidden: bool,
+    follow_links: bool,
+    exclude_dirs: Optional[List[str]],
+    globs: Optional[List[str]] = None
+) -> List[str]:
+    """Build the rg command and the options shared by the search tools."""
+    cmd = [get_rg_command()]
+    
+    if include_hidden:
+        cmd.append('--hidden')
+        
+    if follow_links:
+        cmd.append('--follow')
+        
+    if file_type:
+        cmd.extend(['-t', file_type])
+
+    for glob in globs or []:
+        cmd.extend(['--glob', glob])
+
+    # Add exclusions
+    exclusions = DEFAULT_EXCLUDE_DIRS + (exclude_dirs or [])
+    for dir in exclusions:
+        cmd.extend(['--glob', f'!{dir}'])
+
+    return cmd
+
 @tool
 def ripgrep_search(
     pattern: str,
@@ -87,9 +184,16 @@ def ripgrep_search(
     case_sensitive: bool = True,
     include_hidden: bool = False,
     follow_links: bool = False,
-    exclude_dirs: List[str] = None
+    exclude_dirs: List[str] = None,
+    context_lines: int = 0,
+    max_results: int = DEFAULT_MAX_RESULTS,
+    max_per_file: int = DEFAULT_MAX_PER_FILE
 ) -> Dict[str, Union[str, int, bool]]:
-    """Execute a ripgrep (rg) search with formatting and common options.
+    """Execute a ripgrep (rg) search and return matches grouped by file.
+
+    Output lists each file's path followed by its matching lines as 'line:text'
+    (context lines as 'line-text'). Results are capped; the match count covers
+    all matches even when only some are shown.
 
     Args:
         pattern: Search pattern to find
@@ -98,36 +202,26 @@ def ripgrep_search(
         include_hidden: Whether to search hidden files and directories (default: False)
         follow_links: Whether to follow symbolic links (default: False)
         exclude_dirs: Additional directories to exclude (combines with defaults)
+        context_lines: Lines of context to show around each match (default: 0)
+        max_results: Maximum matching lines to return (default: 200)
+        max_per_file: Maximum matching lines to return per file (default: 20)
 
     Returns:
         Dict containing:
-            - output: The formatted search results
-            - return_code: Process return code (0 means success)
+            - output: The matches, grouped by file
+            - return_code: Process return code (0 means matches were found)
             - success: Boolean indicating if search succeeded
+            - match_count: Total matching lines, including ones not shown
+            - file_count: Files with matches
+            - truncated: Whether some matches were left out
     """
     # Build rg command with options
-    rg_path = get_rg_command()
-    cmd = [rg_path, '--color', 'always']
-    
+    cmd = _build_command(file_type, include_hidden, follow_links, exclude_dirs)
     if not case_sensitive:
         cmd.append('-i')
-    
-    if include_hidden:
-        cmd.append('--hidden')
-        
-    if follow_links:
-        cmd.append('--follow')
-        
-    if file_type:
-        cmd.extend(['-t', file_type])
-
-    # Add exclusions
-    exclusions = DEFAULT_EXCLUDE_DIRS + (exclude_dirs or [])
-    for dir in exclusions:
-        cmd.extend(['--glob', f'!{dir}'])
 
     # Add the search pattern
-    cmd.append(pattern)
+    cmd.extend(['-e', pattern])
 
     # Build info sections for display
     info_sections = []
@@ -149,25 +243,177 @@ def ripgrep_search(
             params.append(f"- `{dir}`")
     info_sections.append("\n".join(params))
 
-    # Execute command
-    console.print(Panel(Markdown(f"Searching for: **{pattern}**"), title="🔎 Ripgrep Search", border_style="bright_blue"))
+    # Execute command, on the index's candidate files if there is an index
     try:
-        print()
-        output, return_code = run_interactive_command(cmd)
-        print()
-        decoded_output = output.decode() if output else ""
-        
+        paths = _index_candidates(
+            cmd[0], pattern, case_sensitive, file_type, include_hidden,
+            DEFAULT_EXCLUDE_DIRS + (exclude_dirs or [])
+        )
+        scope = "" if paths is None else f" in {len(paths)} candidate files from the code search index"
+        console.print(Panel(
+            Markdown(f"Searching for: **{pattern}**{scope}"),
+            title="🔎 Ripgrep Search",
+            border_style="bright_blue"
+        ))
+        if paths == []:
+            result = SearchResult(return_code=1)
+        else:
+            result = run_ripgrep(
+                cmd,
+                paths or (),
+                context=context_lines,
+                max_results=max_results,
+                max_per_file=max_per_file
+            )
+    except Exception as e:
+        error_msg = str(e)
+        console.print(Panel(error_msg, title="❌ Error", border_style="red"))
         return {
-            "output": truncate_output(decoded_output),
-            "return_code": return_code,
-            "success": return_code == 0
+            "output": error_msg,
+            "return_code": 1,
+            "success": False
         }
-        
+
+    output = result.format() if result.files else result.error
+    summary = f"{result.match_count}{'' if result.complete else '+'} matches in {result.file_count} files"
+    if result.truncated:
+        summary += f" (showing {result.shown})"
+    console.print(Panel(
+        Text(output) if output else Text("No matches found"),
+        title=f"🔎 {summary}",
+        border_style="bright_blue" if result.return_code in (0, 1) else "red"
+    ))
+
+    return {
+        "output": output,
+        "return_code": result.return_code,
+        "success": result.return_code == 0,
+        "match_count": result.match_count,
+        "file_count": result.file_count,
+        "truncated": result.truncated
+    }
+
+def _filter_paths(paths: List[str], globs: Optional[List[str]]) -> List[str]:
+    """Apply globs to explicitly listed files, which rg searches regardless of --glob."""
+    if not globs:
+        return paths
+    include = [g for g in globs if not g.startswith('!')]
+    exclude = [g[1:] for g in globs if g.startswith('!')]
+    included = pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, include)
+    excluded = pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, exclude)
+    return [
+        p for p in paths
+        if os.path.isdir(p) or ((not include or included.match_file(p)) and not excluded.match_file(p))
+    ]
+
+@tool
+def ripgrep_search_many(
+    patterns: List[str],
+    paths: List[str] = None,
+    globs: List[str] = None,
+    *,
+    related_files_only: bool = False,
+    changed_since: str = None,
+    case_sensitive: bool = True,
+    file_type: str = None,
+    include_hidden: bool = False,
+    exclude_dirs: List[str] = None,
+    context_lines: int = 0,
+    max_results: int = 50,
+    max_per_file: int = 10
+) -> Dict[str, Union[str, int, bool, Dict[str, int]]]:
+    """Search for several patterns at once in a single ripgrep pass, with results grouped per pattern.
+
+    Use this instead of several ripgrep_search calls when looking for related
+    identifiers: the tree is only walked once. The search can be scoped to the
+    related files and/or files changed since a git ref; scopes and paths are combined.
+
+    Args:
+        patterns: Regular expressions to search for
+        paths: Files or directories to search (default: the whole project)
+        globs: Optional ripgrep globs to include or, prefixed with '!', exclude files (e.g. '*.py', '!tests/**')
+        related_files_only: Also limit the search to the related files registered so far
+        changed_since: Also limit the search to files changed since this git ref (e.g. 'HEAD~3', 'main'), plus untracked files
+        case_sensitive: Whether to do case-sensitive search (default: True)
+        file_type: Optional file type to filter results (e.g. 'py' for Python files)
+        include_hidden: Whether to search hidden files and directories (default: False)
+        exclude_dirs: Additional directories to exclude (combines with defaults)
+        context_lines: Lines of context to show around each match (default: 0)
+        max_results: Maximum matching lines to return per pattern (default: 50)
+        max_per_file: Maximum matching lines to return per file and pattern (default: 10)
+
+    Returns:
+        Dict containing:
+            - output: A section per pattern with its matches grouped by file
+            - return_code: 0 if any pattern matched, 1 if none did, 2 on errors
+            - success: Boolean indicating if any pattern matched
+            - match_counts: Total matching lines per pattern, including ones not shown
+    """
+    if not patterns:
+        return {"output": "No patterns given.", "return_code": 2, "success": False, "match_counts": {}}
+
+    scoped = related_files_only or changed_since is not None
+    search_paths = list(paths or [])
+    try:
+        if related_files_only:
+            search_paths.extend(get_related_file_paths())
+        if changed_since is not None:
+            search_paths.extend(changed_files('.', changed_since))
+    except ValueError as e:
+        console.print(Panel(str(e), title="❌ Error", border_style="red"))
+        return {"output": str(e), "return_code": 2, "success": False, "match_counts": {}}
+    search_paths = _filter_paths(list(dict.fromkeys(search_paths)), globs)
+
+    scope = f"{len(search_paths)} paths" if search_paths else "whole project"
+    console.print(Panel(
+        Markdown(f"Searching {scope} for: " + ", ".join(f"**{p}**" for p in patterns)),
+        title="🔎 Ripgrep Search (batch)",
+        border_style="bright_blue"
+    ))
+    if scoped and not search_paths:
+        output = "No files in the requested scope."
+        return {"output": output, "return_code": 1, "success": False, "match_counts": {p: 0 for p in patterns}}
+
+    try:
+        results = run_ripgrep_many(
+            _build_command(file_type, include_hidden, False, exclude_dirs, globs),
+            patterns,
+            search_paths,
+            ignore_case=not case_sensitive,
+            context=context_lines,
+            max_results=max_results,
+            max_per_file=max_per_file
+        )
     except Exception as e:
         error_msg = str(e)
         console.print(Panel(error_msg, title="❌ Error", border_style="red"))
         return {
             "output": error_msg,
             "return_code": 1,
-            "success": False
+            "success": False,
+            "match_counts": {}
         }
+
+    sections = []
+    for pattern, result in results.items():
+        count = f"{result.match_count}{'' if result.complete else '+'}"
+        header = f"=== {pattern}: {count} matches in {result.file_count} files ==="
+        sections.append(header + "\n" + (result.format() if result.files else "No matches found"))
+    output = "\n\n".join(sections)
+    errors = next(iter(results.values())).error
+    if errors:
+        output += f"\n\n[Errors]\n{errors}"
+
+    return_code = min(result.return_code for result in results.values())
+    console.print(Panel(
+        Markdown("\n".join(f"- `{p}`: {r.match_count} matches in {r.file_count} files" for p, r in results.items())),
+        title="🔎 Batch Search Results",
+        border_style="bright_blue" if return_code in (0, 1) else "red"
+    ))
+
+    return {
+        "output": output,
+        "return_code": return_code,
+        "success": return_code == 0,
+        "match_counts": {pattern: result.match_count for pattern, result in results.items()}
+    }
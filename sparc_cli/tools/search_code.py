@@ -0,0 +1,78 @@
+import os
+import threading
+from typing import Optional
+
+from langchain_core.tools import tool
+from rich.console import Console
+from rich.markdown import Markdown
+from rich.panel import Panel
+
+from sparc_cli.code.search import CodeSearchIndex
+
+console = Console()
+
+_index: Optional[CodeSearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_code_search_index() -> CodeSearchIndex:
+    """Return the code search index for the current directory, brought up to date with the files on disk.
+
+    The first call in a session re-indexes the files changed since the
+    index was last built (e.g. by ``sparc index``). Later calls re-index
+    only the source files whose mtime or size changed since, so code the
+    agent has just written is searchable.
+    """
+    global _index
+    with _index_lock:
+        root = os.path.realpath(os.getcwd())
+        if _index is not None and _index.root == root:
+            _index.refresh()
+            return _index
+
+        index = CodeSearchIndex(root)
+        stats = index.update()
+        if stats.indexed or stats.removed:
+            console.print(Panel(
+                f"Indexed {stats.indexed} files ({stats.unchanged} unchanged, {stats.removed} removed) "
+                f"in {stats.duration:.2f}s",
+                title="🗂️ Code Chunk Index",
+                border_style="bright_blue"
+            ))
+        _index = index
+        return _index
+
+
+@tool
+def search_code(query: str, max_results: int = 10) -> str:
+    """Search the project's code by description, ranking functions, classes and module-level code with BM25.
+
+    Matches the words of the query against identifiers split into their
+    parts (parseHttpResponse -> parse, http, response), definition names
+    and docstrings, so it finds code whose exact names you don't know.
+    Works offline from a persistent index.
+
+    Args:
+        query: What the code does or mentions, e.g. 'retry failed http requests'
+        max_results: Maximum number of chunks to return (default: 10)
+
+    Returns:
+        One entry per chunk, best first: 'path:start-end name (score)' and the
+        chunk's line matching the most query words
+    """
+    hits = get_code_search_index().search(query, limit=max_results)
+
+    if not hits:
+        output = f"No code matching '{query}' found."
+    else:
+        output = '\n'.join(
+            f"{hit.path}:{hit.start_line}-{hit.end_line} {hit.title or '<module>'} ({hit.score:.1f})\n    {hit.preview}"
+            for hit in hits
+        )
+
+    console.print(Panel(
+        Markdown(f"**{query}**: {len(hits)} result(s)"),
+        title="🔎 Search Code",
+        border_style="bright_blue"
+    ))
+    return output
@@ -0,0 +1,100 @@
+import os
+import threading
+from typing import Optional
+
+from langchain_core.tools import tool
+from rich.console import Console
+from rich.markdown import Markdown
+from rich.panel import Panel
+
+from sparc_cli.code.index import SymbolIndex
+
+console = Console()
+
+_index: Optional[SymbolIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_symbol_index() -> SymbolIndex:
+    """Return the symbol index for the current directory, brought up to date with the files on disk.
+
+    The first call in a session re-indexes the files changed since the
+    index was last built (e.g. by ``sparc index``). Later calls re-index
+    only the source files whose mtime or size changed since, so symbols
+    the agent has just written are found.
+    """
+    global _index
+    with _index_lock:
+        root = os.path.realpath(os.getcwd())
+        if _index is not None and _index.root == root:
+            _index.refresh()
+            return _index
+
+        index = SymbolIndex(root)
+        stats = index.update()
+        if stats.indexed or stats.removed:
+            console.print(Panel(
+                f"Indexed {stats.indexed} files ({stats.unchanged} unchanged, {stats.removed} removed) "
+                f"in {stats.duration:.2f}s",
+                title="🗂️ Symbol Index",
+                border_style="bright_blue"
+            ))
+        _index = index
+        return _index
+
+
+@tool
+def find_symbol(name: str, kind: Optional[str] = None, max_results: int = 20) -> str:
+    """Find where a class, function, method or import is defined in the project, using a persistent symbol index.
+
+    Much faster and more precise than searching file contents for a definition.
+
+    Args:
+        name: Symbol name, or a dotted qualified name such as 'ClassName.method_name'
+        kind: Only return this kind of symbol: 'class', 'function', 'method' or 'import' (default: all but imports)
+        max_results: Maximum number of results to return (default: 20)
+
+    Returns:
+        One line per definition: path:line kind qualified_name followed by its signature
+    """
+    locations = get_symbol_index().find_symbol(name, kind=kind, limit=max_results)
+    if not locations:
+        output = f"No definition of {name} found."
+    else:
+        output = '\n'.join(
+            f"{loc.path}:{loc.line} {loc.kind} {loc.qualname}: {loc.signature.splitlines()[0]}" for loc in locations
+        )
+
+    console.print(Panel(
+        Markdown(f"**{name}**: {len(locations)} definition(s)"),
+        title="🔎 Find Symbol",
+        border_style="bright_blue"
+    ))
+    return output
+
+
+@tool
+def find_references(name: str, max_results: int = 50) -> str:
+    """Find the lines in the project that use a name (calls, attribute and name reads, imports), using a persistent symbol index.
+
+    Args:
+        name: Name to look up; for a dotted name, its last part is looked up
+        max_results: Maximum number of lines to return (default: 50)
+
+    Returns:
+        One line per reference: path:line followed by the source line
+    """
+    references, total = get_symbol_index().find_references(name, limit=max_results)
+    if not references:
+        output = f"No references to {name} found."
+    else:
+        output = '\n'.join(f"{ref.path}:{ref.line}: {ref.text}" for ref in references)
+        if total > len(references):
+            output += f"\n... {total - len(references)} more references not shown"
+
+    console.print(Panel(
+        Markdown(f"**{name}**: {total} reference(s)"),
+        title="🔎 Find References",
+        border_style="bright_blue"
+    ))
+    return output
@@ -6,6 +6,8 @@ from langchain_core.tools import tool
 from rich.console import Console
 from rich.panel import Panel
 
+from sparc_cli.code.files import get_project_files
+
 console = Console()
 
 @tool
@@ -51,9 +53,13 @@ def write_file_tool(
 
         logging.debug(f"Starting to write file: {filepath}")
         
+        created = not os.path.exists(filepath)
         with open(filepath, 'w', encoding=encoding) as f:
             f.write(content)
             result["bytes_written"] = len(content.encode(encoding))
+        if created:
+            # So file listings and the symbol and search indexes see it right away
+            get_project_files(os.getcwd()).invalidate()
         
         elapsed = time.time() - start_time
         result["elapsed_time"] = elapsed
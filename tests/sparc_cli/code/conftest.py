@@ -0,0 +1,13 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def write_source():
+    """Write a source file, optionally with a fixed mtime, for index tests."""
+    def write(path, text, mtime=None):
+        path.write_text(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+    return write
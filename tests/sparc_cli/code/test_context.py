@@ -0,0 +1,38 @@
+from sparc_cli.code import build_code_context
+
+def _module(names, body_lines=30):
+    parts = []
+    for name in names:
+        body = "".join(f"    x{i} = {i}\n" for i in range(body_lines))
+        parts.append(f"def {name}(arg):\n{body}    return arg\n\n")
+    return "".join(parts)
+
+def test_build_code_context_keeps_referenced_definitions():
+    """Test large files are cut to referenced functions and their callees' signatures."""
+    big = _module(["parse_config", "validate", "unrelated"]).replace(
+        "def parse_config(arg):\n", "def parse_config(arg):\n    validate(arg)\n"
+    )
+    files = {"big.py": big, "small.py": "VALUE = 1\n"}
+
+    context = build_code_context(files, "Why does parse_config fail?", full_file_lines=20)
+    assert context["small.py"] == "VALUE = 1\n"
+    excerpt = context["big.py"]
+    assert excerpt.startswith("[Excerpts:")
+    assert "validate(arg)\n" in excerpt and "x29 = 29" in excerpt
+    assert "[line 35, signature]\ndef validate(arg):\n" in excerpt
+    assert "def unrelated" not in excerpt
+
+def test_build_code_context_budget_and_snippets():
+    """Test snippet ranges select definitions and over-budget bodies become signatures."""
+    files = {"big.py": _module(["first", "second"])}
+
+    context = build_code_context(files, "What happens here?", snippet_ranges=[("big.py", 40, 41)], full_file_lines=20)
+    assert "def second(arg):" in context["big.py"] and "def first" not in context["big.py"]
+
+    context = build_code_context(files, "Explain first", full_file_lines=20, max_tokens=10)
+    assert "[line 1, signature]\ndef first(arg):\n" in context["big.py"]
+
+def test_build_code_context_without_references_keeps_files():
+    """Test nothing is cut when the question names nothing in the files."""
+    files = {"big.py": _module(["first", "second"])}
+    assert build_code_context(files, "What does this do?", full_file_lines=20) == files
@@ -0,0 +1,71 @@
+import subprocess
+
+import pytest
+
+from sparc_cli.code.files import ProjectFileIndex, changed_files, compile_patterns
+
+def _git(root, *args):
+    subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+def test_compile_patterns():
+    """Test patterns are combined into one matcher."""
+    matches = compile_patterns(["*.py", "docs/*"])
+    assert matches("src/app.py")
+    assert matches("docs/index.md")
+    assert not matches("README.md")
+    assert not compile_patterns([])("anything")
+
+def test_project_file_index_walks_plain_directories(tmp_path):
+    """Test directories outside git are walked, skipping excluded ones."""
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("")
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "dep.js").write_text("")
+    (tmp_path / "README.md").write_text("")
+
+    index = ProjectFileIndex(str(tmp_path))
+    assert not index.is_git
+    assert index.files() == ("README.md", "src/app.py")
+    assert index.filter(include=["*.py"]) == ["src/app.py"]
+    assert index.filter(exclude=["*.py"]) == ["README.md"]
+
+    # Cached until it expires or is invalidated
+    (tmp_path / "new.py").write_text("")
+    assert "new.py" not in index.files()
+    index.invalidate()
+    assert "new.py" in index.files()
+
+def test_project_file_index_refreshes_on_git_index_change(tmp_path):
+    """Test git listings are reused until git's index changes."""
+    _git(tmp_path, "init")
+    (tmp_path / ".gitignore").write_text("*.log\n")
+    (tmp_path / "tracked.py").write_text("")
+    (tmp_path / "debug.log").write_text("")
+    _git(tmp_path, "add", "tracked.py")
+
+    index = ProjectFileIndex(str(tmp_path), max_age=3600)
+    assert index.is_git
+    assert set(index.files()) == {".gitignore", "tracked.py"}
+    assert index.refreshes == 1
+    index.files()
+    assert index.refreshes == 1
+
+    (tmp_path / "added.py").write_text("")
+    _git(tmp_path, "add", "added.py")
+    assert "added.py" in index.files()
+    assert index.refreshes == 2
+
+def test_changed_files(tmp_path):
+    """Test files changed since a ref include uncommitted and untracked ones."""
+    _git(tmp_path, "init")
+    for name in ("kept.py", "edited.py", "deleted.py"):
+        (tmp_path / name).write_text("")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-m", "init")
+    (tmp_path / "edited.py").write_text("changed")
+    (tmp_path / "deleted.py").unlink()
+    (tmp_path / "new.py").write_text("")
+
+    assert sorted(changed_files(str(tmp_path), "HEAD")) == ["edited.py", "new.py"]
+    with pytest.raises(ValueError):
+        changed_files(str(tmp_path), "no-such-ref")
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from sparc_cli.code import SymbolIndex
+
+def test_symbol_index_finds_definitions_and_references(tmp_path, write_source):
+    """Test definitions, qualified names and references are looked up."""
+    write_source(tmp_path / "app.py", "from util import helper\n\nclass App:\n    def run(self):\n        return helper()\n")
+    write_source(tmp_path / "util.py", "def helper():\n    return 1\n")
+    (tmp_path / "notes.txt").write_text("helper")
+
+    index = SymbolIndex(str(tmp_path))
+    stats = index.update()
+    assert (stats.indexed, index.file_count()) == (2, 2)
+    assert os.path.exists(tmp_path / ".sparc" / "index" / "symbols.db")
+
+    [helper] = index.find_symbol("helper")
+    assert (helper.path, helper.line, helper.kind) == ("util.py", 1, "function")
+    [run] = index.find_symbol("App.run")
+    assert (run.path, run.line, run.signature) == ("app.py", 4, "def run(self):")
+    assert index.find_symbol("app")[0].qualname == "App"
+    assert index.find_symbol("helper", kind="import")[0].path == "app.py"
+
+    references, total = index.find_references("helper")
+    assert total == 2
+    assert [(r.path, r.line, r.text) for r in references] == [
+        ("app.py", 1, "from util import helper"),
+        ("app.py", 5, "return helper()")
+    ]
+    index.close()
+
+def test_symbol_index_updates_incrementally(tmp_path, write_source):
+    """Test only changed files are re-indexed and deleted files are dropped."""
+    write_source(tmp_path / "a.py", "def first():\n    pass\n", mtime=1000)
+    write_source(tmp_path / "b.py", "def second():\n    pass\n", mtime=1000)
+    index = SymbolIndex(str(tmp_path))
+    index.update()
+
+    # Touched without changes, changed, and deleted
+    os.utime(tmp_path / "a.py", (2000, 2000))
+    write_source(tmp_path / "b.py", "def renamed():\n    pass\n")
+    stats = index.update()
+    assert (stats.indexed, stats.unchanged) == (1, 1)
+    assert index.find_symbol("second") == []
+    assert index.find_symbol("renamed")[0].path == "b.py"
+
+    (tmp_path / "a.py").unlink()
+    assert index.update().removed == 1
+    assert index.find_symbol("first") == []
+    index.close()
+
+def test_symbol_index_refresh_rechecks_changed_files(tmp_path, write_source):
+    """Test refresh re-indexes edited files and drops deleted ones without a full update."""
+    write_source(tmp_path / "a.py", "def first():\n    pass\n", mtime=1000)
+    write_source(tmp_path / "b.py", "def second():\n    pass\n", mtime=1000)
+    index = SymbolIndex(str(tmp_path))
+    index.update()
+    assert index.refresh().indexed == 0
+
+    write_source(tmp_path / "a.py", "def changed():\n    pass\n", mtime=2000)
+    (tmp_path / "b.py").unlink()
+    stats = index.refresh()
+    assert (stats.indexed, stats.removed) == (1, 1)
+    assert index.find_symbol("changed")[0].path == "a.py"
+    assert index.find_symbol("second") == []
+    index.close()
+
+def test_symbol_index_parallel_build(tmp_path, monkeypatch, write_source):
+    """Test worker processes produce the same index as a serial build."""
+    from sparc_cli.code import index as index_module
+    monkeypatch.setattr(index_module, "PARALLEL_MIN_FILES", 2)
+    for i in range(6):
+        write_source(tmp_path / f"m{i}.py", f"def func_{i}():\n    return {i}\n")
+
+    index = SymbolIndex(str(tmp_path))
+    assert index.update(workers=2).indexed == 6
+    assert index.find_symbol("func_5")[0].path == "m5.py"
+    index.close()
+
+def test_file_index_requires_subclass_hooks(tmp_path):
+    """Test the shared base can't be used without an extraction worker and storage."""
+    from sparc_cli.code.index import FileIndex
+    with pytest.raises(TypeError):
+        FileIndex(str(tmp_path))
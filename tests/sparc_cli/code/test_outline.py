@@ -0,0 +1,55 @@
+from sparc_cli.code.outline import outline_file, outline_files
+
+SOURCE = '''#!/usr/bin/env python
+"""Loaders for things.
+
+More detail.
+"""
+import os
+
+class Loader:
+    """Loads things."""
+
+    def load(
+        self,
+        path: str,
+    ) -> str:
+        """Load one thing.
+
+        Details.
+        """
+        return os.path.join(path)
+
+def helper():
+    return 1
+'''
+
+def test_outline_file(tmp_path):
+    """Test outlines list definitions with signatures, ranges and docstrings."""
+    path = tmp_path / "loader.py"
+    path.write_text(SOURCE)
+
+    outline = outline_file(str(path))
+    assert (outline.lines, outline.doc) == (22, "Loaders for things.")
+    assert outline.format(include_imports=True).splitlines() == [
+        f"{path} (22 lines) — Loaders for things.",
+        "  imports: os",
+        "  8-19: class Loader:  # Loads things.",
+        "    11-19: def load(self, path: str) -> str:  # Load one thing.",
+        "  21-22: def helper():",
+    ]
+
+def test_outline_files_cache(tmp_path):
+    """Test cached outlines are reused until the file changes, and unreadable files are skipped."""
+    path = tmp_path / "a.ts"
+    path.write_text("// Adds.\nexport function add(a, b) {\n  return a + b;\n}\n")
+    (tmp_path / "bin.py").write_bytes(b"\xff\xfe\x00")
+
+    first = outline_files([str(path), str(tmp_path / "bin.py"), str(tmp_path / "missing.py")])
+    assert [(s.name, s.doc) for s in first[str(path)].symbols] == [("add", "Adds.")]
+    assert first[str(tmp_path / "bin.py")] is None
+    assert first[str(tmp_path / "missing.py")] is None
+    assert outline_file(str(path)).symbols is first[str(path)].symbols
+
+    path.write_text("export class Sum {\n}\n")
+    assert [s.name for s in outline_file(str(path)).symbols] == ["Sum"]
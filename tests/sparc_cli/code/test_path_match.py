@@ -0,0 +1,56 @@
+from fuzzywuzzy import process
+
+from sparc_cli.code import path_match
+from sparc_cli.code.files import compile_filter
+from sparc_cli.code.path_match import PathMatcher
+
+PATHS = [
+    "sparc_cli/tools/fuzzy_find.py",
+    "sparc_cli/tools/read_file.py",
+    "sparc_cli/code/path_match.py",
+    "tests/sparc_cli/tools/test_fuzzy_find.py",
+    "docs/fuzzy/finding.md",
+    "README.md",
+]
+
+def test_path_matcher_scores_like_process_extract():
+    """Test scores match fuzzywuzzy's for small lists, which are scored in full."""
+    matcher = PathMatcher(PATHS)
+    results = dict(matcher.match("fuzzy find", limit=len(PATHS)))
+    expected = dict(process.extract("fuzzy find", PATHS, limit=len(PATHS)))
+    assert results == expected
+
+def test_path_matcher_ranks_basename_and_recent_matches_first():
+    """Test equal scores are ordered by basename match, depth and recency."""
+    matcher = PathMatcher(PATHS)
+    assert matcher.match("fuzzy_find", limit=1)[0][0] == "sparc_cli/tools/fuzzy_find.py"
+
+    recent = PathMatcher(PATHS, recent=["tests/sparc_cli/tools/test_fuzzy_find.py"])
+    first = recent.match("fuzzy_find", limit=2)
+    assert first[0][0] == "tests/sparc_cli/tools/test_fuzzy_find.py"
+
+def test_path_matcher_prefilters_large_lists(monkeypatch):
+    """Test trigram and subsequence prefiltering finds the best matches."""
+    monkeypatch.setattr(path_match, "PREFILTER_MIN_PATHS", 0)
+    paths = [f"pkg{i}/module_{i}/file_{i}.txt" for i in range(2000)] + PATHS
+    matcher = PathMatcher(paths)
+
+    assert matcher.match("path_match", limit=1)[0][0] == "sparc_cli/code/path_match.py"
+    # Typo: some trigrams still hit
+    assert matcher.match("fuzzy_fnid", limit=1)[0][0] == "sparc_cli/tools/fuzzy_find.py"
+    # Abbreviation: found through the characters in order
+    assert "sparc_cli/code/path_match.py" in [p for p, _ in matcher.match("pthmtch", limit=3)]
+
+    excluded = matcher.match("fuzzy_find", limit=5, accept=lambda p: not p.startswith("tests/"))
+    assert excluded and all(not p.startswith("tests/") for p, _ in excluded)
+    assert all(score >= 90 for _, score in matcher.match("path_match", threshold=90))
+
+def test_path_matcher_filters_before_prefilter_cut():
+    """Test a narrow include pattern still finds its match among many better-ranked paths."""
+    paths = [f"src/m{i}/config_loader{i}.py" for i in range(8000)]
+    paths.append("documentation/reference/guides/config_loader_reference.md")
+    matcher = PathMatcher(paths)
+    assert len(matcher) > path_match.PREFILTER_MIN_PATHS
+
+    results = matcher.match("config_loader", accept=compile_filter(["documentation/*"]))
+    assert [p for p, _ in results] == ["documentation/reference/guides/config_loader_reference.md"]
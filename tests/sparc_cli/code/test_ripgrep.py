@@ -0,0 +1,53 @@
+import shutil
+
+import pytest
+
+from sparc_cli.code.ripgrep import FileMatches, SearchResult, run_ripgrep, run_ripgrep_many
+
+requires_rg = pytest.mark.skipif(shutil.which("rg") is None, reason="ripgrep is not installed")
+
+def test_search_result_format_groups_by_file():
+    """Test matches are grouped by file with context markers and truncation notes."""
+    result = SearchResult(
+        files=[FileMatches("a.py", [(1, "x", False), (2, "foo", True), (9, "foo()", True)], match_count=3)],
+        match_count=5, file_count=2, truncated=True
+    )
+    assert result.format() == (
+        "a.py\n1-x\n2:foo\n--\n9:foo()\n[... 1 more matches in this file]\n\n"
+        "[Showing 2 of 5 matches in 2 files; narrow the pattern or paths to see the rest]"
+    )
+
+@requires_rg
+def test_run_ripgrep_caps_and_counts(tmp_path):
+    """Test results are capped per file and overall while every match is counted."""
+    (tmp_path / "a.txt").write_text("before\nneedle 1\nafter\nneedle 2\nneedle 3\n")
+    (tmp_path / "b.txt").write_text("needle 4\n")
+
+    full = run_ripgrep(["rg", "needle"], context=1, cwd=str(tmp_path))
+    assert (full.match_count, full.file_count, full.truncated, full.return_code) == (4, 2, False, 0)
+    a = next(f for f in full.files if f.path == "a.txt")
+    assert a.lines[:3] == [(1, "before", False), (2, "needle 1", True), (3, "after", False)]
+
+    capped = run_ripgrep(["rg", "needle"], max_per_file=1, cwd=str(tmp_path))
+    assert capped.match_count == 4 and capped.shown == 2 and capped.truncated
+
+    limited = run_ripgrep(["rg", "needle"], max_results=1, cwd=str(tmp_path))
+    assert limited.match_count == 4 and limited.shown == 1
+
+    missing = run_ripgrep(["rg", "haystack"], cwd=str(tmp_path))
+    assert (missing.files, missing.return_code) == ([], 1)
+
+@requires_rg
+def test_run_ripgrep_many_groups_by_pattern(tmp_path):
+    """Test one pass attributes lines to each pattern they match."""
+    (tmp_path / "a.txt").write_text("alpha beta\ngamma\nbeta\n")
+    (tmp_path / "b.txt").write_text("alpha\n")
+
+    results = run_ripgrep_many(["rg"], ["alpha", "beta", "delta"], cwd=str(tmp_path))
+    assert list(results) == ["alpha", "beta", "delta"]
+    assert (results["alpha"].match_count, results["alpha"].file_count) == (2, 2)
+    assert [line for _, line, _ in results["beta"].files[0].lines] == ["alpha beta", "beta"]
+    assert (results["delta"].files, results["delta"].return_code) == ([], 1)
+
+    scoped = run_ripgrep_many(["rg"], ["ALPHA"], ["b.txt"], ignore_case=True, cwd=str(tmp_path))
+    assert [f.path for f in scoped["ALPHA"].files] == ["b.txt"]
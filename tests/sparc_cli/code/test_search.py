@@ -0,0 +1,81 @@
+import os
+
+from sparc_cli.code import CodeSearchIndex
+from sparc_cli.code.search import split_chunks
+
+HTTP = '''"""HTTP helpers."""
+import time
+
+TIMEOUT = 30
+
+
+class RetryPolicy:
+    """How often to retry failed requests."""
+    attempts = 3
+
+    def backoff(self, attempt):
+        return 2 ** attempt
+
+
+def fetch_with_retries(url, policy):
+    """Fetch a URL, retrying failed requests."""
+    for attempt in range(policy.attempts):
+        time.sleep(policy.backoff(attempt))
+'''
+
+PARSE = '''def parseConfigFile(path):
+    """Load settings from a config file."""
+    with open(path) as f:
+        return f.read()
+'''
+
+
+def test_split_chunks_by_definition():
+    """Test functions are chunks, classes keep only their header and other code forms windows."""
+    assert split_chunks("http.py", HTTP) == [
+        (1, 4, '', ''),
+        (7, 9, 'RetryPolicy', 'How often to retry failed requests.'),
+        (11, 12, 'RetryPolicy.backoff', ''),
+        (15, 18, 'fetch_with_retries', 'Fetch a URL, retrying failed requests.')
+    ]
+
+
+def test_code_search_ranks_chunks(tmp_path, write_source):
+    """Test queries match identifier parts and names rank above bodies."""
+    write_source(tmp_path / "http.py", HTTP)
+    write_source(tmp_path / "config.py", PARSE)
+    index = CodeSearchIndex(str(tmp_path))
+    stats = index.update()
+    assert (stats.indexed, index.chunk_count()) == (2, 5)
+    assert os.path.exists(tmp_path / ".sparc" / "index" / "search.db")
+
+    hits = index.search("fetch url with retries")
+    assert (hits[0].path, hits[0].title, hits[0].start_line) == ("http.py", "fetch_with_retries", 15)
+    assert hits[0].preview == "def fetch_with_retries(url, policy):"
+
+    [config] = index.search("parse config", limit=1)
+    assert (config.path, config.title, config.end_line) == ("config.py", "parseConfigFile", 4)
+    assert index.search("kubernetes") == []
+    index.close()
+
+
+def test_code_search_updates_incrementally(tmp_path, write_source):
+    """Test changed files are re-chunked and deleted files drop out of results."""
+    write_source(tmp_path / "http.py", HTTP, mtime=1000)
+    write_source(tmp_path / "config.py", PARSE, mtime=1000)
+    index = CodeSearchIndex(str(tmp_path))
+    index.update()
+
+    write_source(tmp_path / "config.py", PARSE.replace("parseConfigFile", "loadYamlSettings"), mtime=2000)
+    os.remove(tmp_path / "http.py")
+    stats = index.update()
+    assert (stats.indexed, stats.removed) == (1, 1)
+    assert index.search("retry") == []
+    assert [hit.title for hit in index.search("yaml settings")] == ["loadYamlSettings"]
+    assert index.chunk_count() == 1
+
+    reopened = CodeSearchIndex(str(tmp_path))
+    assert reopened.update().unchanged == 1
+    assert reopened.search("yaml")[0].path == "config.py"
+    index.close()
+    reopened.close()
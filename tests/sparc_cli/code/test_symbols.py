@@ -0,0 +1,68 @@
+from sparc_cli.code import cached_symbols, extract_symbols
+from sparc_cli.code import symbols as symbols_module
+
+PYTHON_SOURCE = '''import os
+from typing import List as L
+
+class Loader:
+    """Loads things."""
+
+    @staticmethod
+    def load(path: str) -> str:
+        return os.path.join(path, helper(path))
+
+def helper(
+    path,
+):
+    return path.strip()
+'''
+
+def test_extract_python_symbols():
+    """Test Python definitions, methods, imports and calls are extracted."""
+    symbols = {s.qualname: s for s in extract_symbols("mod.py", PYTHON_SOURCE)}
+
+    assert symbols['os'].kind == 'import'
+    assert symbols['L'].signature == "from typing import List as L"
+    assert (symbols['Loader'].kind, symbols['Loader'].line, symbols['Loader'].end_line) == ('class', 4, 9)
+    load = symbols['Loader.load']
+    assert (load.kind, load.line) == ('method', 7)
+    assert load.signature == "def load(path: str) -> str:"
+    assert load.calls == {'join', 'helper'}
+    assert symbols['helper'].signature == "def helper(\n    path,\n):"
+
+def test_extract_python_one_line_definitions():
+    """Test definitions with the body on the header line keep their whole signature."""
+    source = "def scale(x: int, by: int = 2) -> int: return x * by\nclass Point: x: int = 0\n"
+    symbols = {s.qualname: s for s in extract_symbols("mod.py", source)}
+    assert symbols['scale'].signature == "def scale(x: int, by: int = 2) -> int:"
+    assert symbols['Point'].signature == "class Point:"
+
+def test_extract_symbols_falls_back_to_patterns():
+    """Test other languages, and Python that doesn't parse, use line patterns."""
+    source = '''import { api } from './api';
+export class Store {
+  load(id) {
+    return api.get(id);
+  }
+}
+export function save(item) {
+  return persist(item);
+}
+'''
+    symbols = {s.qualname: s for s in extract_symbols("store.ts", source)}
+    assert (symbols['Store'].line, symbols['Store'].end_line) == (2, 6)
+    assert symbols['Store.load'].kind == 'method'
+    assert symbols['save'].calls == {'persist'}
+
+    broken = "def ok():\n    return 1\n\ndef broken(:\n"
+    assert [s.name for s in extract_symbols("bad.py", broken)][0] == 'ok'
+
+def test_cached_symbols_keeps_latest_version_per_file():
+    """Test symbols are reused for unchanged text and an edit replaces the file's entry."""
+    first = cached_symbols("pkg/mod.py", "def a():\n    pass\n")
+    assert cached_symbols("./pkg/mod.py", "def a():\n    pass\n") is first
+
+    edited = cached_symbols("pkg/mod.py", "def b():\n    pass\n")
+    assert [s.name for s in edited] == ['b']
+    matching = [key for key in symbols_module._cache if key.endswith("pkg/mod.py")]
+    assert len(matching) == 1
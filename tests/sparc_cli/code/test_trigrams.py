@@ -0,0 +1,43 @@
+import os
+
+from sparc_cli.code.trigrams import TrigramIndex, regex_query
+
+def test_regex_query_extracts_required_literals():
+    """Test regexes are reduced to the literals every match contains."""
+    assert regex_query("handler") == b"handler"
+    assert regex_query(r"def\s+Parse") == ("and", [b"def", b"parse"])
+    assert regex_query("foo_bar|baz_qux") == ("or", [b"foo_bar", b"baz_qux"])
+    assert regex_query("(abc)?xyzw+") == b"xyz"
+    # Nothing required, or not parseable here: search everything
+    assert regex_query("ab") is None
+    assert regex_query("a|bcd") is None
+    assert regex_query(r"\p{L}+") is None
+
+def test_trigram_index_narrows_and_updates(tmp_path):
+    """Test candidates come from the index and reflect changes after updates."""
+    (tmp_path / "a.py").write_text("def parse_config():\n    pass\n")
+    (tmp_path / "b.py").write_text("import os\n")
+    (tmp_path / "c.bin").write_bytes(b"\0parse_config")
+
+    index = TrigramIndex(str(tmp_path))
+    assert index.candidates("parse_config") is None
+    stats = index.update(workers=1)
+    assert (stats.files, stats.rebuilt) == (3, True)
+    assert os.path.exists(tmp_path / ".sparc" / "index" / "trigrams-base.bin")
+    assert index.candidates("parse_config") == ["a.py"]
+    assert index.candidates("PARSE_CONFIG", ignore_case=True) == ["a.py"]
+    assert index.candidates("missing_name") == []
+    assert index.candidates(".*") is None
+
+    # Changed files are candidates before the next update...
+    (tmp_path / "b.py").write_text("from a import parse_config\n")
+    os.utime(tmp_path / "b.py", (1, 1))
+    assert index.candidates("parse_config") == ["a.py", "b.py"]
+
+    # ...and are indexed into the delta segment by it
+    (tmp_path / "a.py").unlink()
+    stats = index.update(workers=1)
+    assert (stats.indexed, stats.delta, stats.rebuilt) == (1, 1, False)
+    assert index.candidates("parse_config") == ["b.py"]
+    assert index.candidates("import os") == []
+    index.close()
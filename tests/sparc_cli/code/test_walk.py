@@ -0,0 +1,77 @@
+from sparc_cli.code.walk import IgnoreMatcher, summarize_tree, walk_tree
+
+def _tree(directory, prefix=''):
+    paths = []
+    for d in directory.dirs:
+        paths.append(f"{prefix}{d.name}/")
+        paths.extend(_tree(d, f"{prefix}{d.name}/"))
+    paths.extend(prefix + f.name for f in directory.files)
+    return paths
+
+def test_ignore_matcher():
+    """Test gitignore semantics, with and without negated patterns."""
+    ignore = IgnoreMatcher(['*.pyc', 'build/', '/top.txt'])
+    assert ignore('a/b.pyc')
+    assert ignore('src/build', is_dir=True)
+    assert not ignore('src/build')
+    assert ignore('top.txt')
+    assert not ignore('a/top.txt')
+
+    nested = ignore.extend(['secret', '/local.txt', '!keep.pyc'], 'sub')
+    assert nested('sub/x/secret')
+    assert not nested('other/secret')
+    assert nested('sub/local.txt')
+    assert not nested('sub/x/local.txt')
+    assert not nested('sub/keep.pyc')
+    assert nested('keep.pyc')
+
+def test_walk_tree_honors_nested_gitignore(tmp_path):
+    """Test nested .gitignore files apply to their own subtree."""
+    (tmp_path / '.gitignore').write_text('*.gen\n')
+    (tmp_path / 'a' / 'b').mkdir(parents=True)
+    (tmp_path / 'a' / 'b' / 'deep.txt').write_text('')
+    (tmp_path / 'a' / 'x.gen').write_text('')
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / '.gitignore').write_text('secret\n!keep.gen\n')
+    for name in ('secret', 'keep.gen', 'ok.py'):
+        (tmp_path / 'sub' / name).write_text('x')
+
+    result = walk_tree(str(tmp_path), max_depth=5, ignore=IgnoreMatcher(['.*']), want_stat=True)
+    assert _tree(result.root) == ['a/', 'a/b/', 'a/b/deep.txt', 'sub/', 'sub/keep.gen', 'sub/ok.py']
+    assert result.root.dirs[1].files[0].size == 1
+    assert not result.truncated
+
+    shallow = walk_tree(str(tmp_path), max_depth=1, ignore=IgnoreMatcher(['.*']))
+    assert _tree(shallow.root) == ['a/', 'sub/']
+    assert not shallow.root.dirs[0].scanned
+
+def test_walk_tree_entry_cap(tmp_path):
+    """Test the entry cap keeps the shallowest entries and reports truncation."""
+    for i in range(3):
+        (tmp_path / f"d{i}").mkdir()
+        for j in range(5):
+            (tmp_path / f"d{i}" / f"f{j}").write_text('')
+
+    result = walk_tree(str(tmp_path), max_depth=3, max_entries=7, workers=4)
+    assert result.truncated
+    assert result.entries == 7
+    assert _tree(result.root) == ['d0/', 'd0/f0', 'd0/f1', 'd0/f2', 'd0/f3', 'd1/', 'd2/']
+
+def test_summarize_tree(tmp_path):
+    """Test subtree aggregates are computed bottom-up."""
+    (tmp_path / 'pkg' / 'sub').mkdir(parents=True)
+    (tmp_path / 'pkg' / 'a.py').write_text('12345')
+    (tmp_path / 'pkg' / 'sub' / 'b.py').write_text('123')
+    (tmp_path / 'pkg' / 'sub' / 'README').write_text('')
+    (tmp_path / 'top.md').write_text('1')
+
+    result = walk_tree(str(tmp_path), max_depth=None, want_stat=True)
+    summaries = summarize_tree(result.root)
+    pkg = summaries['pkg']
+    assert (pkg.files, pkg.dirs, pkg.size, pkg.complete) == (3, 1, 8, True)
+    assert pkg.extensions == {'.py': 2, '': 1}
+    assert summaries[''].files == 4
+    assert summaries[''].newest == max(summaries['pkg'].newest, (tmp_path / 'top.md').stat().st_mtime)
+
+    partial = summarize_tree(walk_tree(str(tmp_path), max_depth=1).root)
+    assert not partial['pkg'].complete
@@ -0,0 +1,45 @@
+from sparc_cli.memory import MemoryArchive, NoteRecord, extractive_summary
+from sparc_cli.text.processing import estimate_tokens
+
+def test_extractive_summary_keeps_central_sentences_within_budget():
+    """Test repeated themes are kept, in original order, within the token budget."""
+    texts = [
+        "The auth module refreshes tokens in auth/session.py. Logging uses structlog.",
+        "Token refresh in auth/session.py retries twice.",
+        "- The CSS build is slow\n- Auth tokens expire after one hour"
+    ]
+    summary = extractive_summary(texts, max_tokens=40)
+    lines = summary.splitlines()
+
+    assert estimate_tokens(summary) <= 40 + len(lines)
+    assert any("auth/session.py" in line for line in lines)
+    assert all(line.startswith("- ") for line in lines)
+    # Original order is preserved
+    positions = [" ".join(texts).find(line[2:]) for line in lines]
+    assert positions == sorted(positions)
+
+def test_extractive_summary_empty():
+    assert extractive_summary([], 100) == ""
+    assert extractive_summary(["  \n- "], 100) == ""
+
+def test_memory_archive_search_and_persistence(tmp_path):
+    """Test archived items are searchable and survive reopening."""
+    archive = MemoryArchive(str(tmp_path))
+    archive.add('research_notes', [
+        NoteRecord("Database migrations live in db/migrations", priority=0),
+        NoteRecord("The frontend is built with Vite", priority=1)
+    ], run_id="run-1")
+    assert archive.count() == 2
+    assert archive.search("where are migrations")[0].content == "Database migrations live in db/migrations"
+
+    # Items added after the index is built are searchable too
+    archive.add('key_facts', [NoteRecord("Vite config is in web/vite.config.ts", priority=1)])
+    assert [item.kind for item in archive.search("vite", kind='key_facts')] == ['key_facts']
+    assert [item.content for item in archive.search("vite", run_id="run-1")] == ["The frontend is built with Vite"]
+    archive.close()
+
+    reopened = MemoryArchive(str(tmp_path))
+    assert reopened.count('research_notes') == 2
+    assert reopened.search("frontend vite", limit=1)[0].run_id == "run-1"
+    assert (tmp_path / ".sparc" / ".gitignore").exists()
+    reopened.close()
@@ -0,0 +1,63 @@
+from sparc_cli.memory import (
+    NearDuplicateIndex, RecordDedupIndex, FactRecord, SnippetRecord, SnippetRefRecord, merge_snippets, shingles
+)
+
+def test_shingles_ignore_case_punctuation_and_stopwords():
+    """Test shingles are word pairs of normalized text."""
+    assert shingles("The API uses OAuth!") == shingles("api uses oauth")
+    assert shingles("Retries") == frozenset({"retries"})
+
+def test_near_duplicate_index_finds_reworded_text():
+    """Test reworded text matches while unrelated text doesn't."""
+    index = NearDuplicateIndex(threshold=0.6)
+    index.add(1, "The project uses pytest for unit tests")
+    index.add(2, "Database connections are pooled in db/pool.py")
+
+    match = index.find("Project uses pytest for its unit tests.")
+    assert match is not None and match[0] == 1 and match[1] >= 0.6
+    assert index.find("Authentication retries use exponential backoff") is None
+    assert index.find("!!!") is None
+
+    index.remove(1)
+    assert index.find("The project uses pytest for unit tests") is None
+
+def test_record_dedup_index_syncs_with_store_changes():
+    """Test the index follows added and removed records."""
+    records = {1: FactRecord(content="Config is loaded from settings.toml", priority=1)}
+    index = RecordDedupIndex()
+    index.sync(records)
+    assert index.find("Config is loaded from settings.toml")[0] == 1
+
+    del records[1]
+    index.sync(records)
+    assert len(index) == 0
+
+def test_merge_overlapping_copied_snippets():
+    """Test overlapping copies from one file are merged line by line."""
+    first = SnippetRecord("a.py", 1, "a\nb\nc", "first", priority=0)
+    second = SnippetRecord("./a.py", 3, "C\nd", "second", priority=2)
+
+    merged = merge_snippets(first, second)
+    assert merged['line_number'] == 1
+    assert merged['snippet'] == "a\nb\nC\nd"
+    assert merged['description'] == "first\nsecond"
+    assert merged.priority == 2
+
+    assert merge_snippets(first, SnippetRecord("a.py", 10, "z", priority=0)) is None
+    assert merge_snippets(first, SnippetRecord("b.py", 2, "b", priority=0)) is None
+
+def test_merge_snippet_refs(tmp_path):
+    """Test line range references widen and contained references are absorbed."""
+    path = tmp_path / "mod.py"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 21)))
+
+    merged = merge_snippets(
+        SnippetRefRecord(str(path), 1, 5, priority=1),
+        SnippetRefRecord(str(path), 4, 8, priority=1)
+    )
+    assert (merged['line_number'], merged['end_line']) == (1, 8)
+
+    outer = SnippetRefRecord(str(path), 1, 10, priority=1)
+    merged = merge_snippets(outer, SnippetRecord(str(path), 2, "line 2\nline 3", priority=0))
+    assert isinstance(merged, SnippetRefRecord)
+    assert (merged['line_number'], merged['end_line']) == (1, 10)
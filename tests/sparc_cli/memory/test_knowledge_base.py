@@ -0,0 +1,64 @@
+from sparc_cli.memory import ProjectKnowledgeBase
+from sparc_cli.memory import knowledge_base
+
+def test_knowledge_base_persists_across_instances(tmp_path):
+    """Test facts and snippets saved in one run load in the next."""
+    (tmp_path / "app.py").write_text("def main():\n    pass\n")
+    kb = ProjectKnowledgeBase(str(tmp_path))
+    kb.save_fact("Entry point is app.main", priority=2, source_files=["app.py"], provenance={'run_id': 'r1'})
+    kb.save_snippet("app.py", 1, "def main():", "Entry point", priority=1)
+    kb.close()
+
+    entries = ProjectKnowledgeBase(str(tmp_path)).load()
+    assert [(e.kind, e.content) for e in entries] == [("fact", "Entry point is app.main"), ("snippet", "def main():")]
+    assert entries[0].provenance == {'run_id': 'r1'}
+    assert entries[1].filepath == "app.py"
+    assert (tmp_path / ".sparc" / ".gitignore").exists()
+
+def test_knowledge_base_drops_entries_when_sources_change(tmp_path):
+    """Test entries are invalidated by a change to their source file's content."""
+    source = tmp_path / "app.py"
+    source.write_text("x = 1\n")
+    kb = ProjectKnowledgeBase(str(tmp_path))
+    kb.save_fact("x is one", priority=1, source_files=["app.py"])
+    kb.save_fact("Unrelated fact", priority=1)
+
+    source.write_text("x = 2\n")
+    assert [e.content for e in kb.load()] == ["Unrelated fact"]
+    # Stale entries are removed from disk, not just skipped
+    source.write_text("x = 1\n")
+    assert [e.content for e in kb.load()] == ["Unrelated fact"]
+
+def test_knowledge_base_expires_facts_without_sources(tmp_path, monkeypatch):
+    """Test facts naming no source file are dropped once they reach the maximum age."""
+    kb = ProjectKnowledgeBase(str(tmp_path))
+    kb.save_fact("Deploys go through the staging cluster first", priority=1)
+    assert len(kb.load()) == 1
+
+    monkeypatch.setattr(knowledge_base, "SOURCELESS_FACT_MAX_AGE", -1)
+    assert kb.load() == []
+
+def test_knowledge_base_skips_snippets_of_unreadable_files(tmp_path):
+    """Test a snippet whose file can't be hashed is neither saved nor loaded."""
+    kb = ProjectKnowledgeBase(str(tmp_path))
+    assert kb.save_snippet("missing.py", 1, "def gone():", None, priority=1) is None
+    assert kb.load() == []
+
+    (tmp_path / "app.py").write_text("def main():\n    pass\n")
+    kb.save_snippet("app.py", 1, "def main():", None, priority=1)
+    # Rows saved without sources by earlier versions are dropped as stale
+    with kb._conn:
+        kb._conn.execute("UPDATE entries SET sources = '{}'")
+    assert kb.load() == []
+
+def test_knowledge_base_dedups_and_forgets(tmp_path):
+    """Test re-saving keeps one entry with the highest priority, and forget removes it."""
+    kb = ProjectKnowledgeBase(str(tmp_path))
+    kb.save_fact("fact", priority=1)
+    kb.save_fact("fact", priority=3)
+    kb.save_fact("fact", priority=0)
+    entries = kb.load()
+    assert len(entries) == 1 and entries[0].priority == 3
+
+    kb.forget_fact("fact")
+    assert kb.load() == []
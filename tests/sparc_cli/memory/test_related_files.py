@@ -0,0 +1,34 @@
+from sparc_cli.memory import RelatedFilesRegistry
+
+def test_registry_dedups_path_spellings(tmp_path, monkeypatch):
+    """Test relative, dotted and absolute spellings map to one ID."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.py").write_text("x = 1\n")
+    registry = RelatedFilesRegistry()
+
+    results = registry.add_many(["./a.py", "a.py", str(tmp_path / "a.py"), "b.py"])
+    assert [(file_id, added) for file_id, _, added in results] == [(1, True), (1, False), (1, False), (2, True)]
+    assert registry[1] == "./a.py"
+    assert registry.id_for(str(tmp_path / "a.py")) == 1
+    assert len(registry) == 2
+
+def test_registry_pop_clears_index(tmp_path, monkeypatch):
+    """Test removing a file allows it to be registered again under a new ID."""
+    monkeypatch.chdir(tmp_path)
+    registry = RelatedFilesRegistry()
+    file_id, _ = registry.add("a.py")
+    assert registry.pop(file_id) == "a.py"
+    assert registry.id_for("a.py") is None
+    assert registry.add("a.py") == (2, True)
+
+def test_registry_put_moves_path_to_new_id(tmp_path, monkeypatch):
+    """Test putting a registered path under another ID leaves only the new ID."""
+    monkeypatch.chdir(tmp_path)
+    registry = RelatedFilesRegistry()
+    registry.add("a.py")
+    registry.put(5, "./a.py")
+
+    assert list(registry.items()) == [(5, "./a.py")]
+    assert registry.id_for("a.py") == 5
+    assert registry.pop(1, None) is None
+    assert registry.id_for("a.py") == 5
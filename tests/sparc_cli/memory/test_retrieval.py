@@ -0,0 +1,40 @@
+from sparc_cli.memory import BM25Index, RecordIndex, FactRecord, tokenize
+
+def test_tokenize_splits_identifiers():
+    """Test identifiers are split into parts and also kept whole."""
+    tokens = tokenize("parseHTTPResponse retry_count in the v2 API")
+    assert {"parse", "http", "response", "parsehttpresponse", "retry", "count", "retry_count", "api"} <= set(tokens)
+    assert "the" not in tokens
+
+def test_bm25_ranks_relevant_documents_first():
+    """Test documents sharing rare query terms rank above others."""
+    index = BM25Index()
+    index.add(1, "Database connections are pooled in db/pool.py")
+    index.add(2, "Authentication retries use exponential backoff in auth/retry.py")
+    index.add(3, "The CLI entry point is sparc_cli/__main__.py")
+
+    results = index.search("how do authentication retries work")
+    assert results[0][0] == 2
+    assert all(key != 3 for key, _ in results)
+
+def test_bm25_remove_and_replace():
+    """Test documents can be removed and re-indexed incrementally."""
+    index = BM25Index()
+    index.add("a", "alpha beta")
+    index.add("a", "gamma")
+    assert index.search("alpha") == []
+    assert index.search("gamma")[0][0] == "a"
+    index.remove("a")
+    assert len(index) == 0 and index.search("gamma") == []
+
+def test_record_index_syncs_with_store_changes():
+    """Test sync indexes new records and forgets deleted ones."""
+    records = {1: FactRecord("uses sqlite", priority=1), 2: FactRecord("uses redis", priority=1)}
+    index = RecordIndex()
+    index.sync(records)
+    assert [k for k, _ in index.search("redis")] == [2]
+
+    del records[2]
+    records[3] = FactRecord("redis cache removed", priority=1)
+    index.sync(records)
+    assert [k for k, _ in index.search("redis")] == [3]
@@ -0,0 +1,41 @@
+import threading
+from contextvars import copy_context
+
+from sparc_cli.memory import BoundedPriorityStore, ContextMemory, FactRecord, MemorySnapshot
+
+def test_snapshot_copies_on_access_and_leaves_parent_untouched():
+    """Test changes through a snapshot don't reach the parent, except shared keys."""
+    store = BoundedPriorityStore(10)
+    store.add(FactRecord("Base fact", priority=1))
+    parent = {'key_facts': store, 'work_log': [], 'flag': False, 'config': {}}
+    snapshot = MemorySnapshot(parent, shared=('config',))
+
+    snapshot['key_facts'].add(FactRecord("Child fact", priority=1))
+    snapshot['work_log'].append("event")
+    snapshot['flag'] = True
+    snapshot['config']['cowboy_mode'] = True
+
+    assert len(parent['key_facts']) == 1 and parent['work_log'] == [] and parent['flag'] is False
+    assert parent['config'] == {'cowboy_mode': True}
+    assert len(snapshot['key_facts']) == 2
+    assert snapshot.base('key_facts') == {1: store[1]}
+
+    del snapshot['flag']
+    assert 'flag' not in snapshot and 'flag' in parent
+    assert set(snapshot) == {'key_facts', 'work_log', 'config'}
+
+def test_context_memory_forks_per_context():
+    """Test the current memory follows the context, including into copied-context threads."""
+    memory = ContextMemory({'depth': 0})
+    seen = {}
+
+    with memory.fork() as snapshot:
+        memory['depth'] = 1
+        context = copy_context()
+        thread = threading.Thread(target=lambda: context.run(lambda: seen.update(depth=memory['depth'])))
+        thread.start()
+        thread.join()
+        assert memory.current() is snapshot
+
+    assert seen == {'depth': 1}
+    assert memory['depth'] == 0 and memory.current() is memory.root
@@ -0,0 +1,60 @@
+import os
+import pytest
+from sparc_cli.memory import SnippetRefRecord
+
+def _touch_later(path):
+    """Bump mtime so caches keyed on it notice the edit."""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+def test_range_ref_resolves_from_disk(tmp_path):
+    """Test a line range reference returns the current file text."""
+    path = tmp_path / "mod.py"
+    path.write_text("a = 1\nb = 2\nc = 3\n")
+    ref = SnippetRefRecord(str(path), start_line=2, end_line=3, priority=1)
+    assert ref['snippet'] == "b = 2\nc = 3\n"
+    assert ref['line_number'] == 2
+
+def test_range_ref_reanchors_after_edit(tmp_path):
+    """Test a range follows its content when lines are inserted above it."""
+    path = tmp_path / "mod.py"
+    path.write_text("a = 1\ndef f():\n    return 1\n")
+    ref = SnippetRefRecord(str(path), start_line=2, end_line=3, priority=1)
+
+    path.write_text("import os\n\na = 1\ndef f():\n    return 1\n")
+    _touch_later(path)
+    assert ref.snippet == "def f():\n    return 1\n"
+    assert (ref.line_number, ref.end_line) == (4, 5)
+
+def test_range_ref_flags_changed_content(tmp_path):
+    """Test a range whose content was rewritten is shown with a staleness note."""
+    path = tmp_path / "mod.py"
+    path.write_text("x = 1\n")
+    ref = SnippetRefRecord(str(path), start_line=1, priority=1)
+    path.write_text("y = 2\n")
+    _touch_later(path)
+    assert ref.snippet.startswith("[content changed")
+    assert "y = 2" in ref.snippet
+
+def test_symbol_ref_python_and_fallback(tmp_path):
+    """Test symbol references via ast for Python and regex for other languages."""
+    py = tmp_path / "mod.py"
+    py.write_text("class A:\n    @property\n    def b(self):\n        return 1\n\nx = 1\n")
+    ref = SnippetRefRecord(str(py), symbol="A.b", priority=1)
+    assert ref.snippet == "    @property\n    def b(self):\n        return 1\n"
+
+    js = tmp_path / "mod.js"
+    js.write_text("const x = 1;\nexport function load(a) {\n  return a;\n}\nload(1);\n")
+    ref = SnippetRefRecord(str(js), symbol="load", priority=1)
+    assert ref.snippet == "export function load(a) {\n  return a;\n}\n"
+
+def test_invalid_refs_raise(tmp_path):
+    """Test unresolvable references are rejected when captured."""
+    path = tmp_path / "mod.py"
+    path.write_text("x = 1\n")
+    with pytest.raises(ValueError):
+        SnippetRefRecord(str(path), symbol="missing", priority=1)
+    with pytest.raises(ValueError):
+        SnippetRefRecord(str(path), start_line=5, priority=1)
+    with pytest.raises(ValueError):
+        SnippetRefRecord(str(tmp_path / "nope.py"), start_line=1, priority=1)
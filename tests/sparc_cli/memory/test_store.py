@@ -0,0 +1,108 @@
+import pytest
+from sparc_cli.memory import (
+    BoundedPriorityStore, BoundedPriorityList, FactRecord, NoteRecord, SnippetRecord
+)
+
+def test_store_assigns_stable_ids():
+    """Test IDs are assigned sequentially and never reused after deletes."""
+    store = BoundedPriorityStore(limit=10)
+    first, _ = store.add(FactRecord("a", priority=1))
+    second, _ = store.add(FactRecord("b", priority=1))
+    assert (first, second) == (1, 2)
+
+    store.pop(second)
+    third, _ = store.add(FactRecord("c", priority=1))
+    assert third == 3
+    assert list(store.keys()) == [1, 3]
+    assert store[3].id == 3
+
+def test_store_evicts_lowest_priority_oldest_first():
+    """Test eviction order is (priority, age)."""
+    store = BoundedPriorityStore(limit=3)
+    store.add(FactRecord("old low", priority=0, timestamp=1.0))
+    store.add(FactRecord("new low", priority=0, timestamp=2.0))
+    store.add(FactRecord("high", priority=2, timestamp=3.0))
+
+    _, evicted = store.add(FactRecord("medium", priority=1, timestamp=4.0))
+    assert [r['content'] for r in evicted] == ["old low"]
+
+    _, evicted = store.add(FactRecord("lowest", priority=0, timestamp=5.0))
+    assert [r['content'] for r in evicted] == ["new low"]
+    assert sorted(r.content for r in store.values()) == ["high", "lowest", "medium"]
+
+def test_store_skips_deleted_heap_entries():
+    """Test deleted records don't count towards eviction."""
+    store = BoundedPriorityStore(limit=2)
+    low_id, _ = store.add(FactRecord("low", priority=0))
+    store.add(FactRecord("high", priority=3))
+    store.pop(low_id)
+
+    _, evicted = store.add(FactRecord("medium", priority=1))
+    assert evicted == []
+    assert len(store) == 2
+
+def test_store_put_replaces_record():
+    """Test put replaces an existing ID without evicting the replacement."""
+    store = BoundedPriorityStore(limit=1)
+    store.put(5, FactRecord("old", priority=0))
+    assert store.put(5, FactRecord("new", priority=0)) == []
+    assert store[5].content == "new"
+    assert store.next_id == 6
+
+def test_record_mapping_access():
+    """Test records behave like the mappings they replace."""
+    record = SnippetRecord("a.py", 3, "pass", None, priority=1)
+    assert record['filepath'] == "a.py"
+    assert record.get('missing') is None
+    assert record.as_dict()['line_number'] == 3
+    with pytest.raises(KeyError):
+        record['missing']
+    with pytest.raises(AttributeError):
+        record.extra = 1
+
+def test_priority_list_sequence_access():
+    """Test list view iterates and indexes records in insertion order."""
+    notes = BoundedPriorityList(limit=2)
+    notes.append(NoteRecord("one", priority=1))
+    notes.append(NoteRecord("two", priority=1))
+    evicted = notes.append(NoteRecord("three", priority=1))
+
+    assert [n['content'] for n in evicted] == ["one"]
+    assert [n['content'] for n in notes] == ["two", "three"]
+    assert notes[0]['content'] == "two"
+    assert notes[-1]['content'] == "three"
+
+def test_store_enforces_token_budget():
+    """Test records are evicted by priority and age until the token budget fits."""
+    store = BoundedPriorityStore(limit=100, max_tokens=10)
+    store.add(FactRecord("x" * 16, priority=0, timestamp=1.0))   # 4 tokens
+    store.add(FactRecord("y" * 16, priority=2, timestamp=2.0))   # 4 tokens
+    assert store.total_tokens == 8
+
+    _, evicted = store.add(FactRecord("z" * 16, priority=1, timestamp=3.0))
+    assert [r.content[0] for r in evicted] == ["x"]
+    assert store.total_tokens == 8
+
+    store.pop(2)
+    assert store.total_tokens == 4
+
+def test_store_rejects_record_larger_than_budget():
+    """Test a record that can never fit is rejected without evicting others."""
+    store = BoundedPriorityStore(limit=100, max_bytes=10)
+    store.add(FactRecord("small", priority=0))
+    record_id, evicted = store.add(FactRecord("much too large", priority=3))
+
+    assert [r.id for r in evicted] == [record_id]
+    assert record_id not in store
+    assert len(store) == 1
+
+def test_store_put_keeps_record_when_replacement_too_large():
+    """Test a replacement over budget is rejected and the existing record is kept."""
+    store = BoundedPriorityStore(limit=100, max_tokens=10)
+    store.put(1, FactRecord("short fact", priority=0))
+    replacement = FactRecord("x" * 200, priority=0)
+
+    assert store.put(1, replacement) == [replacement]
+    assert len(store) == 1
+    assert store[1].content == "short fact"
+    assert store.total_tokens == store.size_of(1)[0]
@@ -0,0 +1,49 @@
+import json
+
+from sparc_cli.memory import WorkLog, WorkLogEvent, JsonlWorkLogSink
+
+def test_work_log_keeps_newest_events():
+    """Test the ring buffer drops the oldest events once full."""
+    log = WorkLog(maxlen=3)
+    for i in range(5):
+        log.append(WorkLogEvent(event=f"Event {i}"))
+
+    assert len(log) == 3
+    assert log.total == 5
+    assert [e['event'] for e in log] == ["Event 2", "Event 3", "Event 4"]
+
+    log.maxlen = 2
+    assert [e.event for e in log] == ["Event 3", "Event 4"]
+
+def test_work_log_render_since():
+    """Test rendering all events and only those after a position."""
+    log = WorkLog(maxlen=10)
+    log.append(WorkLogEvent(event="First", timestamp="2024-01-01T00:00:00"))
+    position = log.total
+    log.append(WorkLogEvent(event="Second", timestamp="2024-01-01T00:00:01"))
+
+    assert log.render() == "## 2024-01-01T00:00:00\n\nFirst\n\n## 2024-01-01T00:00:01\n\nSecond"
+    assert log.render(since=position) == "## 2024-01-01T00:00:01\n\nSecond"
+
+    log.clear()
+    assert log.render() == ""
+    assert not log
+
+def test_jsonl_sink_batches_writes(tmp_path):
+    """Test events are written in batches with the sink's extra fields."""
+    path = tmp_path / "work_log.jsonl"
+    sink = JsonlWorkLogSink(str(path), batch_size=2, flush_interval=3600, extra={'run_id': 'abc'})
+    log = WorkLog(maxlen=10, sink=sink)
+
+    log.append(WorkLogEvent(event="One", tool="emit_key_facts", counts={'facts': 2}))
+    assert not path.exists()
+    log.append(WorkLogEvent(event="Two", stage="research", agent_depth=1))
+    log.append(WorkLogEvent(event="Three", duration=1.5))
+    sink.close()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line['event'] for line in lines] == ["One", "Two", "Three"]
+    assert all(line['run_id'] == 'abc' for line in lines)
+    assert lines[0]['counts'] == {'facts': 2}
+    assert (lines[1]['stage'], lines[1]['agent_depth']) == ("research", 1)
+    assert lines[2]['duration'] == 1.5
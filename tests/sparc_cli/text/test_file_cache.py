@@ -0,0 +1,29 @@
+from sparc_cli.text import FileContentCache
+
+def test_file_cache_reuses_unchanged_files(tmp_path):
+    """Test files are read once while their mtime and size are unchanged."""
+    path = tmp_path / "a.py"
+    path.write_text("x = 1\n")
+    cache = FileContentCache()
+
+    assert cache.get(str(path)).text == "x = 1\n"
+    assert cache.get(str(tmp_path / "." / "a.py")).lines == ["x = 1\n"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    path.write_text("x = 22\n")
+    assert cache.get(str(path)).text == "x = 22\n"
+    assert cache.misses == 2
+
+def test_file_cache_evicts_least_recently_used(tmp_path):
+    """Test the cache stays within its character budget."""
+    cache = FileContentCache(max_chars=10)
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_text("1234")
+        cache.get(str(tmp_path / name))
+
+    assert len(cache) == 2
+    assert str(tmp_path / "a") not in cache
+    assert str(tmp_path / "c") in cache
+
+    cache.invalidate(str(tmp_path / "c"))
+    assert str(tmp_path / "c") not in cache
@@ -0,0 +1,45 @@
+from sparc_cli.text import line_index, read_lines
+
+def test_read_lines_ranges(tmp_path, monkeypatch):
+    """Test line ranges are located through the block index."""
+    monkeypatch.setattr(line_index, "BLOCK_BYTES", 16)
+    path = tmp_path / "a.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 101)) + "last")
+
+    result = read_lines(str(path), 50, 52)
+    assert result.text == "line 50\nline 51\nline 52\n"
+    assert (result.start_line, result.end_line, result.total_lines) == (50, 52, 101)
+    assert not result.truncated
+
+    assert read_lines(str(path), 100).text == "line 100\nlast"
+    past_end = read_lines(str(path), 200)
+    assert (past_end.text, past_end.end_line) == ("", 199)
+
+def test_read_lines_max_bytes(tmp_path):
+    """Test long ranges stop at the last whole line within max_bytes."""
+    path = tmp_path / "a.txt"
+    path.write_text("aaaa\nbbbb\nééééé\n")
+
+    result = read_lines(str(path), max_bytes=12)
+    assert (result.text, result.end_line, result.truncated) == ("aaaa\nbbbb\n", 2, True)
+
+    # A line longer than max_bytes is cut, without splitting a character
+    result = read_lines(str(path), 3, max_bytes=5)
+    assert (result.text, result.end_line, result.truncated) == ("éé", 3, True)
+
+def test_read_lines_updates_with_file(tmp_path):
+    """Test the cached index is rebuilt when the file changes."""
+    path = tmp_path / "a.txt"
+    path.write_text("one\ntwo\n")
+    assert read_lines(str(path)).total_lines == 2
+    path.write_text("one\ntwo\nthree\n")
+    assert read_lines(str(path), 3).text == "three\n"
+    path.write_text("")
+    assert read_lines(str(path)).total_lines == 0
+
+def test_read_lines_utf16(tmp_path):
+    """Test encodings that can't be split at newline bytes are still read by line."""
+    path = tmp_path / "a.txt"
+    path.write_text("one\ntwo\nthree\n", encoding="utf-16")
+    result = read_lines(str(path), 2, 2, encoding="utf-16")
+    assert (result.text, result.total_lines) == ("two\n", 3)
@@ -1,6 +1,9 @@
 import pytest
 from pytest import mark
-from sparc_cli.tools.expert import read_files_with_limit, emit_expert_context, expert_context
+from sparc_cli.tools.expert import (
+    read_files_with_limit, read_changed_files, emit_expert_context, expert_context, ask_expert, reset_expert_session,
+    ask_expert_async, await_expert
+)
 
 def test_read_files_with_limit():
     """Test that read_files_with_limit respects size limits."""
@@ -28,3 +31,154 @@ def test_expert_context():
     assert isinstance(result, dict)
     assert "success" in result
     assert "context" in result
+
+def test_read_changed_files_sends_only_changes(tmp_path):
+    """Test files already sent are diffed or listed as unchanged."""
+    changed = tmp_path / "changed.py"
+    same = tmp_path / "same.py"
+    changed.write_text("a = 1\nb = 2\n")
+    same.write_text("c = 3\n")
+    sent = {}
+
+    first = read_changed_files([str(changed), str(same)], sent)
+    assert f"## File: {changed}" in first and "c = 3" in first
+
+    changed.write_text("a = 1\nb = 20\n")
+    second = read_changed_files([str(changed), str(same)], sent)
+    assert f"## Changes to: {changed}" in second
+    assert "-b = 2\n+b = 20\n" in second
+    assert "c = 3" not in second
+    assert f"- {same}" in second
+    assert sent[str(changed)] == ("a = 1\nb = 20\n", "a = 1\nb = 20\n")
+
+def test_ask_expert_diff_context_continues_conversation(tmp_path, monkeypatch):
+    """Test diff-aware mode resends history instead of unchanged file contents."""
+    from sparc_cli.tools import expert
+    from sparc_cli.tools.memory import _global_memory
+
+    class FakeModel:
+        def __init__(self):
+            self.calls = []
+
+        def invoke(self, query):
+            self.calls.append(query)
+            return type("Response", (), {"content": "answer"})()
+
+    path = tmp_path / "mod.py"
+    path.write_text("def f():\n    return 1\n")
+    model = FakeModel()
+    monkeypatch.setattr(expert, "_model", model)
+    monkeypatch.setitem(_global_memory, "config", {"expert_diff_context": True})
+    reset_expert_session()
+
+    expert.expert_context['files'].append(str(path))
+    ask_expert.invoke({"question": "What does f return?"})
+    expert.expert_context['files'].append(str(path))
+    ask_expert.invoke({"question": "Is f pure?"})
+
+    second = model.calls[1]
+    assert len(second) == 3
+    assert "return 1" in second[0].content
+    assert "return 1" not in second[2].content
+    assert "Unchanged since the previous question" in second[2].content
+    reset_expert_session()
+
+def test_ask_expert_diff_context_resends_other_excerpts_of_unchanged_files(tmp_path, monkeypatch):
+    """Test an unchanged large file cut to other definitions is resent, not diffed."""
+    from sparc_cli.tools import expert
+    from sparc_cli.tools.memory import _global_memory
+
+    class FakeModel:
+        def __init__(self):
+            self.calls = []
+
+        def invoke(self, query):
+            self.calls.append(query)
+            return type("Response", (), {"content": "answer"})()
+
+    path = tmp_path / "funcs.py"
+    path.write_text("".join(f"def func_{i}(x):\n    y = x + {i}\n    return y * {i}\n\n\n" for i in range(1, 60)))
+    model = FakeModel()
+    monkeypatch.setattr(expert, "_model", model)
+    monkeypatch.setitem(_global_memory, "config", {"expert_diff_context": True})
+    reset_expert_session()
+
+    expert.expert_context['files'].append(str(path))
+    ask_expert.invoke({"question": "What does func_3 return?"})
+    expert.expert_context['files'].append(str(path))
+    ask_expert.invoke({"question": "What does func_30 return?"})
+
+    first, second = model.calls[0][0].content, model.calls[1][2].content
+    assert "return y * 3" in first and "return y * 30" not in first
+    assert "## Changes to" not in second
+    assert f"## File: {path}" in second and "return y * 30" in second
+    reset_expert_session()
+
+def test_ask_expert_async_returns_ticket_before_answer(monkeypatch):
+    """Test async questions return a ticket at once and the answer is collected later."""
+    import threading
+    from sparc_cli.tools import expert
+    from sparc_cli.tools.memory import _global_memory
+
+    release = threading.Event()
+
+    class SlowModel:
+        def invoke(self, query):
+            release.wait(5)
+            return type("Response", (), {"content": "slow answer"})()
+
+    monkeypatch.setattr(expert, "_model", SlowModel())
+    monkeypatch.setitem(_global_memory, "config", {})
+
+    result = ask_expert_async.invoke({"question": "What is slow?"})
+    ticket = result.split("ticket ")[1].split(".")[0]
+    assert "still working" in await_expert.invoke({"ticket": ticket, "timeout": 0.01})
+
+    release.set()
+    assert await_expert.invoke({"ticket": ticket}) == "slow answer"
+    assert "Unknown expert ticket" in await_expert.invoke({"ticket": ticket})
+
+def test_expert_tickets_are_kept_per_agent(monkeypatch):
+    """Test sub-agent tickets don't count against the parent and go away with the sub-agent."""
+    import gc
+    import threading
+    from sparc_cli.tools import expert
+    from sparc_cli.tools.memory import _global_memory, fork_memory
+
+    release = threading.Event()
+
+    class SlowModel:
+        def invoke(self, query):
+            release.wait(5)
+            return type("Response", (), {"content": "answer"})()
+
+    monkeypatch.setattr(expert, "_model", SlowModel())
+    monkeypatch.setattr(expert, "EXPERT_MAX_PENDING", 1)
+    monkeypatch.setattr(expert, "EXPERT_MAX_UNCLAIMED", 1)
+    monkeypatch.setitem(_global_memory, "config", {})
+
+    parent = ask_expert_async.invoke({"question": "Parent question?"}).split("ticket ")[1].split(".")[0]
+    assert "already pending" in ask_expert_async.invoke({"question": "Another?"})
+
+    with fork_memory() as snapshot:
+        child = ask_expert_async.invoke({"question": "Child question?"})
+        assert "submitted as ticket" in child
+        child = child.split("ticket ")[1].split(".")[0]
+    assert "Unknown expert ticket" in await_expert.invoke({"ticket": child})
+
+    release.set()
+    assert await_expert.invoke({"ticket": parent}) == "answer"
+    key = id(snapshot)
+    expert.expert_tickets[key][child][1].result(5)
+    del snapshot
+    gc.collect()
+    assert key not in expert.expert_tickets
+
+    # Answers never collected are forgotten once newer ones arrive
+    first = ask_expert_async.invoke({"question": "First?"}).split("ticket ")[1].split(".")[0]
+    expert._agent_tickets()[first][1].result(5)
+    second = ask_expert_async.invoke({"question": "Second?"}).split("ticket ")[1].split(".")[0]
+    expert._agent_tickets()[second][1].result(5)
+    ask_expert_async.invoke({"question": "Third?"})
+    assert first not in expert._agent_tickets()
+    assert await_expert.invoke({"ticket": second}) == "answer"
@@ -1,6 +1,7 @@
 import pytest
 from sparc_cli.tools import list_directory_tree
-from sparc_cli.tools.list_directory import load_gitignore_patterns, should_ignore
+from sparc_cli.code.walk import IgnoreMatcher
+from sparc_cli.tools.list_directory import DEFAULT_EXCLUDE_PATTERNS
 
 def test_list_directory_tree():
     """Test that list_directory_tree returns directory structure."""
@@ -9,26 +10,23 @@ def test_list_directory_tree():
     assert "tree" in result
     assert isinstance(result["tree"], str)
 
-def test_load_gitignore_patterns():
-    """Test loading of gitignore patterns."""
-    patterns = load_gitignore_patterns()
-    assert isinstance(patterns, list)
-    # Should at least have common patterns
-    assert len(patterns) > 0
+def test_default_exclude_patterns():
+    """Test the default patterns ignore hidden and generated paths at any depth."""
+    ignore = IgnoreMatcher(DEFAULT_EXCLUDE_PATTERNS)
 
-def test_should_ignore():
-    """Test gitignore pattern matching."""
     # Test node_modules
-    assert should_ignore("node_modules") is True
-    assert should_ignore("path/to/node_modules") is True
+    assert ignore("node_modules", is_dir=True) is True
+    assert ignore("path/to/node_modules", is_dir=True) is True
     
     # Test .git
-    assert should_ignore(".git") is True
-    assert should_ignore("path/to/.git") is True
+    assert ignore(".git", is_dir=True) is True
+    assert ignore("path/to/.git", is_dir=True) is True
     
-    # Test regular directory
-    assert should_ignore("src") is False
-    assert should_ignore("path/to/src") is False
+    # Test regular directory and file
+    assert ignore("src", is_dir=True) is False
+    assert ignore("path/to/src", is_dir=True) is False
+    assert ignore("path/to/main.pyc") is True
+    assert ignore("path/to/main.py") is False
 
 def test_list_directory_tree_with_path():
     """Test list_directory_tree with specific path."""
@@ -42,3 +40,20 @@ def test_list_directory_tree_nonexistent():
     result = list_directory_tree(path="nonexistent")
     assert isinstance(result, dict)
     assert "error" in result["tree"].lower()
+
+def test_list_directory_tree_summary(tmp_path):
+    """Test summary mode collapses large directories unless expanded."""
+    (tmp_path / 'big').mkdir()
+    for i in range(30):
+        (tmp_path / 'big' / f"f{i}.js").write_text('x')
+    (tmp_path / 'small').mkdir()
+    (tmp_path / 'small' / 'one.py').write_text('')
+
+    result = list_directory_tree.invoke({"path": str(tmp_path), "max_depth": 3, "summary": True})
+    assert "big/ (30 files: 30 .js; 30.0B" in result
+    assert "f0.js" not in result
+    assert "one.py" in result
+
+    result = list_directory_tree.invoke({"path": str(tmp_path), "summary": True, "expand": ["big"]})
+    assert "f0.js" in result
+    assert "one.py" not in result
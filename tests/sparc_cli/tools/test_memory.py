@@ -20,7 +20,17 @@ from sparc_cli.tools.memory import (
     plan_implementation_completed,
     one_shot_completed,
     MemoryPriority,
-    MEMORY_LIMITS
+    MEMORY_LIMITS,
+    MEMORY_BUDGETS,
+    enable_knowledge_base,
+    get_relevant_memory_value,
+    emit_key_snippet_refs,
+    enable_memory_compaction,
+    search_memory_archive,
+    fork_memory,
+    log_work_event,
+    enable_work_log_export,
+    merge_memory_snapshot
 )
 from pathlib import Path
 
@@ -255,3 +265,256 @@ def test_completion_flags():
     one_shot_completed("One-shot done")
     assert _global_memory['task_completed'] is True
     assert _global_memory['completion_message'] == "One-shot done"
+
+def test_memory_limit_evicts_through_store():
+    """Test prioritized categories evict via the bounded store after a reset to plain containers."""
+    limit = MEMORY_LIMITS['key_facts']
+    emit_key_facts.invoke({"facts": [f"Fact {i}" for i in range(limit)], "priority": MemoryPriority.LOW})
+    emit_key_facts.invoke({"facts": ["Critical fact"], "priority": MemoryPriority.CRITICAL})
+
+    facts = _global_memory['key_facts']
+    assert len(facts) == limit
+    assert 1 not in facts
+    assert facts[limit + 1]['content'] == "Critical fact"
+    assert _global_memory['key_fact_id_counter'] == limit + 2
+
+def test_key_snippets_token_budget_reports_evictions(monkeypatch):
+    """Test snippets beyond the token budget are evicted and reported."""
+    monkeypatch.setitem(MEMORY_BUDGETS, 'key_snippets', {'tokens': 60, 'bytes': None})
+    snippet = lambda name: {'filepath': f'{name}.py', 'line_number': 1, 'snippet': 'x = 1\n' * 30, 'description': None}
+
+    emit_key_snippets.invoke({"snippets": [snippet('old')], "priority": MemoryPriority.LOW})
+    result = emit_key_snippets.invoke({"snippets": [snippet('new')], "priority": MemoryPriority.HIGH})
+
+    snippets = _global_memory['key_snippets']
+    assert [s['filepath'] for s in snippets.values()] == ['new.py']
+    assert "Snippet #1" in result
+    assert "old.py" in result
+
+def test_knowledge_base_preloads_memory(tmp_path, monkeypatch):
+    """Test facts persisted in one run are preloaded into memory by the next."""
+    monkeypatch.chdir(tmp_path)
+    enable_knowledge_base(str(tmp_path))
+    emit_key_facts.invoke({"facts": ["Persisted fact"]})
+    _global_memory['knowledge_base'].close()
+
+    setup_function()
+    assert enable_knowledge_base(str(tmp_path)) == 1
+    assert [f['content'] for f in _global_memory['key_facts'].values()] == ["Persisted fact"]
+    _global_memory['knowledge_base'].close()
+
+def test_knowledge_base_ties_facts_to_the_files_they_name(tmp_path, monkeypatch):
+    """Test a persisted fact goes stale when a file it names changes, not any related file."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "auth.py").write_text("TOKEN_TTL = 60\n")
+    (tmp_path / "settings.toml").write_text("debug = true\n")
+    (tmp_path / "other.py").write_text("x = 1\n")
+    enable_knowledge_base(str(tmp_path))
+    emit_related_files.invoke({"files": ["src/auth.py", "other.py"]})
+    emit_key_facts.invoke({"facts": ["Token lifetime is set in auth.py", "Debug mode is set in ./settings.toml."]})
+    kb = _global_memory['knowledge_base']
+    assert {e.content: sorted(e.sources) for e in kb.load()} == {
+        "Token lifetime is set in auth.py": ["src/auth.py"],
+        "Debug mode is set in ./settings.toml.": ["settings.toml"]
+    }
+
+    (tmp_path / "other.py").write_text("x = 2\n")
+    (tmp_path / "settings.toml").write_text("debug = false\n")
+    assert [e.content for e in kb.load()] == ["Token lifetime is set in auth.py"]
+    kb.close()
+
+def test_get_relevant_memory_value_selects_top_items():
+    """Test narrow queries only receive the most relevant facts."""
+    facts = [f"Module {i} handles unrelated feature number {i}" for i in range(10)]
+    facts.append("Authentication tokens are refreshed in auth/session.py")
+    emit_key_facts.invoke({"facts": facts})
+
+    value = get_relevant_memory_value('key_facts', "fix authentication token refresh", top_k=3)
+    assert "auth/session.py" in value
+    assert value.count("Key Fact #") == 3
+    assert "8 less relevant key facts omitted" in value
+
+    # Everything fits, so output matches the unfiltered rendering
+    assert get_relevant_memory_value('key_facts', "anything", top_k=100) == get_memory_value('key_facts')
+
+def test_get_relevant_memory_value_always_keeps_critical_items():
+    """Test critical items survive the item cap and token budget even when irrelevant."""
+    emit_key_facts.invoke({"facts": ["Never push to the main branch", "Never edit generated files"],
+                           "priority": MemoryPriority.CRITICAL})
+    emit_key_facts.invoke({"facts": ["Authentication tokens are refreshed in auth/session.py"]})
+
+    value = get_relevant_memory_value('key_facts', "fix authentication token refresh", top_k=1, max_tokens=1)
+    assert "main branch" in value and "generated files" in value
+    assert "auth/session.py" not in value
+
+    value = get_relevant_memory_value('key_facts', "fix authentication token refresh", top_k=1, max_tokens=1000)
+    assert value.count("Key Fact #") == 3
+
+def test_emit_key_snippet_refs(tmp_path):
+    """Test snippet references render like copied snippets and report failures."""
+    path = tmp_path / "mod.py"
+    path.write_text("def handler():\n    return 42\n")
+
+    result = emit_key_snippet_refs.invoke({"refs": [
+        {'filepath': str(path), 'symbol': 'handler', 'description': 'Entry'},
+        {'filepath': str(path), 'symbol': 'missing'}
+    ]})
+    assert "Could not resolve" in result and "missing" in result
+
+    value = get_memory_value('key_snippets')
+    assert "return 42" in value
+    assert "- Symbol: `handler`" in value
+    assert any(str(path) in f for f in get_related_files())
+
+def test_emit_key_facts_merges_near_duplicates():
+    """Test a reworded fact is merged into the existing one and reported."""
+    emit_key_facts.invoke({"facts": ["Tests are run with pytest from the repository root"], "priority": MemoryPriority.LOW})
+    result = emit_key_facts.invoke({
+        "facts": ["Tests are run with pytest from the repository root directory", "Config lives in settings.toml"],
+        "priority": MemoryPriority.HIGH
+    })
+
+    facts = _global_memory['key_facts']
+    assert len(facts) == 2
+    assert facts[1]['content'] == "Tests are run with pytest from the repository root directory"
+    assert facts[1]['priority'] == MemoryPriority.HIGH
+    assert "Merged into Fact #1" in result
+
+def test_emit_key_facts_merge_keeps_newer_wording():
+    """Test a near-duplicate correction replaces the stored wording and says so."""
+    emit_key_facts.invoke({"facts": ["The billing service reads its tax rates, currency and invoice settings from config/billing.yaml when it starts"]})
+    result = emit_key_facts.invoke({"facts": ["The billing service reads its tax rates, currency and invoice settings from config/billing.toml when it starts"]})
+
+    facts = _global_memory['key_facts']
+    assert len(facts) == 1
+    assert facts[1]['content'] == "The billing service reads its tax rates, currency and invoice settings from config/billing.toml when it starts"
+    assert "Merged into Fact #1; kept the new wording, replacing: The billing service reads" in result
+
+def test_emit_key_snippets_merges_overlapping_ranges():
+    """Test overlapping snippets of one file collapse into a single snippet."""
+    emit_key_snippets.invoke({"snippets": [
+        {'filepath': 'a.py', 'line_number': 1, 'snippet': 'a\nb\nc', 'description': None},
+        {'filepath': 'a.py', 'line_number': 6, 'snippet': 'f\ng', 'description': None}
+    ]})
+    result = emit_key_snippets.invoke({"snippets": [
+        {'filepath': './a.py', 'line_number': 3, 'snippet': 'c\nd\ne', 'description': 'Bridges both'}
+    ]})
+
+    snippets = _global_memory['key_snippets']
+    assert list(snippets.keys()) == [1]
+    assert snippets[1]['snippet'] == "a\nb\nc\nd\ne\nf\ng"
+    assert "Merged into Snippet #1 (also absorbed #2)" in result
+
+def test_memory_compaction_condenses_and_archives(tmp_path, monkeypatch):
+    """Test notes over the limit are condensed into a summary and stay searchable."""
+    monkeypatch.setitem(MEMORY_LIMITS, 'research_notes', 3)
+    enable_memory_compaction(str(tmp_path))
+    topics = ["database migrations", "frontend bundling", "retry backoff", "session tokens", "feature flags"]
+    for topic in topics:
+        emit_research_notes.invoke({"notes": f"Investigated {topic} in detail.", "priority": MemoryPriority.LOW})
+
+    notes = _global_memory['research_notes']
+    assert len(notes) == 3
+    summaries = [n for n in notes if n['content'].startswith("[Summary of")]
+    assert len(summaries) == 1
+    assert "database migrations" in summaries[0]['content']
+
+    result = search_memory_archive.invoke({"query": "database migrations"})
+    assert "Investigated database migrations in detail." in result
+
+    # Items archived by an earlier run only show up when asked for
+    _global_memory['run_id'] = "next-run"
+    result = search_memory_archive.invoke({"query": "database migrations"})
+    assert result == "No archived memory matches the query."
+    result = search_memory_archive.invoke({"query": "database migrations", "all_runs": True})
+    assert "earlier run" in result and "Investigated database migrations in detail." in result
+    _global_memory.pop('memory_archive').close()
+
+def test_fork_memory_isolates_and_merges_sub_agent_changes():
+    """Test a sub-agent's emits merge back with remapped IDs and its completion state stays local."""
+    emit_key_facts.invoke({"facts": ["Parent fact one", "Parent fact two"]})
+
+    with fork_memory() as snapshot:
+        emit_key_facts.invoke({"facts": ["Child finding about caching"]})
+        delete_key_facts.invoke({"fact_ids": [1]})
+        emit_related_files.invoke({"files": ["child.py"]})
+        task_completed.invoke({"message": "child done"})
+        assert len(_global_memory['key_facts']) == 2
+
+    # The parent moved on while the sub-agent ran
+    emit_key_facts.invoke({"facts": ["Parent fact three"]})
+    assert [f['content'] for f in _global_memory['key_facts'].values()] == [
+        "Parent fact one", "Parent fact two", "Parent fact three"
+    ]
+    assert _global_memory['task_completed'] is False
+
+    id_maps = merge_memory_snapshot(snapshot)
+    facts = _global_memory['key_facts']
+    assert id_maps['key_facts'] == {3: 4}
+    assert facts[4]['content'] == "Child finding about caching"
+    assert 1 not in facts
+    assert get_related_files() == ["ID#1 child.py"]
+    assert _global_memory['task_completed'] is False
+    assert _global_memory['completion_message'] == ''
+
+def test_merge_memory_snapshot_keeps_parent_changes_on_conflict():
+    """Test a sub-agent can't delete an item the parent changed meanwhile."""
+    emit_key_snippets.invoke({"snippets": [
+        {'filepath': 'a.py', 'line_number': 1, 'snippet': 'a = 1', 'description': None}
+    ]})
+
+    with fork_memory() as snapshot:
+        delete_key_snippets.invoke({"snippet_ids": [1]})
+
+    # Overlapping snippet replaces #1 in the parent
+    emit_key_snippets.invoke({"snippets": [
+        {'filepath': 'a.py', 'line_number': 1, 'snippet': 'a = 2', 'description': None}
+    ]})
+    merge_memory_snapshot(snapshot)
+    assert _global_memory['key_snippets'][1]['snippet'] == 'a = 2'
+
+def test_merge_memory_snapshot_keeps_one_compaction_summary(tmp_path, monkeypatch):
+    """Test summaries made by a sub-agent stay summaries and fold into the parent's."""
+    monkeypatch.setitem(MEMORY_LIMITS, 'research_notes', 3)
+    enable_memory_compaction(str(tmp_path))
+    topics = ["database migrations", "frontend bundling", "retry backoff", "session tokens"]
+
+    with fork_memory() as snapshot:
+        for topic in topics:
+            emit_research_notes.invoke({"notes": f"Child looked at {topic}.", "priority": MemoryPriority.LOW})
+    merge_memory_snapshot(snapshot)
+    [summary_id] = [i for i, n in _global_memory['research_notes'].items() if n['content'].startswith("[Summary of")]
+    assert _global_memory['memory_summaries']['research_notes']['id'] == summary_id
+
+    # Parent and sub-agent both compact: their summaries are condensed into one
+    with fork_memory() as snapshot:
+        for topic in ["feature flags", "cache keys"]:
+            emit_research_notes.invoke({"notes": f"Child looked at {topic}.", "priority": MemoryPriority.LOW})
+    for topic in ["log rotation", "rate limits"]:
+        emit_research_notes.invoke({"notes": f"Parent looked at {topic}.", "priority": MemoryPriority.LOW})
+    merge_memory_snapshot(snapshot)
+
+    summaries = [n['content'] for n in _global_memory['research_notes'].values() if n['content'].startswith("[Summary of")]
+    assert len(summaries) == 1
+    # Eight notes in all, two of which still fit next to the summary
+    assert summaries[0].startswith("[Summary of 6 archived")
+    _global_memory.pop('memory_archive').close()
+
+def test_work_log_events_are_structured_and_exported(tmp_path):
+    """Test work log events carry stage and tool details and reach the JSONL export."""
+    path = tmp_path / "work_log.jsonl"
+    sink = enable_work_log_export(str(path), batch_size=1)
+    _global_memory['stage'] = 'research'
+
+    emit_key_facts.invoke({"facts": ["Fact one", "Fact two about caching"]})
+    log_work_event("Sub-agent finished.", tool="request_research", duration=2.0)
+
+    event = _global_memory['work_log'][0]
+    assert (event.stage, event.tool, event.counts) == ('research', 'emit_key_facts', {'facts': 2})
+    assert "Stored 2 key facts." in get_work_log()
+
+    sink.close()
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert '"duration": 2.0' in lines[1]
@@ -1,7 +1,7 @@
 import os
 import pytest
 from unittest.mock import patch, MagicMock
-from sparc_cli.tools import read_file_tool
+from sparc_cli.tools import read_file_tool, read_files
 
 def test_read_file_tool():
     """Test that read_file_tool reads file content."""
@@ -32,3 +32,57 @@ def mock_open(read_data=""):
     handle.read.return_value = read_data
     mock.return_value = handle
     return mock
+
+def test_read_file_tool_line_range(tmp_path):
+    """Test reading a range of lines reports the file's total lines."""
+    path = tmp_path / "a.py"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 11)))
+
+    result = read_file_tool.invoke({"filepath": str(path), "start_line": 3, "end_line": 4, "verbose": False})
+    assert result["content"] == "line 3\nline 4\n"
+    assert (result["end_line"], result["total_lines"], result["truncated"]) == (4, 10, False)
+
+    # Large reads keep the head of the file and say where to continue
+    result = read_file_tool.invoke({"filepath": str(path), "max_bytes": 14, "verbose": False})
+    assert result["content"].startswith("line 1\nline 2\n\n[Showing lines 1-2 of 10")
+    assert "start_line=3" in result["content"]
+
+def test_read_files_shares_budget(tmp_path):
+    """Test read_files reads a batch under one token budget."""
+    (tmp_path / "small.py").write_text("x = 1\n")
+    (tmp_path / "big.py").write_text("".join(f"value_{i} = {i}\n" for i in range(1000)))
+
+    result = read_files.invoke({
+        "files": [
+            str(tmp_path / "small.py"),
+            {"filepath": str(tmp_path / "big.py"), "start_line": 10},
+            str(tmp_path / "missing.py")
+        ],
+        "token_budget": 100,
+        "verbose": False
+    })
+    small, big, missing = result["files"]
+    assert small["content"] == "x = 1\n" and not small["truncated"]
+    assert big["truncated"] and big["start_line"] == 10
+    assert big["content"].startswith("value_9 = 9\n")
+    assert small["chars"] + big["chars"] <= 400
+    assert "not found" in missing["error"]
+    assert result["truncated"]
+
+def test_read_files_omits_files_without_budget(tmp_path):
+    """Test files left no share of the budget are reported as omitted, not as an inverted range."""
+    # More files than characters in the smallest budget
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"f{i}.py"
+        path.write_text("".join(f"line {n}\n" for n in range(1, 6)))
+        paths.append({"filepath": str(path), "start_line": 5})
+
+    result = read_files.invoke({"files": paths, "token_budget": 0, "verbose": True})
+    omitted = [f for f in result["files"] if f["end_line"] is None]
+    assert omitted and result["truncated"]
+    for entry in omitted:
+        assert entry["truncated"] and entry["chars"] == 0
+        assert "Omitted to stay within the token budget" in entry["content"]
+        assert "start_line=5" in entry["content"]
+        assert "5-4" not in entry["content"]
@@ -0,0 +1,23 @@
+import importlib
+
+from sparc_cli.tools.search_code import search_code
+from sparc_cli.tools.write_file import write_file_tool
+
+# The package exports the tool under the module's name
+search_code_module = importlib.import_module("sparc_cli.tools.search_code")
+
+def test_search_code_tool_sees_session_edits(tmp_path, monkeypatch):
+    """Test results carry locations and previews, and code written later is searchable."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(search_code_module, "_index", None)
+    (tmp_path / "cache.py").write_text("def evict_stale_entries(cache):\n    return cache\n")
+
+    header, preview = search_code.invoke({"query": "evict stale entries"}).split("\n")
+    assert header.startswith("cache.py:1-2 evict_stale_entries (")
+    assert preview == "    def evict_stale_entries(cache):"
+    assert "No code matching" in search_code.invoke({"query": "rotate logs"})
+
+    write_file_tool.invoke({"filepath": "logs.py", "content": "def rotate_logs(path):\n    pass\n", "verbose": False})
+    assert search_code.invoke({"query": "rotate logs"}).startswith("logs.py:1-2 rotate_logs (")
+    search_code_module._index.close()
+    monkeypatch.setattr(search_code_module, "_index", None)
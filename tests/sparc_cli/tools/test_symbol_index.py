@@ -0,0 +1,24 @@
+from sparc_cli.tools import symbol_index
+from sparc_cli.tools.symbol_index import find_symbol, find_references
+from sparc_cli.tools.write_file import write_file_tool
+
+def test_find_symbol_and_references_tools(tmp_path, monkeypatch):
+    """Test the tools report compact locations and pick up edited files."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(symbol_index, "_index", None)
+    (tmp_path / "mod.py").write_text("def load(path):\n    return path\n\nload('x')\n")
+
+    assert find_symbol.invoke({"name": "load"}) == "mod.py:1 function load: def load(path):"
+    assert find_references.invoke({"name": "load"}) == "mod.py:4: load('x')"
+
+    # Results from a file changed since the index was built are refreshed
+    (tmp_path / "mod.py").write_text("\n\ndef load(path, mode='r'):\n    return path\n")
+    assert find_symbol.invoke({"name": "load"}) == "mod.py:3 function load: def load(path, mode='r'):"
+    assert "No definition" in find_symbol.invoke({"name": "missing"})
+
+    # Files written and edited later in the session are indexed before the next lookup
+    write_file_tool.invoke({"filepath": "new.py", "content": "def missing():\n    load('y')\n", "verbose": False})
+    assert find_symbol.invoke({"name": "missing"}) == "new.py:1 function missing: def missing():"
+    assert find_references.invoke({"name": "load"}) == "new.py:2: load('y')"
+    symbol_index._index.close()
+    monkeypatch.setattr(symbol_index, "_index", None)